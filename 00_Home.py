@@ -17,6 +17,9 @@ from streamlit_oauth import OAuth2Component
 import base64
 import json
 from src.data import supabase_repository as db
+from src.core.structured_logging import configurar_logging
+
+configurar_logging()
 
 # --- PAGE CONFIG ---
 st.set_page_config(
@@ -0,0 +1,29 @@
+-- 06_DEVENGOS_SNAPSHOT.sql
+-- Tabla destino del job de devengo de fin de día (src/services/accrual_job.py).
+-- Una fila por propuesta abierta y fecha de corte; volver a ejecutar el job para la
+-- misma fecha actualiza las filas existentes (upsert sobre fecha_corte + proposal_id).
+
+CREATE TABLE IF NOT EXISTS devengos_snapshot (
+    id                          BIGSERIAL PRIMARY KEY,
+    fecha_corte                 DATE NOT NULL,
+    proposal_id                 TEXT NOT NULL,
+    estado                      TEXT,
+    moneda_factura              TEXT,
+    capital_base                NUMERIC(18, 2) NOT NULL,
+    fecha_base                  DATE,
+    dias_vencidos               INTEGER NOT NULL DEFAULT 0,
+    interes_compensatorio       NUMERIC(18, 2) NOT NULL DEFAULT 0,
+    igv_interes_compensatorio   NUMERIC(18, 2) NOT NULL DEFAULT 0,
+    interes_moratorio           NUMERIC(18, 2) NOT NULL DEFAULT 0,
+    igv_interes_moratorio       NUMERIC(18, 2) NOT NULL DEFAULT 0,
+    saldo_proyectado            NUMERIC(18, 2) NOT NULL DEFAULT 0,
+    created_at                  TIMESTAMPTZ NOT NULL DEFAULT now(),
+    CONSTRAINT devengos_snapshot_corte_propuesta_uk UNIQUE (fecha_corte, proposal_id)
+);
+
+CREATE INDEX IF NOT EXISTS devengos_snapshot_proposal_idx ON devengos_snapshot (proposal_id);
+
+-- Índices que usa la lectura paginada de la cartera abierta.
+CREATE INDEX IF NOT EXISTS propuestas_estado_proposal_idx ON propuestas (estado, proposal_id);
+CREATE INDEX IF NOT EXISTS liquidaciones_resumen_proposal_idx ON liquidaciones_resumen (proposal_id);
+CREATE INDEX IF NOT EXISTS liquidacion_eventos_resumen_orden_idx ON liquidacion_eventos (liquidacion_resumen_id, orden_evento);
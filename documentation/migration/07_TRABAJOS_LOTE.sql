@@ -0,0 +1,29 @@
+-- 07_TRABAJOS_LOTE.sql
+-- Tabla de trabajos en segundo plano de la API (src/services/job_service.py).
+-- Una fila por lote enviado a /trabajos/*: estado, progreso y, al terminar, los resultados
+-- por factura. La tabla es compartida, así que cualquier worker de la API puede responder
+-- la consulta de estado aunque el trabajo corra en otro.
+-- idempotency_key es la cabecera Idempotency-Key del cliente: reenviar el mismo lote con la
+-- misma clave devuelve el trabajo existente en lugar de volver a aplicarlo.
+
+CREATE TABLE IF NOT EXISTS trabajos_lote (
+    id                  TEXT PRIMARY KEY,
+    tipo                TEXT NOT NULL,
+    estado              TEXT NOT NULL,
+    usuario_id          TEXT,
+    idempotency_key     TEXT,
+    huella_payload      TEXT,
+    total               INTEGER NOT NULL DEFAULT 0,
+    procesados          INTEGER NOT NULL DEFAULT 0,
+    exitosas            INTEGER NOT NULL DEFAULT 0,
+    errores             INTEGER NOT NULL DEFAULT 0,
+    resultado_json      JSONB,
+    error               TEXT,
+    created_at          TIMESTAMPTZ NOT NULL DEFAULT now(),
+    started_at          TIMESTAMPTZ,
+    finished_at         TIMESTAMPTZ,
+    updated_at          TIMESTAMPTZ NOT NULL DEFAULT now(),
+    CONSTRAINT trabajos_lote_idempotency_key_uk UNIQUE (idempotency_key)
+);
+
+CREATE INDEX IF NOT EXISTS trabajos_lote_estado_idx ON trabajos_lote (estado, created_at);
@@ -0,0 +1,11 @@
+-- 08_LIQUIDACION_IDEMPOTENCIA.sql
+-- Clave de idempotencia de cada liquidación registrada (src/services/liquidacion_service.py):
+-- SHA-256 de (proposal_id, fecha_pago_real, monto_recibido, request_id), donde request_id es la
+-- cabecera Idempotency-Key del envío. El índice único impide registrar dos veces el mismo pago
+-- aunque dos workers procesen el reintento a la vez; la API además consulta las claves del lote
+-- con una sola lectura y rechaza las ya registradas antes de calcular.
+-- Los eventos anteriores quedan con la clave en NULL (el índice admite varios NULL).
+
+ALTER TABLE liquidacion_eventos ADD COLUMN IF NOT EXISTS idempotency_key TEXT;
+
+CREATE UNIQUE INDEX IF NOT EXISTS liquidacion_eventos_idempotency_key_uk ON liquidacion_eventos (idempotency_key);
@@ -0,0 +1,50 @@
+-- 09_APPEND_EVENTOS.sql
+-- Alta atómica de eventos de liquidación y desembolso (src/data/supabase_repository.py,
+-- `_append_event`). Cada función inserta el evento con orden_evento = MAX(orden_evento) + 1 de
+-- su resumen en una sola sentencia y devuelve la fila insertada. Si dos workers agregan a la vez
+-- al mismo resumen, el índice único rechaza a uno (23505) y la aplicación reintenta.
+-- Aplicar antes de desplegar la versión de la API que llama a estas funciones.
+
+-- Verificar antes que no haya órdenes repetidos (la creación del índice fallaría):
+--   SELECT liquidacion_resumen_id, orden_evento, COUNT(*) FROM liquidacion_eventos
+--   GROUP BY 1, 2 HAVING COUNT(*) > 1;
+
+DROP INDEX IF EXISTS liquidacion_eventos_resumen_orden_idx;
+CREATE UNIQUE INDEX IF NOT EXISTS liquidacion_eventos_resumen_orden_uk
+    ON liquidacion_eventos (liquidacion_resumen_id, orden_evento);
+
+DROP INDEX IF EXISTS desembolso_eventos_resumen_orden_idx;
+CREATE UNIQUE INDEX IF NOT EXISTS desembolso_eventos_resumen_orden_uk
+    ON desembolso_eventos (desembolso_resumen_id, orden_evento);
+
+CREATE OR REPLACE FUNCTION append_liquidacion_evento(p_evento JSONB)
+RETURNS SETOF liquidacion_eventos
+LANGUAGE sql
+AS $$
+    INSERT INTO liquidacion_eventos (
+        liquidacion_resumen_id, orden_evento, tipo_evento, fecha_evento,
+        monto_recibido, dias_diferencia, resultado_json, idempotency_key
+    )
+    SELECT e.liquidacion_resumen_id,
+           COALESCE((SELECT MAX(le.orden_evento) FROM liquidacion_eventos le
+                     WHERE le.liquidacion_resumen_id = e.liquidacion_resumen_id), 0) + 1,
+           e.tipo_evento, e.fecha_evento, e.monto_recibido, e.dias_diferencia,
+           e.resultado_json, e.idempotency_key
+    FROM jsonb_populate_record(NULL::liquidacion_eventos, p_evento) AS e
+    RETURNING *;
+$$;
+
+CREATE OR REPLACE FUNCTION append_desembolso_evento(p_evento JSONB)
+RETURNS SETOF desembolso_eventos
+LANGUAGE sql
+AS $$
+    INSERT INTO desembolso_eventos (
+        desembolso_resumen_id, orden_evento, tipo_evento, fecha_evento, monto_desembolsado
+    )
+    SELECT e.desembolso_resumen_id,
+           COALESCE((SELECT MAX(de.orden_evento) FROM desembolso_eventos de
+                     WHERE de.desembolso_resumen_id = e.desembolso_resumen_id), 0) + 1,
+           e.tipo_evento, e.fecha_evento, e.monto_desembolsado
+    FROM jsonb_populate_record(NULL::desembolso_eventos, p_evento) AS e
+    RETURNING *;
+$$;
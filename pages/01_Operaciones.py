@@ -1,5 +1,4 @@
 import streamlit as st
-import requests
 import os
 import datetime
 import json
@@ -15,22 +14,21 @@ project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 from src.services import pdf_parser
 from src.data import supabase_repository as db
 from src.utils import pdf_generators
+from src.core.date_utils import a_date
+from src.utils.invoice_model import (
+    apply_global_field, set_invoice_field, lote_fingerprint, lote_requiere_calculo, marcar_lote_calculado
+)
+from src.services.calculator_client import get_calculator_client, CalculatorError
 from pages.liquidacion_builder import generar_anexo_liquidacion_pdf # Updated import
 
-# --- Estrategia Unificada para la URL del Backend ---
-
-# 1. Intenta leer la URL desde una variable de entorno local (para desarrollo).
-#    Esta es la que usarás para apuntar a Render desde tu máquina.
-API_BASE_URL = os.getenv("BACKEND_API_URL")
-
-# 2. Si no la encuentra, intenta leerla desde los secretos de Streamlit (para la nube).
-if not API_BASE_URL:
-    try:
-        API_BASE_URL = st.secrets["backend_api"]["url"]
-    except (KeyError, AttributeError):
-        # 3. Si todo falla, muestra un error claro.
-        st.error("La URL del backend no está configurada. Define BACKEND_API_URL o configúrala en st.secrets.")
-        st.stop() # Detiene la ejecución si no hay URL
+# --- Transporte de Cálculo ---
+# CALCULATOR_MODE="local" ejecuta los cálculos en este proceso; "remote" usa la API
+# definida en BACKEND_API_URL o en st.secrets["backend_api"]["url"].
+try:
+    calculator = get_calculator_client()
+except CalculatorError as e:
+    st.error(str(e))
+    st.stop() # Detiene la ejecución si no hay transporte válido
 
 st.set_page_config(
     layout="wide",
@@ -40,45 +38,6 @@ st.set_page_config(
 )
 
 # --- Funciones de Ayuda y Callbacks ---
-def update_date_calculations(invoice, changed_field=None):
-    try:
-        fecha_emision_str = invoice.get('fecha_emision_factura')
-        if not fecha_emision_str:
-            invoice['fecha_pago_calculada'] = ""
-            invoice['plazo_credito_dias'] = 0
-            invoice['plazo_operacion_calculado'] = 0
-            return
-
-        fecha_emision_dt = datetime.datetime.strptime(fecha_emision_str, "%d-%m-%Y")
-
-        if changed_field == 'plazo' and invoice.get('plazo_credito_dias', 0) > 0:
-            plazo = int(invoice['plazo_credito_dias'])
-            fecha_pago_dt = fecha_emision_dt + datetime.timedelta(days=plazo)
-            invoice['fecha_pago_calculada'] = fecha_pago_dt.strftime("%d-%m-%Y")
-        elif changed_field == 'fecha' and invoice.get('fecha_pago_calculada'):
-            fecha_pago_dt = datetime.datetime.strptime(invoice['fecha_pago_calculada'], "%d-%m-%Y")
-            if fecha_pago_dt > fecha_emision_dt:
-                invoice['plazo_credito_dias'] = (fecha_pago_dt - fecha_emision_dt).days
-            else:
-                invoice['plazo_credito_dias'] = 0
-        elif invoice.get('plazo_credito_dias', 0) > 0:
-             plazo = int(invoice['plazo_credito_dias'])
-             fecha_pago_dt = fecha_emision_dt + datetime.timedelta(days=plazo)
-             invoice['fecha_pago_calculada'] = fecha_pago_dt.strftime("%d-%m-%Y")
-        else:
-            invoice['fecha_pago_calculada'] = ""
-
-        if invoice.get('fecha_pago_calculada') and invoice.get('fecha_desembolso_factoring'):
-            fecha_pago_dt = datetime.datetime.strptime(invoice['fecha_pago_calculada'], "%d-%m-%Y")
-            fecha_desembolso_dt = datetime.datetime.strptime(invoice['fecha_desembolso_factoring'], "%d-%m-%Y")
-            invoice['plazo_operacion_calculado'] = (fecha_pago_dt - fecha_desembolso_dt).days if fecha_pago_dt >= fecha_desembolso_dt else 0
-        else:
-            invoice['plazo_operacion_calculado'] = 0
-
-    except (ValueError, TypeError, AttributeError):
-        invoice['fecha_pago_calculada'] = ""
-        invoice['plazo_operacion_calculado'] = 0
-
 def validate_inputs(invoice):
     required_fields = {
         "emisor_nombre": "Nombre del Emisor", "emisor_ruc": "RUC del Emisor",
@@ -141,55 +100,47 @@ def propagate_commission_changes():
 
         for i in range(1, len(st.session_state.invoices_data)):
             invoice = st.session_state.invoices_data[i]
-            invoice['tasa_de_avance'] = first_invoice['tasa_de_avance']
-            invoice['interes_mensual'] = first_invoice['interes_mensual']
-            invoice['interes_moratorio'] = first_invoice['interes_moratorio']
-            invoice['comision_afiliacion_pen'] = first_invoice['comision_afiliacion_pen']
-            invoice['comision_afiliacion_usd'] = first_invoice['comision_afiliacion_usd']
+            set_invoice_field(invoice, 'tasa_de_avance', first_invoice['tasa_de_avance'])
+            set_invoice_field(invoice, 'interes_mensual', first_invoice['interes_mensual'])
+            set_invoice_field(invoice, 'interes_moratorio', first_invoice['interes_moratorio'])
+            set_invoice_field(invoice, 'comision_afiliacion_pen', first_invoice['comision_afiliacion_pen'])
+            set_invoice_field(invoice, 'comision_afiliacion_usd', first_invoice['comision_afiliacion_usd'])
 
 def handle_global_payment_date_change():
     if st.session_state.get('aplicar_fecha_vencimiento_global') and st.session_state.get('fecha_vencimiento_global'):
         global_due_date_str = st.session_state.fecha_vencimiento_global.strftime('%d-%m-%Y')
-        for invoice in st.session_state.invoices_data:
-            invoice['fecha_pago_calculada'] = global_due_date_str
-            update_date_calculations(invoice, changed_field='fecha')
-        st.toast("Fecha de pago global aplicada a todas las facturas.")
+        actualizadas = apply_global_field(st.session_state.invoices_data, 'fecha_pago_calculada', global_due_date_str)
+        st.toast(f"Fecha de pago global aplicada a todas las facturas ({len(actualizadas)} con cambios).")
 
 def handle_global_disbursement_date_change():
     if st.session_state.get('aplicar_fecha_desembolso_global') and st.session_state.get('fecha_desembolso_global'):
         global_disbursement_date_str = st.session_state.fecha_desembolso_global.strftime('%d-%m-%Y')
-        for invoice in st.session_state.invoices_data:
-            invoice['fecha_desembolso_factoring'] = global_disbursement_date_str
-            update_date_calculations(invoice)
-        st.toast("Fecha de desembolso global aplicada a todas las facturas.")
+        actualizadas = apply_global_field(st.session_state.invoices_data, 'fecha_desembolso_factoring', global_disbursement_date_str)
+        st.toast(f"Fecha de desembolso global aplicada a todas las facturas ({len(actualizadas)} con cambios).")
 
 def handle_global_tasa_avance_change():
     if st.session_state.get('aplicar_tasa_avance_global') and st.session_state.get('tasa_avance_global') is not None:
         global_tasa = st.session_state.tasa_avance_global
-        for invoice in st.session_state.invoices_data:
-            invoice['tasa_de_avance'] = global_tasa
-        st.toast("Tasa de avance global aplicada a todas las facturas.")
+        actualizadas = apply_global_field(st.session_state.invoices_data, 'tasa_de_avance', global_tasa)
+        st.toast(f"Tasa de avance global aplicada a todas las facturas ({len(actualizadas)} con cambios).")
 
 def handle_global_interes_mensual_change():
     if st.session_state.get('aplicar_interes_mensual_global') and st.session_state.get('interes_mensual_global') is not None:
         global_interes = st.session_state.interes_mensual_global
-        for invoice in st.session_state.invoices_data:
-            invoice['interes_mensual'] = global_interes
-        st.toast("Interés mensual global aplicado a todas las facturas.")
+        actualizadas = apply_global_field(st.session_state.invoices_data, 'interes_mensual', global_interes)
+        st.toast(f"Interés mensual global aplicado a todas las facturas ({len(actualizadas)} con cambios).")
 
 def handle_global_interes_moratorio_change():
     if st.session_state.get('aplicar_interes_moratorio_global') and st.session_state.get('interes_moratorio_global') is not None:
         global_interes_moratorio = st.session_state.interes_moratorio_global
-        for invoice in st.session_state.invoices_data:
-            invoice['interes_moratorio'] = global_interes_moratorio
-        st.toast("Interés moratorio global aplicado a todas las facturas.")
+        actualizadas = apply_global_field(st.session_state.invoices_data, 'interes_moratorio', global_interes_moratorio)
+        st.toast(f"Interés moratorio global aplicado a todas las facturas ({len(actualizadas)} con cambios).")
 
 def handle_global_min_interest_days_change():
     if st.session_state.get('aplicar_dias_interes_minimo_global'):
         global_min_days = st.session_state.dias_interes_minimo_global
-        for invoice in st.session_state.invoices_data:
-            invoice['dias_minimos_interes_individual'] = global_min_days
-        st.toast("Días de interés mínimo global aplicado a todas las facturas.")
+        actualizadas = apply_global_field(st.session_state.invoices_data, 'dias_minimos_interes_individual', global_min_days)
+        st.toast(f"Días de interés mínimo global aplicado a todas las facturas ({len(actualizadas)} con cambios).")
 
 # --- Inicialización del Session State ---
 if 'invoices_data' not in st.session_state: st.session_state.invoices_data = []
@@ -431,11 +382,11 @@ if st.session_state.invoices_data:
             with col_num_factura:
                 invoice['numero_factura'] = st.text_input("NÚMERO DE FACTURA", value=invoice.get('numero_factura', ''), key=f"numero_factura_{idx}", label_visibility="visible")
             with col_monto_total:
-                invoice['monto_total_factura'] = st.number_input("MONTO FACTURA TOTAL (CON IGV)", min_value=0.0, value=invoice.get('monto_total_factura', 0.0), format="%.2f", key=f"monto_total_factura_{idx}", label_visibility="visible")
+                set_invoice_field(invoice, 'monto_total_factura', st.number_input("MONTO FACTURA TOTAL (CON IGV)", min_value=0.0, value=invoice.get('monto_total_factura', 0.0), format="%.2f", key=f"monto_total_factura_{idx}", label_visibility="visible"))
             with col_monto_neto:
-                invoice['monto_neto_factura'] = st.number_input("MONTO FACTURA NETO", min_value=0.0, value=invoice.get('monto_neto_factura', 0.0), format="%.2f", key=f"monto_neto_factura_{idx}", label_visibility="visible")
+                set_invoice_field(invoice, 'monto_neto_factura', st.number_input("MONTO FACTURA NETO", min_value=0.0, value=invoice.get('monto_neto_factura', 0.0), format="%.2f", key=f"monto_neto_factura_{idx}", label_visibility="visible"))
             with col_moneda:
-                invoice['moneda_factura'] = st.selectbox("MONEDA DE FACTURA", ["PEN", "USD"], index=["PEN", "USD"].index(invoice.get('moneda_factura', 'PEN')), key=f"moneda_factura_{idx}", label_visibility="visible")
+                set_invoice_field(invoice, 'moneda_factura', st.selectbox("MONEDA DE FACTURA", ["PEN", "USD"], index=["PEN", "USD"].index(invoice.get('moneda_factura', 'PEN')), key=f"moneda_factura_{idx}", label_visibility="visible"))
             with col_detraccion:
                 detraccion_retencion_pct = 0.0
                 if invoice.get('monto_total_factura', 0) > 0:
@@ -449,8 +400,8 @@ if st.session_state.invoices_data:
             def to_date_obj(date_str):
                 if not date_str or not isinstance(date_str, str): return None
                 try:
-                    return datetime.datetime.strptime(date_str, '%d-%m-%Y').date()
-                except (ValueError, TypeError):
+                    return a_date(date_str)
+                except ValueError:
                     return None
 
             col_fecha_emision, col_plazo_credito, col_fecha_pago, col_fecha_desembolso, col_plazo_operacion, col_dias_minimos = st.columns(6)
@@ -475,24 +426,17 @@ if st.session_state.invoices_data:
 
             def plazo_changed(idx):
                 new_plazo = st.session_state.get(f"plazo_credito_dias_{idx}")
-                st.session_state.invoices_data[idx]['plazo_credito_dias'] = new_plazo
-                update_date_calculations(st.session_state.invoices_data[idx], changed_field='plazo')
+                set_invoice_field(st.session_state.invoices_data[idx], 'plazo_credito_dias', new_plazo)
 
             def fecha_pago_changed(idx):
                 new_date_obj = st.session_state.get(f"fecha_pago_calculada_{idx}")
-                if new_date_obj:
-                    st.session_state.invoices_data[idx]['fecha_pago_calculada'] = new_date_obj.strftime('%d-%m-%Y')
-                else:
-                    st.session_state.invoices_data[idx]['fecha_pago_calculada'] = ''
-                update_date_calculations(st.session_state.invoices_data[idx], changed_field='fecha')
+                new_value = new_date_obj.strftime('%d-%m-%Y') if new_date_obj else ''
+                set_invoice_field(st.session_state.invoices_data[idx], 'fecha_pago_calculada', new_value)
 
             def fecha_desembolso_changed(idx):
                 new_date_obj = st.session_state.get(f"fecha_desembolso_factoring_{idx}")
-                if new_date_obj:
-                    st.session_state.invoices_data[idx]['fecha_desembolso_factoring'] = new_date_obj.strftime('%d-%m-%Y')
-                else:
-                    st.session_state.invoices_data[idx]['fecha_desembolso_factoring'] = ''
-                update_date_calculations(st.session_state.invoices_data[idx])
+                new_value = new_date_obj.strftime('%d-%m-%Y') if new_date_obj else ''
+                set_invoice_field(st.session_state.invoices_data[idx], 'fecha_desembolso_factoring', new_value)
 
             with col_plazo_credito:
                 plazo_value = invoice.get('plazo_credito_dias')
@@ -530,7 +474,7 @@ if st.session_state.invoices_data:
                 st.number_input("Plazo de Operación (días)", value=invoice.get('plazo_operacion_calculado', 0), disabled=True, key=f"plazo_operacion_calculado_{idx}", label_visibility="visible")
             
             with col_dias_minimos:
-                invoice['dias_minimos_interes_individual'] = st.number_input("Días Mín. Interés", value=invoice.get('dias_minimos_interes_individual', 15), min_value=0, step=1, key=f"dias_minimos_interes_individual_{idx}")
+                set_invoice_field(invoice, 'dias_minimos_interes_individual', st.number_input("Días Mín. Interés", value=invoice.get('dias_minimos_interes_individual', 15), min_value=0, step=1, key=f"dias_minimos_interes_individual_{idx}"))
 
         with st.container():
             st.write("##### Tasas y Comisiones")
@@ -538,11 +482,11 @@ if st.session_state.invoices_data:
 
             col_tasa_avance, col_interes_mensual, col_interes_moratorio = st.columns(3)
             with col_tasa_avance:
-                invoice['tasa_de_avance'] = st.number_input("Tasa de Avance (%)", min_value=0.0, value=invoice.get('tasa_de_avance', st.session_state.default_tasa_de_avance), format="%.2f", key=f"tasa_de_avance_{idx}", on_change=propagate_commission_changes, disabled=is_disabled)
+                set_invoice_field(invoice, 'tasa_de_avance', st.number_input("Tasa de Avance (%)", min_value=0.0, value=invoice.get('tasa_de_avance', st.session_state.default_tasa_de_avance), format="%.2f", key=f"tasa_de_avance_{idx}", on_change=propagate_commission_changes, disabled=is_disabled))
             with col_interes_mensual:
-                invoice['interes_mensual'] = st.number_input("Interés Mensual (%)", min_value=0.0, value=invoice.get('interes_mensual', st.session_state.default_interes_mensual), format="%.2f", key=f"interes_mensual_{idx}", on_change=propagate_commission_changes, disabled=is_disabled)
+                set_invoice_field(invoice, 'interes_mensual', st.number_input("Interés Mensual (%)", min_value=0.0, value=invoice.get('interes_mensual', st.session_state.default_interes_mensual), format="%.2f", key=f"interes_mensual_{idx}", on_change=propagate_commission_changes, disabled=is_disabled))
             with col_interes_moratorio:
-                invoice['interes_moratorio'] = st.number_input("Interés Moratorio (%)", min_value=0.0, value=invoice.get('interes_moratorio', st.session_state.default_interes_moratorio), format="%.2f", key=f"interes_moratorio_{idx}", on_change=propagate_commission_changes, disabled=is_disabled)
+                set_invoice_field(invoice, 'interes_moratorio', st.number_input("Interés Moratorio (%)", min_value=0.0, value=invoice.get('interes_moratorio', st.session_state.default_interes_moratorio), format="%.2f", key=f"interes_moratorio_{idx}", on_change=propagate_commission_changes, disabled=is_disabled))
 
         st.markdown("---")
 
@@ -550,6 +494,8 @@ if st.session_state.invoices_data:
         with col_resultados:
             if invoice.get('recalculate_result'):
                 st.write("##### Perfil de la Operación")
+                if invoice.get('calculo_obsoleto'):
+                    st.warning("Los datos de esta factura cambiaron después del último cálculo. Vuelva a calcular.")
                 st.markdown(
                     f"**Emisor:** {invoice.get('emisor_nombre', 'N/A')} | "
                     f"**Aceptante:** {invoice.get('aceptante_nombre', 'N/A')} | "
@@ -692,51 +638,52 @@ if st.session_state.invoices_data:
                     }
                     lote_desembolso_payload.append(api_data)
 
-                try:
-                    with st.spinner("Calculando desembolso inicial para todas las facturas..."):
-                        response = requests.post(f"{API_BASE_URL}/calcular_desembolso_lote", json=lote_desembolso_payload)
-                        response.raise_for_status()
-                        initial_calc_results_lote = response.json()
-
-                    if initial_calc_results_lote.get("error"):
-                        st.error(f"Error en el cálculo de desembolso en lote: {initial_calc_results_lote.get('error')}")
-                        st.stop()
-
-                    lote_encontrar_tasa_payload = []
-                    for idx_btn, invoice_btn in enumerate(st.session_state.invoices_data):
-                        invoice_btn['initial_calc_result'] = initial_calc_results_lote["resultados_por_factura"][idx_btn]
+                if not lote_requiere_calculo(st.session_state.invoices_data, lote_desembolso_payload, st.session_state.get('ultimo_lote_calculado')):
+                    st.info("No hay cambios desde el último cálculo; se mantienen los resultados actuales.")
+                else:
+                    try:
+                        with st.spinner("Calculando desembolso inicial para todas las facturas..."):
+                            initial_calc_results_lote = calculator.calcular_desembolso_lote(lote_desembolso_payload)
+
+                        if initial_calc_results_lote.get("error"):
+                            st.error(f"Error en el cálculo de desembolso en lote: {initial_calc_results_lote.get('error')}")
+                            st.stop()
+
+                        lote_encontrar_tasa_payload = []
+                        for idx_btn, invoice_btn in enumerate(st.session_state.invoices_data):
+                            invoice_btn['initial_calc_result'] = initial_calc_results_lote["resultados_por_factura"][idx_btn]
                         
-                        if invoice_btn['initial_calc_result'] and 'abono_real_teorico' in invoice_btn['initial_calc_result']:
-                            abono_real_teorico = invoice_btn['initial_calc_result']['abono_real_teorico']
-                            monto_desembolsar_objetivo = (abono_real_teorico // 10) * 10
+                            if invoice_btn['initial_calc_result'] and 'abono_real_teorico' in invoice_btn['initial_calc_result']:
+                                abono_real_teorico = invoice_btn['initial_calc_result']['abono_real_teorico']
+                                monto_desembolsar_objetivo = (abono_real_teorico // 10) * 10
 
-                            api_data_recalculate = lote_desembolso_payload[idx_btn].copy()
-                            api_data_recalculate["monto_objetivo"] = monto_desembolsar_objetivo
-                            api_data_recalculate.pop("tasa_avance", None)
+                                api_data_recalculate = lote_desembolso_payload[idx_btn].copy()
+                                api_data_recalculate["monto_objetivo"] = monto_desembolsar_objetivo
+                                api_data_recalculate.pop("tasa_avance", None)
                             
-                            lote_encontrar_tasa_payload.append(api_data_recalculate)
-                        else:
-                            invoice_btn['recalculate_result'] = None
+                                lote_encontrar_tasa_payload.append(api_data_recalculate)
+                            else:
+                                invoice_btn['recalculate_result'] = None
 
-                    if lote_encontrar_tasa_payload:
-                        with st.spinner("Ajustando tasa de avance para todas las facturas..."):
-                            response_recalculate = requests.post(f"{API_BASE_URL}/encontrar_tasa_lote", json=lote_encontrar_tasa_payload)
-                            response_recalculate.raise_for_status()
-                            recalculate_results_lote = response_recalculate.json()
+                        if lote_encontrar_tasa_payload:
+                            with st.spinner("Ajustando tasa de avance para todas las facturas..."):
+                                recalculate_results_lote = calculator.encontrar_tasa_lote(lote_encontrar_tasa_payload)
 
-                        if recalculate_results_lote.get("error"):
-                            st.error(f"Error en el ajuste de tasa en lote: {recalculate_results_lote.get('error')}")
-                            st.stop()
+                            if recalculate_results_lote.get("error"):
+                                st.error(f"Error en el ajuste de tasa en lote: {recalculate_results_lote.get('error')}")
+                                st.stop()
                         
-                        for idx_btn, invoice_btn in enumerate(st.session_state.invoices_data):
-                            if idx_btn < len(recalculate_results_lote.get("resultados_por_factura", [])):
-                                invoice_btn['recalculate_result'] = recalculate_results_lote["resultados_por_factura"][idx_btn]
+                            for idx_btn, invoice_btn in enumerate(st.session_state.invoices_data):
+                                if idx_btn < len(recalculate_results_lote.get("resultados_por_factura", [])):
+                                    invoice_btn['recalculate_result'] = recalculate_results_lote["resultados_por_factura"][idx_btn]
 
-                    st.success("¡Cálculo de todas las facturas completado!")
-                    st.rerun()
+                        marcar_lote_calculado(st.session_state.invoices_data)
+                        st.session_state.ultimo_lote_calculado = lote_fingerprint(lote_desembolso_payload)
+                        st.success("¡Cálculo de todas las facturas completado!")
+                        st.rerun()
 
-                except requests.exceptions.RequestException as e:
-                    st.error(f"Error de conexión con la API: {e}")
+                    except CalculatorError as e:
+                        st.error(f"Error en el cálculo: {e}")
 
     with col2:
         if st.button("GRABAR Propuesta", disabled=not can_save_proposal, help=COMMENT_GRABAR, use_container_width=True):
@@ -746,64 +693,73 @@ if st.session_state.invoices_data:
                 timestamp = datetime.datetime.now().strftime("%Y%m%d%H%M%S")
                 identificador_lote = f"LOTE-{contract_number_str}-{anexo_number_str}-{timestamp}"
 
-                for idx_btn, invoice_btn in enumerate(st.session_state.invoices_data):
-                    if invoice_btn.get('recalculate_result'):
-                        with st.spinner(f"Guardando propuesta para Factura {idx_btn + 1}..."):
-                            anexo_number_int = int(anexo_number_str) if anexo_number_str else None
-                            contract_number_int = int(contract_number_str) if contract_number_str else None
-                            
-                            temp_session_data = {
-                                'emisor_nombre': invoice_btn.get('emisor_nombre'),
-                                'emisor_ruc': invoice_btn.get('emisor_ruc'),
-                                'aceptante_nombre': invoice_btn.get('aceptante_nombre'),
-                                'aceptante_ruc': invoice_btn.get('aceptante_ruc'),
-                                'numero_factura': invoice_btn.get('numero_factura'),
-                                'monto_total_factura': invoice_btn.get('monto_total_factura'),
-                                'monto_neto_factura': invoice_btn.get('monto_neto_factura'),
-                                'moneda_factura': invoice_btn.get('moneda_factura'),
-                                'fecha_emision_factura': invoice_btn.get('fecha_emision_factura'),
-                                'plazo_credito_dias': invoice_btn.get('plazo_credito_dias'),
-                                'fecha_desembolso_factoring': invoice_btn.get('fecha_desembolso_factoring'),
-                                'tasa_de_avance': invoice_btn.get('tasa_de_avance'),
-                                'interes_mensual': invoice_btn.get('interes_mensual'),
-                                'interes_moratorio': invoice_btn.get('interes_moratorio'),
-                                'comision_de_estructuracion': invoice_btn.get('comision_de_estructuracion'),
-                                'comision_minima_pen': invoice_btn.get('comision_minima_pen'),
-                                'comision_minima_usd': invoice_btn.get('comision_minima_usd'),
-                                'comision_afiliacion_pen': invoice_btn.get('comision_afiliacion_pen'),
-                                'comision_afiliacion_usd': invoice_btn.get('comision_afiliacion_usd'),
-                                'aplicar_comision_afiliacion': invoice_btn.get('aplicar_comision_afiliacion'),
-                                'detraccion_porcentaje': invoice_btn.get('detraccion_porcentaje'),
-                                'fecha_pago_calculada': invoice_btn.get('fecha_pago_calculada'),
-                                'plazo_operacion_calculado': invoice_btn.get('plazo_operacion_calculado'),
-                                'initial_calc_result': invoice_btn.get('initial_calc_result'),
-                                'recalculate_result': invoice_btn.get('recalculate_result'),
-                                'anexo_number': anexo_number_int,
-                                'contract_number': contract_number_int,
-                            }
-                            success, message = db.save_proposal(temp_session_data, identificador_lote=identificador_lote)
-                            if success:
-                                st.success(message)
-                                if "Propuesta con ID" in message:
-                                    start_index = message.find("ID ") + 3
-                                    end_index = message.find(" guardada")
-                                    newly_saved_id = message[start_index:end_index]
-                                    invoice_btn['proposal_id'] = newly_saved_id
-                                    invoice_btn['identificador_lote'] = identificador_lote
-                                    st.session_state.last_saved_proposal_id = newly_saved_id
-
-                                    if 'accumulated_proposals' not in st.session_state:
-                                        st.session_state.accumulated_proposals = []
-                                    
-                                    full_proposal_details = db.get_proposal_details_by_id(newly_saved_id)
-                                    if full_proposal_details and 'proposal_id' in full_proposal_details:
-                                        if not any(p.get('proposal_id') == newly_saved_id for p in st.session_state.accumulated_proposals):
-                                            st.session_state.accumulated_proposals.append(full_proposal_details)
-                                            st.success(f"Propuesta {newly_saved_id} añadida a la lista de impresión.")
-                            else:
-                                st.error(message)
-                else:
+                anexo_number_int = int(anexo_number_str) if anexo_number_str else None
+                contract_number_int = int(contract_number_str) if contract_number_str else None
+
+                invoices_to_save = [inv for inv in st.session_state.invoices_data if inv.get('recalculate_result')]
+                proposals_to_save = []
+                for invoice_btn in invoices_to_save:
+                    proposals_to_save.append({
+                        'emisor_nombre': invoice_btn.get('emisor_nombre'),
+                        'emisor_ruc': invoice_btn.get('emisor_ruc'),
+                        'aceptante_nombre': invoice_btn.get('aceptante_nombre'),
+                        'aceptante_ruc': invoice_btn.get('aceptante_ruc'),
+                        'numero_factura': invoice_btn.get('numero_factura'),
+                        'monto_total_factura': invoice_btn.get('monto_total_factura'),
+                        'monto_neto_factura': invoice_btn.get('monto_neto_factura'),
+                        'moneda_factura': invoice_btn.get('moneda_factura'),
+                        'fecha_emision_factura': invoice_btn.get('fecha_emision_factura'),
+                        'plazo_credito_dias': invoice_btn.get('plazo_credito_dias'),
+                        'fecha_desembolso_factoring': invoice_btn.get('fecha_desembolso_factoring'),
+                        'tasa_de_avance': invoice_btn.get('tasa_de_avance'),
+                        'interes_mensual': invoice_btn.get('interes_mensual'),
+                        'interes_moratorio': invoice_btn.get('interes_moratorio'),
+                        'comision_de_estructuracion': invoice_btn.get('comision_de_estructuracion'),
+                        'comision_minima_pen': invoice_btn.get('comision_minima_pen'),
+                        'comision_minima_usd': invoice_btn.get('comision_minima_usd'),
+                        'comision_afiliacion_pen': invoice_btn.get('comision_afiliacion_pen'),
+                        'comision_afiliacion_usd': invoice_btn.get('comision_afiliacion_usd'),
+                        'aplicar_comision_afiliacion': invoice_btn.get('aplicar_comision_afiliacion'),
+                        'detraccion_porcentaje': invoice_btn.get('detraccion_porcentaje'),
+                        'fecha_pago_calculada': invoice_btn.get('fecha_pago_calculada'),
+                        'plazo_operacion_calculado': invoice_btn.get('plazo_operacion_calculado'),
+                        'initial_calc_result': invoice_btn.get('initial_calc_result'),
+                        'recalculate_result': invoice_btn.get('recalculate_result'),
+                        'anexo_number': anexo_number_int,
+                        'contract_number': contract_number_int,
+                    })
+
+                save_results = []
+                if not proposals_to_save:
                     st.warning("No hay resultados de cálculo para guardar.")
+                else:
+                    # Todo el lote se graba en una sola petición (ver `save_proposals_bulk`)
+                    with st.spinner(f"Guardando {len(proposals_to_save)} propuestas..."):
+                        save_results = db.save_proposals_bulk(proposals_to_save, identificador_lote=identificador_lote)
+
+                saved_ids = []
+                for invoice_btn, result in zip(invoices_to_save, save_results):
+                    if result['status'] == 'SUCCESS':
+                        st.success(result['message'])
+                        newly_saved_id = result['proposal_id']
+                        invoice_btn['proposal_id'] = newly_saved_id
+                        invoice_btn['identificador_lote'] = identificador_lote
+                        st.session_state.last_saved_proposal_id = newly_saved_id
+                        saved_ids.append(newly_saved_id)
+                    else:
+                        st.error(f"Factura {invoice_btn.get('numero_factura')}: {result['message']}")
+
+                if saved_ids:
+                    if 'accumulated_proposals' not in st.session_state:
+                        st.session_state.accumulated_proposals = []
+
+                    full_proposals_details = db.get_proposals_details_by_ids(saved_ids)
+                    for newly_saved_id in saved_ids:
+                        full_proposal_details = full_proposals_details.get(newly_saved_id)
+                        if full_proposal_details and 'proposal_id' in full_proposal_details:
+                            if not any(p.get('proposal_id') == newly_saved_id for p in st.session_state.accumulated_proposals):
+                                st.session_state.accumulated_proposals.append(full_proposal_details)
+                                st.success(f"Propuesta {newly_saved_id} añadida a la lista de impresión.")
 
     with col3:
         if st.button("Generar Perfil", disabled=not can_print_profiles, help=COMMENT_PERFIL, use_container_width=True):
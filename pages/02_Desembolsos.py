@@ -5,6 +5,8 @@ import streamlit as st
 import sys
 import os
 import datetime
+import time
+import uuid
 import requests
 import json
 
@@ -47,6 +49,7 @@ if 'lote_encontrado' not in st.session_state: st.session_state.lote_encontrado =
 if 'facturas_seleccionadas' not in st.session_state: st.session_state.facturas_seleccionadas = {}
 if 'facturas_a_desembolsar' not in st.session_state: st.session_state.facturas_a_desembolsar = []
 if 'resultados_desembolso_lote' not in st.session_state: st.session_state.resultados_desembolso_lote = None
+if 'desembolso_idempotency_key' not in st.session_state: st.session_state.desembolso_idempotency_key = None
 if 'global_desembolso_vars' not in st.session_state: 
     st.session_state.global_desembolso_vars = {
         'fecha_desembolso': datetime.date.today(), 
@@ -148,6 +151,7 @@ def mostrar_desembolso():
         st.session_state.lote_encontrado = []
         st.session_state.facturas_a_desembolsar = []
         st.session_state.resultados_desembolso_lote = None
+        st.session_state.desembolso_idempotency_key = None
         st.rerun()
 
     # Calcular el total para el campo de suma
@@ -193,7 +197,7 @@ def mostrar_desembolso():
 
 
         if st.form_submit_button("Registrar Desembolso de Facturas Vía API", type="primary"):
-            with st.spinner("Procesando desembolso en lote a través de la API..."):
+            with st.spinner("Enviando el lote a la API..."):
                 desembolsos_info = []
                 for factura in st.session_state.facturas_a_desembolsar:
                     info = {
@@ -208,14 +212,49 @@ def mostrar_desembolso():
                     "desembolsos": desembolsos_info
                 }
 
+                # El lote se procesa como trabajo en segundo plano. La clave de idempotencia se
+                # conserva hasta tener resultados: reintentar tras un error de conexión retoma el
+                # mismo trabajo en lugar de desembolsar dos veces.
+                if not st.session_state.desembolso_idempotency_key:
+                    st.session_state.desembolso_idempotency_key = uuid.uuid4().hex
                 try:
-                    response = requests.post(f"{API_BASE_URL}/desembolsar_lote", json=payload)
+                    response = requests.post(f"{API_BASE_URL}/trabajos/desembolsar_lote", json=payload,
+                                             headers={"Idempotency-Key": st.session_state.desembolso_idempotency_key})
+                    response.raise_for_status()
+                    trabajo = response.json()
+                except requests.exceptions.RequestException as e:
+                    st.error(f"Error de conexión con la API: {e}")
+                    if e.response is not None and e.response.status_code == 422:
+                        # El lote cambió desde el envío anterior: el próximo envío es un trabajo nuevo
+                        st.session_state.desembolso_idempotency_key = None
+                    trabajo = None
+                    st.session_state.resultados_desembolso_lote = None
+
+            if trabajo:
+                barra_progreso = st.progress(0.0, text="Procesando desembolsos...")
+                try:
+                    while trabajo['estado'] not in ('COMPLETADO', 'FALLIDO'):
+                        time.sleep(1)
+                        response = requests.get(f"{API_BASE_URL}/trabajos/{trabajo['id']}")
+                        response.raise_for_status()
+                        trabajo = response.json()
+                        barra_progreso.progress(trabajo['procesados'] / max(trabajo['total'], 1),
+                                                text=f"Procesadas {trabajo['procesados']} de {trabajo['total']} facturas")
+                    response = requests.get(f"{API_BASE_URL}/trabajos/{trabajo['id']}/resultados")
                     response.raise_for_status()
                     st.session_state.resultados_desembolso_lote = response.json()
-                    st.success("¡Lote procesado por la API!")
+                    st.session_state.desembolso_idempotency_key = None
+                    if trabajo['estado'] == 'FALLIDO':
+                        st.error(f"El lote se interrumpió: {trabajo.get('error')}")
+                    else:
+                        st.success("¡Lote procesado por la API!")
                 except requests.exceptions.RequestException as e:
                     st.error(f"Error de conexión con la API: {e}")
                     st.session_state.resultados_desembolso_lote = None
+                finally:
+                    # El trabajo pudo cambiar estados aunque el seguimiento falle: descartar las
+                    # lecturas en caché (incluida la búsqueda del lote).
+                    db.invalidate_cache('propuestas')
 
     if st.session_state.resultados_desembolso_lote:
         st.markdown("---")
@@ -264,6 +303,7 @@ def mostrar_desembolso():
             st.session_state.lote_encontrado = []
             st.session_state.facturas_a_desembolsar = []
             st.session_state.resultados_desembolso_lote = None
+            st.session_state.desembolso_idempotency_key = None
             st.rerun()
 
 # --- UI: Título y CSS ---
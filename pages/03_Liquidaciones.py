@@ -10,11 +10,14 @@ import streamlit as st
 import datetime
 import requests
 import json
+import uuid
 import subprocess
 from src.utils.pdf_generators import generate_lote_report_pdf
 
 # --- Module Imports from `src` ---
 from src.data import supabase_repository as db
+from src.core.date_utils import iso_a_fecha
+from src.services.calculator_client import get_calculator_client, CalculatorError
 
 # --- Estrategia Unificada para la URL del Backend ---
 
@@ -31,6 +34,14 @@ if not API_BASE_URL:
         st.error("La URL del backend no está configurada. Define BACKEND_API_URL o configúrala en st.secrets.")
         st.stop() # Detiene la ejecución si no hay URL
 
+# Simulaciones y proyecciones pueden ejecutarse en este proceso (CALCULATOR_MODE="local").
+# El registro de liquidaciones siempre pasa por la API.
+try:
+    calculator = get_calculator_client()
+except CalculatorError as e:
+    st.error(str(e))
+    st.stop()
+
 # --- Configuración de la Página ---
 st.set_page_config(
     layout="wide",
@@ -45,6 +56,7 @@ if 'lote_encontrado' not in st.session_state: st.session_state.lote_encontrado =
 if 'facturas_seleccionadas' not in st.session_state: st.session_state.facturas_seleccionadas = {}
 if 'facturas_a_liquidar' not in st.session_state: st.session_state.facturas_a_liquidar = []
 if 'resultados_liquidacion_lote' not in st.session_state: st.session_state.resultados_liquidacion_lote = None
+if 'liquidacion_idempotency_key' not in st.session_state: st.session_state.liquidacion_idempotency_key = None
 if 'global_liquidation_vars' not in st.session_state: 
     st.session_state.global_liquidation_vars = {
         'fecha_pago': datetime.date.today(), 
@@ -178,11 +190,8 @@ def _display_liquidation_detail_view_batch(result_dict: dict, moneda: str, event
 
 def _display_forecast_table_batch(proposal_id, fecha_inicio_proyeccion, initial_capital):
     st.markdown("**Proyección de Deuda Post-Pago (Interés Compuesto Diario)**")
-    payload = {"proposal_id": proposal_id, "fecha_inicio_proyeccion": fecha_inicio_proyeccion, "initial_capital": initial_capital}
     try:
-        response = requests.post(f"{API_BASE_URL}/liquidaciones/get_projected_balance", json=payload)
-        response.raise_for_status()
-        forecast_data = response.json()
+        forecast_data = calculator.get_projected_balance(proposal_id, fecha_inicio_proyeccion, initial_capital)
         if forecast_data.get('error') or not forecast_data.get('proyeccion_futura'):
             return
 
@@ -205,7 +214,7 @@ def _display_forecast_table_batch(proposal_id, fecha_inicio_proyeccion, initial_
             st.markdown("&nbsp;") # Spacer
             render_chunk_as_pivoted_table(proyeccion[15:30])
 
-    except requests.exceptions.RequestException as e:
+    except CalculatorError as e:
         st.warning(f"No se pudo obtener la proyección de deuda: {e}")
 
 # --- Lógica de Vistas ---
@@ -222,22 +231,12 @@ def mostrar_busqueda():
             st.session_state.lote_encontrado = []
         else:
             with st.spinner("Buscando facturas por liquidar..."):
-                resultados = db.get_disbursed_proposals_by_lote(lote_id_sanitized)
+                # Detalles completos del lote en una sola lectura, en caché por lote: se descarta
+                # al liquidar (ver `invalidate_cache` tras la llamada a la API).
+                resultados = db.get_disbursed_proposal_details_by_lote(lote_id_sanitized)
                 st.session_state.lote_encontrado = resultados
                 if resultados:
                     st.success(f"Se encontraron {len(resultados)} facturas por liquidar.")
-                    
-                    # --- BEGIN: Fetch full details for all proposals in the lote ---
-                    with st.spinner("Cargando detalles de las facturas..."):
-                        detalles_completos = []
-                        for res in resultados:
-                            proposal_id = res.get('proposal_id')
-                            if proposal_id:
-                                detalles = db.get_proposal_details_by_id(proposal_id)
-                                if detalles:
-                                    detalles_completos.append(detalles)
-                        st.session_state.lote_encontrado = detalles_completos
-                    # --- END: Fetch full details for all proposals in the lote ---
 
                     if st.session_state.lote_encontrado:
                         st.session_state.anexo_number = st.session_state.lote_encontrado[0].get('anexo_number', '')
@@ -293,6 +292,7 @@ def mostrar_liquidacion():
         st.session_state.lote_encontrado = []
         st.session_state.facturas_a_liquidar = []
         st.session_state.resultados_liquidacion_lote = None
+        st.session_state.liquidacion_idempotency_key = None
         
         st.rerun()
 
@@ -341,7 +341,7 @@ def mostrar_liquidacion():
                     st.markdown("###### Historial de Pagos Registrados")
                     for j, event in enumerate(eventos_liquidacion):
                         resultado = json.loads(event['resultado_json']) if isinstance(event['resultado_json'], str) else event['resultado_json']
-                        fecha_evento_str = datetime.datetime.fromisoformat(event['fecha_evento'].split('+')[0]).strftime('%d-%m-%Y')
+                        fecha_evento_str = iso_a_fecha(event['fecha_evento'])
                         _display_liquidation_detail_view_batch(resultado, f.get('moneda_factura', 'PEN'), fecha_evento_str, event['monto_recibido'])
                         
                         # Proyección de Deuda Post-Pago si es el último evento y hay saldo
@@ -387,14 +387,10 @@ def mostrar_liquidacion():
                     }
                     lote_payload.append(payload)
                 try:
-                    response = requests.post(f"{API_BASE_URL}/liquidaciones/simular_liquidacion_lote", json={"usuario_id": "system", "liquidaciones": lote_payload})
-                    response.raise_for_status()
-                    st.session_state.resultados_liquidacion_lote = response.json()
+                    st.session_state.resultados_liquidacion_lote = calculator.simular_liquidacion_lote("system", lote_payload)
                     st.success("¡Simulación de lote completada con éxito!")
-                    
-                    
-                except requests.exceptions.RequestException as e:
-                    st.error(f"Error de conexión con la API: {e}")
+                except CalculatorError as e:
+                    st.error(f"Error en la simulación: {e}")
 
     if st.session_state.resultados_liquidacion_lote:
         st.markdown("---")
@@ -501,15 +497,42 @@ def mostrar_liquidacion():
                             "is_first_payment": not bool(eventos_previos)
                         }
                         lote_payload.append(payload)
+                    # La clave de idempotencia se conserva hasta que el lote termina: un doble clic o
+                    # un reintento tras un timeout no vuelve a registrar las facturas ya liquidadas.
+                    if not st.session_state.liquidacion_idempotency_key:
+                        st.session_state.liquidacion_idempotency_key = uuid.uuid4().hex
                     try:
-                        response = requests.post(f"{API_BASE_URL}/liquidaciones/procesar_liquidacion_lote", json={"usuario_id": "system", "liquidaciones": lote_payload})
-                        response.raise_for_status()
-                        st.session_state.resultados_liquidacion_lote = response.json()
-                        st.success("¡Lote liquidado y guardado con éxito!")
-                        
-                        
+                        # Modo NDJSON: una línea por factura a medida que la API la procesa
+                        barra_progreso = st.progress(0.0, text="Procesando liquidaciones...")
+                        resultados_stream = []
+                        with requests.post(f"{API_BASE_URL}/liquidaciones/procesar_liquidacion_lote", params={"stream": "true"},
+                                           json={"usuario_id": "system", "liquidaciones": lote_payload}, stream=True,
+                                           headers={"Idempotency-Key": st.session_state.liquidacion_idempotency_key}) as response:
+                            response.raise_for_status()
+                            for linea in response.iter_lines():
+                                if not linea:
+                                    continue
+                                resultado = json.loads(linea)
+                                if resultado.get('status') == 'FIN':
+                                    break
+                                resultados_stream.append(resultado)
+                                barra_progreso.progress(len(resultados_stream) / max(len(lote_payload), 1),
+                                                        text=f"Procesadas {len(resultados_stream)} de {len(lote_payload)} facturas")
+                        st.session_state.resultados_liquidacion_lote = {"resultados_del_lote": resultados_stream}
+                        duplicadas = sum(1 for r in resultados_stream if r.get('status') == 'DUPLICADO')
+                        if len(resultados_stream) < len(lote_payload):
+                            st.warning(f"La respuesta se interrumpió: {len(resultados_stream)} de {len(lote_payload)} facturas procesadas.")
+                        else:
+                            st.session_state.liquidacion_idempotency_key = None
+                            if duplicadas:
+                                st.warning(f"{duplicadas} factura(s) ya estaban liquidadas con este envío y no se volvieron a registrar.")
+                            st.success("¡Lote liquidado y guardado con éxito!")
                     except requests.exceptions.RequestException as e:
                         st.error(f"Error de conexión con la API: {e}")
+                    finally:
+                        # La API pudo registrar eventos y cambiar estados aunque la respuesta se corte:
+                        # descartar las lecturas en caché (incluida la búsqueda del lote).
+                        db.invalidate_cache('propuestas', 'liquidaciones_resumen', 'liquidacion_eventos')
 
         # Botón para finalizar y volver (siempre visible después de liquidar)
         if st.button("Finalizar y Volver"):
@@ -517,6 +540,7 @@ def mostrar_liquidacion():
             st.session_state.lote_encontrado = []
             st.session_state.facturas_a_liquidar = []
             st.session_state.resultados_liquidacion_lote = None
+            st.session_state.liquidacion_idempotency_key = None
             
             st.rerun()
 
@@ -1,7 +1,6 @@
 # 03_Calculadora_Factoring.py
 
 import streamlit as st
-import requests
 import os
 import datetime
 import json
@@ -14,21 +13,20 @@ project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 
 # --- Module Imports from `src` ---
 from src.utils import pdf_generators
+from src.core.date_utils import a_date
+from src.utils.invoice_model import (
+    apply_global_field, set_invoice_field, lote_fingerprint, lote_requiere_calculo, marcar_lote_calculado
+)
+from src.services.calculator_client import get_calculator_client, CalculatorError
 
-# --- Estrategia Unificada para la URL del Backend ---
-
-# 1. Intenta leer la URL desde una variable de entorno local (para desarrollo).
-#    Esta es la que usarás para apuntar a Render desde tu máquina.
-API_BASE_URL = os.getenv("BACKEND_API_URL")
-
-# 2. Si no la encuentra, intenta leerla desde los secretos de Streamlit (para la nube).
-if not API_BASE_URL:
-    try:
-        API_BASE_URL = st.secrets["backend_api"]["url"]
-    except (KeyError, AttributeError):
-        # 3. Si todo falla, muestra un error claro.
-        st.error("La URL del backend no está configurada. Define BACKEND_API_URL o configúrala en st.secrets.")
-        st.stop() # Detiene la ejecución si no hay URL
+# --- Transporte de Cálculo ---
+# CALCULATOR_MODE="local" ejecuta los cálculos en este proceso; "remote" usa la API
+# definida en BACKEND_API_URL o en st.secrets["backend_api"]["url"].
+try:
+    calculator = get_calculator_client()
+except CalculatorError as e:
+    st.error(str(e))
+    st.stop() # Detiene la ejecución si no hay transporte válido
 
 st.set_page_config(
     layout="wide",
@@ -38,45 +36,6 @@ st.set_page_config(
 )
 
 # --- Funciones de Ayuda y Callbacks ---
-def update_date_calculations(invoice, changed_field=None):
-    try:
-        fecha_emision_str = invoice.get('fecha_emision_factura')
-        if not fecha_emision_str:
-            invoice['fecha_pago_calculada'] = ""
-            invoice['plazo_credito_dias'] = 0
-            invoice['plazo_operacion_calculado'] = 0
-            return
-
-        fecha_emision_dt = datetime.datetime.strptime(fecha_emision_str, "%d-%m-%Y")
-
-        if changed_field == 'plazo' and invoice.get('plazo_credito_dias', 0) > 0:
-            plazo = int(invoice['plazo_credito_dias'])
-            fecha_pago_dt = fecha_emision_dt + datetime.timedelta(days=plazo)
-            invoice['fecha_pago_calculada'] = fecha_pago_dt.strftime("%d-%m-%Y")
-        elif changed_field == 'fecha' and invoice.get('fecha_pago_calculada'):
-            fecha_pago_dt = datetime.datetime.strptime(invoice['fecha_pago_calculada'], "%d-%m-%Y")
-            if fecha_pago_dt > fecha_emision_dt:
-                invoice['plazo_credito_dias'] = (fecha_pago_dt - fecha_emision_dt).days
-            else:
-                invoice['plazo_credito_dias'] = 0
-        elif invoice.get('plazo_credito_dias', 0) > 0:
-             plazo = int(invoice['plazo_credito_dias'])
-             fecha_pago_dt = fecha_emision_dt + datetime.timedelta(days=plazo)
-             invoice['fecha_pago_calculada'] = fecha_pago_dt.strftime("%d-%m-%Y")
-        else:
-            invoice['fecha_pago_calculada'] = ""
-
-        if invoice.get('fecha_pago_calculada') and invoice.get('fecha_desembolso_factoring'):
-            fecha_pago_dt = datetime.datetime.strptime(invoice['fecha_pago_calculada'], "%d-%m-%Y")
-            fecha_desembolso_dt = datetime.datetime.strptime(invoice['fecha_desembolso_factoring'], "%d-%m-%Y")
-            invoice['plazo_operacion_calculado'] = (fecha_pago_dt - fecha_desembolso_dt).days if fecha_pago_dt >= fecha_desembolso_dt else 0
-        else:
-            invoice['plazo_operacion_calculado'] = 0
-
-    except (ValueError, TypeError, AttributeError):
-        invoice['fecha_pago_calculada'] = ""
-        invoice['plazo_operacion_calculado'] = 0
-
 def validate_inputs(invoice):
     required_fields = {
         "emisor_nombre": "Nombre del Emisor", "emisor_ruc": "RUC del Emisor",
@@ -111,47 +70,40 @@ def propagate_commission_changes():
 
         for i in range(1, len(st.session_state.invoices_data)):
             invoice = st.session_state.invoices_data[i]
-            invoice['tasa_de_avance'] = first_invoice['tasa_de_avance']
-            invoice['interes_mensual'] = first_invoice['interes_mensual']
-            invoice['comision_afiliacion_pen'] = first_invoice['comision_afiliacion_pen']
-            invoice['comision_afiliacion_usd'] = first_invoice['comision_afiliacion_usd']
+            set_invoice_field(invoice, 'tasa_de_avance', first_invoice['tasa_de_avance'])
+            set_invoice_field(invoice, 'interes_mensual', first_invoice['interes_mensual'])
+            set_invoice_field(invoice, 'comision_afiliacion_pen', first_invoice['comision_afiliacion_pen'])
+            set_invoice_field(invoice, 'comision_afiliacion_usd', first_invoice['comision_afiliacion_usd'])
 
 def handle_global_payment_date_change():
     if st.session_state.get('aplicar_fecha_vencimiento_global') and st.session_state.get('fecha_vencimiento_global'):
         global_due_date_str = st.session_state.fecha_vencimiento_global.strftime('%d-%m-%Y')
-        for invoice in st.session_state.invoices_data:
-            invoice['fecha_pago_calculada'] = global_due_date_str
-            update_date_calculations(invoice, changed_field='fecha')
-        st.toast("Fecha de pago global aplicada a todas las facturas.")
+        actualizadas = apply_global_field(st.session_state.invoices_data, 'fecha_pago_calculada', global_due_date_str)
+        st.toast(f"Fecha de pago global aplicada a todas las facturas ({len(actualizadas)} con cambios).")
 
 def handle_global_disbursement_date_change():
     if st.session_state.get('aplicar_fecha_desembolso_global') and st.session_state.get('fecha_desembolso_global'):
         global_disbursement_date_str = st.session_state.fecha_desembolso_global.strftime('%d-%m-%Y')
-        for invoice in st.session_state.invoices_data:
-            invoice['fecha_desembolso_factoring'] = global_disbursement_date_str
-            update_date_calculations(invoice)
-        st.toast("Fecha de desembolso global aplicada a todas las facturas.")
+        actualizadas = apply_global_field(st.session_state.invoices_data, 'fecha_desembolso_factoring', global_disbursement_date_str)
+        st.toast(f"Fecha de desembolso global aplicada a todas las facturas ({len(actualizadas)} con cambios).")
 
 def handle_global_tasa_avance_change():
     if st.session_state.get('aplicar_tasa_avance_global') and st.session_state.get('tasa_avance_global') is not None:
         global_tasa = st.session_state.tasa_avance_global
-        for invoice in st.session_state.invoices_data:
-            invoice['tasa_de_avance'] = global_tasa
-        st.toast("Tasa de avance global aplicada a todas las facturas.")
+        actualizadas = apply_global_field(st.session_state.invoices_data, 'tasa_de_avance', global_tasa)
+        st.toast(f"Tasa de avance global aplicada a todas las facturas ({len(actualizadas)} con cambios).")
 
 def handle_global_interes_mensual_change():
     if st.session_state.get('aplicar_interes_mensual_global') and st.session_state.get('interes_mensual_global') is not None:
         global_interes = st.session_state.interes_mensual_global
-        for invoice in st.session_state.invoices_data:
-            invoice['interes_mensual'] = global_interes
-        st.toast("Interés mensual global aplicado a todas las facturas.")
+        actualizadas = apply_global_field(st.session_state.invoices_data, 'interes_mensual', global_interes)
+        st.toast(f"Interés mensual global aplicado a todas las facturas ({len(actualizadas)} con cambios).")
 
 def handle_global_min_interest_days_change():
     if st.session_state.get('aplicar_dias_interes_minimo_global'):
         global_min_days = st.session_state.dias_interes_minimo_global
-        for invoice in st.session_state.invoices_data:
-            invoice['dias_minimos_interes_individual'] = global_min_days
-        st.toast("Días de interés mínimo global aplicado a todas las facturas.")
+        actualizadas = apply_global_field(st.session_state.invoices_data, 'dias_minimos_interes_individual', global_min_days)
+        st.toast(f"Días de interés mínimo global aplicado a todas las facturas ({len(actualizadas)} con cambios).")
 
 # --- Inicialización del Session State (incluyendo variables globales) ---
 if 'num_invoices_to_simulate' not in st.session_state: st.session_state.num_invoices_to_simulate = 1
@@ -385,70 +337,92 @@ if st.session_state.invoices_data:
         if not all_valid:
             st.warning("No se pueden calcular todas las facturas. Por favor, revisa los errores mencionados arriba.")
         else:
-            st.success("Todas las facturas son válidas. Iniciando cálculos...")
-            for idx, invoice in enumerate(st.session_state.invoices_data):
-                with st.spinner(f"Calculando Factura {idx + 1}/{len(st.session_state.invoices_data)}..."):
-                    num_invoices = len(st.session_state.invoices_data)
-                    
-                    comision_pen_apportioned = st.session_state.get('comision_afiliacion_pen_global', 0.0) / num_invoices if num_invoices > 0 else 0
-                    comision_usd_apportioned = st.session_state.get('comision_afiliacion_usd_global', 0.0) / num_invoices if num_invoices > 0 else 0
-                    comision_estructuracion_pct = st.session_state.comision_estructuracion_pct_global
-                    comision_min_pen_apportioned_struct = st.session_state.comision_estructuracion_min_pen_global / num_invoices if num_invoices > 0 else 0
-                    comision_min_usd_apportioned_struct = st.session_state.comision_estructuracion_min_usd_global / num_invoices if num_invoices > 0 else 0
-
-                    if invoice['moneda_factura'] == 'USD':
-                        comision_minima_aplicable = comision_min_usd_apportioned_struct
-                        comision_afiliacion_aplicable = comision_usd_apportioned
-                    else:
-                        comision_minima_aplicable = comision_min_pen_apportioned_struct
-                        comision_afiliacion_aplicable = comision_pen_apportioned
-
-                    plazo_real = invoice.get('plazo_operacion_calculado', 0)
-                    plazo_para_api = plazo_real
-                    if st.session_state.get('aplicar_dias_interes_minimo_global', False):
-                        dias_minimos_a_usar = invoice.get('dias_minimos_interes_individual', 15)
-                        plazo_para_api = max(plazo_real, dias_minimos_a_usar)
-
-                    api_data = {
-                        "plazo_operacion": plazo_para_api,
-                        "mfn": invoice['monto_neto_factura'],
-                        "tasa_avance": invoice['tasa_de_avance'] / 100,
-                        "interes_mensual": invoice['interes_mensual'] / 100,
-                        "comision_estructuracion_pct": comision_estructuracion_pct / 100,
-                        "comision_minima_aplicable": comision_minima_aplicable,
-                        "igv_pct": 0.18,
-                        "comision_afiliacion_aplicable": comision_afiliacion_aplicable,
-                        "aplicar_comision_afiliacion": st.session_state.get('aplicar_comision_afiliacion_global', False)
-                    }
-                    try:
-                        response = requests.post(f"{API_BASE_URL}/calcular_desembolso", json=api_data)
-                        response.raise_for_status()
-                        invoice['initial_calc_result'] = response.json()
+            st.success("Todas las facturas son válidas. Iniciando cálculos en lote...")
+
+            lote_desembolso_payload = []
+            num_invoices = len(st.session_state.invoices_data)
+
+            for invoice in st.session_state.invoices_data:
+                comision_pen_apportioned = st.session_state.get('comision_afiliacion_pen_global', 0.0) / num_invoices if num_invoices > 0 else 0
+                comision_usd_apportioned = st.session_state.get('comision_afiliacion_usd_global', 0.0) / num_invoices if num_invoices > 0 else 0
+                comision_estructuracion_pct = st.session_state.comision_estructuracion_pct_global
+                comision_min_pen_apportioned_struct = st.session_state.comision_estructuracion_min_pen_global / num_invoices if num_invoices > 0 else 0
+                comision_min_usd_apportioned_struct = st.session_state.comision_estructuracion_min_usd_global / num_invoices if num_invoices > 0 else 0
+
+                if invoice['moneda_factura'] == 'USD':
+                    comision_minima_aplicable = comision_min_usd_apportioned_struct
+                    comision_afiliacion_aplicable = comision_usd_apportioned
+                else:
+                    comision_minima_aplicable = comision_min_pen_apportioned_struct
+                    comision_afiliacion_aplicable = comision_pen_apportioned
+
+                plazo_real = invoice.get('plazo_operacion_calculado', 0)
+                plazo_para_api = plazo_real
+                if st.session_state.get('aplicar_dias_interes_minimo_global', False):
+                    dias_minimos_a_usar = invoice.get('dias_minimos_interes_individual', 15)
+                    plazo_para_api = max(plazo_real, dias_minimos_a_usar)
+
+                api_data = {
+                    "plazo_operacion": plazo_para_api,
+                    "mfn": invoice['monto_neto_factura'],
+                    "tasa_avance": invoice['tasa_de_avance'] / 100,
+                    "interes_mensual": invoice['interes_mensual'] / 100,
+                    "comision_estructuracion_pct": comision_estructuracion_pct / 100,
+                    "comision_minima_aplicable": comision_minima_aplicable,
+                    "igv_pct": 0.18,
+                    "comision_afiliacion_aplicable": comision_afiliacion_aplicable,
+                    "aplicar_comision_afiliacion": st.session_state.get('aplicar_comision_afiliacion_global', False)
+                }
+                lote_desembolso_payload.append(api_data)
+
+            if not lote_requiere_calculo(st.session_state.invoices_data, lote_desembolso_payload, st.session_state.get('ultimo_lote_calculado')):
+                st.info("No hay cambios desde el último cálculo; se mantienen los resultados actuales.")
+            else:
+                try:
+                    with st.spinner("Calculando desembolso inicial para todas las facturas..."):
+                        initial_calc_results_lote = calculator.calcular_desembolso_lote(lote_desembolso_payload)
+
+                    if initial_calc_results_lote.get("error"):
+                        st.error(f"Error en el cálculo de desembolso en lote: {initial_calc_results_lote.get('error')}")
+                        st.stop()
+
+                    lote_encontrar_tasa_payload = []
+                    indices_con_objetivo = []
+                    for idx, invoice in enumerate(st.session_state.invoices_data):
+                        invoice['initial_calc_result'] = initial_calc_results_lote["resultados_por_factura"][idx]
 
                         if invoice['initial_calc_result'] and 'abono_real_teorico' in invoice['initial_calc_result']:
                             abono_real_teorico = invoice['initial_calc_result']['abono_real_teorico']
                             monto_desembolsar_objetivo = (abono_real_teorico // 10) * 10
 
-                            api_data_recalculate = {
-                                "plazo_operacion": plazo_para_api,
-                                "mfn": invoice['monto_neto_factura'],
-                                "interes_mensual": invoice['interes_mensual'] / 100,
-                                "comision_estructuracion_pct": comision_estructuracion_pct / 100,
-                                "igv_pct": 0.18,
-                                "monto_objetivo": monto_desembolsar_objetivo,
-                                "comision_minima_aplicable": comision_minima_aplicable,
-                                "comision_afiliacion_aplicable": comision_afiliacion_aplicable,
-                                "aplicar_comision_afiliacion": st.session_state.get('aplicar_comision_afiliacion_global', False)
-                            }
-                            response_recalculate = requests.post(f"{API_BASE_URL}/encontrar_tasa", json=api_data_recalculate)
-                            response_recalculate.raise_for_status()
-                            invoice['recalculate_result'] = response_recalculate.json()
+                            api_data_recalculate = lote_desembolso_payload[idx].copy()
+                            api_data_recalculate["monto_objetivo"] = monto_desembolsar_objetivo
+                            api_data_recalculate.pop("tasa_avance", None)
+
+                            lote_encontrar_tasa_payload.append(api_data_recalculate)
+                            indices_con_objetivo.append(idx)
                         else:
                             invoice['recalculate_result'] = None
-                    except requests.exceptions.RequestException as e:
-                        st.error(f"Error de conexión con la API para Factura {idx + 1}: {e}")
-                        break 
-            st.success("¡Cálculo de todas las facturas completado!")
+
+                    if lote_encontrar_tasa_payload:
+                        with st.spinner("Ajustando tasa de avance para todas las facturas..."):
+                            recalculate_results_lote = calculator.encontrar_tasa_lote(lote_encontrar_tasa_payload)
+
+                        if recalculate_results_lote.get("error"):
+                            st.error(f"Error en el ajuste de tasa en lote: {recalculate_results_lote.get('error')}")
+                            st.stop()
+
+                        resultados_tasa = recalculate_results_lote.get("resultados_por_factura", [])
+                        for pos, idx in enumerate(indices_con_objetivo):
+                            if pos < len(resultados_tasa):
+                                st.session_state.invoices_data[idx]['recalculate_result'] = resultados_tasa[pos]
+
+                    marcar_lote_calculado(st.session_state.invoices_data)
+                    st.session_state.ultimo_lote_calculado = lote_fingerprint(lote_desembolso_payload)
+                    st.success("¡Cálculo de todas las facturas completado!")
+
+                except CalculatorError as e:
+                    st.error(f"Error en el cálculo: {e}")
 
 
 # --- UI: Formulario Principal ---
@@ -475,11 +449,11 @@ if st.session_state.invoices_data:
             with col_num_factura:
                 invoice['numero_factura'] = st.text_input("NÚMERO DE FACTURA", value=invoice.get('numero_factura', ''), key=f"numero_factura_{idx}", label_visibility="visible")
             with col_monto_total:
-                invoice['monto_total_factura'] = st.number_input("MONTO FACTURA TOTAL (CON IGV)", min_value=0.0, value=invoice.get('monto_total_factura', 0.0), format="%.2f", key=f"monto_total_factura_{idx}", label_visibility="visible")
+                set_invoice_field(invoice, 'monto_total_factura', st.number_input("MONTO FACTURA TOTAL (CON IGV)", min_value=0.0, value=invoice.get('monto_total_factura', 0.0), format="%.2f", key=f"monto_total_factura_{idx}", label_visibility="visible"))
             with col_monto_neto:
-                invoice['monto_neto_factura'] = st.number_input("MONTO FACTURA NETO", min_value=0.0, value=invoice.get('monto_neto_factura', 0.0), format="%.2f", key=f"monto_neto_factura_{idx}", label_visibility="visible")
+                set_invoice_field(invoice, 'monto_neto_factura', st.number_input("MONTO FACTURA NETO", min_value=0.0, value=invoice.get('monto_neto_factura', 0.0), format="%.2f", key=f"monto_neto_factura_{idx}", label_visibility="visible"))
             with col_moneda:
-                invoice['moneda_factura'] = st.selectbox("MONEDA DE FACTURA", ["PEN", "USD"], index=["PEN", "USD"].index(invoice.get('moneda_factura', 'PEN')), key=f"moneda_factura_{idx}", label_visibility="visible")
+                set_invoice_field(invoice, 'moneda_factura', st.selectbox("MONEDA DE FACTURA", ["PEN", "USD"], index=["PEN", "USD"].index(invoice.get('moneda_factura', 'PEN')), key=f"moneda_factura_{idx}", label_visibility="visible"))
             with col_detraccion:
                 detraccion_retencion_pct = 0.0
                 if invoice.get('monto_total_factura', 0) > 0:
@@ -493,8 +467,8 @@ if st.session_state.invoices_data:
             def to_date_obj(date_str):
                 if not date_str or not isinstance(date_str, str): return None
                 try:
-                    return datetime.datetime.strptime(date_str, '%d-%m-%Y').date()
-                except (ValueError, TypeError):
+                    return a_date(date_str)
+                except ValueError:
                     return None
 
             col_fecha_emision, col_plazo_credito, col_fecha_pago, col_fecha_desembolso, col_plazo_operacion, col_dias_minimos = st.columns(6)
@@ -516,24 +490,17 @@ if st.session_state.invoices_data:
 
             def plazo_changed(idx):
                 new_plazo = st.session_state.get(f"plazo_credito_dias_{idx}")
-                st.session_state.invoices_data[idx]['plazo_credito_dias'] = new_plazo
-                update_date_calculations(st.session_state.invoices_data[idx], changed_field='plazo')
+                set_invoice_field(st.session_state.invoices_data[idx], 'plazo_credito_dias', new_plazo)
 
             def fecha_pago_changed(idx):
                 new_date_obj = st.session_state.get(f"fecha_pago_calculada_{idx}")
-                if new_date_obj:
-                    st.session_state.invoices_data[idx]['fecha_pago_calculada'] = new_date_obj.strftime('%d-%m-%Y')
-                else:
-                    st.session_state.invoices_data[idx]['fecha_pago_calculada'] = ''
-                update_date_calculations(st.session_state.invoices_data[idx], changed_field='fecha')
+                new_value = new_date_obj.strftime('%d-%m-%Y') if new_date_obj else ''
+                set_invoice_field(st.session_state.invoices_data[idx], 'fecha_pago_calculada', new_value)
 
             def fecha_desembolso_changed(idx):
                 new_date_obj = st.session_state.get(f"fecha_desembolso_factoring_{idx}")
-                if new_date_obj:
-                    st.session_state.invoices_data[idx]['fecha_desembolso_factoring'] = new_date_obj.strftime('%d-%m-%Y')
-                else:
-                    st.session_state.invoices_data[idx]['fecha_desembolso_factoring'] = ''
-                update_date_calculations(st.session_state.invoices_data[idx])
+                new_value = new_date_obj.strftime('%d-%m-%Y') if new_date_obj else ''
+                set_invoice_field(st.session_state.invoices_data[idx], 'fecha_desembolso_factoring', new_value)
 
             with col_plazo_credito:
                 plazo_value = invoice.get('plazo_credito_dias')
@@ -574,7 +541,7 @@ if st.session_state.invoices_data:
                 st.number_input("Plazo de Operación (días)", value=invoice.get('plazo_operacion_calculado', 0), disabled=True, key=f"plazo_operacion_calculado_{idx}", label_visibility="visible")
             
             with col_dias_minimos:
-                invoice['dias_minimos_interes_individual'] = st.number_input("Días Mín. Interés", value=invoice.get('dias_minimos_interes_individual', 15), min_value=0, step=1, key=f"dias_minimos_interes_individual_{idx}")
+                set_invoice_field(invoice, 'dias_minimos_interes_individual', st.number_input("Días Mín. Interés", value=invoice.get('dias_minimos_interes_individual', 15), min_value=0, step=1, key=f"dias_minimos_interes_individual_{idx}"))
 
         with st.container():
             st.write("##### Tasas y Comisiones")
@@ -584,9 +551,9 @@ if st.session_state.invoices_data:
 
             col_tasa_avance, col_interes_mensual = st.columns(2)
             with col_tasa_avance:
-                invoice['tasa_de_avance'] = st.number_input("Tasa de Avance (%)", min_value=0.0, value=invoice.get('tasa_de_avance', st.session_state.default_tasa_de_avance), format="%.2f", key=f"tasa_de_avance_{idx}", label_visibility="visible", on_change=propagate_commission_changes, disabled=is_disabled)
+                set_invoice_field(invoice, 'tasa_de_avance', st.number_input("Tasa de Avance (%)", min_value=0.0, value=invoice.get('tasa_de_avance', st.session_state.default_tasa_de_avance), format="%.2f", key=f"tasa_de_avance_{idx}", label_visibility="visible", on_change=propagate_commission_changes, disabled=is_disabled))
             with col_interes_mensual:
-                invoice['interes_mensual'] = st.number_input("Interés Mensual (%)", min_value=0.0, value=invoice.get('interes_mensual', st.session_state.default_interes_mensual), format="%.2f", key=f"interes_mensual_{idx}", label_visibility="visible", on_change=propagate_commission_changes, disabled=is_disabled)
+                set_invoice_field(invoice, 'interes_mensual', st.number_input("Interés Mensual (%)", min_value=0.0, value=invoice.get('interes_mensual', st.session_state.default_interes_mensual), format="%.2f", key=f"interes_mensual_{idx}", label_visibility="visible", on_change=propagate_commission_changes, disabled=is_disabled))
             
         st.markdown("---")
 
@@ -608,6 +575,8 @@ if st.session_state.invoices_data:
 
             if invoice.get('recalculate_result'):
                 st.write("##### Perfil de la Operación")
+                if invoice.get('calculo_obsoleto'):
+                    st.warning("Los datos de esta factura cambiaron después del último cálculo. Vuelva a calcular.")
                 st.markdown(
                     f"**Emisor:** {invoice.get('emisor_nombre', 'N/A')} | "
                     f"**Aceptante:** {invoice.get('aceptante_nombre', 'N/A')} | "
@@ -9,6 +9,8 @@ from decimal import Decimal, InvalidOperation
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 from src.data import supabase_repository as db
 from src.core.factoring_system import SistemaFactoringCompleto
+from src.core.audit_log import registro_a_evento_auditoria
+from src.core.date_utils import a_date
 
 # --- Page Config ---
 st.set_page_config(
@@ -62,12 +64,11 @@ def mostrar_busqueda_universal():
             st.session_state.lote_encontrado_universal = []
         else:
             with st.spinner("Buscando facturas por liquidar..."):
-                resultados = db.get_disbursed_proposals_by_lote(lote_id_sanitized)
+                resultados = db.get_disbursed_proposal_details_by_lote(lote_id_sanitized)
                 if resultados:
                     st.success(f"Se encontraron {len(resultados)} facturas desembolsadas.")
                     with st.spinner("Cargando detalles completos..."):
-                        detalles_completos = [db.get_proposal_details_by_id(res.get('proposal_id')) for res in resultados]
-                        st.session_state.lote_encontrado_universal = [d for d in detalles_completos if d]
+                        st.session_state.lote_encontrado_universal = resultados
                         st.session_state.vista_actual_universal = 'liquidacion'
                         st.rerun()
                 else:
@@ -118,8 +119,10 @@ def mostrar_liquidacion_universal():
     if submit_button:
         # Lógica de cálculo (sin cambios)
         with st.spinner("Ejecutando nuevo motor de liquidación..."):
-            sistema = SistemaFactoringCompleto()
-            resultados_finales = []
+            sistema = SistemaFactoringCompleto(
+                sink_auditoria=lambda registros: db.add_audit_events_bulk([registro_a_evento_auditoria(r) for r in registros])
+            )
+            operaciones, montos_pagados = [], []
 
             for factura in st.session_state.lote_encontrado_universal:
                 proposal_id = factura.get('proposal_id')
@@ -144,21 +147,27 @@ def mostrar_liquidacion_universal():
                         "interes_compensatorio": float(safe_decimal(desglose.get('interes', {}).get('monto'))),
                         "igv_interes": float(safe_decimal(desglose.get('interes', {}).get('igv'))),
                         "tasa_interes_mensual": float(safe_decimal(factura.get('interes_mensual')) / 100),
-                        "fecha_desembolso": datetime.datetime.strptime(fecha_desembolso_str, '%d-%m-%Y').date(),
-                        "fecha_vencimiento": datetime.datetime.strptime(fecha_vencimiento_str, '%d-%m-%Y').date(),
+                        "fecha_desembolso": a_date(fecha_desembolso_str),
+                        "fecha_vencimiento": a_date(fecha_vencimiento_str),
                     }
 
-                    resultado = sistema.liquidar_operacion_con_back_door(
-                        operacion=operacion,
-                        fecha_pago=st.session_state.global_liquidation_date_universal,
-                        monto_pagado=monto_pagado,
-                        monto_minimo=st.session_state.global_backdoor_min_amount_universal
-                    )
-                    resultados_finales.append(resultado)
+                    operaciones.append(operacion)
+                    montos_pagados.append(monto_pagado)
 
                 except (json.JSONDecodeError, KeyError, ValueError, TypeError) as e:
                     st.error(f"Error procesando factura {parse_invoice_number(proposal_id)}: {e}")
-            
+
+            # Todo el lote se liquida en una sola pasada vectorizada
+            resultados_finales = []
+            if operaciones:
+                resultados_finales = sistema.liquidar_lote_con_back_door(
+                    operaciones,
+                    fechas_pago=st.session_state.global_liquidation_date_universal,
+                    montos_pagados=montos_pagados,
+                    monto_minimo=st.session_state.global_backdoor_min_amount_universal
+                ).to_dict('records')
+                sistema.log_auditoria.flush()
+
             st.session_state.resultados_liquidacion_universal = resultados_finales
             st.success("Cálculo de liquidación universal completado.")
 
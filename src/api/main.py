@@ -2,7 +2,8 @@ import sys
 import os
 import json
 from datetime import datetime, timedelta
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import PlainTextResponse
 from pydantic import BaseModel
 from typing import Optional, List, Dict, Any
 from fastapi.middleware.cors import CORSMiddleware
@@ -17,20 +18,32 @@ from core.factoring_calculator import (
     procesar_lote_desembolso_inicial,
     procesar_lote_encontrar_tasa
 )
-from data import supabase_repository as db
-from data.supabase_repository import (
-    get_or_create_desembolso_resumen,
-    add_desembolso_evento,
-    add_audit_event
-)
-from api.routers import liquidaciones
+from core import tracing
+from core.structured_logging import configurar_logging
+from data import cache as repository_cache
+from api.routers import desembolsos, liquidaciones, trabajos
+from api.responses import RespuestaJsonRapida, elegir_formato, respuesta_lote
+from services import job_service, simulation_executor
+
+# La caché de lecturas del repositorio es por proceso. Con varios workers, una escritura
+# en uno no invalidaría la caché de los otros, así que la API siempre lee de Supabase.
+repository_cache.configure(ttl_seconds=0)
+
+# Logs estructurados por cola (nivel y formato en LOG_LEVEL / LOG_FORMAT)
+configurar_logging()
 
 app = FastAPI(
     title="API de Calculadora de Factoring INANDES",
     description="Provee endpoints para los cálculos de factoring y gestión de operaciones.",
     version="3.1.0",
+    default_response_class=RespuestaJsonRapida,
 )
 
+@app.on_event("shutdown")
+def cerrar_pools():
+    simulation_executor.shutdown()
+    job_service.shutdown()
+
 # --- Middleware de CORS ---
 app.add_middleware(
     CORSMiddleware,
@@ -40,68 +53,65 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# --- Modelos de Datos (Pydantic) ---
+# --- Middleware de Trazas ---
+# Mide cada petición (tiempo total, tiempo en el repositorio y en los cálculos, round trips a
+# la base de datos), lo devuelve en la cabecera `Server-Timing` y lo acumula para `/metrics`.
 
-class DesembolsoInfo(BaseModel):
-    proposal_id: str
-    monto_desembolsado: float
-    fecha_desembolso_real: str # Format: DD-MM-YYYY
-
-class DesembolsarLoteRequest(BaseModel):
-    usuario_id: str
-    desembolsos: List[DesembolsoInfo]
+@app.middleware("http")
+async def medir_peticion(request: Request, call_next):
+    with tracing.traza() as traza:
+        try:
+            response = await call_next(request)
+        except Exception:
+            tracing.registrar_peticion(request.method, _ruta_de(request), 500, traza.segundos)
+            raise
+    tracing.registrar_peticion(request.method, _ruta_de(request), response.status_code, traza.segundos)
+    response.headers["Server-Timing"] = traza.server_timing()
+    return response
 
-# --- Endpoints de Gestión de Estado ---
+def _ruta_de(request: Request) -> str:
+    # Solo rutas registradas, para acotar la cardinalidad de las etiquetas. `route.path` no
+    # incluye el prefijo del router, así que se usa la URL salvo que la ruta tenga parámetros.
+    route = request.scope.get("route")
+    if route is None:
+        return "no_encontrada"
+    return route.path if "{" in route.path else request.url.path
 
-@app.post("/desembolsar_lote")
-async def desembolsar_lote_endpoint(request: DesembolsarLoteRequest):
-    results = []
-    for desembolso_info in request.desembolsos:
-        proposal_id = desembolso_info.proposal_id
-        try:
-            # Update status to DESEMBOLSADA
-            db.update_proposal_status(proposal_id, 'DESEMBOLSADA')
-            
-            # Add audit event (assuming initial status was 'ACTIVO')
-            db.add_audit_event(
-                usuario_id=request.usuario_id,
-                entidad_id=proposal_id,
-                accion="DESEMBOLSO",
-                estado_anterior="ACTIVO",
-                estado_nuevo="DESEMBOLSADA",
-                detalles_adicionales={"monto_desembolsado": desembolso_info.monto_desembolsado, "fecha_desembolso": desembolso_info.fecha_desembolso_real}
-            )
-            
-            results.append({"proposal_id": proposal_id, "status": "SUCCESS", "message": "Estado actualizado a DESEMBOLSADA."})
-        except Exception as e:
-            results.append({"proposal_id": proposal_id, "status": "ERROR", "message": f"Error al actualizar estado: {e}"})
-    
-    return {"resultados_del_lote": results}
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def metrics_endpoint():
+    """Métricas del proceso en formato de texto de Prometheus."""
+    return PlainTextResponse(tracing.exportar_prometheus(), media_type="text/plain; version=0.0.4; charset=utf-8")
 
 # --- Routers ---
+app.include_router(desembolsos.router, tags=["desembolsos"])
 app.include_router(liquidaciones.router, prefix="/liquidaciones", tags=["liquidaciones"])
+app.include_router(trabajos.router, prefix="/trabajos", tags=["trabajos"])
 
 @app.post("/calcular_desembolso_lote")
-async def calcular_desembolso_lote_endpoint(payload: List[Dict[str, Any]]):
+async def calcular_desembolso_lote_endpoint(payload: List[Dict[str, Any]], request: Request, formato: Optional[str] = None):
     """
     Calcula el desembolso inicial para un lote de facturas.
+    `formato` (o la cabecera `Accept`) elige json, columnar, arrow o parquet; ver `api/responses.py`.
     """
+    formato = elegir_formato(request, formato)
     try:
         result = procesar_lote_desembolso_inicial(payload)
-        return result
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
+    return respuesta_lote(result, formato)
 
 @app.post("/encontrar_tasa_lote")
-async def encontrar_tasa_lote_endpoint(payload: List[Dict[str, Any]]):
+async def encontrar_tasa_lote_endpoint(payload: List[Dict[str, Any]], request: Request, formato: Optional[str] = None):
     """
     Encuentra la tasa de avance para un lote de facturas dado un monto objetivo.
+    `formato` (o la cabecera `Accept`) elige json, columnar, arrow o parquet; ver `api/responses.py`.
     """
+    formato = elegir_formato(request, formato)
     try:
         result = procesar_lote_encontrar_tasa(payload)
-        return result
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
+    return respuesta_lote(result, formato)
 
 # --- Endpoints Antiguos / de Cálculo ---
 
@@ -0,0 +1,72 @@
+# src/api/responses.py
+
+from typing import Any, Dict, Optional
+
+from fastapi import HTTPException, Request
+from fastapi.responses import JSONResponse, Response
+
+from core import columnar, json_codec
+
+class RespuestaJsonRapida(JSONResponse):
+    """
+    JSONResponse serializada con `json_codec` (orjson si está instalado).
+    Es la clase de respuesta por defecto de la API. FastAPI igual pasa los dict que devuelve un
+    endpoint por `jsonable_encoder`, que recorre todo el resultado en Python; los endpoints de
+    lote devuelven esta respuesta directamente para evitar ese recorrido.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return json_codec.dumps_bytes(content)
+
+# --- Formatos de Respuesta de los Endpoints de Lote ---
+# Por defecto, JSON con un dict anidado por factura (sin cambios). Con `?formato=` o la cabecera
+# `Accept` se puede pedir el mismo resultado por columnas (ver `core/columnar.py`):
+#   columnar  application/vnd.inandes.columnar+json  los campos del lote + {"columnas": {ruta: [valores]}}
+#   arrow     application/vnd.apache.arrow.stream    Arrow IPC; los campos del lote en los metadatos del esquema
+#   parquet   application/vnd.apache.parquet         Parquet (zstd); ídem
+# Arrow y Parquet tienen un tipo por columna. Si el lote no cabe en ese esquema (un campo que
+# mezcla números y textos entre facturas), se responde 406 en lugar de un 500: el mismo
+# resultado se puede pedir en json o columnar.
+
+FORMATOS_LOTE = {
+    'json': 'application/json',
+    'columnar': 'application/vnd.inandes.columnar+json',
+    'arrow': 'application/vnd.apache.arrow.stream',
+    'parquet': 'application/vnd.apache.parquet',
+}
+METADATOS_LOTE = 'inandes.lote'  # Clave de los metadatos del esquema Arrow/Parquet
+
+def elegir_formato(request: Request, formato: Optional[str]) -> str:
+    """El parámetro `formato` manda; si no viene, el primer formato no JSON presente en `Accept`."""
+    if formato:
+        formato = formato.lower()
+        if formato not in FORMATOS_LOTE:
+            raise HTTPException(status_code=400, detail=f"Formato no soportado: '{formato}'. Use uno de {list(FORMATOS_LOTE)}.")
+        return formato
+    accept = request.headers.get('accept', '')
+    for nombre, media_type in FORMATOS_LOTE.items():
+        if nombre != 'json' and media_type in accept:
+            return nombre
+    return 'json'
+
+def respuesta_lote(resultado: Dict[str, Any], formato: str, clave: str = 'resultados_por_factura') -> Response:
+    """Serializa el resultado de un lote en el formato elegido. Los errores del lote siempre van en JSON."""
+    headers = {'Vary': 'Accept'}
+    if formato == 'json' or not isinstance(resultado.get(clave), list):
+        return RespuestaJsonRapida(resultado, headers=headers)
+
+    campos_lote = {k: v for k, v in resultado.items() if k != clave}
+    columnas = columnar.a_columnas(resultado[clave])
+    if formato == 'columnar':
+        contenido = {**campos_lote, 'formato': 'columnar', 'cantidad': len(resultado[clave]), 'columnas': columnas}
+        return RespuestaJsonRapida(contenido, headers=headers, media_type=FORMATOS_LOTE['columnar'])
+
+    if columnar.pa is None:
+        raise HTTPException(status_code=406, detail=f"El formato '{formato}' requiere pyarrow en el servidor.")
+    try:
+        tabla = columnar.a_tabla_arrow(columnas, {METADATOS_LOTE: json_codec.dumps(campos_lote)})
+        cuerpo = columnar.a_arrow_ipc(tabla) if formato == 'arrow' else columnar.a_parquet(tabla)
+    except ValueError as e:
+        raise HTTPException(status_code=406, detail=f"El resultado no se puede entregar en formato '{formato}': {e}. "
+                                                    "Pídalo en formato json o columnar.")
+    return Response(cuerpo, headers=headers, media_type=FORMATOS_LOTE[formato])
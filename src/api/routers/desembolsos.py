@@ -0,0 +1,33 @@
+import sys
+import os
+from fastapi import APIRouter
+from pydantic import BaseModel
+from typing import List
+
+# --- Configuración de Path para Módulos ---
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, project_root)
+
+from api.responses import RespuestaJsonRapida
+from services.desembolso_service import procesar_desembolso_lote_iter
+
+router = APIRouter()
+
+# --- Modelos de Datos (Pydantic) ---
+
+class DesembolsoInfo(BaseModel):
+    proposal_id: str
+    monto_desembolsado: float
+    fecha_desembolso_real: str # Format: DD-MM-YYYY
+
+class DesembolsarLoteRequest(BaseModel):
+    usuario_id: str
+    desembolsos: List[DesembolsoInfo]
+
+# --- Endpoints de Gestión de Estado ---
+
+@router.post("/desembolsar_lote")
+def desembolsar_lote_endpoint(request: DesembolsarLoteRequest):
+    desembolsos = [desembolso.dict() for desembolso in request.desembolsos]
+    resultados = list(procesar_desembolso_lote_iter(desembolsos, request.usuario_id))
+    return RespuestaJsonRapida({"resultados_del_lote": resultados})
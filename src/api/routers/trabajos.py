@@ -0,0 +1,60 @@
+import sys
+import os
+from fastapi import APIRouter, Header, HTTPException
+from typing import Any, Dict, List, Optional
+
+# --- Configuración de Path para Módulos ---
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, project_root)
+
+from api.responses import RespuestaJsonRapida
+from api.routers.desembolsos import DesembolsarLoteRequest
+from api.routers.liquidaciones import ProcesarLiquidacionRequest
+from services import job_service
+
+router = APIRouter()
+
+# --- Envío de Trabajos ---
+# Versión asíncrona de los endpoints de lote: responde 202 con el trabajo (id, estado,
+# progreso) y la cabecera Location para sondearlo. Ver `services/job_service.py`.
+
+def _enviar(tipo: str, items: List[Dict[str, Any]], usuario_id: str, idempotency_key: Optional[str]) -> RespuestaJsonRapida:
+    try:
+        trabajo, creado = job_service.enviar_trabajo(tipo, items, usuario_id, idempotency_key)
+    except job_service.ConflictoIdempotencia as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    # 202 si se encoló ahora; 200 si la clave de idempotencia ya tenía este trabajo
+    return RespuestaJsonRapida(trabajo, status_code=202 if creado else 200,
+                               headers={"Location": f"/trabajos/{trabajo['id']}"})
+
+@router.post("/procesar_liquidacion_lote", status_code=202)
+def enviar_liquidacion_lote(request: ProcesarLiquidacionRequest, idempotency_key: Optional[str] = Header(None)):
+    """Encola la liquidación del lote. Reenviar con la misma cabecera `Idempotency-Key` no la repite."""
+    return _enviar('procesar_liquidacion_lote', [liquidacion.dict() for liquidacion in request.liquidaciones],
+                   request.usuario_id, idempotency_key)
+
+@router.post("/desembolsar_lote", status_code=202)
+def enviar_desembolso_lote(request: DesembolsarLoteRequest, idempotency_key: Optional[str] = Header(None)):
+    """Encola el desembolso del lote. Reenviar con la misma cabecera `Idempotency-Key` no lo repite."""
+    return _enviar('desembolsar_lote', [desembolso.dict() for desembolso in request.desembolsos],
+                   request.usuario_id, idempotency_key)
+
+# --- Consulta de Trabajos ---
+
+@router.get("/{trabajo_id}")
+def obtener_trabajo(trabajo_id: str):
+    """Estado (PENDIENTE, EN_PROCESO, COMPLETADO, FALLIDO) y progreso del trabajo."""
+    trabajo = job_service.obtener_trabajo(trabajo_id)
+    if trabajo is None:
+        raise HTTPException(status_code=404, detail=f"Trabajo '{trabajo_id}' no encontrado.")
+    return RespuestaJsonRapida(trabajo)
+
+@router.get("/{trabajo_id}/resultados")
+def obtener_resultados(trabajo_id: str):
+    """Resultados por factura en `resultados_del_lote`; 409 mientras el trabajo no termina."""
+    trabajo = job_service.obtener_resultados(trabajo_id)
+    if trabajo is None:
+        raise HTTPException(status_code=404, detail=f"Trabajo '{trabajo_id}' no encontrado.")
+    if trabajo["resultados_del_lote"] is None:
+        raise HTTPException(status_code=409, detail=f"El trabajo '{trabajo_id}' sigue {trabajo['estado']}.")
+    return RespuestaJsonRapida(trabajo)
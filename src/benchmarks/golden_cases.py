@@ -0,0 +1,384 @@
+# src/benchmarks/golden_cases.py
+"""
+Casos dorados de liquidación: correctitud al centavo y rendimiento de cada motor.
+
+Carga los casos resueltos en `documentation/CASOS.LIQUIDACIONES.*.csv` (una operación,
+varios pagos "Liquidacion N" y la tabla "Resultado" con los montos esperados) y los pasa
+por cada motor de liquidación:
+
+  - calcular_liquidacion                   (core.liquidation_calculator, usado por la API)
+  - calcular_liquidacion_RECONCILIACION    (core.liquidation_calculator_TEST)
+  - SistemaFactoringCompleto               (liquidar_operacion, caso por caso)
+  - SistemaFactoringCompleto (lote)        (liquidar_lote_con_back_door, todos los casos juntos)
+
+Para cada motor informa:
+  - coincidencia con la tabla "Resultado" del CSV (solo en los campos que el motor produce);
+  - coincidencia al centavo con la línea base guardada (`golden_baseline.json`). Cualquier
+    cambio de montos respecto de la línea base, o un motor que falte en ella o en la
+    ejecución, hace fallar el script (código de salida 1), así una optimización no puede
+    cambiar dinero sin que se note;
+  - coincidencia al centavo entre motores en los campos que comparten el mismo modelo
+    (ver `ACUERDOS`); una diferencia también hace fallar el script;
+  - latencia por caso (mediana y p95) y casos por segundo.
+
+Uso (desde `src/`):
+    python -m benchmarks.golden_cases
+    python -m benchmarks.golden_cases --repeticiones 500
+    python -m benchmarks.golden_cases --actualizar-baseline   # tras un cambio de montos intencional
+"""
+
+import argparse
+import contextlib
+import csv
+import datetime
+import io
+import json
+import os
+import statistics
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Este módulo se importa como `src.benchmarks` y como `benchmarks` (CLI desde `src/`).
+try:
+    from ..core.date_utils import formatear_fecha, a_ordinal
+    from ..core.factoring_system import SistemaFactoringCompleto
+    from ..core.liquidation_calculator import calcular_liquidacion
+    from ..core.money import a_centavos
+except ImportError:
+    from core.date_utils import formatear_fecha, a_ordinal
+    from core.factoring_system import SistemaFactoringCompleto
+    from core.liquidation_calculator import calcular_liquidacion
+    from core.money import a_centavos
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+ARCHIVOS_CASOS = [
+    os.path.join(PROJECT_ROOT, 'documentation', 'CASOS.LIQUIDACIONES.EJEMPLOS.csv'),
+    os.path.join(PROJECT_ROOT, 'documentation', 'CASOS.LIQUIDACIONES.COMPREHENSIVE.CHRISTIE.FEEDBACK.csv'),
+]
+RUTA_BASELINE = os.path.join(os.path.dirname(__file__), 'golden_baseline.json')
+
+# Campos normalizados que se comparan (mismo orden que la tabla "Resultado" del CSV)
+CAMPOS = ['delta_compensatorios', 'delta_igv_compensatorios', 'moratorios', 'igv_moratorios', 'delta_capital', 'saldo']
+
+# Pares de motores que calculan esos campos con el mismo modelo: deben coincidir al centavo en
+# todos los casos. El saldo solo se exige entre las dos versiones de SistemaFactoringCompleto:
+# calcular_liquidacion y RECONCILIACION modelan el saldo de otra forma, y RECONCILIACION calcula
+# los moratorios sobre capital + interés + IGV originales. Esas diferencias se ven contra el CSV.
+ACUERDOS = [
+    ('calcular_liquidacion', 'SistemaFactoringCompleto', ['moratorios', 'igv_moratorios']),
+    ('calcular_liquidacion', 'SistemaFactoringCompleto (lote)', ['moratorios', 'igv_moratorios']),
+    ('SistemaFactoringCompleto', 'SistemaFactoringCompleto (lote)', CAMPOS),
+]
+
+# --- Lectura de los CSV ---
+
+def _numero(texto: str) -> Optional[float]:
+    texto = (texto or '').strip()
+    if not texto:
+        return None
+    if texto.endswith('%'):
+        return float(texto[:-1]) / 100
+    return float(texto)
+
+def _fecha(texto: str) -> datetime.date:
+    dia, mes, anio = texto.strip().split('/')
+    return datetime.date(int(anio), int(mes), int(dia))
+
+def _clave(nombre: str) -> str:
+    return nombre.replace(' ', '').upper()
+
+def cargar_casos(ruta: str) -> List[Dict[str, Any]]:
+    """Un caso por columna "Liquidacion N" con su pago y los montos esperados."""
+    with open(ruta, newline='', encoding='utf-8-sig') as f:
+        filas = list(csv.reader(f, delimiter=';'))
+
+    # Cabecera: pares etiqueta/valor en las columnas 1-2 y 4-5
+    cabecera = {}
+    for fila in filas[:8]:
+        for col in (1, 4):
+            if len(fila) > col + 1 and fila[col].strip():
+                cabecera[fila[col].strip()] = fila[col + 1].strip()
+    fecha_desembolso = _fecha(cabecera['Fecha Desembolso'])
+    operacion = {
+        'capital': _numero(cabecera['Capital']),
+        'interes_cobrado': _numero(cabecera['Intereses compesnatorios']),
+        'igv_interes_cobrado': _numero(cabecera['IGV Compensatorios']),
+        'desembolso': _numero(cabecera['Desembolso']),
+        'tasa_compensatoria': _numero(cabecera['Compensatorio']),
+        'tasa_moratoria': _numero(cabecera['Moratorio']),
+        'fecha_desembolso': fecha_desembolso,
+        'fecha_vencimiento': _fecha(cabecera['Fecha de Pago']),
+    }
+
+    # Tabla diaria: cada columna "Liquidacion N" tiene el monto pagado en la fila de su fecha
+    inicio = next(i for i, f in enumerate(filas) if len(f) > 6 and f[1].strip() == 'Fecha' and f[6].startswith('Liquidacion'))
+    columnas = {j: filas[inicio][j].strip() for j in range(6, len(filas[inicio])) if filas[inicio][j].strip()}
+    pagos = {}
+    for fila in filas[inicio + 1:]:
+        if not fila or not fila[0].strip().isdigit():
+            break
+        for j, nombre in columnas.items():
+            if j < len(fila) and fila[j].strip():
+                pagos[_clave(nombre)] = (nombre, _fecha(fila[1]), _numero(fila[j]))
+
+    # Tabla "Resultado": montos esperados por liquidación (vacío = 0)
+    inicio_resultado = next(i for i, f in enumerate(filas) if len(f) > 1 and f[1].strip() == 'Resultado')
+    esperados = {}
+    for fila in filas[inicio_resultado + 1:]:
+        if len(fila) < 8 or not fila[1].strip().startswith('Liquidacion'):
+            break
+        esperados[_clave(fila[1])] = {campo: _numero(fila[2 + k]) or 0.0 for k, campo in enumerate(CAMPOS)}
+
+    archivo = os.path.basename(ruta)
+    return [{
+        'id': f"{archivo}::{nombre}",
+        'operacion': operacion,
+        'fecha_pago': fecha_pago,
+        'monto_pagado': monto,
+        'esperado': esperados.get(clave),
+    } for clave, (nombre, fecha_pago, monto) in pagos.items()]
+
+# --- Adaptadores de Motores ---
+# Cada adaptador recibe un caso y devuelve los CAMPOS que su motor produce (el resto en None).
+
+def _motor_calcular_liquidacion(caso: Dict[str, Any]) -> Dict[str, Optional[float]]:
+    op = caso['operacion']
+    resultado = calcular_liquidacion(
+        datos_operacion={
+            'fecha_pago_calculada': formatear_fecha(a_ordinal(op['fecha_vencimiento'])),
+            'capital_calculado': op['capital'],
+            'interes_calculado': op['interes_cobrado'],
+            'plazo_operacion_calculado': (op['fecha_vencimiento'] - op['fecha_desembolso']).days,
+            'interes_mensual': op['tasa_compensatoria'] * 100,
+        },
+        monto_recibido=caso['monto_pagado'],
+        fecha_pago_real_str=formatear_fecha(a_ordinal(caso['fecha_pago'])),
+        tasa_interes_compensatoria_pct=op['tasa_compensatoria'] * 100,
+        tasa_interes_moratoria_pct=op['tasa_moratoria'] * 100,
+    )
+    if 'error' in resultado:
+        raise ValueError(resultado['error'])
+    cargos = resultado['desglose_cargos']
+    return {
+        'delta_compensatorios': None, 'delta_igv_compensatorios': None, 'delta_capital': None,
+        'moratorios': cargos['interes_moratorio'],
+        'igv_moratorios': cargos['igv_interes_moratorio'],
+        'saldo': resultado['liquidacion_final']['saldo_final_a_liquidar'],
+    }
+
+def _cargar_reconciliacion() -> Callable:
+    try:
+        from ..core.liquidation_calculator_TEST import calcular_liquidacion_RECONCILIACION
+    except ImportError:
+        from core.liquidation_calculator_TEST import calcular_liquidacion_RECONCILIACION
+    return calcular_liquidacion_RECONCILIACION
+
+def _adaptador_reconciliacion(calcular: Callable) -> Callable:
+    def motor(caso: Dict[str, Any]) -> Dict[str, Optional[float]]:
+        op = caso['operacion']
+        resultado = calcular({
+            'capital_desembolsado': op['capital'],
+            'interes_original_cobrado': op['interes_cobrado'],
+            'igv_interes_original_cobrado': op['igv_interes_cobrado'],
+            'fecha_desembolso': formatear_fecha(a_ordinal(op['fecha_desembolso'])),
+            'fecha_pago_calculada_original': formatear_fecha(a_ordinal(op['fecha_vencimiento'])),
+            'fecha_pago_actual': formatear_fecha(a_ordinal(caso['fecha_pago'])),
+            'monto_recibido': caso['monto_pagado'],
+            'tasa_compensatoria_pct': op['tasa_compensatoria'],
+            'tasa_moratoria_pct': op['tasa_moratoria'],
+        })
+        if 'error' in resultado:
+            raise ValueError(resultado['error'])
+        desglose = resultado['desglose_calculo']
+        return {
+            'delta_compensatorios': None, 'delta_igv_compensatorios': None, 'igv_moratorios': None,
+            'moratorios': desglose['interes_moratorio_real'],
+            'delta_capital': None,
+            'saldo': desglose['saldo_final_calculado'],
+        }
+    return motor
+
+def _operacion_sistema(caso: Dict[str, Any]) -> Dict[str, Any]:
+    op = caso['operacion']
+    return {
+        'id_operacion': caso['id'],
+        'capital_operacion': op['capital'],
+        'monto_desembolsado': op['desembolso'],
+        'interes_compensatorio': op['interes_cobrado'],
+        'igv_interes': op['igv_interes_cobrado'],
+        'tasa_interes_mensual': op['tasa_compensatoria'],
+        'fecha_desembolso': op['fecha_desembolso'],
+        'fecha_vencimiento': op['fecha_vencimiento'],
+    }
+
+def _campos_sistema(resultado: Dict[str, Any]) -> Dict[str, Optional[float]]:
+    return {
+        'delta_compensatorios': resultado['delta_intereses'],
+        'delta_igv_compensatorios': resultado['delta_igv_intereses'],
+        'moratorios': resultado['interes_moratorio'],
+        'igv_moratorios': resultado['igv_moratorio'],
+        'delta_capital': resultado['delta_capital'],
+        'saldo': resultado['saldo_global'],
+    }
+
+_sistema = SistemaFactoringCompleto()
+
+def _motor_sistema(caso: Dict[str, Any]) -> Dict[str, Optional[float]]:
+    resultado = _sistema.liquidar_operacion(_operacion_sistema(caso), caso['fecha_pago'], caso['monto_pagado'])
+    if 'error' in resultado:
+        raise ValueError(resultado['error'])
+    return _campos_sistema(resultado)
+
+def _motor_sistema_lote(casos: List[Dict[str, Any]]) -> List[Dict[str, Optional[float]]]:
+    df = _sistema_sin_back_door.liquidar_lote_con_back_door(
+        [_operacion_sistema(c) for c in casos],
+        fechas_pago=[c['fecha_pago'] for c in casos],
+        montos_pagados=[c['monto_pagado'] for c in casos],
+    )
+    return [_campos_sistema(r) for r in df.to_dict('records')]
+
+with contextlib.redirect_stdout(io.StringIO()):
+    _sistema_sin_back_door = SistemaFactoringCompleto()
+    _sistema_sin_back_door.configurar_back_door(aplicar=False)  # Mismo alcance que `liquidar_operacion`
+
+# --- Ejecución ---
+
+def _centavos(valor: Optional[float]) -> Optional[int]:
+    return None if valor is None else a_centavos(valor)
+
+def _a_centavos(campos: Dict[str, Optional[float]]) -> Dict[str, Optional[int]]:
+    return {campo: _centavos(campos.get(campo)) for campo in CAMPOS}
+
+def _diferencias(obtenido: Dict[str, Optional[int]], esperado: Dict[str, Optional[int]]) -> List[str]:
+    """Campos donde ambos tienen valor y difieren en al menos un centavo."""
+    return [f"{c}: {obtenido[c] / 100:.2f} != {esperado[c] / 100:.2f}"
+            for c in CAMPOS if obtenido.get(c) is not None and esperado.get(c) is not None and obtenido[c] != esperado[c]]
+
+def _percentil(valores: List[float], p: float) -> float:
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))]
+
+def ejecutar(repeticiones: int) -> Tuple[Dict[str, Dict[str, Dict[str, Optional[int]]]], Dict[str, Dict[str, Any]]]:
+    casos = [caso for ruta in ARCHIVOS_CASOS for caso in cargar_casos(ruta)]
+    motores: Dict[str, Callable] = {
+        'calcular_liquidacion': _motor_calcular_liquidacion,
+        'SistemaFactoringCompleto': _motor_sistema,
+    }
+    motores['calcular_liquidacion_RECONCILIACION'] = _adaptador_reconciliacion(_cargar_reconciliacion())
+
+    resultados: Dict[str, Dict[str, Dict[str, Optional[int]]]] = {}
+    metricas: Dict[str, Dict[str, Any]] = {}
+    for nombre, motor in motores.items():
+        resultados[nombre], latencias = {}, []
+        for caso in casos:
+            resultados[nombre][caso['id']] = _a_centavos(motor(caso))
+            tiempos = []
+            for _ in range(repeticiones):
+                inicio = time.perf_counter()
+                motor(caso)
+                tiempos.append(time.perf_counter() - inicio)
+            latencias.append(statistics.median(tiempos))
+        metricas[nombre] = {
+            'latencia_mediana_us': statistics.median(latencias) * 1e6,
+            'latencia_p95_us': _percentil(latencias, 95) * 1e6,
+            'casos_por_segundo': len(casos) / sum(latencias),
+        }
+
+    # El motor vectorizado se mide por lote completo
+    nombre = 'SistemaFactoringCompleto (lote)'
+    salida = _motor_sistema_lote(casos)
+    resultados[nombre] = {caso['id']: _a_centavos(campos) for caso, campos in zip(casos, salida)}
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        _motor_sistema_lote(casos)
+        tiempos.append(time.perf_counter() - inicio)
+    lote = statistics.median(tiempos)
+    metricas[nombre] = {
+        'latencia_mediana_us': lote / len(casos) * 1e6,
+        'latencia_p95_us': None,
+        'casos_por_segundo': len(casos) / lote,
+    }
+
+    esperados = {caso['id']: _a_centavos(caso['esperado']) for caso in casos if caso['esperado']}
+    for nombre in resultados:
+        metricas[nombre]['casos'] = len(casos)
+        metricas[nombre]['difieren_del_csv'] = {
+            caso_id: diffs for caso_id, obtenido in resultados[nombre].items()
+            if caso_id in esperados and (diffs := _diferencias(obtenido, esperados[caso_id]))
+        }
+    return resultados, metricas
+
+def comparar_con_baseline(resultados: Dict[str, Dict[str, Dict[str, Optional[int]]]], baseline: Dict[str, Any]) -> List[str]:
+    cambios = [f"{motor}: está en la línea base pero no se ejecutó" for motor in baseline if motor not in resultados]
+    for motor, por_caso in resultados.items():
+        if motor not in baseline:
+            cambios.append(f"{motor}: no está en la línea base (regenérela con --actualizar-baseline)")
+            continue
+        for caso_id, obtenido in por_caso.items():
+            anterior = baseline[motor].get(caso_id)
+            if anterior is None:
+                cambios.append(f"{motor} | {caso_id}: caso nuevo, no está en la línea base")
+                continue
+            cambios.extend(f"{motor} | {caso_id}: {diff}" for diff in _diferencias(obtenido, anterior))
+            cambios.extend(f"{motor} | {caso_id}: {c} {'aparece' if obtenido[c] is not None else 'desaparece'}"
+                           for c in CAMPOS if (obtenido.get(c) is None) != (anterior.get(c) is None))
+    return cambios
+
+def comparar_motores(resultados: Dict[str, Dict[str, Dict[str, Optional[int]]]]) -> List[str]:
+    """Diferencias entre motores en los campos de `ACUERDOS` (cuando ambos producen el campo)."""
+    diferencias = []
+    for motor_a, motor_b, campos in ACUERDOS:
+        for caso_id, obtenido_a in resultados[motor_a].items():
+            obtenido_b = resultados[motor_b][caso_id]
+            diferencias.extend(f"{motor_a} vs {motor_b} | {caso_id}: {c}: {obtenido_a[c] / 100:.2f} != {obtenido_b[c] / 100:.2f}"
+                               for c in campos if obtenido_a.get(c) is not None and obtenido_b.get(c) is not None
+                               and obtenido_a[c] != obtenido_b[c])
+    return diferencias
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Casos dorados de liquidación: correctitud al centavo y rendimiento.")
+    parser.add_argument('--repeticiones', type=int, default=200, help="Ejecuciones por caso para medir latencia.")
+    parser.add_argument('--actualizar-baseline', action='store_true', help="Guarda los resultados actuales como línea base.")
+    args = parser.parse_args(argv)
+
+    resultados, metricas = ejecutar(max(1, args.repeticiones))
+
+    print(f"{'Motor':<38} {'Casos':>5} {'≠ CSV':>6} {'Mediana µs':>11} {'p95 µs':>9} {'Casos/s':>10}")
+    for nombre, m in metricas.items():
+        p95 = f"{m['latencia_p95_us']:.1f}" if m['latencia_p95_us'] is not None else '-'
+        print(f"{nombre:<38} {m['casos']:>5} {len(m['difieren_del_csv']):>6} {m['latencia_mediana_us']:>11.1f} {p95:>9} {m['casos_por_segundo']:>10.0f}")
+    for nombre, m in metricas.items():
+        for caso_id, diffs in m['difieren_del_csv'].items():
+            print(f"  ≠ CSV  {nombre} | {caso_id}: {'; '.join(diffs)}")
+
+    diferencias = comparar_motores(resultados)
+    if diferencias:
+        print(f"❌ {len(diferencias)} montos difieren entre motores que comparten el modelo:")
+        for diferencia in diferencias:
+            print(f"  {diferencia}")
+        return 1
+
+    if args.actualizar_baseline:
+        with open(RUTA_BASELINE, 'w', encoding='utf-8') as f:
+            json.dump(resultados, f, indent=2, sort_keys=True)
+        print(f"✅ Línea base actualizada: {RUTA_BASELINE}")
+        return 0
+
+    if not os.path.exists(RUTA_BASELINE):
+        print("⚠️ No hay línea base; ejecute con --actualizar-baseline para crearla.")
+        return 1
+    with open(RUTA_BASELINE, encoding='utf-8') as f:
+        baseline = json.load(f)
+    cambios = comparar_con_baseline(resultados, baseline)
+    if cambios:
+        print(f"❌ {len(cambios)} montos cambiaron respecto de la línea base:")
+        for cambio in cambios:
+            print(f"  {cambio}")
+        return 1
+    print("✅ Todos los motores coinciden al centavo con la línea base.")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,140 @@
+# src/benchmarks/json_bench.py
+"""
+Benchmark de serialización de las respuestas de lote y de los blobs guardados.
+
+Compara, sobre respuestas reales de los motores para lotes sintéticos (ver `synthetic_data`):
+  - fastapi:  `jsonable_encoder` + `json.dumps`, lo que hacía la API con los dict devueltos;
+  - json:     `json_codec` con la biblioteca estándar;
+  - orjson:   `json_codec` con orjson (si está instalado).
+Mide codificación y decodificación de la respuesta completa y de los `recalculate_result_json`
+fila por fila (lo que graba `save_proposals_bulk`). Para las respuestas mide además los formatos
+columnares (ver `api/responses.py`): columnar (JSON por columnas), arrow y parquet; la
+codificación incluye pasar las filas a columnas y la decodificación es la del cliente.
+
+Uso (desde `src/`):
+    python -m benchmarks.json_bench
+    python -m benchmarks.json_bench --facturas 1000 10000 --repeticiones 5
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import statistics
+import sys
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from fastapi.encoders import jsonable_encoder
+
+# Este módulo se importa como `src.benchmarks` y como `benchmarks` (CLI desde `src/`).
+try:
+    from . import synthetic_data
+    from ..core import columnar, json_codec
+    from ..core.factoring_calculator import procesar_lote_desembolso_inicial, procesar_lote_encontrar_tasa
+except ImportError:
+    from benchmarks import synthetic_data
+    from core import columnar, json_codec
+    from core.factoring_calculator import procesar_lote_desembolso_inicial, procesar_lote_encontrar_tasa
+
+FACTURAS_DEFAULT = [10_000]
+
+@contextlib.contextmanager
+def _backend(nombre: str) -> Iterator[None]:
+    anterior = json_codec.BACKEND
+    json_codec.BACKEND = nombre
+    try:
+        yield
+    finally:
+        json_codec.BACKEND = anterior
+
+def _fastapi_dumps(valor: Any) -> bytes:
+    # Mismo camino que JSONResponse.render tras jsonable_encoder
+    return json.dumps(jsonable_encoder(valor), ensure_ascii=False, allow_nan=False, separators=(',', ':')).encode('utf-8')
+
+def _medir(funcion: Callable[[], Any], repeticiones: int) -> float:
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return statistics.median(tiempos) * 1000
+
+def _backends() -> List[str]:
+    return ['json', 'orjson'] if json_codec.orjson is not None else ['json']
+
+def medir_respuesta(nombre: str, respuesta: Dict[str, Any], repeticiones: int) -> List[Dict[str, Any]]:
+    filas = []
+    cuerpo = _fastapi_dumps(respuesta)
+    filas.append({'caso': nombre, 'codec': 'fastapi', 'bytes': len(cuerpo),
+                  'encode_ms': _medir(lambda: _fastapi_dumps(respuesta), repeticiones),
+                  'decode_ms': _medir(lambda: json.loads(cuerpo), repeticiones)})
+    for backend in _backends():
+        with _backend(backend):
+            cuerpo = json_codec.dumps_bytes(respuesta)
+            filas.append({'caso': nombre, 'codec': backend, 'bytes': len(cuerpo),
+                          'encode_ms': _medir(lambda: json_codec.dumps_bytes(respuesta), repeticiones),
+                          'decode_ms': _medir(lambda: json_codec.loads(cuerpo), repeticiones)})
+    return filas
+
+def medir_formatos_columnares(nombre: str, respuesta: Dict[str, Any], repeticiones: int) -> List[Dict[str, Any]]:
+    filas_lote = respuesta['resultados_por_factura']
+
+    def _columnar() -> bytes:
+        return json_codec.dumps_bytes({'columnas': columnar.a_columnas(filas_lote)})
+
+    codificadores = {'columnar': (_columnar, json_codec.loads)}
+    if columnar.pa is not None:
+        codificadores['arrow'] = (lambda: columnar.a_arrow_ipc(columnar.a_tabla_arrow(columnar.a_columnas(filas_lote))),
+                                  lambda cuerpo: columnar.pa.ipc.open_stream(cuerpo).read_all())
+        codificadores['parquet'] = (lambda: columnar.a_parquet(columnar.a_tabla_arrow(columnar.a_columnas(filas_lote))),
+                                    lambda cuerpo: columnar.pq.read_table(io.BytesIO(cuerpo)))
+    filas = []
+    for formato, (codificar, decodificar) in codificadores.items():
+        cuerpo = codificar()
+        filas.append({'caso': nombre, 'codec': formato, 'bytes': len(cuerpo),
+                      'encode_ms': _medir(codificar, repeticiones),
+                      'decode_ms': _medir(lambda: decodificar(cuerpo), repeticiones)})
+    return filas
+
+def medir_blobs(nombre: str, blobs: List[Dict[str, Any]], repeticiones: int) -> List[Dict[str, Any]]:
+    filas = []
+    for backend in _backends():
+        with _backend(backend):
+            textos = [json_codec.dumps(blob) for blob in blobs]
+            filas.append({'caso': nombre, 'codec': backend, 'bytes': sum(len(t) for t in textos),
+                          'encode_ms': _medir(lambda: [json_codec.dumps(blob) for blob in blobs], repeticiones),
+                          'decode_ms': _medir(lambda: [json_codec.loads(t) for t in textos], repeticiones)})
+    return filas
+
+def ejecutar(tamanos: List[int], repeticiones: int, semilla: int) -> List[Dict[str, Any]]:
+    filas = []
+    for tamano in tamanos:
+        facturas = synthetic_data.generar_facturas(tamano, semilla)
+        desembolso = procesar_lote_desembolso_inicial(synthetic_data.payload_desembolso(facturas))
+        encontrar_tasa = procesar_lote_encontrar_tasa(synthetic_data.payload_encontrar_tasa(facturas))
+        for fila in (medir_respuesta(f'calcular_desembolso_lote x{tamano}', desembolso, repeticiones)
+                     + medir_formatos_columnares(f'calcular_desembolso_lote x{tamano}', desembolso, repeticiones)
+                     + medir_respuesta(f'encontrar_tasa_lote x{tamano}', encontrar_tasa, repeticiones)
+                     + medir_formatos_columnares(f'encontrar_tasa_lote x{tamano}', encontrar_tasa, repeticiones)
+                     + medir_blobs(f'recalculate_result_json x{tamano}', encontrar_tasa['resultados_por_factura'], repeticiones)):
+            _imprimir_fila(fila)
+            filas.append(fila)
+    return filas
+
+def _imprimir_fila(r: Dict[str, Any]) -> None:
+    print(f"{r['caso']:<34} {r['codec']:<9} {r['bytes'] / 1e6:>9.2f} {r['encode_ms']:>11.1f} {r['decode_ms']:>11.1f}", flush=True)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark de codificación/decodificación de respuestas de lote.")
+    parser.add_argument('--facturas', type=int, nargs='+', default=FACTURAS_DEFAULT, help="Facturas por lote.")
+    parser.add_argument('--repeticiones', type=int, default=5)
+    parser.add_argument('--semilla', type=int, default=42)
+    args = parser.parse_args(argv)
+
+    print(f"{'Caso':<34} {'Formato':<9} {'MB':>9} {'Encode ms':>11} {'Decode ms':>11}")
+    ejecutar(args.facturas, args.repeticiones, args.semilla)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
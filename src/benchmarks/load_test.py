@@ -0,0 +1,265 @@
+# src/benchmarks/load_test.py
+"""
+Prueba de carga de la API con lotes sintéticos, en el mismo proceso.
+
+Levanta la app FastAPI con `TestClient` (sin red ni uvicorn) y reemplaza las funciones del
+repositorio de Supabase por un repositorio en memoria cargado con propuestas sintéticas
+(ver `synthetic_data`), de modo que se mide la API y los motores de cálculo, no la red.
+
+Para cada tamaño de lote y endpoint informa latencia p50/p95/p99, peticiones por segundo
+y facturas por segundo.
+
+Uso (desde `src/`):
+    python -m benchmarks.load_test
+    python -m benchmarks.load_test --tamanos 10 1000 --peticiones 20 --concurrencia 4
+    python -m benchmarks.load_test --endpoints simular_liquidacion_lote
+"""
+
+import argparse
+import contextlib
+import copy
+import datetime as dt
+import io
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+# Este módulo se importa como `src.benchmarks` y como `benchmarks` (CLI desde `src/`).
+try:
+    from . import synthetic_data
+    from ..data import supabase_repository as db
+except ImportError:
+    from benchmarks import synthetic_data
+    from data import supabase_repository as db
+
+TAMANOS_DEFAULT = [10, 1000, 10000]
+PETICIONES_OBJETIVO = 20_000  # Facturas totales por escenario: menos peticiones cuanto mayor el lote
+
+# --- Repositorio Local ---
+
+class RepositorioEnMemoria:
+    """Implementa en memoria las funciones de `supabase_repository` que usan los endpoints."""
+
+    def __init__(self, propuestas: List[Dict[str, Any]]):
+        self._propuestas_iniciales = propuestas
+        self._lock = threading.Lock()
+        self.reiniciar()
+
+    def reiniciar(self) -> None:
+        """Vuelve al estado inicial (las liquidaciones cambian estados y saldos)."""
+        with self._lock:
+            self.propuestas = {p['proposal_id']: copy.deepcopy(p) for p in self._propuestas_iniciales}
+            self.resumenes: Dict[str, Dict[str, Any]] = {}
+            self.eventos: Dict[str, List[Dict[str, Any]]] = {}
+            self.claves: Dict[str, Dict[str, Any]] = {}  # idempotency_key -> evento
+            self.auditoria: List[Dict[str, Any]] = []
+
+    # Lecturas
+    def get_proposal_details_by_id(self, proposal_id: str):
+        propuesta = self.propuestas.get(proposal_id)
+        return dict(propuesta) if propuesta else None
+
+    def get_proposals_details_by_ids(self, proposal_ids: List[str]):
+        return {pid: dict(self.propuestas[pid]) for pid in proposal_ids if pid in self.propuestas}
+
+    def get_liquidacion_resumen(self, proposal_id: str):
+        return self.resumenes.get(proposal_id)
+
+    def get_liquidacion_resumenes_by_proposal_ids(self, proposal_ids: List[str]):
+        return {pid: self.resumenes[pid] for pid in proposal_ids if pid in self.resumenes}
+
+    def get_liquidacion_eventos(self, proposal_id: str):
+        resumen = self.resumenes.get(proposal_id)
+        return list(self.eventos.get(resumen['id'], [])) if resumen else []
+
+    def get_last_liquidacion_evento_fechas(self, resumen_ids: List[str]):
+        return {rid: self.eventos[rid][-1]['fecha_evento'] for rid in resumen_ids if self.eventos.get(rid)}
+
+    # Escrituras
+    def get_or_create_liquidacion_resumen(self, proposal_id: str, datos_operacion: Dict[str, Any]) -> str:
+        with self._lock:
+            if proposal_id not in self.resumenes:
+                capital = self.propuestas.get(proposal_id, {}).get('capital_calculado', 0.0)
+                self.resumenes[proposal_id] = {'id': f"res-{proposal_id}", 'proposal_id': proposal_id,
+                                               'saldo_actual': capital, 'capital_original': capital}
+            return self.resumenes[proposal_id]['id']
+
+    def get_liquidacion_eventos_by_idempotency_keys(self, idempotency_keys: List[str]):
+        return {clave: self.claves[clave] for clave in idempotency_keys if clave in self.claves}
+
+    def add_liquidacion_evento(self, liquidacion_resumen_id: str, tipo_evento: str, fecha_evento: dt.date,
+                               monto_recibido: float, dias_diferencia: int, resultado_json: dict,
+                               idempotency_key: Optional[str] = None) -> None:
+        with self._lock:
+            if idempotency_key is not None and idempotency_key in self.claves:
+                raise db.DuplicateEventError(idempotency_key)
+            eventos = self.eventos.setdefault(liquidacion_resumen_id, [])
+            evento = {'liquidacion_resumen_id': liquidacion_resumen_id, 'orden_evento': len(eventos) + 1,
+                      'tipo_evento': tipo_evento, 'fecha_evento': fecha_evento.isoformat(),
+                      'monto_recibido': monto_recibido, 'dias_diferencia': dias_diferencia,
+                      'idempotency_key': idempotency_key}
+            eventos.append(evento)
+            if idempotency_key is not None:
+                self.claves[idempotency_key] = evento
+
+    def update_liquidacion_resumen_saldo(self, liquidacion_resumen_id: str, saldo_actual: float) -> None:
+        with self._lock:
+            for resumen in self.resumenes.values():
+                if resumen['id'] == liquidacion_resumen_id:
+                    resumen['saldo_actual'] = saldo_actual
+
+    def update_proposal_status(self, proposal_id: str, status: str) -> None:
+        with self._lock:
+            if proposal_id in self.propuestas:
+                self.propuestas[proposal_id]['estado'] = status
+
+    def add_audit_event(self, usuario_id: str, entidad_id: str, accion: str, estado_anterior: str,
+                        estado_nuevo: str, detalles_adicionales: dict) -> None:
+        with self._lock:
+            self.auditoria.append({'usuario_id': usuario_id, 'entidad_id': entidad_id, 'accion': accion})
+
+FUNCIONES_REEMPLAZADAS = [
+    'get_proposal_details_by_id', 'get_proposals_details_by_ids', 'get_liquidacion_resumen',
+    'get_liquidacion_resumenes_by_proposal_ids', 'get_liquidacion_eventos', 'get_last_liquidacion_evento_fechas',
+    'get_liquidacion_eventos_by_idempotency_keys', 'get_or_create_liquidacion_resumen', 'add_liquidacion_evento',
+    'update_liquidacion_resumen_saldo',
+    'update_proposal_status', 'add_audit_event',
+]
+
+@contextlib.contextmanager
+def repositorio_local(repositorio: RepositorioEnMemoria) -> Iterator[RepositorioEnMemoria]:
+    """
+    Reemplaza las funciones del repositorio en todos los módulos cargados que las referencian:
+    el módulo `supabase_repository` y los que hicieron `from ... import funcion` (p. ej. los routers).
+    """
+    originales = {nombre: getattr(db, nombre) for nombre in FUNCIONES_REEMPLAZADAS}
+    reemplazos = []
+    for modulo in list(sys.modules.values()):
+        for nombre, original in originales.items():
+            if getattr(modulo, nombre, None) is original:
+                reemplazos.append((modulo, nombre, original))
+                setattr(modulo, nombre, getattr(repositorio, nombre))
+    try:
+        yield repositorio
+    finally:
+        for modulo, nombre, original in reemplazos:
+            setattr(modulo, nombre, original)
+
+# --- Escenarios ---
+
+def _escenarios(cantidad: int, semilla: int) -> Dict[str, Dict[str, Any]]:
+    facturas = synthetic_data.generar_facturas(cantidad, semilla=semilla)
+    propuestas = synthetic_data.propuestas_desembolsadas(facturas)
+    pagos = synthetic_data.liquidaciones(propuestas, semilla=semilla)
+    request_liquidacion = {'usuario_id': 'load-test', 'liquidaciones': pagos}
+    return {
+        'calcular_desembolso_lote': {'ruta': '/calcular_desembolso_lote', 'json': synthetic_data.payload_desembolso(facturas)},
+        'encontrar_tasa_lote': {'ruta': '/encontrar_tasa_lote', 'json': synthetic_data.payload_encontrar_tasa(facturas)},
+        'simular_liquidacion_lote': {'ruta': '/liquidaciones/simular_liquidacion_lote', 'json': request_liquidacion},
+        # Cambia estados: el repositorio se reinicia antes de cada petición (fuera de la medición)
+        'procesar_liquidacion_lote': {'ruta': '/liquidaciones/procesar_liquidacion_lote', 'json': request_liquidacion, 'reinicia': True},
+        '_propuestas': propuestas,
+    }
+
+def _percentil(valores: List[float], p: float) -> float:
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))]
+
+def _tiene_errores_por_factura(respuesta) -> bool:
+    # Los endpoints de lote responden 200 aunque alguna factura falle
+    cuerpo = respuesta.json()
+    return isinstance(cuerpo, dict) and any(r.get('status') == 'ERROR' for r in cuerpo.get('resultados_del_lote', []))
+
+def medir(enviar: Callable[[], Any], peticiones: int, concurrencia: int,
+          antes: Optional[Callable[[], None]] = None) -> Dict[str, float]:
+    """Ejecuta `enviar` `peticiones` veces con `concurrencia` hilos y resume las latencias."""
+    latencias: List[float] = []
+    errores = 0
+    lock = threading.Lock()
+
+    def una_peticion(_):
+        nonlocal errores
+        if antes:
+            antes()
+        inicio = time.perf_counter()
+        respuesta = enviar()
+        segundos = time.perf_counter() - inicio
+        with lock:
+            latencias.append(segundos)
+            if respuesta.status_code >= 400 or _tiene_errores_por_factura(respuesta):
+                errores += 1
+
+    inicio_total = time.perf_counter()
+    if concurrencia <= 1:
+        for i in range(peticiones):
+            una_peticion(i)
+    else:
+        with ThreadPoolExecutor(max_workers=concurrencia) as pool:
+            list(pool.map(una_peticion, range(peticiones)))
+    total = time.perf_counter() - inicio_total
+
+    return {
+        'peticiones': peticiones,
+        'errores': errores,
+        'p50_ms': _percentil(latencias, 50) * 1000,
+        'p95_ms': _percentil(latencias, 95) * 1000,
+        'p99_ms': _percentil(latencias, 99) * 1000,
+        'media_ms': statistics.mean(latencias) * 1000,
+        'rps': peticiones / total if total > 0 else 0.0,
+    }
+
+def ejecutar(tamanos: List[int], endpoints: Optional[List[str]], peticiones: Optional[int],
+             concurrencia: int, semilla: int, salida=None) -> List[Dict[str, Any]]:
+    from fastapi.testclient import TestClient
+    try:
+        from ..api.main import app
+    except ImportError:
+        from api.main import app
+
+    filas = []
+    with TestClient(app) as cliente:
+        for tamano in tamanos:
+            escenarios = _escenarios(tamano, semilla)
+            repositorio = RepositorioEnMemoria(escenarios.pop('_propuestas'))
+            with repositorio_local(repositorio):
+                for nombre, escenario in escenarios.items():
+                    if endpoints and nombre not in endpoints:
+                        continue
+                    n = peticiones or max(3, min(200, PETICIONES_OBJETIVO // tamano))
+                    enviar = lambda e=escenario: cliente.post(e['ruta'], json=e['json'])  # noqa: E731
+                    enviar()  # Calentamiento (imports perezosos, pool de procesos)
+                    # Con concurrencia, reiniciar el repositorio en paralelo mezclaría peticiones: se limita a 1
+                    concurrencia_real = 1 if escenario.get('reinicia') else concurrencia
+                    resultado = medir(enviar, n, concurrencia_real, antes=repositorio.reiniciar if escenario.get('reinicia') else None)
+                    resultado.update({'endpoint': nombre, 'facturas': tamano, 'concurrencia': concurrencia_real,
+                                      'facturas_por_segundo': resultado['rps'] * tamano})
+                    filas.append(resultado)
+                    _imprimir_fila(resultado, salida)
+    return filas
+
+def _imprimir_fila(r: Dict[str, Any], salida=None) -> None:
+    print(f"{r['endpoint']:<28} {r['facturas']:>7} {r['peticiones']:>6} {r['errores']:>5} {r['p50_ms']:>10.1f} "
+          f"{r['p95_ms']:>10.1f} {r['p99_ms']:>10.1f} {r['rps']:>8.1f} {r['facturas_por_segundo']:>12.0f}", file=salida, flush=True)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Prueba de carga en proceso de la API con lotes sintéticos.")
+    parser.add_argument('--tamanos', type=int, nargs='+', default=TAMANOS_DEFAULT, help="Facturas por lote.")
+    parser.add_argument('--endpoints', nargs='+', default=None, help="Subconjunto de endpoints a medir.")
+    parser.add_argument('--peticiones', type=int, default=None, help="Peticiones por escenario (por defecto, según el tamaño).")
+    parser.add_argument('--concurrencia', type=int, default=1, help="Hilos que envían peticiones a la vez.")
+    parser.add_argument('--semilla', type=int, default=42)
+    parser.add_argument('--verbose', action='store_true', help="No silenciar los print de la aplicación.")
+    args = parser.parse_args(argv)
+
+    consola = sys.stdout
+    print(f"{'Endpoint':<28} {'Facturas':>7} {'Pet.':>6} {'Err.':>5} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'RPS':>8} {'Facturas/s':>12}")
+    # La aplicación usa print para depurar: se descarta, salvo las filas del reporte
+    with contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO()):
+        filas = ejecutar(args.tamanos, args.endpoints, args.peticiones, args.concurrencia, args.semilla, salida=consola)
+    return 1 if any(f['errores'] for f in filas) else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
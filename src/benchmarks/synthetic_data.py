@@ -0,0 +1,162 @@
+# src/benchmarks/synthetic_data.py
+"""
+Generador de lotes sintéticos con la forma de los datos reales de la aplicación.
+
+Cada factura sintética tiene monto neto, moneda, tasas (compensatoria y moratoria), plazo y
+fechas realistas, y a partir de ella se arman:
+  - los payloads de `/calcular_desembolso_lote` y `/encontrar_tasa_lote`;
+  - las filas de `propuestas` ya desembolsadas (con `recalculate_result_json` calculado por el
+    mismo motor que usa la aplicación), para alimentar un repositorio local;
+  - las liquidaciones de `/liquidaciones/*`: pagos completos, parciales, anticipados y tardíos.
+
+El generador es determinista para una misma semilla.
+"""
+
+import datetime
+import json
+import random
+from typing import Any, Dict, List, Optional
+
+# Este módulo se importa como `src.benchmarks` y como `benchmarks` (CLI desde `src/`).
+try:
+    from ..core.factoring_calculator import procesar_lote_encontrar_tasa
+    from ..core.date_utils import formatear_fecha, formatear_fecha_iso, a_ordinal
+except ImportError:
+    from core.factoring_calculator import procesar_lote_encontrar_tasa
+    from core.date_utils import formatear_fecha, formatear_fecha_iso, a_ordinal
+
+IGV_PCT = 0.18
+MONEDAS = [('PEN', 0.7), ('USD', 0.3)]
+TASAS_MENSUALES_PCT = [1.5, 1.8, 2.0, 2.2, 2.5, 3.0]
+PLAZOS_CREDITO_DIAS = [30, 45, 60, 90, 120]
+
+# Distribución de pagos en las liquidaciones: (tipo, probabilidad)
+TIPOS_PAGO = [('completo', 0.5), ('parcial', 0.2), ('anticipado', 0.15), ('tardio', 0.15)]
+
+def _elegir(rng: random.Random, opciones):
+    valores, pesos = zip(*opciones)
+    return rng.choices(valores, weights=pesos, k=1)[0]
+
+def generar_facturas(cantidad: int, semilla: int = 42, fecha_desembolso: Optional[datetime.date] = None) -> List[Dict[str, Any]]:
+    """Facturas sintéticas de un lote (mismo emisor, como en la aplicación)."""
+    rng = random.Random(semilla)
+    fecha_desembolso = fecha_desembolso or datetime.date(2025, 1, 15)
+    emisor = f"EMISOR SINTETICO {semilla}"
+    facturas = []
+    for i in range(cantidad):
+        plazo_credito = rng.choice(PLAZOS_CREDITO_DIAS)
+        fecha_emision = fecha_desembolso - datetime.timedelta(days=rng.randint(0, 10))
+        fecha_pago = fecha_emision + datetime.timedelta(days=plazo_credito)
+        plazo_operacion = max(1, (fecha_pago - fecha_desembolso).days)
+        monto_total = round(rng.lognormvariate(9.5, 0.9), 2)  # mediana ~13k, cola larga
+        detraccion = round(monto_total * rng.choice([0.0, 0.0, 0.04, 0.12]), 2)
+        tasa_mensual = rng.choice(TASAS_MENSUALES_PCT)
+        moneda = _elegir(rng, MONEDAS)
+        facturas.append({
+            'numero_factura': f"E001-{semilla % 1000:03d}{i:06d}",
+            'emisor_nombre': emisor,
+            'emisor_ruc': f"20{semilla % 10**9:09d}",
+            'aceptante_nombre': f"ACEPTANTE {rng.randint(1, 50)}",
+            'aceptante_ruc': f"20{rng.randint(10**8, 10**9 - 1)}",
+            'moneda_factura': moneda,
+            'monto_total_factura': monto_total,
+            'monto_neto_factura': round(monto_total - detraccion, 2),
+            'fecha_emision_factura': fecha_emision,
+            'fecha_desembolso_factoring': fecha_desembolso,
+            'fecha_pago_calculada': fecha_pago,
+            'plazo_credito_dias': plazo_credito,
+            'plazo_operacion_calculado': plazo_operacion,
+            'tasa_de_avance': rng.choice([0.90, 0.95, 0.98]),
+            'interes_mensual': tasa_mensual,
+            'interes_moratorio': round(tasa_mensual * 1.5, 2),
+            'comision_estructuracion_pct': 0.005,
+            'comision_minima_aplicable': 100.0 if moneda == 'PEN' else 30.0,
+        })
+    return facturas
+
+# --- Payloads de la API de Cálculo ---
+
+def payload_desembolso(facturas: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Payload de `/calcular_desembolso_lote` (misma forma que arma la página de originación)."""
+    return [{
+        'plazo_operacion': f['plazo_operacion_calculado'],
+        'mfn': f['monto_neto_factura'],
+        'tasa_avance': f['tasa_de_avance'],
+        'interes_mensual': f['interes_mensual'] / 100,
+        'comision_estructuracion_pct': f['comision_estructuracion_pct'],
+        'comision_minima_aplicable': f['comision_minima_aplicable'],
+        'igv_pct': IGV_PCT,
+        'comision_afiliacion_aplicable': 0.0,
+        'aplicar_comision_afiliacion': False,
+    } for f in facturas]
+
+def payload_encontrar_tasa(facturas: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Payload de `/encontrar_tasa_lote`: el monto objetivo es el abono del avance elegido."""
+    payload = payload_desembolso(facturas)
+    for item, f in zip(payload, facturas):
+        item['monto_objetivo'] = round(f['monto_neto_factura'] * f['tasa_de_avance'] * 0.95, 2)
+        del item['tasa_avance']
+    return payload
+
+# --- Filas de Base de Datos ---
+
+def propuestas_desembolsadas(facturas: List[Dict[str, Any]], identificador_lote: str = 'LOTE-SINTETICO') -> List[Dict[str, Any]]:
+    """Filas de `propuestas` en estado 'DESEMBOLSADA', con las fechas en ISO como las guarda Supabase."""
+    recalculos = procesar_lote_encontrar_tasa(payload_encontrar_tasa(facturas))['resultados_por_factura']
+    filas = []
+    for f, recalculo in zip(facturas, recalculos):
+        filas.append({
+            'proposal_id': f"{f['emisor_nombre'].replace(' ', '_')}-{f['numero_factura']}",
+            'identificador_lote': identificador_lote,
+            'estado': 'DESEMBOLSADA',
+            'emisor_nombre': f['emisor_nombre'],
+            'emisor_ruc': f['emisor_ruc'],
+            'aceptante_nombre': f['aceptante_nombre'],
+            'aceptante_ruc': f['aceptante_ruc'],
+            'numero_factura': f['numero_factura'],
+            'moneda_factura': f['moneda_factura'],
+            'monto_total_factura': f['monto_total_factura'],
+            'monto_neto_factura': f['monto_neto_factura'],
+            'fecha_emision_factura': formatear_fecha_iso(a_ordinal(f['fecha_emision_factura'])),
+            'fecha_desembolso_factoring': formatear_fecha_iso(a_ordinal(f['fecha_desembolso_factoring'])),
+            'fecha_pago_calculada': formatear_fecha_iso(a_ordinal(f['fecha_pago_calculada'])),
+            'plazo_credito_dias': f['plazo_credito_dias'],
+            'plazo_operacion_calculado': f['plazo_operacion_calculado'],
+            'tasa_de_avance': recalculo['resultado_busqueda']['tasa_avance_encontrada'],
+            'interes_mensual': f['interes_mensual'],
+            'interes_moratorio': f['interes_moratorio'],
+            'capital_calculado': recalculo['calculo_con_tasa_encontrada']['capital'],
+            'recalculate_result_json': json.dumps(recalculo),
+        })
+    return filas
+
+# --- Liquidaciones ---
+
+def liquidaciones(propuestas: List[Dict[str, Any]], semilla: int = 42) -> List[Dict[str, Any]]:
+    """
+    Un pago por propuesta (forma de `LiquidacionInfo`): completo en fecha, parcial,
+    anticipado o tardío según `TIPOS_PAGO`.
+    """
+    rng = random.Random(semilla + 1)
+    pagos = []
+    for propuesta in propuestas:
+        capital = float(propuesta['capital_calculado'] or 0)
+        vencimiento = datetime.date.fromisoformat(propuesta['fecha_pago_calculada'])
+        tipo = _elegir(rng, TIPOS_PAGO)
+        if tipo == 'parcial':
+            monto, fecha = capital * rng.uniform(0.3, 0.9), vencimiento
+        elif tipo == 'anticipado':
+            monto, fecha = capital, vencimiento - datetime.timedelta(days=rng.randint(1, 20))
+        elif tipo == 'tardio':
+            monto, fecha = capital * rng.uniform(1.0, 1.05), vencimiento + datetime.timedelta(days=rng.randint(1, 45))
+        else:
+            monto, fecha = capital, vencimiento
+        pagos.append({
+            'proposal_id': propuesta['proposal_id'],
+            'monto_recibido': round(monto, 2),
+            'fecha_pago_real': formatear_fecha(a_ordinal(fecha)),
+            'tasa_interes_compensatoria_pct': float(propuesta['interes_mensual']),
+            'tasa_interes_moratoria_pct': float(propuesta['interes_moratorio']),
+            'is_first_payment': True,
+        })
+    return pagos
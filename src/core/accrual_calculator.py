@@ -0,0 +1,77 @@
+# src/core/accrual_calculator.py
+
+from typing import Dict, Optional, Sequence
+
+try:
+    import numpy as np
+except ImportError:  # numpy es opcional: sin él se calcula fila por fila
+    np = None
+
+from .date_utils import FechaLike, a_ordinal, dias_entre_lote
+from .financial_kernel import IGV_PCT, factor_interes_expm1, igv, interes_compuesto, tasa_diaria
+from .money import redondear_montos_lote
+
+# --- DEVENGO DE INTERESES EN LOTE ---
+# Aplica las mismas fórmulas que `liquidation_calculator.calcular_liquidacion` para un pago
+# de monto cero en la fecha de corte: después de la fecha base (vencimiento o último pago)
+# se devengan interés compensatorio y moratorio compuestos diariamente, más su IGV.
+# Antes de esa fecha no hay devengo, porque el interés del plazo ya fue descontado al desembolsar.
+
+COLUMNAS_DEVENGO = (
+    "dias_vencidos", "interes_compensatorio", "igv_interes_compensatorio",
+    "interes_moratorio", "igv_interes_moratorio", "saldo_proyectado",
+)
+
+def calcular_devengos_lote(
+    capitales: Sequence[float],
+    fechas_base: Sequence[Optional[int]],
+    tasas_compensatorias_pct: Sequence[float],
+    tasas_moratorias_pct: Sequence[float],
+    fecha_corte: FechaLike,
+    igv_pct: float = IGV_PCT
+) -> Dict[str, Sequence]:
+    """
+    Calcula el devengo a `fecha_corte` para un lote de operaciones.
+    `fechas_base` son ordinales de día (ver `date_utils`); las tasas son mensuales en %.
+    Devuelve un diccionario de columnas (arrays de numpy si está disponible), con los
+    montos redondeados a 2 decimales.
+    """
+    corte = a_ordinal(fecha_corte)
+    dias = dias_entre_lote(fechas_base, [corte] * len(fechas_base), minimo=0)
+
+    if np is None:
+        return _calcular_devengos_sin_numpy(capitales, dias, tasas_compensatorias_pct, tasas_moratorias_pct, igv_pct)
+
+    capital = np.abs(np.asarray(capitales, dtype=np.float64))
+    tasa_diaria_compensatoria = tasa_diaria(np.asarray(tasas_compensatorias_pct, dtype=np.float64) / 100)
+    tasa_diaria_moratoria = tasa_diaria(np.asarray(tasas_moratorias_pct, dtype=np.float64) / 100)
+
+    interes_compensatorio = capital * factor_interes_expm1(tasa_diaria_compensatoria, dias)
+    interes_moratorio = capital * factor_interes_expm1(tasa_diaria_moratoria, dias)
+    igv_compensatorio = igv(interes_compensatorio, igv_pct)
+    igv_moratorio = igv(interes_moratorio, igv_pct)
+    saldo = capital + interes_compensatorio + igv_compensatorio + interes_moratorio + igv_moratorio
+
+    return {
+        "dias_vencidos": dias,
+        "interes_compensatorio": redondear_montos_lote(interes_compensatorio),
+        "igv_interes_compensatorio": redondear_montos_lote(igv_compensatorio),
+        "interes_moratorio": redondear_montos_lote(interes_moratorio),
+        "igv_interes_moratorio": redondear_montos_lote(igv_moratorio),
+        "saldo_proyectado": redondear_montos_lote(saldo),
+    }
+
+def _calcular_devengos_sin_numpy(capitales, dias, tasas_compensatorias_pct, tasas_moratorias_pct, igv_pct) -> Dict[str, list]:
+    columnas = {nombre: [] for nombre in COLUMNAS_DEVENGO}
+    for capital, n, tasa_c, tasa_m in zip(capitales, dias, tasas_compensatorias_pct, tasas_moratorias_pct):
+        capital = abs(capital)
+        interes_c = interes_compuesto(capital, tasa_diaria(tasa_c / 100), n)
+        interes_m = interes_compuesto(capital, tasa_diaria(tasa_m / 100), n)
+        igv_c, igv_m = igv(interes_c, igv_pct), igv(interes_m, igv_pct)
+        columnas["dias_vencidos"].append(n)
+        columnas["interes_compensatorio"].append(round(interes_c, 2))
+        columnas["igv_interes_compensatorio"].append(round(igv_c, 2))
+        columnas["interes_moratorio"].append(round(interes_m, 2))
+        columnas["igv_interes_moratorio"].append(round(igv_m, 2))
+        columnas["saldo_proyectado"].append(round(capital + interes_c + igv_c + interes_m + igv_m, 2))
+    return columnas
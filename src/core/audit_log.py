@@ -0,0 +1,136 @@
+# src/core/audit_log.py
+
+import threading
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional
+
+from .structured_logging import get_logger
+
+logger = get_logger('core.auditoria')
+
+# --- REGISTRO DE AUDITORÍA ACOTADO ---
+# Guarda en memoria solo los últimos `capacidad` registros (buffer circular) y mantiene
+# agregados acumulados (cantidad, suma, mínimo y máximo de `saldo_original`) que se
+# actualizan al insertar: las métricas no recorren el registro.
+# Los registros pendientes se envían en bloque a `sink` (p. ej. Supabase) cada
+# `tamano_flush` inserciones, o al llamar a `flush()`.
+
+CAPACIDAD_DEFAULT = 1000
+TAMANO_FLUSH_DEFAULT = 100
+
+Sink = Callable[[List[Dict[str, Any]]], Any]
+
+class RegistroAuditoria:
+    """Registro de auditoría en memoria con tamaño fijo, métricas O(1) y volcado por lotes."""
+
+    def __init__(self, capacidad: int = CAPACIDAD_DEFAULT, sink: Optional[Sink] = None,
+                 tamano_flush: int = TAMANO_FLUSH_DEFAULT):
+        self._registros: Deque[Dict[str, Any]] = deque(maxlen=capacidad)
+        self._pendientes: List[Dict[str, Any]] = []
+        self._sink = sink
+        self._tamano_flush = max(1, tamano_flush)
+        self._lock = threading.Lock()
+        self._estadisticas: Dict[str, Dict[str, float]] = {}  # por decisión
+
+    def registrar(self, registro: Dict[str, Any]) -> None:
+        with self._lock:
+            self._registros.append(registro)
+            self._acumular(registro)
+            if self._sink is not None:
+                self._pendientes.append(registro)
+                lote = self._tomar_pendientes() if len(self._pendientes) >= self._tamano_flush else None
+            else:
+                lote = None
+        if lote:
+            self._enviar(lote)
+
+    append = registrar  # Compatibilidad con el uso previo como lista
+
+    def flush(self) -> int:
+        """Envía al sink los registros pendientes. Devuelve cuántos se enviaron."""
+        with self._lock:
+            lote = self._tomar_pendientes()
+        if lote:
+            self._enviar(lote)
+        return len(lote)
+
+    def metricas(self, decision: str) -> Dict[str, Any]:
+        """Agregados acumulados de `saldo_original` para una decisión (incluye registros ya descartados del buffer)."""
+        with self._lock:
+            estadisticas = self._estadisticas.get(decision)
+            if not estadisticas:
+                return {'cantidad': 0, 'suma': 0.0, 'promedio': 0.0, 'minimo': None, 'maximo': None}
+            return {
+                'cantidad': int(estadisticas['cantidad']),
+                'suma': estadisticas['suma'],
+                'promedio': estadisticas['suma'] / estadisticas['cantidad'],
+                'minimo': estadisticas['minimo'],
+                'maximo': estadisticas['maximo'],
+            }
+
+    def consultar(self, operacion_id: Optional[str] = None, decision: Optional[str] = None,
+                  limite: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Registros retenidos en memoria que cumplen los filtros, del más reciente al más antiguo."""
+        with self._lock:
+            registros = list(self._registros)
+        resultado = []
+        for registro in reversed(registros):
+            if operacion_id is not None and registro.get('operacion_id') != operacion_id:
+                continue
+            if decision is not None and registro.get('decision') != decision:
+                continue
+            resultado.append(registro)
+            if limite is not None and len(resultado) >= limite:
+                break
+        return resultado
+
+    @property
+    def pendientes(self) -> int:
+        return len(self._pendientes)
+
+    def __len__(self) -> int:
+        return len(self._registros)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        with self._lock:
+            return iter(list(self._registros))
+
+    # --- Internos ---
+
+    def _acumular(self, registro: Dict[str, Any]) -> None:
+        monto = float(registro.get('saldo_original') or 0)
+        estadisticas = self._estadisticas.get(registro.get('decision'))
+        if estadisticas is None:
+            self._estadisticas[registro.get('decision')] = {'cantidad': 1, 'suma': monto, 'minimo': monto, 'maximo': monto}
+            return
+        estadisticas['cantidad'] += 1
+        estadisticas['suma'] += monto
+        estadisticas['minimo'] = min(estadisticas['minimo'], monto)
+        estadisticas['maximo'] = max(estadisticas['maximo'], monto)
+
+    def _tomar_pendientes(self) -> List[Dict[str, Any]]:
+        lote, self._pendientes = self._pendientes, []
+        return lote
+
+    def _enviar(self, lote: List[Dict[str, Any]]) -> None:
+        # Fuera del lock: el sink puede hacer I/O. Si falla, los registros vuelven a la cola
+        # (acotada a la capacidad, para no crecer sin límite si el destino sigue caído).
+        try:
+            self._sink(lote)
+        except Exception:
+            logger.exception("No se pudieron enviar %d registros de auditoría al sink; vuelven a la cola", len(lote))
+            with self._lock:
+                self._pendientes[:0] = lote
+                del self._pendientes[:-self._registros.maxlen]
+
+def registro_a_evento_auditoria(registro: Dict[str, Any]) -> Dict[str, Any]:
+    """Convierte un registro de back door en una fila de la tabla `auditoria_eventos`."""
+    return {
+        "usuario_id": registro.get('usuario', 'sistema_automatico'),
+        "entidad_id": registro.get('operacion_id'),
+        "accion": registro.get('decision'),
+        "estado_anterior": None,
+        "estado_nuevo": "LIQUIDADO - BACK DOOR",
+        "detalles_adicionales": registro,
+        "timestamp": registro.get('timestamp'),
+    }
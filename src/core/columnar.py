@@ -0,0 +1,88 @@
+# src/core/columnar.py
+
+import io
+from typing import Any, Dict, List, Optional
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow es opcional: sin él solo está el formato columnar en JSON
+    pa = None
+    pq = None
+
+# --- Formato Columnar para Resultados de Lote ---
+# Los endpoints de lote devuelven una lista de dict anidados, uno por factura, que repite todos
+# los nombres de campo en cada factura. Aquí se convierte esa lista en columnas: una lista de
+# valores por campo, con los campos anidados aplanados por ruta
+# ('desglose_final_detallado.abono.monto'). La misma tabla se puede serializar como JSON
+# columnar, Arrow IPC (stream) o Parquet; `a_filas` reconstruye la lista original.
+
+SEPARADOR = '.'
+
+def _aplanar(valor: Dict[str, Any], prefijo: str, destino: Dict[str, Any]) -> None:
+    for clave, sub_valor in valor.items():
+        ruta = f'{prefijo}{clave}'
+        if isinstance(sub_valor, dict) and sub_valor:
+            _aplanar(sub_valor, ruta + SEPARADOR, destino)
+        else:
+            destino[ruta] = sub_valor
+
+def a_columnas(filas: List[Dict[str, Any]]) -> Dict[str, List[Any]]:
+    """Columnas por ruta de campo, en el orden en que aparecen. Un campo ausente en una fila vale None."""
+    planas = []
+    for fila in filas:
+        plana: Dict[str, Any] = {}
+        _aplanar(fila, '', plana)
+        planas.append(plana)
+    rutas = dict.fromkeys(ruta for plana in planas for ruta in plana)
+    return {ruta: [plana.get(ruta) for plana in planas] for ruta in rutas}
+
+def a_filas(columnas: Dict[str, List[Any]]) -> List[Dict[str, Any]]:
+    """Inversa de `a_columnas`: reconstruye los dict anidados (omitiendo los campos None que faltaban)."""
+    cantidad = len(next(iter(columnas.values()), []))
+    filas: List[Dict[str, Any]] = [{} for _ in range(cantidad)]
+    for ruta, valores in columnas.items():
+        partes = ruta.split(SEPARADOR)
+        for fila, valor in zip(filas, valores):
+            if valor is None:
+                continue
+            destino = fila
+            for parte in partes[:-1]:
+                destino = destino.setdefault(parte, {})
+            destino[partes[-1]] = valor
+    return filas
+
+def _requerir_pyarrow() -> None:
+    if pa is None:
+        raise ImportError("Los formatos Arrow y Parquet requieren pyarrow.")
+
+def a_tabla_arrow(columnas: Dict[str, List[Any]], metadatos: Optional[Dict[str, str]] = None) -> 'pa.Table':
+    """
+    Tabla Arrow de las columnas; `metadatos` (p. ej. los campos del lote) va en el esquema.
+    Arrow exige un tipo por columna: si una mezcla tipos que no puede unificar (p. ej. un
+    número en una factura y un texto de error en otra) lanza ValueError con la ruta del campo.
+    """
+    _requerir_pyarrow()
+    arrays = {}
+    for ruta, valores in columnas.items():
+        try:
+            arrays[ruta] = pa.array(valores)
+        except (pa.ArrowInvalid, pa.ArrowTypeError) as e:
+            raise ValueError(f"El campo '{ruta}' mezcla tipos que Arrow no puede representar: {e}") from e
+    tabla = pa.table(arrays) if arrays else pa.table({})
+    return tabla.replace_schema_metadata(metadatos) if metadatos else tabla
+
+def a_arrow_ipc(tabla: 'pa.Table') -> bytes:
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, tabla.schema) as escritor:
+        escritor.write_table(tabla)
+    return sink.getvalue().to_pybytes()
+
+def a_parquet(tabla: 'pa.Table') -> bytes:
+    """Parquet (zstd). Los tipos que Parquet no admite (p. ej. un dict vacío como valor) dan ValueError."""
+    buffer = io.BytesIO()
+    try:
+        pq.write_table(tabla, buffer, compression='zstd')
+    except pa.ArrowNotImplementedError as e:
+        raise ValueError(f"La tabla no se puede escribir en Parquet: {e}") from e
+    return buffer.getvalue()
@@ -0,0 +1,124 @@
+# src/core/date_utils.py
+
+import datetime
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Union
+
+try:
+    import numpy as np
+except ImportError:  # numpy es opcional: sin él se usan listas
+    np = None
+
+# Las fechas viajan por la aplicación como texto 'DD-MM-YYYY' (UI, cálculos) o ISO
+# 'YYYY-MM-DD[THH:MM:SS+00:00]' (Supabase). Internamente se trabajan como ordinales
+# de día (`date.toordinal()`): una diferencia de días es una resta de enteros.
+
+FORMATO_FECHA = '%d-%m-%Y'
+FORMATO_ISO = '%Y-%m-%d'
+
+FechaLike = Union[str, int, datetime.date, datetime.datetime]
+
+# --- Conversión Texto <-> Ordinal (con caché) ---
+
+@lru_cache(maxsize=8192)
+def parse_fecha(fecha_str: str) -> int:
+    """Convierte 'DD-MM-YYYY' en ordinal de día. Lanza ValueError si el formato es inválido."""
+    try:
+        dia, mes, anio = fecha_str.split('-')
+        return datetime.date(int(anio), int(mes), int(dia)).toordinal()
+    except (ValueError, AttributeError) as e:
+        raise ValueError(f"Fecha inválida '{fecha_str}', se esperaba DD-MM-YYYY.") from e
+
+@lru_cache(maxsize=8192)
+def parse_fecha_iso(fecha_str: str) -> int:
+    """Convierte una fecha ISO en ordinal de día, ignorando hora y zona horaria."""
+    try:
+        solo_fecha = fecha_str.split('T')[0].split(' ')[0].split('+')[0]
+        anio, mes, dia = solo_fecha.split('-')
+        return datetime.date(int(anio), int(mes), int(dia)).toordinal()
+    except (ValueError, AttributeError) as e:
+        raise ValueError(f"Fecha ISO inválida '{fecha_str}'.") from e
+
+@lru_cache(maxsize=8192)
+def formatear_fecha(ordinal: int) -> str:
+    """Ordinal de día -> 'DD-MM-YYYY'."""
+    return datetime.date.fromordinal(ordinal).strftime(FORMATO_FECHA)
+
+@lru_cache(maxsize=8192)
+def formatear_fecha_iso(ordinal: int) -> str:
+    """Ordinal de día -> 'YYYY-MM-DD'."""
+    return datetime.date.fromordinal(ordinal).isoformat()
+
+def a_ordinal(valor: FechaLike) -> int:
+    """Acepta 'DD-MM-YYYY', ISO, date, datetime u ordinal y devuelve el ordinal de día."""
+    if isinstance(valor, datetime.datetime):
+        return valor.date().toordinal()
+    if isinstance(valor, datetime.date):
+        return valor.toordinal()
+    if isinstance(valor, int):
+        return valor
+    if isinstance(valor, str) and len(valor) >= 10 and valor[4] == '-':
+        return parse_fecha_iso(valor)
+    return parse_fecha(valor)
+
+def a_date(valor: FechaLike) -> datetime.date:
+    return datetime.date.fromordinal(a_ordinal(valor))
+
+def iso_a_fecha(fecha_str: str) -> str:
+    """'YYYY-MM-DD[T...]' -> 'DD-MM-YYYY'."""
+    return formatear_fecha(parse_fecha_iso(fecha_str))
+
+def fecha_a_iso(fecha_str: str) -> str:
+    """'DD-MM-YYYY' -> 'YYYY-MM-DD'."""
+    return formatear_fecha_iso(parse_fecha(fecha_str))
+
+def sumar_dias(fecha_str: str, dias: int) -> str:
+    """Suma días a una fecha 'DD-MM-YYYY' y la devuelve en el mismo formato."""
+    return formatear_fecha(parse_fecha(fecha_str) + int(dias))
+
+def dias_entre(inicio: FechaLike, fin: FechaLike) -> int:
+    """Días de `inicio` a `fin` (negativo si `fin` es anterior)."""
+    return a_ordinal(fin) - a_ordinal(inicio)
+
+# --- Operaciones en Lote ---
+
+def parse_fechas(valores: Iterable[Optional[FechaLike]]) -> List[Optional[int]]:
+    """Convierte una secuencia de fechas en ordinales. Los valores vacíos o inválidos quedan en None."""
+    vistos: Dict[Any, Optional[int]] = {}  # En un lote las fechas se repiten mucho
+    ordinales = []
+    for valor in valores:
+        ordinal = vistos.get(valor, -1)
+        if ordinal == -1:
+            try:
+                ordinal = a_ordinal(valor) if valor not in (None, '') else None
+            except (ValueError, TypeError):
+                ordinal = None
+            vistos[valor] = ordinal
+        ordinales.append(ordinal)
+    return ordinales
+
+def dias_entre_lote(inicios: Sequence[Optional[int]], fines: Sequence[Optional[int]], minimo: Optional[int] = None):
+    """
+    Diferencia de días elemento a elemento entre dos secuencias de ordinales.
+    Los pares con algún None dan `minimo` (o 0 si no se indica). Con `minimo` se
+    acota el resultado por abajo (p. ej. 0 para plazos y días de mora).
+    Devuelve un array de numpy si está disponible; si no, una lista.
+    """
+    relleno = minimo if minimo is not None else 0
+    if np is not None:
+        inicio_arr = np.array([v if v is not None else 0 for v in inicios], dtype=np.int64)
+        fin_arr = np.array([v if v is not None else 0 for v in fines], dtype=np.int64)
+        validos = np.array([a is not None and b is not None for a, b in zip(inicios, fines)], dtype=bool)
+        dias = np.where(validos, fin_arr - inicio_arr, relleno)
+        if minimo is not None:
+            dias = np.maximum(dias, minimo)
+        return dias
+
+    dias = []
+    for inicio, fin in zip(inicios, fines):
+        if inicio is None or fin is None:
+            dias.append(relleno)
+            continue
+        diferencia = fin - inicio
+        dias.append(max(diferencia, minimo) if minimo is not None else diferencia)
+    return dias
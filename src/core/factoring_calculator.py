@@ -1,10 +1,14 @@
 
 import datetime
-import math
 import json
 
+from .financial_kernel import comision_estructuracion, factor_interes, igv, tasa_diaria, usa_comision_porcentual
+from .money import a_centavos, a_monto, sumar_centavos
+from .tracing import medir
+
 # --- CÁLCULO DE DESEMBOLSO INICIAL ---
 
+@medir('calc')
 def calcular_desembolso_inicial(**kwargs) -> dict:
     """Adaptador para procesar una sola factura llamando a la lógica de lote."""
     resultado_lote = procesar_lote_desembolso_inicial([kwargs])
@@ -12,6 +16,7 @@ def calcular_desembolso_inicial(**kwargs) -> dict:
         return resultado_lote["resultados_por_factura"][0]
     return resultado_lote
 
+@medir('calc')
 def procesar_lote_desembolso_inicial(lote_datos: list) -> dict:
     """
     Orquesta el cálculo del desembolso para un lote, aplicando la lógica de comisión agregada.
@@ -22,20 +27,19 @@ def procesar_lote_desembolso_inicial(lote_datos: list) -> dict:
     # FASE 1: Decisión Agregada sobre la Comisión (Elegir el MAYOR)
     capital_total_agregado = sum(d.get("mfn", 0) * d.get("tasa_avance", 0) for d in lote_datos)
     comision_fija_total = sum(d.get("comision_minima_aplicable", 0) for d in lote_datos)
-    comision_porcentual_total = capital_total_agregado * lote_datos[0].get("comision_estructuracion_pct", 0)
+    usa_porcentaje = usa_comision_porcentual(capital_total_agregado, lote_datos[0].get("comision_estructuracion_pct", 0), comision_fija_total)
 
-    metodo_de_comision_elegido = "PORCENTAJE" if comision_porcentual_total > comision_fija_total else "FIJO_PRORRATEADO"
+    metodo_de_comision_elegido = "PORCENTAJE" if usa_porcentaje else "FIJO_PRORRATEADO"
 
     # FASE 2: Cálculo Individual con la Decisión ya Tomada
     resultados_finales = []
     for datos_factura in lote_datos:
         capital_individual = datos_factura.get("mfn", 0) * datos_factura.get("tasa_avance", 0)
-        
-        if metodo_de_comision_elegido == "PORCENTAJE":
-            comision_para_esta_factura = capital_individual * datos_factura.get("comision_estructuracion_pct", 0)
-        else: # FIJO_PRORRATEADO
-            comision_para_esta_factura = datos_factura.get("comision_minima_aplicable", 0)
-            
+        comision_para_esta_factura = comision_estructuracion(
+            capital_individual, datos_factura.get("comision_estructuracion_pct", 0),
+            datos_factura.get("comision_minima_aplicable", 0), usa_porcentaje
+        )
+
         resultado_factura = _calcular_desglose_factura(
             comision_estructuracion_fija=comision_para_esta_factura,
             **datos_factura
@@ -43,43 +47,51 @@ def procesar_lote_desembolso_inicial(lote_datos: list) -> dict:
         resultados_finales.append(resultado_factura)
         
     # FASE 3: Corrección de Totales
-    total_comision_corregido = sum(c['comision_estructuracion'] for c in resultados_finales)
+    total_comision_corregido = sumar_centavos([c['comision_estructuracion'] for c in resultados_finales])
 
     return {
         "metodo_comision_elegido": metodo_de_comision_elegido,
-        "comision_estructuracion_total_corregida": round(total_comision_corregido, 2),
+        "comision_estructuracion_total_corregida": a_monto(total_comision_corregido),
         "resultados_por_factura": resultados_finales
     }
 
 def _calcular_desglose_factura(comision_estructuracion_fija: float, **kwargs) -> dict:
-    """Calcula los detalles de UNA factura. Asume que la comisión ya fue resuelta."""
-    capital = kwargs["mfn"] * kwargs["tasa_avance"]
-    tasa_diaria = kwargs["interes_mensual"] / 30
-    interes = capital * (((1 + tasa_diaria) ** kwargs["plazo_operacion"]) - 1)
-    igv_interes = interes * kwargs["igv_pct"]
-    comision_estructuracion = comision_estructuracion_fija
-    igv_comision = comision_estructuracion * kwargs["igv_pct"]
-    
-    abono_real_teorico = capital - interes - igv_interes - comision_estructuracion - igv_comision
-    
-    comision_afiliacion = 0.0
-    igv_afiliacion = 0.0
+    """
+    Calcula los detalles de UNA factura. Asume que la comisión ya fue resuelta.
+    Los montos se llevan en centavos enteros: el capital y las comisiones se convierten al
+    entrar, el interés se calcula sobre el capital en centavos y cada cargo se redondea al
+    calcularlo (el IGV, sobre el monto sin redondear); el abono es la resta exacta de esos cargos. Se pasan a float solo en el resultado.
+    """
+    igv_pct = kwargs["igv_pct"]
+    capital = a_centavos(kwargs["mfn"] * kwargs["tasa_avance"])
+    interes_exacto = a_monto(capital) * factor_interes(tasa_diaria(kwargs["interes_mensual"]), kwargs["plazo_operacion"])
+    interes = a_centavos(interes_exacto)
+    igv_interes = a_centavos(igv(interes_exacto, igv_pct))
+    comision = a_centavos(comision_estructuracion_fija)
+    igv_comision = a_centavos(igv(comision_estructuracion_fija, igv_pct))
+
+    abono_real_teorico = capital - interes - igv_interes - comision - igv_comision
+
+    comision_afiliacion = 0
+    igv_afiliacion = 0
     if kwargs.get("aplicar_comision_afiliacion", False):
-        comision_afiliacion = kwargs.get("comision_afiliacion_aplicable", 0.0)
-        igv_afiliacion = comision_afiliacion * kwargs["igv_pct"]
+        comision_afiliacion_aplicable = kwargs.get("comision_afiliacion_aplicable", 0.0)
+        comision_afiliacion = a_centavos(comision_afiliacion_aplicable)
+        igv_afiliacion = a_centavos(igv(comision_afiliacion_aplicable, igv_pct))
         abono_real_teorico -= (comision_afiliacion + igv_afiliacion)
 
     return {
-        "capital": round(capital, 2), "interes": round(interes, 2),
-        "igv_interes": round(igv_interes, 2), "comision_estructuracion": round(comision_estructuracion, 2),
-        "igv_comision": round(igv_comision, 2), "comision_afiliacion": round(comision_afiliacion, 2),
-        "igv_afiliacion": round(igv_afiliacion, 2), "abono_real_teorico": round(abono_real_teorico, 2),
-        "monto_desembolsado": math.floor(abono_real_teorico),
-        "margen_seguridad": round(kwargs["mfn"] - capital, 2), "plazo_operacion": kwargs["plazo_operacion"]
+        "capital": a_monto(capital), "interes": a_monto(interes),
+        "igv_interes": a_monto(igv_interes), "comision_estructuracion": a_monto(comision),
+        "igv_comision": a_monto(igv_comision), "comision_afiliacion": a_monto(comision_afiliacion),
+        "igv_afiliacion": a_monto(igv_afiliacion), "abono_real_teorico": a_monto(abono_real_teorico),
+        "monto_desembolsado": abono_real_teorico // 100,  # Piso en unidades enteras de moneda
+        "margen_seguridad": a_monto(a_centavos(kwargs["mfn"]) - capital), "plazo_operacion": kwargs["plazo_operacion"]
     }
 
 # --- BÚSQUEDA DE TASA DE AVANCE ---
 
+@medir('calc')
 def encontrar_tasa_de_avance(**kwargs) -> dict:
     """Adaptador para procesar una sola factura llamando a la lógica de lote."""
     resultado_lote = procesar_lote_encontrar_tasa([kwargs])
@@ -87,6 +99,7 @@ def encontrar_tasa_de_avance(**kwargs) -> dict:
         return resultado_lote["resultados_por_factura"][0]
     return resultado_lote
 
+@medir('calc')
 def procesar_lote_encontrar_tasa(lote_datos: list) -> dict:
     """
     Encuentra la tasa de avance para un lote, asegurando que la decisión de la comisión
@@ -105,20 +118,19 @@ def procesar_lote_encontrar_tasa(lote_datos: list) -> dict:
 
     # FASE 2: Decisión Agregada sobre la Comisión (Elegir el MAYOR)
     comision_pct = lote_datos[0].get("comision_estructuracion_pct", 0)
-    comision_total_A = sum(capitales_A) * comision_pct
     comision_total_B = sum(d.get("comision_minima_aplicable", 0) for d in lote_datos)
-    metodo_de_comision_elegido = "PORCENTAJE" if comision_total_A > comision_total_B else "FIJO_PRORRATEADO"
+    usa_porcentaje = usa_comision_porcentual(sum(capitales_A), comision_pct, comision_total_B)
+    metodo_de_comision_elegido = "PORCENTAJE" if usa_porcentaje else "FIJO_PRORRATEADO"
 
     # FASE 3: Cálculo Final Individual con la Decisión ya Tomada
     resultados_finales = []
     for i, datos_factura in enumerate(lote_datos):
-        capital_necesario = capitales_A[i] if metodo_de_comision_elegido == "PORCENTAJE" else capitales_B[i]
+        capital_necesario = capitales_A[i] if usa_porcentaje else capitales_B[i]
         
         # Determinar la comisión de estructuración final para esta factura
-        if metodo_de_comision_elegido == "PORCENTAJE":
-            comision_final_factura = capital_necesario * comision_pct
-        else: # FIJO_PRORRATEADO
-            comision_final_factura = datos_factura.get("comision_minima_aplicable", 0)
+        comision_final_factura = comision_estructuracion(
+            capital_necesario, comision_pct, datos_factura.get("comision_minima_aplicable", 0), usa_porcentaje
+        )
 
         resultado_factura = _construir_respuesta_tasa_encontrada(
             capital_necesario=capital_necesario,
@@ -134,18 +146,17 @@ def procesar_lote_encontrar_tasa(lote_datos: list) -> dict:
 
 def _resolver_capital_dual(**kwargs) -> tuple[float, float]:
     """Resuelve el capital necesario para un monto objetivo bajo ambos esquemas de comisión."""
-    tasa_diaria = kwargs["interes_mensual"] / 30
-    factor_interes = ((1 + tasa_diaria) ** kwargs["plazo_operacion"]) - 1
+    factor = factor_interes(tasa_diaria(kwargs["interes_mensual"]), kwargs["plazo_operacion"])
     costo_fijo_afiliacion = 0.0
     if kwargs.get("aplicar_comision_afiliacion", False):
         costo_fijo_afiliacion = kwargs.get("comision_afiliacion_aplicable", 0) * (1 + kwargs["igv_pct"])
 
     # Escenario A: Comisión por Porcentaje
-    costo_variable_A = (factor_interes + kwargs["comision_estructuracion_pct"]) * (1 + kwargs["igv_pct"])
+    costo_variable_A = (factor + kwargs["comision_estructuracion_pct"]) * (1 + kwargs["igv_pct"])
     capital_A = (kwargs["monto_objetivo"] + costo_fijo_afiliacion) / (1 - costo_variable_A) if (1 - costo_variable_A) > 0 else 0
 
     # Escenario B: Comisión Fija
-    costo_variable_B = factor_interes * (1 + kwargs["igv_pct"])
+    costo_variable_B = factor * (1 + kwargs["igv_pct"])
     costo_fijo_estructuracion = kwargs["comision_minima_aplicable"] * (1 + kwargs["igv_pct"])
     costos_fijos_totales_B = costo_fijo_estructuracion + costo_fijo_afiliacion
     capital_B = (kwargs["monto_objetivo"] + costos_fijos_totales_B) / (1 - costo_variable_B) if (1 - costo_variable_B) > 0 else 0
@@ -158,22 +169,20 @@ def _construir_respuesta_tasa_encontrada(capital_necesario: float, comision_estr
     if mfn == 0: return {"error": "MFN no puede ser cero."}
 
     capital = capital_necesario
-    tasa_diaria = kwargs["interes_mensual"] / 30
-    factor_interes = ((1 + tasa_diaria) ** kwargs["plazo_operacion"]) - 1
-    interes = capital * factor_interes
-    igv_interes = interes * kwargs["igv_pct"]
+    interes = capital * factor_interes(tasa_diaria(kwargs["interes_mensual"]), kwargs["plazo_operacion"])
+    igv_interes = igv(interes, kwargs["igv_pct"])
     
     # LA LÓGICA DE DECISIÓN YA NO ESTÁ AQUÍ. Se usa el valor pre-calculado.
-    comision_estructuracion = comision_estructuracion_final
-    igv_comision_estructuracion = comision_estructuracion * kwargs["igv_pct"]
+    comision = comision_estructuracion_final
+    igv_comision_estructuracion = igv(comision, kwargs["igv_pct"])
     
     comision_afiliacion = 0.0
     igv_afiliacion = 0.0
     if kwargs.get("aplicar_comision_afiliacion", False):
         comision_afiliacion = kwargs.get("comision_afiliacion_aplicable", 0)
-        igv_afiliacion = comision_afiliacion * kwargs["igv_pct"]
+        igv_afiliacion = igv(comision_afiliacion, kwargs["igv_pct"])
     
-    abono_real = capital - interes - igv_interes - comision_estructuracion - igv_comision_estructuracion - comision_afiliacion - igv_afiliacion
+    abono_real = capital - interes - igv_interes - comision - igv_comision_estructuracion - comision_afiliacion - igv_afiliacion
     margen_seguridad = mfn - capital
     total_igv = igv_interes + igv_comision_estructuracion + igv_afiliacion
     tasa_avance_encontrada = capital / mfn
@@ -181,7 +190,7 @@ def _construir_respuesta_tasa_encontrada(capital_necesario: float, comision_estr
     desglose = {
         "abono": {"monto": round(abono_real, 2), "porcentaje": round((abono_real / mfn) * 100, 3)},
         "interes": {"monto": round(interes, 2), "porcentaje": round((interes / mfn) * 100, 3)},
-        "comision_estructuracion": {"monto": round(comision_estructuracion, 2), "porcentaje": round((comision_estructuracion / mfn) * 100, 3)},
+        "comision_estructuracion": {"monto": round(comision, 2), "porcentaje": round((comision / mfn) * 100, 3)},
         "comision_afiliacion": {"monto": round(comision_afiliacion, 2), "porcentaje": round((comision_afiliacion / mfn) * 100, 3)},
         "igv_total": {"monto": round(total_igv, 2), "porcentaje": round((total_igv / mfn) * 100, 3)},
         "margen_seguridad": {"monto": round(margen_seguridad, 2), "porcentaje": round((margen_seguridad / mfn) * 100, 3)}
@@ -195,7 +204,7 @@ def _construir_respuesta_tasa_encontrada(capital_necesario: float, comision_estr
         },
         "calculo_con_tasa_encontrada": {
             "capital": round(capital, 2), "interes": round(interes, 2), "igv_interes": round(igv_interes, 2),
-            "comision_estructuracion": round(comision_estructuracion, 2), "igv_comision_estructuracion": round(igv_comision_estructuracion, 2),
+            "comision_estructuracion": round(comision, 2), "igv_comision_estructuracion": round(igv_comision_estructuracion, 2),
             "comision_afiliacion": round(comision_afiliacion, 2), "igv_afiliacion": round(igv_afiliacion, 2),
             "margen_seguridad": round(margen_seguridad, 2), "plazo_operacion": kwargs["plazo_operacion"]
         },
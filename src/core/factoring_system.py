@@ -1,9 +1,18 @@
 # factoring_sistema_completo_back_door.py
 import datetime
 import math
+import numpy as np
 import pandas as pd
 import json
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Sequence, Union
+
+from .audit_log import RegistroAuditoria, Sink
+from .date_utils import parse_fechas
+from .financial_kernel import (IGV_PCT, aplica_back_door, comision_estructuracion, factor_interes, factor_interes_lote,
+                               igv, interes_compuesto, reduccion_back_door, tasa_diaria, usa_comision_porcentual)
+from .report_builder import construir_reporte, exportar_reporte, Liquidaciones, TAMANO_CHUNK_DEFAULT
+
+TASA_MORATORIA_MENSUAL = 0.03  # 3% mensual
 
 class SistemaFactoringCompleto:
     """
@@ -11,9 +20,9 @@ class SistemaFactoringCompleto:
     Incluye corrección crítica + lógica de liquidación forzada por montos mínimos
     """
     
-    def __init__(self):
+    def __init__(self, sink_auditoria: Optional[Sink] = None, capacidad_auditoria: int = 1000):
         # Parámetros financieros fijos
-        self.igv_pct = 0.18
+        self.igv_pct = IGV_PCT
         self.dias_ano_comercial = 360
         
         # Configuración BACK DOOR (personalizable)
@@ -24,8 +33,8 @@ class SistemaFactoringCompleto:
             'niveles_configuracion': [50.0, 100.0, 150.0, 200.0]
         }
         
-        # Log de auditoría
-        self.log_auditoria = []
+        # Log de auditoría (acotado; los registros se vuelcan en bloque a `sink_auditoria` si se indica)
+        self.log_auditoria = RegistroAuditoria(capacidad=capacidad_auditoria, sink=sink_auditoria)
     
     # =========================================================================
     # MÓDULO DE ORIGINACIÓN
@@ -59,13 +68,9 @@ class SistemaFactoringCompleto:
             capital_total += capital_factura
             comision_fija_total += factura.get('comision_minima', 0)
         
-        comision_pct_total = capital_total * lote_facturas[0].get('comision_porcentual', 0)
-        
         # Elegir método que genere MAYOR comisión
-        if comision_pct_total > comision_fija_total:
-            metodo_comision = "PORCENTAJE"
-        else:
-            metodo_comision = "FIJO"
+        usa_porcentaje = usa_comision_porcentual(capital_total, lote_facturas[0].get('comision_porcentual', 0), comision_fija_total)
+        metodo_comision = "PORCENTAJE" if usa_porcentaje else "FIJO"
         
         # PROCESAMIENTO INDIVIDUAL DE FACTURAS
         resultados_originacion = []
@@ -75,10 +80,8 @@ class SistemaFactoringCompleto:
                 capital_operacion = factura.get('monto_factura_neto', 0) * factura.get('tasa_avance', 0)
                 
                 # Aplicar método de comisión decidido
-                if metodo_comision == "PORCENTAJE":
-                    comision = capital_operacion * factura.get('comision_porcentual', 0)
-                else:
-                    comision = factura.get('comision_minima', 0)
+                comision = comision_estructuracion(capital_operacion, factura.get('comision_porcentual', 0),
+                                                   factura.get('comision_minima', 0), usa_porcentaje)
                 
                 # Cálculo detallado
                 resultado = self._calcular_desglose_originacion(capital_operacion, comision, factura)
@@ -100,16 +103,14 @@ class SistemaFactoringCompleto:
     
     def _calcular_desglose_originacion(self, capital: float, comision: float, datos: Dict) -> Dict:
         """Cálculo detallado de una operación de originación"""
-        tasa_diaria = datos["tasa_interes_mensual"] / 30
         plazo_dias = datos["plazo_dias"]
         
         # Cálculo de intereses compensatorios (fórmula Excel exacta)
-        factor_interes = math.pow(1 + tasa_diaria, plazo_dias)
-        interes_compensatorio = capital * (factor_interes - 1)
+        interes_compensatorio = interes_compuesto(capital, tasa_diaria(datos["tasa_interes_mensual"]), plazo_dias)
         
         # Cálculo de IGV
-        igv_interes = interes_compensatorio * self.igv_pct
-        igv_comision = comision * self.igv_pct
+        igv_interes = igv(interes_compensatorio, self.igv_pct)
+        igv_comision = igv(comision, self.igv_pct)
         
         # Cálculo de desembolso
         abono_teorico = capital - interes_compensatorio - igv_interes - comision - igv_comision
@@ -119,7 +120,7 @@ class SistemaFactoringCompleto:
         igv_afiliacion = 0.0
         if datos.get("aplica_comision_afiliacion", False):
             comision_afiliacion = datos.get("comision_afiliacion", 0)
-            igv_afiliacion = comision_afiliacion * self.igv_pct
+            igv_afiliacion = igv(comision_afiliacion, self.igv_pct)
             abono_teorico -= (comision_afiliacion + igv_afiliacion)
         
         # Fechas
@@ -173,7 +174,153 @@ class SistemaFactoringCompleto:
             liquidacion = self._aplicar_back_door(liquidacion, monto_minimo_uso)
         
         return liquidacion
-    
+
+    def liquidar_lote_con_back_door(self, operaciones: Union[pd.DataFrame, Dict[str, Sequence], List[Dict]],
+                                    fechas_pago: Union[Any, Sequence[Any]], montos_pagados: Sequence[float],
+                                    monto_minimo: Optional[float] = None) -> pd.DataFrame:
+        """
+        Versión vectorizada de `liquidar_operacion_con_back_door` para un lote completo.
+        `operaciones` es columnar (DataFrame, dict de columnas o lista de dicts) con las mismas
+        claves que la versión individual; `fechas_pago` puede ser una sola fecha para todo el lote.
+        Devuelve un DataFrame con una fila por operación y las mismas claves que el dict individual,
+        más la columna `error` (None si la fila se liquidó).
+        """
+        df = pd.DataFrame(operaciones).reset_index(drop=True)
+        n = len(df)
+        if n == 0:
+            return pd.DataFrame()
+
+        columnas_requeridas = ['capital_operacion', 'monto_desembolsado', 'interes_compensatorio',
+                               'igv_interes', 'tasa_interes_mensual', 'fecha_desembolso', 'fecha_vencimiento']
+        faltantes = [c for c in columnas_requeridas if c not in df.columns]
+        if faltantes:
+            raise ValueError(f"Faltan columnas en las operaciones: {faltantes}")
+
+        a_array = lambda valores: np.array([o if o is not None else -1 for o in parse_fechas(valores)], dtype=np.int64)  # noqa: E731
+        if isinstance(fechas_pago, (str, datetime.date)):
+            pago = np.full(n, a_array([fechas_pago])[0], dtype=np.int64)
+        else:
+            pago = a_array(fechas_pago)
+        desembolso = a_array(df['fecha_desembolso'])
+        vencimiento = a_array(df['fecha_vencimiento'])
+
+        capital = df['capital_operacion'].to_numpy(dtype=np.float64)
+        tasa_mensual = df['tasa_interes_mensual'].to_numpy(dtype=np.float64)
+        monto_pagado = np.asarray(montos_pagados, dtype=np.float64)
+
+        # --- Liquidación normal ---
+        dias_transcurridos = pago - desembolso
+        errores = np.full(n, None, dtype=object)
+        errores[(pago < 0) | (desembolso < 0) | (vencimiento < 0) | np.isnan(capital)] = "Datos de liquidación incompletos"
+        errores[(errores == None) & (dias_transcurridos < 0)] = "Fecha de pago anterior al desembolso"  # noqa: E711
+        dias_mora = np.maximum(pago - vencimiento, 0)
+
+        # (POWER((1+tasa/30), días)-1)*capital, 0 si no hay días
+        # `factor_interes_lote` da los mismos bits que la versión individual (ver financial_kernel)
+        interes_devengado = np.where(dias_transcurridos > 0, factor_interes_lote(tasa_diaria(tasa_mensual), np.maximum(dias_transcurridos, 0)) * capital, 0.0)
+        igv_interes_devengado = igv(interes_devengado, self.igv_pct)
+        interes_moratorio = np.where(dias_mora > 0, factor_interes_lote(tasa_diaria(TASA_MORATORIA_MENSUAL), dias_mora) * capital, 0.0)
+        igv_moratorio = igv(interes_moratorio, self.igv_pct)
+
+        delta_intereses = interes_devengado - df['interes_compensatorio'].to_numpy(dtype=np.float64)
+        delta_igv_intereses = igv_interes_devengado - df['igv_interes'].to_numpy(dtype=np.float64)
+        delta_capital = capital - monto_pagado
+        saldo_global = delta_intereses + delta_igv_intereses + interes_moratorio + igv_moratorio + delta_capital
+
+        # Como en la versión individual: se clasifica sobre los valores sin redondear y solo las
+        # columnas de salida se redondean (el back door trabaja sobre valores redondeados)
+        estado, accion = self._clasificar_casos_lote(delta_intereses, delta_capital, saldo_global)
+        r = lambda valores: np.round(valores, 6)  # noqa: E731
+        interes_moratorio, igv_moratorio = r(interes_moratorio), r(igv_moratorio)
+        delta_intereses, delta_igv_intereses, delta_capital = r(delta_intereses), r(delta_igv_intereses), r(delta_capital)
+        saldo_global = r(saldo_global)
+
+        fechas_por_ordinal = {o: (datetime.date.fromordinal(o) if o > 0 else None) for o in set(pago.tolist())}
+        resultado = pd.DataFrame({
+            "fecha_liquidacion": [fechas_por_ordinal[o] for o in pago.tolist()],
+            "dias_transcurridos": dias_transcurridos,
+            "dias_mora": dias_mora,
+            "interes_devengado": r(interes_devengado),
+            "igv_interes_devengado": r(igv_interes_devengado),
+            "interes_moratorio": interes_moratorio,
+            "igv_moratorio": igv_moratorio,
+            "delta_intereses": delta_intereses,
+            "delta_igv_intereses": delta_igv_intereses,
+            "delta_capital": delta_capital,
+            "saldo_global": saldo_global,
+            "estado_operacion": estado,
+            "accion_recomendada": accion,
+            "monto_pagado": monto_pagado,
+            "capital_operacion": capital,
+            "monto_desembolsado": df['monto_desembolsado'].to_numpy(),
+            "id_operacion": df['id_operacion'].fillna("N/A").to_numpy() if 'id_operacion' in df.columns else np.full(n, "N/A", dtype=object),
+            "back_door_aplicado": np.zeros(n, dtype=bool),
+            "monto_minimo_configurado": np.zeros(n, dtype=np.float64),
+            "reducciones_aplicadas": [[] for _ in range(n)],
+            "saldo_original": saldo_global.copy(),
+        })
+
+        # --- BACK DOOR ---
+        if self.configuracion_back_door['aplicar_back_door']:
+            monto_minimo_uso = monto_minimo or self.configuracion_back_door['monto_minimo_liquidacion']
+            costo_transaccional = self.configuracion_back_door['costo_transaccional_promedio']
+            # Mismas condiciones que `_aplicar_back_door` (ver `financial_kernel.aplica_back_door`)
+            aplica = (errores == None) & aplica_back_door(saldo_global, monto_minimo_uso, costo_transaccional)  # noqa: E711
+            if aplica.any():
+                self._ejecutar_reduccion_secuencial_lote(resultado, aplica, monto_minimo_uso)
+
+        resultado["error"] = errores
+        # En las filas con error los montos calculados no tienen sentido: se dejan vacíos
+        con_error = errores != None  # noqa: E711
+        if con_error.any():
+            for columna in ("interes_devengado", "igv_interes_devengado", "interes_moratorio", "igv_moratorio",
+                            "delta_intereses", "delta_igv_intereses", "delta_capital", "saldo_global", "saldo_original"):
+                resultado.loc[con_error, columna] = np.nan
+            resultado.loc[con_error, ["estado_operacion", "accion_recomendada"]] = None
+        return resultado
+
+    def _ejecutar_reduccion_secuencial_lote(self, resultado: pd.DataFrame, aplica: np.ndarray, monto_minimo: float) -> None:
+        """
+        Versión vectorizada de `_ejecutar_reduccion_secuencial` sobre las filas marcadas en `aplica`:
+        Moratorios → Compensatorios → Capital. Modifica `resultado` en el lugar.
+        """
+        saldo_original = resultado["saldo_global"].to_numpy(dtype=np.float64)
+        saldo_restante = np.where(aplica, saldo_original, 0.0)
+        reducciones = {}
+        componentes = (
+            # (tipo, columna a reducir, columna de IGV a recalcular)
+            ('moratorios', 'interes_moratorio', 'igv_moratorio'),
+            ('compensatorios', 'delta_intereses', 'delta_igv_intereses'),
+            ('capital', 'delta_capital', None),
+        )
+        for tipo, columna, columna_igv in componentes:
+            valor = resultado[columna].to_numpy(dtype=np.float64)
+            reduccion = reduccion_back_door(saldo_restante, valor)  # 0 fuera de `aplica`: ahí el saldo restante es 0
+            reducido = reduccion > 0
+            nuevo_valor = valor - reduccion
+            resultado[columna] = nuevo_valor
+            if columna_igv:
+                resultado[columna_igv] = np.where(reducido, igv(nuevo_valor, self.igv_pct), resultado[columna_igv].to_numpy(dtype=np.float64))
+            saldo_restante = saldo_restante - reduccion
+            reducciones[tipo] = (reducido, reduccion, nuevo_valor)
+
+        resultado["saldo_global"] = np.where(aplica, saldo_restante, saldo_original)
+        resultado["saldo_original"] = saldo_original
+        resultado.loc[aplica, "back_door_aplicado"] = True
+        resultado.loc[aplica, "monto_minimo_configurado"] = monto_minimo
+        resultado.loc[aplica, "estado_operacion"] = "LIQUIDADO - BACK DOOR"
+
+        # Solo las filas con back door (pocas) necesitan el detalle y el registro de auditoría
+        for i in np.flatnonzero(aplica):
+            reducciones_aplicadas = [
+                {'tipo': tipo, 'monto': round(float(reduccion[i]), 2), 'nuevo_saldo': round(float(nuevo_valor[i]), 2)}
+                for tipo, (reducido, reduccion, nuevo_valor) in reducciones.items() if reducido[i]
+            ]
+            resultado.at[i, "reducciones_aplicadas"] = reducciones_aplicadas
+            resultado.at[i, "accion_recomendada"] = (f"Liquidación forzada por monto mínimo (${monto_minimo}). "
+                                                    f"Reducciones aplicadas: {reducciones_aplicadas}")
+            self._registrar_back_door(resultado.loc[i].to_dict())
+
     def _liquidar_operacion_normal(self, operacion: Dict, fecha_pago: datetime.datetime, 
                                   monto_pagado: float) -> Dict:
         """Liquidación normal sin BACK DOOR"""
@@ -201,7 +348,7 @@ class SistemaFactoringCompleto:
             operacion["tasa_interes_mensual"], 
             dias_transcurridos
         )
-        igv_interes_devengado = interes_devengado * self.igv_pct
+        igv_interes_devengado = igv(interes_devengado, self.igv_pct)
         
         # Intereses moratorios (si hay mora)
         interes_moratorio = 0.0
@@ -214,7 +361,7 @@ class SistemaFactoringCompleto:
                 operacion["capital_operacion"],
                 dias_mora
             )
-            igv_moratorio = interes_moratorio * self.igv_pct
+            igv_moratorio = igv(interes_moratorio, self.igv_pct)
         
         # ✅ CORRECCIÓN CRÍTICA: Delta Capital = Capital Operación - Pago
         delta_intereses = interes_devengado - operacion["interes_compensatorio"]
@@ -267,16 +414,13 @@ class SistemaFactoringCompleto:
         """Réplica EXACTA de fórmula Excel: (POWER((1+tasa/30), días)-1)*capital"""
         if dias <= 0:
             return 0.0
-        tasa_diaria = tasa_mensual / 30
-        factor = math.pow(1 + tasa_diaria, dias)
-        return (factor - 1) * capital
+        return factor_interes(tasa_diaria(tasa_mensual), dias) * capital
     
     def _calcular_intereses_moratorios(self, capital: float, dias_mora: int) -> float:
         """Cálculo de intereses moratorios"""
         if dias_mora <= 0:
             return 0.0
-        tasa_moratoria_mensual = 0.03  # 3% mensual
-        return self._calcular_intereses_compensatorios(capital, tasa_moratoria_mensual, dias_mora)
+        return self._calcular_intereses_compensatorios(capital, TASA_MORATORIA_MENSUAL, dias_mora)
     
     # =========================================================================
     # MÓDULO BACK DOOR - LIQUIDACIÓN FORZADA
@@ -287,24 +431,15 @@ class SistemaFactoringCompleto:
         Aplicar BACK DOOR: reducción secuencial para montos mínimos
         """
         saldo_global = liquidacion.get('saldo_global', 0)
+        costo_transaccional = self.configuracion_back_door['costo_transaccional_promedio']
         
-        # Verificar si aplica BACK DOOR
-        if saldo_global <= 0 or saldo_global > monto_minimo:
-            return liquidacion  # No aplica BACK DOOR
-        
-        # Verificar lógica de negocio: ¿Vale la pena perseguir?
-        if not self._vale_la_pena_perseguir(saldo_global):
+        # Saldo positivo bajo el monto mínimo que no vale la pena perseguir: no supera el costo
+        # transaccional (ver `financial_kernel.aplica_back_door`)
+        if aplica_back_door(saldo_global, monto_minimo, costo_transaccional):
             return self._ejecutar_reduccion_secuencial(liquidacion, saldo_global, monto_minimo)
         
         return liquidacion
     
-    def _vale_la_pena_perseguir(self, monto_saldo: float) -> bool:
-        """
-        Lógica de negocio: ¿El costo transaccional justifica perseguir el pago?
-        """
-        costo_transaccional = self.configuracion_back_door['costo_transaccional_promedio']
-        return monto_saldo > costo_transaccional
-    
     def _ejecutar_reduccion_secuencial(self, liquidacion: Dict, saldo_original: float, 
                                       monto_minimo: float) -> Dict:
         """
@@ -314,45 +449,39 @@ class SistemaFactoringCompleto:
         saldo_restante = saldo_original
         
         # 1. REDUCIR MORATORIOS (Primera prioridad)
-        if liquidacion.get('interes_moratorio', 0) > 0:
-            reduccion_moratorios = min(saldo_restante, liquidacion['interes_moratorio'])
-            
-            if reduccion_moratorios > 0:
-                liquidacion['interes_moratorio'] -= reduccion_moratorios
-                liquidacion['igv_moratorio'] = liquidacion['interes_moratorio'] * self.igv_pct
-                saldo_restante -= reduccion_moratorios
-                reducciones_aplicadas.append({
-                    'tipo': 'moratorios',
-                    'monto': round(reduccion_moratorios, 2),
-                    'nuevo_saldo': round(liquidacion['interes_moratorio'], 2)
-                })
+        reduccion_moratorios = reduccion_back_door(saldo_restante, liquidacion.get('interes_moratorio', 0))
+        if reduccion_moratorios > 0:
+            liquidacion['interes_moratorio'] -= reduccion_moratorios
+            liquidacion['igv_moratorio'] = igv(liquidacion['interes_moratorio'], self.igv_pct)
+            saldo_restante -= reduccion_moratorios
+            reducciones_aplicadas.append({
+                'tipo': 'moratorios',
+                'monto': round(reduccion_moratorios, 2),
+                'nuevo_saldo': round(liquidacion['interes_moratorio'], 2)
+            })
         
         # 2. REDUCIR COMPENSATORIOS (Segunda prioridad)
-        if saldo_restante > 0 and liquidacion.get('delta_intereses', 0) > 0:
-            reduccion_compensatorios = min(saldo_restante, liquidacion['delta_intereses'])
-            
-            if reduccion_compensatorios > 0:
-                liquidacion['delta_intereses'] -= reduccion_compensatorios
-                liquidacion['delta_igv_intereses'] = liquidacion['delta_intereses'] * self.igv_pct
-                saldo_restante -= reduccion_compensatorios
-                reducciones_aplicadas.append({
-                    'tipo': 'compensatorios', 
-                    'monto': round(reduccion_compensatorios, 2),
-                    'nuevo_saldo': round(liquidacion['delta_intereses'], 2)
-                })
+        reduccion_compensatorios = reduccion_back_door(saldo_restante, liquidacion.get('delta_intereses', 0))
+        if reduccion_compensatorios > 0:
+            liquidacion['delta_intereses'] -= reduccion_compensatorios
+            liquidacion['delta_igv_intereses'] = igv(liquidacion['delta_intereses'], self.igv_pct)
+            saldo_restante -= reduccion_compensatorios
+            reducciones_aplicadas.append({
+                'tipo': 'compensatorios', 
+                'monto': round(reduccion_compensatorios, 2),
+                'nuevo_saldo': round(liquidacion['delta_intereses'], 2)
+            })
         
         # 3. REDUCIR CAPITAL (Último recurso)
-        if saldo_restante > 0 and liquidacion.get('delta_capital', 0) > 0:
-            reduccion_capital = min(saldo_restante, liquidacion['delta_capital'])
-            
-            if reduccion_capital > 0:
-                liquidacion['delta_capital'] -= reduccion_capital
-                saldo_restante -= reduccion_capital
-                reducciones_aplicadas.append({
-                    'tipo': 'capital',
-                    'monto': round(reduccion_capital, 2),
-                    'nuevo_saldo': round(liquidacion['delta_capital'], 2)
-                })
+        reduccion_capital = reduccion_back_door(saldo_restante, liquidacion.get('delta_capital', 0))
+        if reduccion_capital > 0:
+            liquidacion['delta_capital'] -= reduccion_capital
+            saldo_restante -= reduccion_capital
+            reducciones_aplicadas.append({
+                'tipo': 'capital',
+                'monto': round(reduccion_capital, 2),
+                'nuevo_saldo': round(liquidacion['delta_capital'], 2)
+            })
         
         # Actualizar saldo global
         liquidacion['saldo_global'] = saldo_restante
@@ -385,7 +514,7 @@ class SistemaFactoringCompleto:
             'decision': 'BACK_DOOR_APLICADO'
         }
         
-        self.log_auditoria.append(registro)
+        self.log_auditoria.registrar(registro)
         print(f"📋 BACK DOOR REGISTRADO: {json.dumps(registro, indent=2, default=str)}")
     
     # =========================================================================
@@ -409,7 +538,31 @@ class SistemaFactoringCompleto:
             return "LIQUIDADO - Caso 6", "Generar NC, devolver saldo negativo"
         else:
             return "NO CLASIFICADO", "Revisión manual requerida"
-    
+
+    def _clasificar_casos_lote(self, delta_intereses: np.ndarray, delta_capital: np.ndarray,
+                               saldo_global: np.ndarray) -> tuple:
+        """Versión vectorizada de `_clasificar_caso_liquidacion` (mismo orden de evaluación)."""
+        di, dc, sg = delta_intereses, delta_capital, saldo_global
+        condiciones = [
+            (di < 0) & (dc < 0) & (sg < 0),
+            (di < 0) & (dc > 0) & (sg > 0),
+            (di > 0) & (dc > 0) & (sg > 0),
+            (di > 0) & (dc < 0) & (sg > 0),
+            (di > 0) & (dc < 0) & (sg < 0),
+            (di < 0) & (dc > 0) & (sg < 0),
+        ]
+        casos = [
+            ("LIQUIDADO - Caso 1", "Generar notas de crédito, devolver dinero al cliente"),
+            ("EN PROCESO - Caso 2", "Generar NC, crear nuevo calendario de pagos"),
+            ("EN PROCESO - Caso 3", "Facturar intereses adicionales, nuevo calendario"),
+            ("EN PROCESO - Caso 4", "Facturar intereses, evaluar moratorios"),
+            ("LIQUIDADO - Caso 5", "Facturar intereses, devolver exceso de capital"),
+            ("LIQUIDADO - Caso 6", "Generar NC, devolver saldo negativo"),
+        ]
+        estado = np.select(condiciones, [c[0] for c in casos], default="NO CLASIFICADO").astype(object)
+        accion = np.select(condiciones, [c[1] for c in casos], default="Revisión manual requerida").astype(object)
+        return estado, accion
+
     def configurar_back_door(self, monto_minimo: Optional[float] = None, 
                            aplicar: Optional[bool] = None, 
                            costo_transaccional: Optional[float] = None) -> Dict:
@@ -426,19 +579,14 @@ class SistemaFactoringCompleto:
     
     def obtener_metricas_back_door(self) -> Dict:
         """Obtener métricas del BACK DOOR"""
-        back_door_aplicados = [log for log in self.log_auditoria if log.get('decision') == 'BACK_DOOR_APLICADO']
-        
-        if back_door_aplicados:
-            montos = [log['saldo_original'] for log in back_door_aplicados]
-            monto_promedio = sum(montos) / len(montos)
-            ahorro_transaccional = len(back_door_aplicados) * self.configuracion_back_door['costo_transaccional_promedio']
-        else:
-            monto_promedio = 0
-            ahorro_transaccional = 0
+        metricas = self.log_auditoria.metricas('BACK_DOOR_APLICADO')
+        ahorro_transaccional = metricas['cantidad'] * self.configuracion_back_door['costo_transaccional_promedio']
         
         return {
-            'total_back_door_aplicados': len(back_door_aplicados),
-            'monto_promedio_back_door': round(monto_promedio, 2),
+            'total_back_door_aplicados': metricas['cantidad'],
+            'monto_promedio_back_door': round(metricas['promedio'], 2),
+            'monto_minimo_back_door': metricas['minimo'],
+            'monto_maximo_back_door': metricas['maximo'],
             'ahorro_transaccional': round(ahorro_transaccional, 2),
             'configuracion_actual': self.configuracion_back_door.copy()
         }
@@ -474,21 +622,11 @@ class SistemaFactoringCompleto:
             'back_door_implementado': True
         }
     
-    def generar_reporte_liquidaciones(self, operaciones_liquidadas: List[Dict]) -> pd.DataFrame:
-        """Generar reporte consolidado de liquidaciones"""
-        if not operaciones_liquidadas:
-            return pd.DataFrame()
-        
-        # Crear DataFrame
-        df = pd.DataFrame(operaciones_liquidadas)
-        
-        # Formatear columnas monetarias
-        columnas_monetarias = ['interes_devengado', 'igv_interes_devengado', 'interes_moratorio', 
-                             'igv_moratorio', 'delta_intereses', 'delta_igv_intereses', 
-                             'delta_capital', 'saldo_global', 'monto_pagado']
-        
-        for col in columnas_monetarias:
-            if col in df.columns:
-                df[col] = df[col].round(2)
-        
-        return df
+    def generar_reporte_liquidaciones(self, operaciones_liquidadas: Union[pd.DataFrame, List[Dict]]) -> pd.DataFrame:
+        """Generar reporte consolidado de liquidaciones (columnas tipadas, montos redondeados)"""
+        return construir_reporte(operaciones_liquidadas)
+    
+    def exportar_reporte_liquidaciones(self, operaciones_liquidadas: Liquidaciones, ruta: str,
+                                       formato: Optional[str] = None, tamano_chunk: int = TAMANO_CHUNK_DEFAULT) -> int:
+        """Exportar el reporte a Parquet o CSV por chunks (ver `report_builder.exportar_reporte`)"""
+        return exportar_reporte(operaciones_liquidadas, ruta, formato=formato, tamano_chunk=tamano_chunk)
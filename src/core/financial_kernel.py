@@ -0,0 +1,95 @@
+# src/core/financial_kernel.py
+
+from decimal import Decimal
+
+try:
+    import numpy as np
+except ImportError:  # numpy es opcional: las primitivas también operan sobre escalares
+    np = None
+
+# --- NÚCLEO DE CÁLCULO FINANCIERO ---
+# Primitivas compartidas por todos los motores (`factoring_calculator`, `liquidation_calculator`,
+# `liquidation_calculator_TEST`, `factoring_system`, `accrual_calculator`, `scenario_calculator`).
+# Solo usan operadores aritméticos, así que cada motor conserva su representación y su
+# aritmética: float, Decimal o arrays de numpy (vectorizado por difusión). Los casos dorados
+# coinciden al centavo con la línea base (`python -m benchmarks.golden_cases`), y
+# `tests/test_financial_kernel.py` compara cada primitiva, con entradas aleatorias, contra la
+# fórmula que antes repetía cada motor.
+#
+# Las tasas se expresan como fracción (0.02 = 2 %); los motores que reciben porcentajes
+# los dividen por 100 antes de llamar a `tasa_diaria`.
+
+DIAS_MES_COMERCIAL = 30
+IGV_PCT = 0.18
+IGV_PCT_DECIMAL = Decimal('0.18')
+
+# --- Interés ---
+
+def tasa_diaria(tasa_mensual):
+    """Tasa diaria equivalente de una tasa mensual (mes comercial de 30 días)."""
+    return tasa_mensual / DIAS_MES_COMERCIAL
+
+def factor_interes(tasa_diaria, dias):
+    """(1 + tasa_diaria) ** dias - 1: fórmula Excel (POWER((1+tasa/30), días)-1)."""
+    return (1 + tasa_diaria) ** dias - 1
+
+def factor_interes_expm1(tasa_diaria, dias):
+    """
+    Igual que `factor_interes` pero con expm1(n * log1p(t)) (solo numpy), sin perder precisión
+    con tasas pequeñas. Da centésimas iguales pero no bits iguales: cada motor usa siempre la misma.
+    """
+    return np.expm1(dias * np.log1p(tasa_diaria))
+
+def factor_interes_lote(tasa_diaria, dias):
+    """
+    `factor_interes` sobre arrays, igual bit a bit a la versión escalar: `np.power` no siempre
+    redondea como el `pow` de la libm, así que se usa este una vez por cada par (tasa, días)
+    distinto del lote (pocos: las tasas y los plazos se repiten).
+    """
+    tasas, dias = np.broadcast_arrays(np.asarray(tasa_diaria, dtype=np.float64), np.asarray(dias, dtype=np.float64))
+    pares, inverso = np.unique(np.stack([tasas.ravel(), dias.ravel()], axis=1), axis=0, return_inverse=True)
+    factores = np.array([factor_interes(t, d) for t, d in pares.tolist()], dtype=np.float64)
+    return factores[inverso.ravel()].reshape(tasas.shape)
+
+def interes_compuesto(capital, tasa_diaria, dias):
+    """Interés compuesto diario de `capital` durante `dias`."""
+    return capital * factor_interes(tasa_diaria, dias)
+
+def igv(monto, igv_pct=None):
+    """IGV de `monto`; con Decimal usa la tasa en Decimal para no mezclar tipos."""
+    if igv_pct is None:
+        igv_pct = IGV_PCT_DECIMAL if isinstance(monto, Decimal) else IGV_PCT
+    return monto * igv_pct
+
+# --- Comisión de Estructuración ---
+
+def usa_comision_porcentual(capital_total, comision_pct, comision_fija_total):
+    """
+    Decisión agregada del lote: se cobra el método que genere MAYOR comisión. True si la
+    comisión porcentual sobre el capital total supera la suma de las comisiones mínimas.
+    """
+    return capital_total * comision_pct > comision_fija_total
+
+def comision_estructuracion(capital, comision_pct, comision_minima, porcentual):
+    """Comisión de una factura con el método ya decidido para el lote."""
+    if np is not None and isinstance(porcentual, np.ndarray):
+        return np.where(porcentual, capital * comision_pct, comision_minima)
+    return capital * comision_pct if porcentual else comision_minima
+
+# --- Back Door (liquidación forzada por montos mínimos) ---
+
+def aplica_back_door(saldo, monto_minimo, costo_transaccional):
+    """
+    El saldo pendiente es positivo, no supera el monto mínimo de liquidación y perseguirlo
+    cuesta más que cobrarlo (no supera el costo transaccional).
+    """
+    return (saldo > 0) & (saldo <= monto_minimo) & (saldo <= costo_transaccional)
+
+def reduccion_back_door(saldo_restante, valor):
+    """
+    Cuánto se reduce un componente (moratorios → compensatorios → capital) con el saldo
+    que queda por condonar: min(saldo, valor) si ambos son positivos, si no 0.
+    """
+    if np is not None and (isinstance(saldo_restante, np.ndarray) or isinstance(valor, np.ndarray)):
+        return np.where((saldo_restante > 0) & (valor > 0), np.minimum(saldo_restante, valor), 0.0)
+    return min(saldo_restante, valor) if saldo_restante > 0 and valor > 0 else 0.0
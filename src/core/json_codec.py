@@ -0,0 +1,52 @@
+# src/core/json_codec.py
+
+import datetime
+import decimal
+import json
+import os
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:  # Opcional: sin orjson se usa json de la biblioteca estándar
+    orjson = None
+
+# --- Serialización JSON ---
+# Punto único para serializar las respuestas de la API y los blobs que se guardan en la base de
+# datos (`recalculate_result_json`, `resultado_json`, `detalles_adicionales`). Usa orjson si está
+# instalado y json de la biblioteca estándar si no; JSON_BACKEND=json fuerza la biblioteca estándar.
+# Ambos caminos producen JSON compacto (sin espacios) y convierten los mismos tipos no nativos.
+
+BACKEND = 'orjson' if orjson is not None and os.environ.get('JSON_BACKEND', 'orjson').lower() != 'json' else 'json'
+
+if orjson is not None:
+    _OPCIONES_ORJSON = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+def _default(valor: Any) -> Any:
+    """Tipos que ninguno de los dos backends serializa por sí solo."""
+    if isinstance(valor, decimal.Decimal):
+        return float(valor)
+    if isinstance(valor, (datetime.date, datetime.datetime)):
+        return valor.isoformat()
+    if isinstance(valor, (set, frozenset, tuple)):
+        return list(valor)
+    if hasattr(valor, 'item'):  # escalares de numpy en el camino de la biblioteca estándar
+        return valor.item()
+    if hasattr(valor, 'tolist'):  # arrays de numpy en el camino de la biblioteca estándar
+        return valor.tolist()
+    return str(valor)
+
+def dumps_bytes(valor: Any) -> bytes:
+    if BACKEND == 'orjson':
+        return orjson.dumps(valor, default=_default, option=_OPCIONES_ORJSON)
+    return json.dumps(valor, default=_default, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+def dumps(valor: Any) -> str:
+    if BACKEND == 'orjson':
+        return orjson.dumps(valor, default=_default, option=_OPCIONES_ORJSON).decode('utf-8')
+    return json.dumps(valor, default=_default, ensure_ascii=False, separators=(',', ':'))
+
+def loads(datos: Union[str, bytes, bytearray]) -> Any:
+    if BACKEND == 'orjson':
+        return orjson.loads(datos)
+    return json.loads(datos)
@@ -1,9 +1,23 @@
-from datetime import datetime, timedelta
+from datetime import datetime
 from decimal import Decimal, getcontext
 
+from .date_utils import formatear_fecha, parse_fecha
+from .financial_kernel import factor_interes, igv, tasa_diaria
+from .money import Centavos, a_centavos, a_monto
+from .tracing import medir
+
 # Set precision for Decimal calculations
 getcontext().prec = 30
 
+# --- MONTOS EN CENTAVOS ---
+# Los montos viajan como centavos enteros (`money.Centavos`) desde la entrada hasta el
+# resultado: se convierten una vez al leerlos y se pasan a float solo al armar la respuesta.
+# Las tasas se aplican en Decimal (precisión 30) y cada cargo se redondea a centavos al
+# calcularlo; el IGV sale del interés sin redondear, como en el resto de los motores. Los
+# totales y el saldo son sumas exactas de los cargos ya redondeados.
+CERO = Decimal('0')
+CIEN = Decimal('100')
+
 def _safe_get(data: dict, key: str, default_value=0, target_type=Decimal):
     """
     Safely gets a value from a dictionary, handles None, and converts its type.
@@ -11,11 +25,33 @@ def _safe_get(data: dict, key: str, default_value=0, target_type=Decimal):
     value = data.get(key)
     if value is None:
         return Decimal(default_value)
+    if target_type is Decimal and type(value) in (Decimal, int):
+        return Decimal(value)  # Exactos: no hace falta pasar por str
     try:
         return target_type(str(value)) # Convert to string before Decimal to avoid float inaccuracies
     except (ValueError, TypeError):
         return Decimal(default_value)
 
+def _safe_get_centavos(data: dict, key: str) -> Centavos:
+    """Como `_safe_get` para un monto: lo devuelve en centavos (0 si falta o no es numérico)."""
+    value = data.get(key)
+    if value is None:
+        return 0
+    try:
+        return a_centavos(value)
+    except (ValueError, TypeError, ArithmeticError):
+        return 0
+
+def _tasa(pct) -> Decimal:
+    """Tasa en % a Decimal. No es un monto: se lee por su texto, el decimal que se ingresó."""
+    return Decimal(str(pct)) / CIEN
+
+def _cargo_e_igv(base: Centavos, tasa_diaria_: Decimal, dias: int) -> tuple:
+    """Interés compuesto de `base` centavos durante `dias`, y su IGV, ambos en centavos."""
+    interes = Decimal(base).scaleb(-2) * factor_interes(tasa_diaria_, dias)
+    return a_centavos(interes), a_centavos(igv(interes))
+
+@medir('calc')
 def calcular_liquidacion(
     datos_operacion: dict,
     monto_recibido: float,
@@ -32,101 +68,94 @@ def calcular_liquidacion(
         if not fecha_pago_esperada_str:
             raise ValueError("La 'fecha_pago_calculada' es inválida o no fue encontrada.")
 
-        capital_desembolsado = _safe_get(datos_operacion, 'capital_calculado')
-        interes_original = _safe_get(datos_operacion, 'interes_calculado')
+        capital_desembolsado = _safe_get_centavos(datos_operacion, 'capital_calculado')
+        interes_original = _safe_get_centavos(datos_operacion, 'interes_calculado')
         plazo_operacion_original = _safe_get(datos_operacion, 'plazo_operacion_calculado', target_type=int)
         interes_mensual_pct = _safe_get(datos_operacion, 'interes_mensual')
-        igv_pct = Decimal('0.18')
 
-        fecha_pago_esperada = datetime.strptime(fecha_pago_esperada_str, '%d-%m-%Y')
-        fecha_pago_real = datetime.strptime(fecha_pago_real_str, '%d-%m-%Y')
+        fecha_pago_esperada = parse_fecha(fecha_pago_esperada_str)
+        fecha_pago_real = parse_fecha(fecha_pago_real_str)
+        monto_recibido_cent = a_centavos(monto_recibido)
 
-    except (ValueError, TypeError, AttributeError) as e:
+    except (ValueError, TypeError, AttributeError, ArithmeticError) as e:
         return {"error": f"Error en los datos de entrada: {e}"}
 
     # 2. Calcular diferencias y tasas
-    dias_diferencia = (fecha_pago_real - fecha_pago_esperada).days
+    dias_diferencia = fecha_pago_real - fecha_pago_esperada
     if abs(dias_diferencia) > 365 * 5:
         return {"error": f"El número de días de diferencia ({dias_diferencia}) excede el límite. Revise las fechas."}
 
-    monto_recibido_dec = Decimal(str(monto_recibido))
-    diferencia_monto_pago = capital_desembolsado - monto_recibido_dec
-    tasa_diaria_compensatoria = (Decimal(str(tasa_interes_compensatoria_pct)) / Decimal('100')) / Decimal('30')
-    tasa_diaria_moratoria = (Decimal(str(tasa_interes_moratoria_pct)) / Decimal('100')) / Decimal('30')
-    tasa_diaria_original = (interes_mensual_pct / Decimal('100')) / Decimal('30') if interes_mensual_pct else Decimal('0')
-
-    # 3. Inicializar variables
-    base_moratorio_calc = Decimal('0')
-    cargo_por_diferencia = Decimal('0')
-    credito_por_diferencia = Decimal('0')
-    interes_compensatorio_final_calc, igv_interes_compensatorio_final_calc = Decimal('0'), Decimal('0')
-    interes_moratorio_final_calc, igv_interes_moratorio_final_calc = Decimal('0'), Decimal('0')
-    interes_a_devolver_final_calc, igv_interes_a_devolver_final_calc = Decimal('0'), Decimal('0')
-
-    if diferencia_monto_pago > 0:
-        cargo_por_diferencia = diferencia_monto_pago
-    else:
-        credito_por_diferencia = abs(diferencia_monto_pago)
+    diferencia_monto_pago = capital_desembolsado - monto_recibido_cent
+    tasa_diaria_compensatoria = tasa_diaria(_tasa(tasa_interes_compensatoria_pct))
+    tasa_diaria_moratoria = tasa_diaria(_tasa(tasa_interes_moratoria_pct))
+    tasa_diaria_original = tasa_diaria(interes_mensual_pct / CIEN) if interes_mensual_pct else CERO
+
+    # 3. Inicializar variables (centavos)
+    base_moratorio_calc = 0
+    interes_compensatorio_final_calc, igv_interes_compensatorio_final_calc = 0, 0
+    interes_moratorio_final_calc, igv_interes_moratorio_final_calc = 0, 0
+    interes_a_devolver_final_calc, igv_interes_a_devolver_final_calc = 0, 0
+
+    cargo_por_diferencia = max(diferencia_monto_pago, 0)
+    credito_por_diferencia = max(-diferencia_monto_pago, 0)
 
     # 4. Lógica de cálculo principal
     if dias_diferencia > 0:
         capital_base_para_interes_calc = abs(capital_desembolsado)
-        
-        interes_compensatorio_final_calc = capital_base_para_interes_calc * ((Decimal('1') + tasa_diaria_compensatoria) ** dias_diferencia - Decimal('1'))
-        igv_interes_compensatorio_final_calc = interes_compensatorio_final_calc * igv_pct
-        
+
+        interes_compensatorio_final_calc, igv_interes_compensatorio_final_calc = _cargo_e_igv(
+            capital_base_para_interes_calc, tasa_diaria_compensatoria, dias_diferencia)
+
         base_moratorio_calc = capital_base_para_interes_calc
-        interes_moratorio_final_calc = base_moratorio_calc * ((Decimal('1') + tasa_diaria_moratoria) ** dias_diferencia - Decimal('1'))
-        igv_interes_moratorio_final_calc = interes_moratorio_final_calc * igv_pct
+        interes_moratorio_final_calc, igv_interes_moratorio_final_calc = _cargo_e_igv(
+            base_moratorio_calc, tasa_diaria_moratoria, dias_diferencia)
 
     elif dias_diferencia < 0:
         dias_anticipacion = abs(dias_diferencia)
-        plazo_real = plazo_operacion_original - dias_anticipacion
-        if plazo_real < 0: plazo_real = 0
-        interes_real_calculado = capital_desembolsado * ((Decimal('1') + tasa_diaria_original) ** plazo_real - Decimal('1'))
-        interes_a_devolver_final_calc = interes_original - interes_real_calculado
-        if interes_a_devolver_final_calc < 0: interes_a_devolver_final_calc = Decimal('0')
-        igv_interes_a_devolver_final_calc = interes_a_devolver_final_calc * igv_pct
+        plazo_real = max(plazo_operacion_original - dias_anticipacion, 0)
+        interes_real_calculado = Decimal(capital_desembolsado).scaleb(-2) * factor_interes(tasa_diaria_original, plazo_real)
+        interes_a_devolver = max(Decimal(interes_original).scaleb(-2) - interes_real_calculado, CERO)
+        interes_a_devolver_final_calc = a_centavos(interes_a_devolver)
+        igv_interes_a_devolver_final_calc = a_centavos(igv(interes_a_devolver))
 
     # 5. Calcular saldo final
-    total_owed_before_payment = capital_desembolsado + interes_compensatorio_final_calc + igv_interes_compensatorio_final_calc + \
-                                interes_moratorio_final_calc + igv_interes_moratorio_final_calc
+    total_intereses = interes_compensatorio_final_calc + igv_interes_compensatorio_final_calc + \
+                      interes_moratorio_final_calc + igv_interes_moratorio_final_calc
+    saldo_final = capital_desembolsado + total_intereses - monto_recibido_cent
 
-    saldo_final = total_owed_before_payment - monto_recibido_dec
-
-    # 6. Preparar el resultado final
+    # 6. Preparar el resultado final (único paso de centavos a float)
     resultado_liquidacion = {
         "parametros_calculo": {
-            "capital_base": float(abs(capital_desembolsado).quantize(Decimal('0.01'))),
-            "base_calculo_mora": float(abs(base_moratorio_calc).quantize(Decimal('0.01'))),
+            "capital_base": a_monto(abs(capital_desembolsado)),
+            "base_calculo_mora": a_monto(abs(base_moratorio_calc)),
             "tasa_interes_compensatoria_pct": tasa_interes_compensatoria_pct,
             "tasa_interes_moratoria_pct": tasa_interes_moratoria_pct,
-            "interes_original_completo": float(interes_original.quantize(Decimal('0.01'))),
+            "interes_original_completo": a_monto(interes_original),
             "plazo_operacion_original": plazo_operacion_original,
-            "capital_no_pagado_en_fecha_pago": float(cargo_por_diferencia.quantize(Decimal('0.01'))),
-            "pago_excedente_sobre_capital": float(credito_por_diferencia.quantize(Decimal('0.01'))),
+            "capital_no_pagado_en_fecha_pago": a_monto(cargo_por_diferencia),
+            "pago_excedente_sobre_capital": a_monto(credito_por_diferencia),
             "tasa_diaria_compensatoria": float(tasa_diaria_compensatoria),
             "tasa_diaria_moratoria": float(tasa_diaria_moratoria),
             "tasa_diaria_original": float(tasa_diaria_original)
         },
         "dias_diferencia": dias_diferencia,
         "tipo_pago": "Tardío" if dias_diferencia > 0 else ("Anticipado" if dias_diferencia < 0 else "A Tiempo"),
-        "cargo_por_diferencia": float(cargo_por_diferencia.quantize(Decimal('0.01'))),
-        "credito_por_diferencia": float(credito_por_diferencia.quantize(Decimal('0.01'))),
+        "cargo_por_diferencia": a_monto(cargo_por_diferencia),
+        "credito_por_diferencia": a_monto(credito_por_diferencia),
         "desglose_cargos": {
-            "interes_compensatorio": float(interes_compensatorio_final_calc.quantize(Decimal('0.01'))),
-            "igv_interes_compensatorio": float(igv_interes_compensatorio_final_calc.quantize(Decimal('0.01'))),
-            "interes_moratorio": float(interes_moratorio_final_calc.quantize(Decimal('0.01'))),
-            "igv_interes_moratorio": float(igv_interes_moratorio_final_calc.quantize(Decimal('0.01'))),
-            "total_cargos": float((interes_compensatorio_final_calc + igv_interes_compensatorio_final_calc + interes_moratorio_final_calc + igv_interes_moratorio_final_calc + cargo_por_diferencia).quantize(Decimal('0.01')))
+            "interes_compensatorio": a_monto(interes_compensatorio_final_calc),
+            "igv_interes_compensatorio": a_monto(igv_interes_compensatorio_final_calc),
+            "interes_moratorio": a_monto(interes_moratorio_final_calc),
+            "igv_interes_moratorio": a_monto(igv_interes_moratorio_final_calc),
+            "total_cargos": a_monto(total_intereses + cargo_por_diferencia)
         },
         "desglose_creditos": {
-            "interes_a_devolver": float(interes_a_devolver_final_calc.quantize(Decimal('0.01'))),
-            "igv_interes_a_devolver": float(igv_interes_a_devolver_final_calc.quantize(Decimal('0.01'))),
-            "total_creditos": float((interes_a_devolver_final_calc + igv_interes_a_devolver_final_calc + credito_por_diferencia).quantize(Decimal('0.01')))
+            "interes_a_devolver": a_monto(interes_a_devolver_final_calc),
+            "igv_interes_a_devolver": a_monto(igv_interes_a_devolver_final_calc),
+            "total_creditos": a_monto(interes_a_devolver_final_calc + igv_interes_a_devolver_final_calc + credito_por_diferencia)
         },
         "liquidacion_final": {
-            "saldo_final_a_liquidar": float(saldo_final.quantize(Decimal('0.01')))
+            "saldo_final_a_liquidar": a_monto(saldo_final)
         },
         "proyeccion_futura": []
     }
@@ -138,41 +167,36 @@ def proyectar_saldo_diario(capital_inicial: float, fecha_inicio: datetime.date,
                            dias_proyeccion: int) -> list:
     """
     Proyecta el saldo diario de un capital, aplicando intereses compensatorios y moratorios.
+    Cada día se cargan los intereses en centavos y el saldo crece con esos cargos.
     """
     proyeccion = []
-    current_capital = Decimal(str(capital_inicial))
-    current_date = fecha_inicio
+    current_capital = a_centavos(capital_inicial)
+    dia_inicio = fecha_inicio.toordinal()
 
-    tasa_diaria_compensatoria = (Decimal(str(tasa_compensatoria_mensual)) / Decimal('100')) / Decimal('30')
-    tasa_diaria_moratoria = (Decimal(str(tasa_moratoria_mensual)) / Decimal('100')) / Decimal('30')
-    igv_pct = Decimal('0.18')
+    tasa_diaria_compensatoria = tasa_diaria(_tasa(tasa_compensatoria_mensual))
+    tasa_diaria_moratoria = tasa_diaria(_tasa(tasa_moratoria_mensual))
 
     for i in range(dias_proyeccion):
-        interes_compensatorio_dia = current_capital * tasa_diaria_compensatoria
-        igv_compensatorio_dia = interes_compensatorio_dia * igv_pct
-
-        base_moratorio_dia = current_capital
-        interes_moratorio_dia = base_moratorio_dia * tasa_diaria_moratoria
-        igv_moratorio_dia = interes_moratorio_dia * igv_pct
+        interes_compensatorio_dia, igv_compensatorio_dia = _cargo_e_igv(current_capital, tasa_diaria_compensatoria, 1)
+        interes_moratorio_dia, igv_moratorio_dia = _cargo_e_igv(current_capital, tasa_diaria_moratoria, 1)
 
         capital_al_inicio_del_dia = current_capital
         current_capital += interes_compensatorio_dia + igv_compensatorio_dia + \
                            interes_moratorio_dia + igv_moratorio_dia
 
         proyeccion.append({
-            "fecha": current_date.strftime('%d-%m-%Y'),
-            "capital_anterior": float(capital_al_inicio_del_dia.quantize(Decimal('0.01'))),
-            "interes_compensatorio": float(interes_compensatorio_dia.quantize(Decimal('0.01'))),
-            "igv_compensatorio": float(igv_compensatorio_dia.quantize(Decimal('0.01'))),
-            "interes_moratorio": float(interes_moratorio_dia.quantize(Decimal('0.01'))),
-            "igv_moratorio": float(igv_moratorio_dia.quantize(Decimal('0.01'))),
-            "capital_proyectado": float(current_capital.quantize(Decimal('0.01')))
+            "fecha": formatear_fecha(dia_inicio + i),
+            "capital_anterior": a_monto(capital_al_inicio_del_dia),
+            "interes_compensatorio": a_monto(interes_compensatorio_dia),
+            "igv_compensatorio": a_monto(igv_compensatorio_dia),
+            "interes_moratorio": a_monto(interes_moratorio_dia),
+            "igv_moratorio": a_monto(igv_moratorio_dia),
+            "capital_proyectado": a_monto(current_capital)
         })
 
-        current_date += timedelta(days=1)
-
     return proyeccion
 
+@medir('calc')
 def procesar_lote_liquidacion(lote_datos: list) -> dict:
     """
     Procesa un lote de solicitudes de liquidación.
@@ -4,17 +4,21 @@ import json
 import os
 import sys
 import csv
-from jinja2 import Template
-from weasyprint import HTML
 
 # --- PATH SETUP ---
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
 if project_root not in sys.path:
     sys.path.insert(0, project_root)
 
+# Como módulo (`core` o `src.core`) o como script, gracias al PATH SETUP de arriba.
+try:
+    from .financial_kernel import IGV_PCT_DECIMAL, igv, interes_compuesto, tasa_diaria
+except ImportError:
+    from src.core.financial_kernel import IGV_PCT_DECIMAL, igv, interes_compuesto, tasa_diaria
+
 # --- CONSTANTS ---
 getcontext().prec = 30
-IGV_PCT = Decimal('0.18')
+IGV_PCT = IGV_PCT_DECIMAL
 
 # =================================================================================
 # ALGORITMO LEGACY (El original, renombrado)
@@ -56,18 +60,18 @@ def calcular_liquidacion_RECONCILIACION(datos_evento: dict) -> dict:
         # Se define la base sobre la cual se calculan los intereses de liquidación.
         base_calculo_liquidacion = capital_desembolsado + interes_original_cobrado + igv_interes_original_cobrado
 
-        tasa_diaria_compensatoria = tasa_compensatoria_pct / 30
+        tasa_diaria_compensatoria = tasa_diaria(tasa_compensatoria_pct)
         dias_transcurridos = (fecha_pago_actual - fecha_desembolso).days
-        interes_compensatorio_real = base_calculo_liquidacion * ((1 + tasa_diaria_compensatoria) ** dias_transcurridos - 1)
+        interes_compensatorio_real = interes_compuesto(base_calculo_liquidacion, tasa_diaria_compensatoria, dias_transcurridos)
 
         interes_moratorio_real = Decimal(0)
         if fecha_pago_actual > fecha_pago_calculada_original:
-            tasa_diaria_moratoria = tasa_moratoria_pct / 30
+            tasa_diaria_moratoria = tasa_diaria(tasa_moratoria_pct)
             dias_de_mora = (fecha_pago_actual - fecha_pago_calculada_original).days
-            interes_moratorio_real = base_calculo_liquidacion * ((1 + tasa_diaria_moratoria) ** dias_de_mora - 1)
+            interes_moratorio_real = interes_compuesto(base_calculo_liquidacion, tasa_diaria_moratoria, dias_de_mora)
 
         interes_real_devengado_total = interes_compensatorio_real + interes_moratorio_real
-        igv_interes_real_devengado = interes_real_devengado_total * IGV_PCT
+        igv_interes_real_devengado = igv(interes_real_devengado_total, IGV_PCT)
 
         # --- FASE 3: CÁLCULO DEL AJUSTE FINAL ---
         ajuste_de_interes = interes_real_devengado_total - interes_original_cobrado
@@ -117,6 +121,10 @@ def calcular_liquidacion_RECONCILIACION(datos_evento: dict) -> dict:
 # FUNCIÓN PARA GENERAR PDF COMPARATIVO
 # =================================================================================
 def generar_pdf_comparativo(inputs, resultado_legacy, resultado_universal):
+    # Solo el PDF necesita jinja2 y weasyprint: los algoritmos se importan sin ellos
+    from jinja2 import Template
+    from weasyprint import HTML
+
     template_html = """
     <!DOCTYPE html>
     <html lang="es">
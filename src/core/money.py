@@ -0,0 +1,123 @@
+# src/core/money.py
+
+import math
+import numbers
+from decimal import ROUND_CEILING, ROUND_DOWN, ROUND_FLOOR, ROUND_HALF_EVEN, ROUND_HALF_UP, Decimal
+from typing import Any, Iterable, List, Union
+
+try:
+    import numpy as np
+except ImportError:  # numpy es opcional: sin él los lotes son listas de int/float
+    np = None
+
+# --- DINERO EN CENTAVOS ENTEROS ---
+# Un monto en centavos es un `int` (`Centavos`) y un lote es un array int64 de numpy (o una
+# lista de int sin numpy). Sumar centavos es exacto y no depende del orden, a diferencia de
+# acumular floats.
+#
+# `liquidation_calculator` y el desglose de `factoring_calculator` llevan los montos en
+# centavos de punta a punta: `a_centavos` al leer la entrada y al cargar cada interés,
+# aritmética entera para totales y saldos, y `a_monto` al armar la respuesta. Los motores
+# vectorizados calculan en float64 y redondean el resultado con `redondear_montos_lote`;
+# los totales se acumulan con `sumar_centavos` y los casos dorados comparan con `a_centavos`.
+#
+# El redondeo siempre es explícito y usa los modos del módulo `decimal`:
+#   ROUND_HALF_EVEN  (por defecto) el de `round(x, 2)`, `np.round` y `Decimal.quantize`
+#   ROUND_HALF_UP    empates hacia afuera del cero
+#   ROUND_FLOOR / ROUND_CEILING / ROUND_DOWN   hacia -∞ / +∞ / hacia el cero
+
+Centavos = int
+MODOS_REDONDEO = (ROUND_HALF_EVEN, ROUND_HALF_UP, ROUND_FLOOR, ROUND_CEILING, ROUND_DOWN)
+
+def _validar_modo(redondeo: str) -> None:
+    if redondeo not in MODOS_REDONDEO:
+        raise ValueError(f"Modo de redondeo no soportado: '{redondeo}'.")
+
+# --- Escalares ---
+
+def a_centavos(valor: Union[int, float, Decimal, str], redondeo: str = ROUND_HALF_EVEN) -> Centavos:
+    """
+    Convierte un monto a centavos enteros. Con float el redondeo es exacto sobre su valor
+    binario (con ROUND_HALF_EVEN da lo mismo que `round(valor, 2)`), sin pasar por str.
+    """
+    _validar_modo(redondeo)
+    if isinstance(valor, numbers.Integral):  # También los enteros de numpy
+        return int(valor) * 100
+    if isinstance(valor, float):
+        # valor == n / d con d potencia de 2: se redondea la fracción n * 100 / d con enteros
+        n, d = valor.as_integer_ratio()
+        cociente, resto = divmod(n * 100, d)  # resto >= 0: el cociente ya es el piso
+        if resto == 0 or redondeo == ROUND_FLOOR:
+            return cociente
+        if redondeo == ROUND_CEILING:
+            return cociente + 1
+        if redondeo == ROUND_DOWN:
+            return cociente + 1 if cociente < 0 else cociente
+        doble = 2 * resto
+        if doble > d:
+            return cociente + 1
+        if doble < d:
+            return cociente
+        if redondeo == ROUND_HALF_UP:  # Empate: hacia afuera del cero
+            return cociente + 1 if cociente >= 0 else cociente
+        return cociente + (cociente & 1)
+    if isinstance(valor, str):
+        valor = Decimal(valor)
+    return int(valor.scaleb(2).to_integral_value(rounding=redondeo))
+
+def a_monto(centavos: Centavos) -> float:
+    """Centavos a float para la API: el float más cercano al monto con 2 decimales."""
+    return centavos / 100
+
+# --- Lotes ---
+
+def _redondear_lote(centavos_float: Any, redondeo: str) -> Any:
+    """Redondea a entero un array float64 de centavos; los NaN se conservan."""
+    if redondeo == ROUND_HALF_EVEN:
+        return np.rint(centavos_float)
+    if redondeo == ROUND_FLOOR:
+        return np.floor(centavos_float)
+    if redondeo == ROUND_CEILING:
+        return np.ceil(centavos_float)
+    truncado = np.trunc(centavos_float)
+    if redondeo == ROUND_DOWN:
+        return truncado
+    # ROUND_HALF_UP: y - trunc(y) es exacto, así que el empate se detecta sin error
+    return truncado + np.where(np.abs(centavos_float - truncado) >= 0.5, np.sign(centavos_float), 0.0)
+
+def _redondear_escalar(centavos_float: float, redondeo: str) -> float:
+    """Igual que `_redondear_lote` para un solo float (lotes sin numpy)."""
+    if centavos_float != centavos_float:  # NaN
+        return centavos_float
+    if redondeo == ROUND_HALF_EVEN:
+        return float(round(centavos_float))
+    if redondeo == ROUND_FLOOR:
+        return float(math.floor(centavos_float))
+    if redondeo == ROUND_CEILING:
+        return float(math.ceil(centavos_float))
+    truncado = float(math.trunc(centavos_float))
+    if redondeo == ROUND_DOWN or abs(centavos_float - truncado) < 0.5:
+        return truncado
+    return truncado + math.copysign(1.0, centavos_float)
+
+def redondear_montos_lote(valores: Iterable[float], redondeo: str = ROUND_HALF_EVEN) -> Union[Any, List[float]]:
+    """
+    Redondea un lote de montos a centavos, devolviendo floats. Opera sobre valores * 100 como
+    `np.round(valores, 2)`, con el que coincide bit a bit en ROUND_HALF_EVEN. Los NaN se conservan.
+    """
+    _validar_modo(redondeo)
+    if np is None:
+        return [_redondear_escalar(v * 100, redondeo) / 100 for v in valores]
+    return _redondear_lote(np.asarray(valores, dtype=np.float64) * 100, redondeo) / 100
+
+def a_centavos_lote(valores: Iterable[float], redondeo: str = ROUND_HALF_EVEN) -> Union[Any, List[Centavos]]:
+    """Lote de montos (finitos) a centavos: array int64 con numpy, lista de int sin él."""
+    _validar_modo(redondeo)
+    if np is None:
+        return [int(_redondear_escalar(v * 100, redondeo)) for v in valores]
+    return _redondear_lote(np.asarray(valores, dtype=np.float64) * 100, redondeo).astype(np.int64)
+
+def sumar_centavos(valores: Iterable[float], redondeo: str = ROUND_HALF_EVEN) -> Centavos:
+    """Suma exacta, en centavos, de un lote de montos."""
+    centavos = a_centavos_lote(valores, redondeo)
+    return int(centavos.sum()) if np is not None else sum(centavos)
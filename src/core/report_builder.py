@@ -0,0 +1,139 @@
+# src/core/report_builder.py
+
+import itertools
+import json
+import os
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow es opcional: sin él solo se exporta a CSV
+    pa = None
+    pq = None
+
+from .money import redondear_montos_lote
+
+# --- REPORTE DE LIQUIDACIONES ---
+# Construye el reporte con tipos fijos por columna (float64 para montos, category para el
+# estado) en lugar de dejar que pandas infiera `object` fila por fila, y redondea todos los
+# montos en una sola operación sobre el bloque. Para reportes grandes (cierre de mes),
+# `exportar_reporte` procesa las liquidaciones por chunks y escribe cada uno al archivo,
+# de modo que nunca hay más de `tamano_chunk` filas en memoria.
+
+COLUMNAS_MONETARIAS = ['interes_devengado', 'igv_interes_devengado', 'interes_moratorio',
+                       'igv_moratorio', 'delta_intereses', 'delta_igv_intereses',
+                       'delta_capital', 'saldo_global', 'monto_pagado']
+COLUMNAS_FLOAT = COLUMNAS_MONETARIAS + ['capital_operacion', 'monto_desembolsado',
+                                        'saldo_original', 'monto_minimo_configurado']
+COLUMNAS_ENTERAS = ['dias_transcurridos', 'dias_mora']
+# Texto con tipo explícito: una columna toda vacía en un chunk no debe cambiar el esquema del archivo
+COLUMNAS_TEXTO = ['id_operacion', 'accion_recomendada', 'error']
+
+# Mismos estados que `SistemaFactoringCompleto._clasificar_caso_liquidacion` y el back door.
+# Categorías fijas: todos los chunks de un export comparten el mismo esquema.
+ESTADOS_OPERACION = [
+    "LIQUIDADO - Caso 1", "EN PROCESO - Caso 2", "EN PROCESO - Caso 3", "EN PROCESO - Caso 4",
+    "LIQUIDADO - Caso 5", "LIQUIDADO - Caso 6", "LIQUIDADO - BACK DOOR", "NO CLASIFICADO",
+]
+ESTADO_DTYPE = pd.CategoricalDtype(ESTADOS_OPERACION)
+
+# Columnas de objetos anidados: se serializan a JSON al exportar
+COLUMNAS_ANIDADAS = ['reducciones_aplicadas']
+
+TAMANO_CHUNK_DEFAULT = 50_000
+
+Liquidaciones = Union[pd.DataFrame, Iterable[Dict[str, Any]]]
+
+def construir_reporte(operaciones_liquidadas: Union[pd.DataFrame, List[Dict[str, Any]]]) -> pd.DataFrame:
+    """Reporte tipado de liquidaciones (dicts de `liquidar_operacion*` o el DataFrame de `liquidar_lote_con_back_door`)."""
+    if isinstance(operaciones_liquidadas, pd.DataFrame):
+        df = operaciones_liquidadas.copy()
+    elif operaciones_liquidadas:
+        df = pd.DataFrame.from_records(operaciones_liquidadas)
+    else:
+        return pd.DataFrame()
+    if df.empty:
+        return df
+
+    # Montos: float64 y redondeo vectorizado sobre el bloque completo
+    columnas_float = [c for c in COLUMNAS_FLOAT if c in df.columns]
+    if columnas_float:
+        bloque = np.array(df[columnas_float].apply(pd.to_numeric, errors='coerce'), dtype=np.float64)
+        monetarias = np.isin(columnas_float, COLUMNAS_MONETARIAS)
+        bloque[:, monetarias] = redondear_montos_lote(bloque[:, monetarias])
+        df[columnas_float] = pd.DataFrame(bloque, columns=columnas_float, index=df.index)
+
+    for columna in COLUMNAS_ENTERAS:
+        if columna in df.columns:
+            df[columna] = pd.to_numeric(df[columna], errors='coerce').astype('Int64')
+
+    for columna in COLUMNAS_TEXTO:
+        if columna in df.columns:
+            df[columna] = df[columna].astype('string')
+    if 'estado_operacion' in df.columns:
+        df['estado_operacion'] = df['estado_operacion'].astype(ESTADO_DTYPE)
+    if 'back_door_aplicado' in df.columns:
+        df['back_door_aplicado'] = df['back_door_aplicado'].fillna(False).astype(bool)
+    if 'fecha_liquidacion' in df.columns:
+        df['fecha_liquidacion'] = pd.to_datetime(df['fecha_liquidacion'], errors='coerce')
+    return df
+
+def _iterar_chunks(operaciones_liquidadas: Liquidaciones, tamano_chunk: int):
+    if isinstance(operaciones_liquidadas, pd.DataFrame):
+        for inicio in range(0, len(operaciones_liquidadas), tamano_chunk):
+            yield operaciones_liquidadas.iloc[inicio:inicio + tamano_chunk]
+        return
+    iterador = iter(operaciones_liquidadas)
+    while True:
+        chunk = list(itertools.islice(iterador, tamano_chunk))
+        if not chunk:
+            return
+        yield chunk
+
+def _serializar_anidadas(df: pd.DataFrame) -> pd.DataFrame:
+    for columna in COLUMNAS_ANIDADAS:
+        if columna in df.columns:
+            df[columna] = [json.dumps(v, default=str) if v is not None else None for v in df[columna]]
+    return df
+
+def exportar_reporte(operaciones_liquidadas: Liquidaciones, ruta: str, formato: Optional[str] = None,
+                     tamano_chunk: int = TAMANO_CHUNK_DEFAULT) -> int:
+    """
+    Escribe el reporte a Parquet o CSV por chunks. `operaciones_liquidadas` puede ser un
+    generador, así no hace falta tener todas las liquidaciones en memoria.
+    `formato` se deduce de la extensión de `ruta` si no se indica. Devuelve las filas escritas.
+    """
+    formato = (formato or os.path.splitext(ruta)[1].lstrip('.') or 'csv').lower()
+    if formato not in ('parquet', 'csv'):
+        raise ValueError(f"Formato de reporte no soportado: '{formato}'. Use 'parquet' o 'csv'.")
+    if formato == 'parquet' and pq is None:
+        raise ImportError("Exportar a Parquet requiere pyarrow. Instálelo o use formato 'csv'.")
+
+    filas = 0
+    escritor = None
+    columnas = None
+    try:
+        for chunk in _iterar_chunks(operaciones_liquidadas, tamano_chunk):
+            df = _serializar_anidadas(construir_reporte(chunk))
+            if df.empty:
+                continue
+            if columnas is None:
+                columnas = list(df.columns)
+            df = df.reindex(columns=columnas)  # Mismo orden de columnas en todos los chunks
+
+            if formato == 'parquet':
+                tabla = pa.Table.from_pandas(df, preserve_index=False)
+                if escritor is None:
+                    escritor = pq.ParquetWriter(ruta, tabla.schema)
+                escritor.write_table(tabla.cast(escritor.schema))
+            else:
+                df.to_csv(ruta, mode='w' if filas == 0 else 'a', header=filas == 0, index=False)
+            filas += len(df)
+    finally:
+        if escritor is not None:
+            escritor.close()
+    return filas
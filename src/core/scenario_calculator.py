@@ -0,0 +1,91 @@
+# src/core/scenario_calculator.py
+
+from typing import Any, Dict, List, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # numpy es opcional: sin él se recorre la grilla con bucles
+    np = None
+
+from .date_utils import parse_fecha
+from .financial_kernel import IGV_PCT, factor_interes, factor_interes_expm1, tasa_diaria
+from .money import a_centavos, a_centavos_lote, a_monto
+from .tracing import medir
+
+MAX_DIAS_DIFERENCIA = 365 * 5  # Mismo límite que `calcular_liquidacion`
+
+# --- GRILLA DE ESCENARIOS DE LIQUIDACIÓN ---
+# Reproduce el saldo final de `liquidation_calculator.calcular_liquidacion` para todas las
+# combinaciones tasas × fechas de pago × montos recibidos de una operación:
+#   - pago tardío (días > 0): saldo = capital + (interés compensatorio + moratorio) * (1 + IGV) - monto
+#   - pago a tiempo o anticipado: saldo = capital - monto (el crédito por anticipación no se descuenta)
+# Igual que allí, cada interés y cada IGV se redondea a centavos por separado y el saldo es
+# la suma exacta en centavos. Los cargos no dependen del monto, así que se calculan una vez
+# por (tasa, fecha) y el monto se resta por difusión (broadcasting) sobre el último eje.
+
+@medir('calc')
+def calcular_grilla_liquidacion(
+    datos_operacion: Dict[str, Any],
+    fechas_pago: Sequence[str],
+    montos_recibidos: Sequence[float],
+    tasas: Sequence[Tuple[float, float]],
+    igv_pct: float = IGV_PCT
+) -> Dict[str, Any]:
+    """
+    Evalúa la grilla completa de una operación ya preparada (ver `liquidacion_service`).
+    `tasas` son pares (compensatoria %, moratoria %) mensuales; `fechas_pago` en 'DD-MM-YYYY'.
+    Devuelve matrices como listas anidadas:
+      - "cargos": [tasa][fecha]   intereses + IGV devengados después del vencimiento
+      - "saldos": [tasa][fecha][monto]
+    """
+    fecha_pago_esperada_str = datos_operacion.get('fecha_pago_calculada')
+    if not fecha_pago_esperada_str:
+        raise ValueError("La 'fecha_pago_calculada' es inválida o no fue encontrada.")
+
+    esperada = parse_fecha(fecha_pago_esperada_str)
+    dias = [parse_fecha(fecha) - esperada for fecha in fechas_pago]
+    fuera_de_rango = [d for d in dias if abs(d) > MAX_DIAS_DIFERENCIA]
+    if fuera_de_rango:
+        raise ValueError(f"El número de días de diferencia ({fuera_de_rango[0]}) excede el límite. Revise las fechas.")
+
+    capital = a_centavos(float(datos_operacion.get('capital_calculado') or 0))
+
+    if np is None:
+        cargos, saldos = _grilla_sin_numpy(capital, dias, montos_recibidos, tasas, igv_pct)
+        return {"dias_diferencia": dias, "cargos": cargos, "saldos": saldos}
+
+    base = a_monto(abs(capital))
+    dias_vencidos = np.maximum(np.asarray(dias, dtype=np.float64), 0)           # (D,)
+    tasas_arr = tasa_diaria(np.asarray(tasas, dtype=np.float64).reshape(-1, 2) / 100)  # (R, 2) diarias
+    montos = a_centavos_lote(montos_recibidos)                                  # (M,) centavos
+
+    # (1 + t) ** n - 1 para cada (tasa, fecha); es 0 cuando no hay días vencidos
+    interes_compensatorio = base * factor_interes_expm1(tasas_arr[:, 0:1], dias_vencidos[None, :])
+    interes_moratorio = base * factor_interes_expm1(tasas_arr[:, 1:2], dias_vencidos[None, :])
+    cargos = sum(a_centavos_lote(monto.ravel()).reshape(monto.shape) for monto in (       # (R, D) centavos
+        interes_compensatorio, interes_compensatorio * igv_pct, interes_moratorio, interes_moratorio * igv_pct))
+    saldos = (capital + cargos)[:, :, None] - montos[None, None, :]                      # (R, D, M) centavos
+
+    return {
+        "dias_diferencia": dias,
+        "cargos": (cargos / 100).tolist(),
+        "saldos": (saldos / 100).tolist(),
+    }
+
+def _grilla_sin_numpy(capital, dias, montos_recibidos, tasas, igv_pct) -> Tuple[List, List]:
+    base = a_monto(abs(capital))
+    montos = [a_centavos(monto) for monto in montos_recibidos]
+    cargos, saldos = [], []
+    for tasa_c, tasa_m in tasas:
+        fila_cargos, fila_saldos = [], []
+        for d in dias:
+            n = max(d, 0)
+            cargo = 0
+            for tasa in (tasa_c, tasa_m):
+                interes = base * factor_interes(tasa_diaria(tasa / 100), n)
+                cargo += a_centavos(interes) + a_centavos(interes * igv_pct)
+            fila_cargos.append(a_monto(cargo))
+            fila_saldos.append([a_monto(capital + cargo - monto) for monto in montos])
+        cargos.append(fila_cargos)
+        saldos.append(fila_saldos)
+    return cargos, saldos
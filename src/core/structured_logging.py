@@ -0,0 +1,132 @@
+# src/core/structured_logging.py
+
+import atexit
+import datetime
+import json
+import logging
+import os
+import queue
+import random
+import threading
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Optional
+
+# --- Logging Estructurado ---
+# Los módulos piden su logger con `get_logger(...)` (jerarquía 'inandes.*') y registran con
+# formato perezoso: `logger.debug("... %s", PayloadJson(datos))` no serializa nada si el
+# nivel DEBUG está desactivado. Los puntos de entrada (API y Home de Streamlit) llaman a
+# `configurar_logging()`, que envía los registros a una cola; un hilo aparte los formatea
+# (JSON de una línea o texto) y los escribe en stderr, así el camino caliente solo encola.
+#
+# Configuración por variables de entorno:
+#   LOG_LEVEL                 nivel de 'inandes' (INFO por defecto)
+#   LOG_FORMAT                'json' (por defecto) o 'texto'
+#   LOG_DEBUG_SAMPLE_RATE     fracción de registros DEBUG marcados con MUESTREAR que se emiten (0.1)
+
+RAIZ = 'inandes'
+MUESTREAR = {'muestrear': True}  # `extra` para payloads de depuración voluminosos
+
+_CAMPOS_ESTANDAR = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime', 'muestrear'}
+
+_lock = threading.Lock()
+_listener: Optional[QueueListener] = None
+
+def get_logger(nombre: str) -> logging.Logger:
+    """Logger de la jerarquía de la aplicación, p. ej. `get_logger('data.repository')`."""
+    return logging.getLogger(f'{RAIZ}.{nombre}')
+
+class PayloadJson:
+    """Serializa `datos` a JSON solo si el registro llega a formatearse."""
+    __slots__ = ('datos',)
+
+    def __init__(self, datos: Any):
+        self.datos = datos
+
+    def __str__(self) -> str:
+        return json.dumps(self.datos, default=str, ensure_ascii=False)
+
+class FiltroMuestreo(logging.Filter):
+    """Deja pasar solo una fracción de los registros DEBUG marcados con `MUESTREAR`."""
+
+    def __init__(self, tasa: float):
+        super().__init__()
+        self.tasa = tasa
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.DEBUG or not getattr(record, 'muestrear', False):
+            return True
+        return random.random() < self.tasa
+
+class JsonFormatter(logging.Formatter):
+    """Un objeto JSON por línea: marca de tiempo, nivel, logger, función, mensaje y campos de `extra`."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        evento = {
+            'ts': datetime.datetime.fromtimestamp(record.created, tz=datetime.timezone.utc).isoformat(timespec='milliseconds'),
+            'nivel': record.levelname,
+            'logger': record.name,
+            'funcion': record.funcName,
+            'mensaje': record.getMessage(),
+        }
+        for clave, valor in vars(record).items():
+            if clave not in _CAMPOS_ESTANDAR:
+                evento[clave] = valor
+        if record.exc_info:
+            evento['excepcion'] = self.formatException(record.exc_info)
+        return json.dumps(evento, default=str, ensure_ascii=False)
+
+class _QueueHandlerSinFormato(QueueHandler):
+    """
+    `QueueHandler.prepare` formatea el mensaje en el hilo que registra (para poder serializar
+    el registro entre procesos). La cola aquí es del mismo proceso, así que el registro se
+    encola tal cual y el formateo queda para el hilo del listener. Los argumentos se leen al
+    formatear: no se deben mutar después de registrarlos.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+def configurar_logging(nivel: Optional[str] = None, formato: Optional[str] = None,
+                       tasa_muestreo_debug: Optional[float] = None) -> logging.Logger:
+    """Configura la jerarquía 'inandes' (idempotente: las llamadas siguientes solo cambian el nivel)."""
+    global _listener
+    raiz = logging.getLogger(RAIZ)
+    raiz.setLevel((nivel or os.environ.get('LOG_LEVEL', 'INFO')).upper())
+
+    with _lock:
+        if _listener is not None:
+            return raiz
+
+        formato = (formato or os.environ.get('LOG_FORMAT', 'json')).lower()
+        if tasa_muestreo_debug is None:
+            tasa_muestreo_debug = float(os.environ.get('LOG_DEBUG_SAMPLE_RATE', '0.1'))
+
+        salida = logging.StreamHandler()
+        if formato == 'json':
+            salida.setFormatter(JsonFormatter())
+        else:
+            salida.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(name)s.%(funcName)s: %(message)s'))
+
+        cola: 'queue.SimpleQueue[logging.LogRecord]' = queue.SimpleQueue()
+        handler = _QueueHandlerSinFormato(cola)
+        handler.addFilter(FiltroMuestreo(tasa_muestreo_debug))  # Se filtra antes de encolar
+        raiz.addHandler(handler)
+        raiz.propagate = False
+
+        _listener = QueueListener(cola, salida)
+        _listener.start()
+        atexit.register(detener_logging)
+    return raiz
+
+def detener_logging() -> None:
+    """Vacía la cola y detiene el hilo del listener."""
+    global _listener
+    with _lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+            raiz = logging.getLogger(RAIZ)
+            for handler in list(raiz.handlers):
+                if isinstance(handler, _QueueHandlerSinFormato):
+                    raiz.removeHandler(handler)
+            raiz.propagate = True
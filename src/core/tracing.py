@@ -0,0 +1,219 @@
+# src/core/tracing.py
+
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+# --- Trazas por Petición y Métricas del Proceso ---
+# Cada petición de la API abre una `Traza` (ver el middleware en `api/main.py`) que acumula:
+#   - el tiempo por categoría de las funciones marcadas con `@medir` ('db' en el repositorio,
+#     'calc' en los motores de cálculo);
+#   - los round trips a la base de datos (cada `.execute()` del cliente instrumentado).
+# Los mismos datos se acumulan en contadores del proceso que `/metrics` expone en el formato
+# de texto de Prometheus. Con varios workers cada proceso tiene sus propios contadores.
+#
+# Solo se mide el nivel más externo de cada categoría: si una función 'calc' llama a otra
+# función 'calc', el tiempo se cuenta una vez.
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+class Traza:
+    """Acumulador de tiempos de una petición."""
+    __slots__ = ('inicio', 'fin', 'spans', 'round_trips', 'segundos_round_trips')
+
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self.fin: Optional[float] = None
+        self.spans: Dict[str, List[float]] = {}  # categoria -> [llamadas, segundos]
+        self.round_trips = 0
+        self.segundos_round_trips = 0.0
+
+    @property
+    def segundos(self) -> float:
+        return (self.fin or time.perf_counter()) - self.inicio
+
+    def server_timing(self) -> str:
+        """Valor de la cabecera `Server-Timing` (duraciones en milisegundos)."""
+        partes = [f'app;dur={self.segundos * 1000:.1f}']
+        for categoria, (llamadas, segundos) in self.spans.items():
+            partes.append(f'{categoria};dur={segundos * 1000:.1f};desc="{int(llamadas)} llamadas"')
+        if self.round_trips:
+            partes.append(f'db-rt;dur={self.segundos_round_trips * 1000:.1f};desc="{self.round_trips} round trips"')
+        return ', '.join(partes)
+
+_traza_actual: contextvars.ContextVar[Optional[Traza]] = contextvars.ContextVar('traza_actual', default=None)
+_categorias_activas: contextvars.ContextVar[frozenset] = contextvars.ContextVar('categorias_activas', default=frozenset())
+
+# --- Registro de Métricas del Proceso ---
+
+_lock = threading.Lock()
+_contadores: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], float] = {}
+_histogramas: Dict[Tuple[Tuple[str, str], ...], List[float]] = {}  # etiquetas -> [bucket_1..bucket_n, suma, cantidad]
+
+_AYUDA = {
+    'inandes_http_requests_total': ('counter', 'Peticiones HTTP atendidas.'),
+    'inandes_http_request_duration_seconds': ('histogram', 'Duración de las peticiones HTTP.'),
+    'inandes_span_seconds_total': ('counter', 'Tiempo acumulado en funciones instrumentadas.'),
+    'inandes_span_calls_total': ('counter', 'Llamadas a funciones instrumentadas.'),
+    'inandes_db_round_trips_total': ('counter', 'Round trips a la base de datos.'),
+    'inandes_db_round_trip_seconds_total': ('counter', 'Tiempo acumulado en round trips a la base de datos.'),
+}
+
+def _sumar(nombre: str, etiquetas: Tuple[Tuple[str, str], ...], valor: float) -> None:
+    clave = (nombre, etiquetas)
+    _contadores[clave] = _contadores.get(clave, 0.0) + valor
+
+def registrar_span(categoria: str, funcion: str, segundos: float) -> None:
+    traza = _traza_actual.get()
+    if traza is not None:
+        acumulado = traza.spans.setdefault(categoria, [0, 0.0])
+        acumulado[0] += 1
+        acumulado[1] += segundos
+    etiquetas = (('categoria', categoria), ('funcion', funcion))
+    with _lock:
+        _sumar('inandes_span_calls_total', etiquetas, 1)
+        _sumar('inandes_span_seconds_total', etiquetas, segundos)
+
+def registrar_round_trip(tabla: str, segundos: float) -> None:
+    traza = _traza_actual.get()
+    if traza is not None:
+        traza.round_trips += 1
+        traza.segundos_round_trips += segundos
+    etiquetas = (('tabla', tabla),)
+    with _lock:
+        _sumar('inandes_db_round_trips_total', etiquetas, 1)
+        _sumar('inandes_db_round_trip_seconds_total', etiquetas, segundos)
+
+def registrar_peticion(metodo: str, ruta: str, status: int, segundos: float) -> None:
+    with _lock:
+        _sumar('inandes_http_requests_total', (('metodo', metodo), ('ruta', ruta), ('status', str(status))), 1)
+        valores = _histogramas.setdefault((('ruta', ruta),), [0.0] * (len(DURATION_BUCKETS) + 2))
+        for i, limite in enumerate(DURATION_BUCKETS):
+            if segundos <= limite:
+                valores[i] += 1
+        valores[-2] += segundos
+        valores[-1] += 1
+
+def reiniciar_metricas() -> None:
+    with _lock:
+        _contadores.clear()
+        _histogramas.clear()
+
+def _formatear_etiquetas(etiquetas: Tuple[Tuple[str, str], ...]) -> str:
+    if not etiquetas:
+        return ''
+    pares = []
+    for clave, valor in etiquetas:
+        valor = str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        pares.append(f'{clave}="{valor}"')
+    return '{' + ','.join(pares) + '}'
+
+def _formatear_valor(valor: float) -> str:
+    return str(int(valor)) if float(valor).is_integer() else repr(valor)
+
+def exportar_prometheus() -> str:
+    """Métricas del proceso en el formato de texto de Prometheus (versión 0.0.4)."""
+    with _lock:
+        contadores = sorted(_contadores.items())
+        histogramas = sorted((k, list(v)) for k, v in _histogramas.items())
+
+    lineas: List[str] = []
+    nombre_anterior = None
+    for (nombre, etiquetas), valor in contadores:
+        if nombre != nombre_anterior:
+            tipo, ayuda = _AYUDA[nombre]
+            lineas += [f'# HELP {nombre} {ayuda}', f'# TYPE {nombre} {tipo}']
+            nombre_anterior = nombre
+        lineas.append(f'{nombre}{_formatear_etiquetas(etiquetas)} {_formatear_valor(valor)}')
+
+    if histogramas:
+        nombre = 'inandes_http_request_duration_seconds'
+        tipo, ayuda = _AYUDA[nombre]
+        lineas += [f'# HELP {nombre} {ayuda}', f'# TYPE {nombre} {tipo}']
+        for etiquetas, valores in histogramas:
+            for limite, cantidad in zip(DURATION_BUCKETS, valores):
+                lineas.append(f'{nombre}_bucket{_formatear_etiquetas(etiquetas + (("le", repr(limite)),))} {_formatear_valor(cantidad)}')
+            lineas.append(f'{nombre}_bucket{_formatear_etiquetas(etiquetas + (("le", "+Inf"),))} {_formatear_valor(valores[-1])}')
+            lineas.append(f'{nombre}_sum{_formatear_etiquetas(etiquetas)} {_formatear_valor(valores[-2])}')
+            lineas.append(f'{nombre}_count{_formatear_etiquetas(etiquetas)} {_formatear_valor(valores[-1])}')
+    return '\n'.join(lineas) + '\n'
+
+# --- Instrumentación ---
+
+@contextmanager
+def traza() -> Iterator[Traza]:
+    """Abre la traza de una petición; las funciones instrumentadas llamadas dentro acumulan en ella."""
+    actual = Traza()
+    token = _traza_actual.set(actual)
+    try:
+        yield actual
+    finally:
+        actual.fin = time.perf_counter()
+        _traza_actual.reset(token)
+
+def traza_actual() -> Optional[Traza]:
+    return _traza_actual.get()
+
+def medir(categoria: str) -> Callable:
+    """Mide el tiempo de la función decorada bajo `categoria` (solo la llamada más externa de la categoría)."""
+    def decorator(func: Callable) -> Callable:
+        nombre = func.__name__
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            activas = _categorias_activas.get()
+            if categoria in activas:
+                return func(*args, **kwargs)
+            token = _categorias_activas.set(activas | {categoria})
+            inicio = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                registrar_span(categoria, nombre, time.perf_counter() - inicio)
+                _categorias_activas.reset(token)
+        return wrapper
+    return decorator
+
+class _ConsultaInstrumentada:
+    """Envuelve un query builder de supabase-py: cada `.execute()` cuenta como un round trip."""
+    __slots__ = ('_consulta', '_tabla')
+
+    def __init__(self, consulta: Any, tabla: str):
+        self._consulta = consulta
+        self._tabla = tabla
+
+    def execute(self, *args, **kwargs):
+        inicio = time.perf_counter()
+        try:
+            return self._consulta.execute(*args, **kwargs)
+        finally:
+            registrar_round_trip(self._tabla, time.perf_counter() - inicio)
+
+    def __getattr__(self, nombre: str):
+        atributo = getattr(self._consulta, nombre)
+        if not callable(atributo):
+            return atributo
+
+        def encadenar(*args, **kwargs):
+            resultado = atributo(*args, **kwargs)
+            # Los filtros y modificadores devuelven otro builder: se sigue envolviendo
+            return _ConsultaInstrumentada(resultado, self._tabla) if hasattr(resultado, 'execute') else resultado
+        return encadenar
+
+class ClienteInstrumentado:
+    """Envuelve el cliente de Supabase (o `SQLiteClient`) para contar los round trips por tabla."""
+
+    def __init__(self, cliente: Any):
+        self._cliente = cliente
+
+    def table(self, nombre: str) -> _ConsultaInstrumentada:
+        return _ConsultaInstrumentada(self._cliente.table(nombre), nombre)
+
+    def rpc(self, funcion: str, *args, **kwargs) -> _ConsultaInstrumentada:
+        return _ConsultaInstrumentada(self._cliente.rpc(funcion, *args, **kwargs), f'rpc:{funcion}')
+
+    def __getattr__(self, nombre: str):
+        return getattr(self._cliente, nombre)
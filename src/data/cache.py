@@ -0,0 +1,114 @@
+# src/data/cache.py
+
+import copy
+import os
+import threading
+import time
+from functools import wraps
+from typing import Any, Callable, Dict, Iterable, Optional, Set, Tuple
+
+# --- Configuración ---
+# Segundos que vive una lectura en caché. 0 desactiva la caché.
+# La API la desactiva al arrancar: con varios workers, una escritura en un proceso
+# no podría invalidar la caché de los demás.
+DEFAULT_TTL_SECONDS = float(os.environ.get("REPOSITORY_CACHE_TTL", "60"))
+
+# Tablas que cambian de estado (propuestas, liquidaciones, desembolsos). Las escriben también
+# la API, sus trabajos en segundo plano y otras réplicas, y esas escrituras no pueden invalidar
+# la caché de este proceso: por eso sus lecturas usan un TTL propio, 0 (sin caché) por defecto.
+# Una lectura que depende de varias tablas usa el menor de sus TTL.
+TABLAS_CON_ESTADO = ('propuestas', 'liquidaciones_resumen', 'liquidacion_eventos', 'desembolsos_resumen')
+DEFAULT_STATE_TTL_SECONDS = float(os.environ.get("REPOSITORY_CACHE_STATE_TTL", "0"))
+
+# Búsquedas por lote de las páginas (`cached_read(..., search=True)`). Se repiten en cada
+# rerun de Streamlit y las páginas las invalidan explícitamente tras sus propias escrituras
+# y llamadas a la API, así que usan este TTL aunque lean tablas con estado (nunca más que
+# el general: con la caché desactivada, como en la API, tampoco se guardan).
+DEFAULT_SEARCH_TTL_SECONDS = float(os.environ.get("REPOSITORY_CACHE_SEARCH_TTL", "60"))
+
+_lock = threading.RLock()
+_ttl_seconds = DEFAULT_TTL_SECONDS
+_state_ttl_seconds = DEFAULT_STATE_TTL_SECONDS
+_search_ttl_seconds = DEFAULT_SEARCH_TTL_SECONDS
+_entries: Dict[Tuple, Tuple[float, Any]] = {}   # clave -> (expira_en, valor)
+_keys_by_table: Dict[str, Set[Tuple]] = {}      # tabla -> claves que dependen de ella
+
+def configure(ttl_seconds: float, state_ttl_seconds: Optional[float] = None,
+              search_ttl_seconds: Optional[float] = None) -> None:
+    """
+    Cambia el TTL de la caché (y, si se indican, el de las tablas con estado y el de las
+    búsquedas de las páginas). Un valor <= 0 la desactiva; las entradas ya guardadas se descartan.
+    """
+    global _ttl_seconds, _state_ttl_seconds, _search_ttl_seconds
+    with _lock:
+        _ttl_seconds = ttl_seconds
+        if state_ttl_seconds is not None:
+            _state_ttl_seconds = state_ttl_seconds
+        if search_ttl_seconds is not None:
+            _search_ttl_seconds = search_ttl_seconds
+        _entries.clear()
+        _keys_by_table.clear()
+
+def _ttl_for(tables: Tuple[str, ...], search: bool = False) -> float:
+    if search:
+        return min(_ttl_seconds, _search_ttl_seconds)
+    if any(table in TABLAS_CON_ESTADO for table in tables):
+        return min(_ttl_seconds, _state_ttl_seconds)
+    return _ttl_seconds
+
+def invalidate(*tables: str) -> None:
+    """Descarta las lecturas que dependen de las tablas indicadas (todas si no se indica ninguna)."""
+    with _lock:
+        if not tables:
+            _entries.clear()
+            _keys_by_table.clear()
+            return
+        for table in tables:
+            for key in _keys_by_table.pop(table, set()):
+                _entries.pop(key, None)
+
+def cached_read(tables: Iterable[str], search: bool = False) -> Callable:
+    """
+    Memoiza una función de lectura del repositorio, indexada por sus argumentos.
+    Con `search=True` es una búsqueda de página (p. ej. por lote): usa el TTL de búsquedas
+    y depende de que quien escribe, o llama a la API, invalide sus tablas. Solo se guardan resultados no vacíos, así un error transitorio (que el repositorio
+    devuelve como None o []) no queda fijado en la caché. Se devuelven copias para
+    que las páginas puedan mutar los diccionarios sin contaminar la caché.
+    """
+    tables = tuple(tables)
+
+    def decorator(func: Callable) -> Callable:
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            ttl_seconds = _ttl_for(tables, search)
+            if ttl_seconds <= 0:
+                return func(*args, **kwargs)
+
+            key = (func.__name__, args, tuple(sorted(kwargs.items())))
+            now = time.monotonic()
+            with _lock:
+                entry = _entries.get(key)
+                if entry and entry[0] > now:
+                    return copy.deepcopy(entry[1])
+
+            value = func(*args, **kwargs)
+            if value:
+                with _lock:
+                    _entries[key] = (now + ttl_seconds, copy.deepcopy(value))
+                    for table in tables:
+                        _keys_by_table.setdefault(table, set()).add(key)
+            return value
+        return wrapper
+    return decorator
+
+def invalidates(*tables: str) -> Callable:
+    """Marca una función de escritura: al terminar (con o sin error) invalida las tablas indicadas."""
+    def decorator(func: Callable) -> Callable:
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            try:
+                return func(*args, **kwargs)
+            finally:
+                invalidate(*tables)
+        return wrapper
+    return decorator
@@ -0,0 +1,477 @@
+# src/data/sqlite_client.py
+
+import datetime as dt
+import json
+import sqlite3
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+# --- Backend Local (SQLite) ---
+# Implementa el subconjunto del query builder de supabase-py que usa `supabase_repository`:
+#   client.table(nombre).select(...).eq/neq/gt/gte/lt/lte/in_(...).order(...).limit(...)
+#         .range(...).single().execute()
+#   client.table(nombre).insert(filas) / .update(valores).eq(...) / .upsert(filas, on_conflict=...)
+#         / .delete().eq(...)
+#   client.rpc(funcion, parametros).execute() para las funciones de FUNCIONES_RPC
+# El repositorio no necesita cambios: `get_supabase_client()` devuelve este cliente cuando
+# STORAGE_BACKEND=sqlite. Sirve para benchmarks y pruebas de integración sin red.
+# Los índices replican los de producción (ver documentation/migration/*.sql) para que los
+# patrones de consulta se puedan medir en local.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS propuestas (
+    proposal_id                 TEXT PRIMARY KEY,
+    identificador_lote          TEXT,
+    estado                      TEXT,
+    recalculate_result_json     TEXT,
+    emisor_nombre               TEXT,
+    emisor_ruc                  TEXT,
+    aceptante_nombre            TEXT,
+    aceptante_ruc               TEXT,
+    numero_factura              TEXT,
+    monto_total_factura         REAL,
+    monto_neto_factura          REAL,
+    moneda_factura              TEXT,
+    fecha_emision_factura       TEXT,
+    plazo_credito_dias          INTEGER,
+    fecha_desembolso_factoring  TEXT,
+    tasa_de_avance              REAL,
+    interes_mensual             REAL,
+    interes_moratorio           REAL,
+    fecha_pago_calculada        TEXT,
+    plazo_operacion_calculado   INTEGER,
+    capital_calculado           REAL,
+    anexo_number                TEXT,
+    contract_number             TEXT,
+    created_at                  TEXT DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS propuestas_lote_estado_idx ON propuestas (identificador_lote, estado);
+CREATE INDEX IF NOT EXISTS propuestas_estado_proposal_idx ON propuestas (estado, proposal_id);
+
+CREATE TABLE IF NOT EXISTS liquidaciones_resumen (
+    id                  INTEGER PRIMARY KEY AUTOINCREMENT,
+    proposal_id         TEXT NOT NULL,
+    saldo_actual        REAL,
+    capital_original    REAL,
+    created_at          TEXT DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS liquidaciones_resumen_proposal_idx ON liquidaciones_resumen (proposal_id);
+
+CREATE TABLE IF NOT EXISTS liquidacion_eventos (
+    id                      INTEGER PRIMARY KEY AUTOINCREMENT,
+    liquidacion_resumen_id  INTEGER NOT NULL,
+    orden_evento            INTEGER NOT NULL,
+    tipo_evento             TEXT,
+    fecha_evento            TEXT,
+    monto_recibido          REAL,
+    dias_diferencia         INTEGER,
+    resultado_json          TEXT,
+    idempotency_key         TEXT,
+    created_at              TEXT DEFAULT CURRENT_TIMESTAMP
+);
+CREATE UNIQUE INDEX IF NOT EXISTS liquidacion_eventos_resumen_orden_uk ON liquidacion_eventos (liquidacion_resumen_id, orden_evento);
+CREATE UNIQUE INDEX IF NOT EXISTS liquidacion_eventos_idempotency_key_uk ON liquidacion_eventos (idempotency_key);
+
+CREATE TABLE IF NOT EXISTS desembolsos_resumen (
+    id                          INTEGER PRIMARY KEY AUTOINCREMENT,
+    proposal_id                 TEXT NOT NULL,
+    monto_desembolsado_total    REAL,
+    created_at                  TEXT DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS desembolsos_resumen_proposal_idx ON desembolsos_resumen (proposal_id);
+
+CREATE TABLE IF NOT EXISTS desembolso_eventos (
+    id                      INTEGER PRIMARY KEY AUTOINCREMENT,
+    desembolso_resumen_id   INTEGER NOT NULL,
+    orden_evento            INTEGER NOT NULL,
+    tipo_evento             TEXT,
+    fecha_evento            TEXT,
+    monto_desembolsado      REAL,
+    created_at              TEXT DEFAULT CURRENT_TIMESTAMP
+);
+CREATE UNIQUE INDEX IF NOT EXISTS desembolso_eventos_resumen_orden_uk ON desembolso_eventos (desembolso_resumen_id, orden_evento);
+
+CREATE TABLE IF NOT EXISTS auditoria_eventos (
+    id                      INTEGER PRIMARY KEY AUTOINCREMENT,
+    usuario_id              TEXT,
+    entidad_id              TEXT,
+    accion                  TEXT,
+    estado_anterior         TEXT,
+    estado_nuevo            TEXT,
+    detalles_adicionales    TEXT,
+    timestamp               TEXT
+);
+CREATE INDEX IF NOT EXISTS auditoria_eventos_entidad_idx ON auditoria_eventos (entidad_id);
+
+CREATE TABLE IF NOT EXISTS "EMISORES.DEUDORES" (
+    "RUC"                               TEXT PRIMARY KEY,
+    "Razon Social"                      TEXT,
+    "Direccion"                         TEXT,
+    "Depositario 1"                     TEXT,
+    "DNI Depositario 1"                 TEXT,
+    "Garante/Fiador solidario 1"        TEXT,
+    "DNI Garante/Fiador solidario 1"    TEXT,
+    "Garante/Fiador solidario 2"        TEXT,
+    "DNI Garante/Fiador solidario 2"    TEXT
+);
+
+CREATE TABLE IF NOT EXISTS devengos_snapshot (
+    id                          INTEGER PRIMARY KEY AUTOINCREMENT,
+    fecha_corte                 TEXT NOT NULL,
+    proposal_id                 TEXT NOT NULL,
+    estado                      TEXT,
+    moneda_factura              TEXT,
+    capital_base                REAL NOT NULL,
+    fecha_base                  TEXT,
+    dias_vencidos               INTEGER NOT NULL DEFAULT 0,
+    interes_compensatorio       REAL NOT NULL DEFAULT 0,
+    igv_interes_compensatorio   REAL NOT NULL DEFAULT 0,
+    interes_moratorio           REAL NOT NULL DEFAULT 0,
+    igv_interes_moratorio       REAL NOT NULL DEFAULT 0,
+    saldo_proyectado            REAL NOT NULL DEFAULT 0,
+    created_at                  TEXT DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE (fecha_corte, proposal_id)
+);
+CREATE INDEX IF NOT EXISTS devengos_snapshot_proposal_idx ON devengos_snapshot (proposal_id);
+
+CREATE TABLE IF NOT EXISTS trabajos_lote (
+    id                  TEXT PRIMARY KEY,
+    tipo                TEXT NOT NULL,
+    estado              TEXT NOT NULL,
+    usuario_id          TEXT,
+    idempotency_key     TEXT UNIQUE,
+    huella_payload      TEXT,
+    total               INTEGER NOT NULL DEFAULT 0,
+    procesados          INTEGER NOT NULL DEFAULT 0,
+    exitosas            INTEGER NOT NULL DEFAULT 0,
+    errores             INTEGER NOT NULL DEFAULT 0,
+    resultado_json      TEXT,
+    error               TEXT,
+    created_at          TEXT,
+    started_at          TEXT,
+    finished_at         TEXT,
+    updated_at          TEXT
+);
+CREATE INDEX IF NOT EXISTS trabajos_lote_estado_idx ON trabajos_lote (estado, created_at);
+
+CREATE TABLE IF NOT EXISTS authorized_users (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    email       TEXT UNIQUE NOT NULL,
+    created_at  TEXT DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS modules (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    name        TEXT UNIQUE NOT NULL,
+    description TEXT
+);
+
+CREATE TABLE IF NOT EXISTS user_module_access (
+    id              INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id         INTEGER NOT NULL,
+    module_id       INTEGER NOT NULL,
+    hierarchy_level TEXT DEFAULT 'viewer',
+    UNIQUE (user_id, module_id)
+);
+"""
+
+# Funciones RPC (equivalentes de las de documentation/migration/09_APPEND_EVENTOS.sql):
+# nombre -> (tabla de eventos, columna del resumen). Reciben {'p_evento': fila sin orden_evento}
+# y la insertan con orden_evento = MAX(orden_evento) + 1 del resumen en una sola sentencia.
+FUNCIONES_RPC = {
+    'append_liquidacion_evento': ('liquidacion_eventos', 'liquidacion_resumen_id'),
+    'append_desembolso_evento': ('desembolso_eventos', 'desembolso_resumen_id'),
+}
+
+# Mensaje de sqlite3.IntegrityError -> código SQLSTATE que devolvería PostgREST. El repositorio
+# distingue los duplicados (23505) del resto: una fila mal formada no debe tratarse como tal.
+CODIGOS_INTEGRIDAD = (
+    ('UNIQUE constraint failed', '23505'),
+    ('NOT NULL constraint failed', '23502'),
+    ('CHECK constraint failed', '23514'),
+    ('FOREIGN KEY constraint failed', '23503'),
+)
+
+def _codigo_integridad(mensaje: str) -> str:
+    for prefijo, codigo in CODIGOS_INTEGRIDAD:
+        if mensaje.startswith(prefijo):
+            return codigo
+    return '23000'  # integrity_constraint_violation genérica
+
+class SQLiteAPIError(Exception):
+    """Equivalente local de `postgrest.exceptions.APIError` (mismos códigos donde aplica)."""
+
+    def __init__(self, message: str, code: Optional[str] = None):
+        super().__init__(message)
+        self.message = message
+        self.code = code
+
+class SQLiteResponse:
+    def __init__(self, data: Any, count: Optional[int] = None):
+        self.data = data
+        self.count = count
+
+def _quote(identificador: str) -> str:
+    return '"' + identificador.replace('"', '""') + '"'
+
+def _adaptar(valor: Any) -> Any:
+    """Convierte valores de Python al tipo que guardaría PostgREST (jsonb como texto, fechas en ISO)."""
+    if isinstance(valor, (dict, list)):
+        return json.dumps(valor, default=str)
+    if isinstance(valor, (dt.date, dt.datetime)):
+        return valor.isoformat()
+    return valor
+
+class SQLiteClient:
+    """Cliente con la interfaz de `supabase.Client` usada por el repositorio, sobre un archivo SQLite."""
+
+    def __init__(self, ruta: str = ':memory:'):
+        self.ruta = ruta
+        self._conn = sqlite3.connect(ruta, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.RLock()  # Una conexión compartida: las sentencias se serializan
+        with self._lock:
+            self._conn.execute('PRAGMA journal_mode=WAL' if ruta != ':memory:' else 'PRAGMA journal_mode=MEMORY')
+            self._conn.executescript(SCHEMA)
+        self._columnas: Dict[str, List[str]] = {}
+
+    def table(self, nombre: str) -> '_Consulta':
+        return _Consulta(self, nombre)
+
+    def rpc(self, funcion: str, parametros: Optional[Dict[str, Any]] = None) -> '_LlamadaRPC':
+        return _LlamadaRPC(self, funcion, parametros or {})
+
+    def columnas(self, tabla: str) -> List[str]:
+        if tabla not in self._columnas:
+            with self._lock:
+                filas = self._conn.execute(f'PRAGMA table_info({_quote(tabla)})').fetchall()
+            if not filas:
+                raise SQLiteAPIError(f'relation "{tabla}" does not exist', code='42P01')
+            self._columnas[tabla] = [fila['name'] for fila in filas]
+        return self._columnas[tabla]
+
+    def ejecutar(self, sql: str, parametros: Sequence[Any] = (), muchos: bool = False) -> List[Dict[str, Any]]:
+        with self._lock:
+            try:
+                if muchos:
+                    filas = []
+                    self._conn.execute('BEGIN')
+                    try:
+                        for params in parametros:
+                            filas.extend(self._conn.execute(sql, params).fetchall())
+                        self._conn.execute('COMMIT')
+                    except Exception:
+                        self._conn.execute('ROLLBACK')
+                        raise
+                else:
+                    filas = self._conn.execute(sql, parametros).fetchall()
+            except sqlite3.IntegrityError as e:
+                raise SQLiteAPIError(str(e), code=_codigo_integridad(str(e))) from e
+            except sqlite3.Error as e:
+                raise SQLiteAPIError(str(e)) from e
+        return [dict(fila) for fila in filas]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+class _Consulta:
+    """Constructor de consultas encadenable; se ejecuta con `execute()`."""
+
+    def __init__(self, cliente: SQLiteClient, tabla: str):
+        self._cliente = cliente
+        self._tabla = tabla
+        self._operacion = 'select'
+        self._columnas_select: Optional[List[str]] = None
+        self._filtros: List[Tuple[str, str, Any]] = []
+        self._orden: List[Tuple[str, bool]] = []
+        self._limite: Optional[int] = None
+        self._desde: int = 0
+        self._unico: Optional[str] = None  # 'single' | 'maybe_single'
+        self._filas: List[Dict[str, Any]] = []
+        self._valores: Dict[str, Any] = {}
+        self._on_conflict: Optional[str] = None
+
+    # --- Operaciones ---
+
+    def select(self, columnas: str = '*', count: Optional[str] = None) -> '_Consulta':
+        self._operacion = 'select'
+        if columnas.strip() != '*':
+            self._columnas_select = [c.strip().strip('"') for c in columnas.split(',') if c.strip()]
+        return self
+
+    def insert(self, filas: Union[Dict[str, Any], List[Dict[str, Any]]]) -> '_Consulta':
+        self._operacion = 'insert'
+        self._filas = [filas] if isinstance(filas, dict) else list(filas)
+        return self
+
+    def upsert(self, filas: Union[Dict[str, Any], List[Dict[str, Any]]], on_conflict: Optional[str] = None) -> '_Consulta':
+        self.insert(filas)
+        self._operacion = 'upsert'
+        self._on_conflict = on_conflict
+        return self
+
+    def update(self, valores: Dict[str, Any]) -> '_Consulta':
+        self._operacion = 'update'
+        self._valores = valores
+        return self
+
+    def delete(self) -> '_Consulta':
+        self._operacion = 'delete'
+        return self
+
+    # --- Filtros y modificadores ---
+
+    def _filtro(self, columna: str, operador: str, valor: Any) -> '_Consulta':
+        self._filtros.append((columna, operador, valor))
+        return self
+
+    def eq(self, columna: str, valor: Any) -> '_Consulta':
+        return self._filtro(columna, '=', valor)
+
+    def neq(self, columna: str, valor: Any) -> '_Consulta':
+        return self._filtro(columna, '!=', valor)
+
+    def gt(self, columna: str, valor: Any) -> '_Consulta':
+        return self._filtro(columna, '>', valor)
+
+    def gte(self, columna: str, valor: Any) -> '_Consulta':
+        return self._filtro(columna, '>=', valor)
+
+    def lt(self, columna: str, valor: Any) -> '_Consulta':
+        return self._filtro(columna, '<', valor)
+
+    def lte(self, columna: str, valor: Any) -> '_Consulta':
+        return self._filtro(columna, '<=', valor)
+
+    def in_(self, columna: str, valores: Sequence[Any]) -> '_Consulta':
+        return self._filtro(columna, 'IN', list(valores))
+
+    def order(self, columna: str, desc: bool = False) -> '_Consulta':
+        self._orden.append((columna, desc))
+        return self
+
+    def limit(self, cantidad: int) -> '_Consulta':
+        self._limite = cantidad
+        return self
+
+    def range(self, desde: int, hasta: int) -> '_Consulta':
+        self._desde, self._limite = desde, hasta - desde + 1
+        return self
+
+    def single(self) -> '_Consulta':
+        self._unico = 'single'
+        return self
+
+    def maybe_single(self) -> '_Consulta':
+        self._unico = 'maybe_single'
+        return self
+
+    # --- Ejecución ---
+
+    def _validar(self, columnas: Sequence[str]) -> None:
+        existentes = self._cliente.columnas(self._tabla)
+        for columna in columnas:
+            if columna not in existentes:
+                raise SQLiteAPIError(f'column {self._tabla}.{columna} does not exist', code='42703')
+
+    def _where(self) -> Tuple[str, List[Any]]:
+        if not self._filtros:
+            return '', []
+        self._validar([c for c, _, _ in self._filtros])
+        partes, parametros = [], []
+        for columna, operador, valor in self._filtros:
+            if operador == 'IN':
+                if not valor:
+                    partes.append('0')  # `in_` con lista vacía no devuelve filas
+                    continue
+                partes.append(f'{_quote(columna)} IN ({", ".join("?" * len(valor))})')
+                parametros.extend(_adaptar(v) for v in valor)
+            else:
+                partes.append(f'{_quote(columna)} {operador} ?')
+                parametros.append(_adaptar(valor))
+        return ' WHERE ' + ' AND '.join(partes), parametros
+
+    def execute(self) -> SQLiteResponse:
+        tabla = _quote(self._tabla)
+        self._cliente.columnas(self._tabla)  # Falla si la tabla no existe
+
+        if self._operacion == 'select':
+            columnas = self._columnas_select
+            if columnas:
+                self._validar(columnas)
+            sql_columnas = ', '.join(_quote(c) for c in columnas) if columnas else '*'
+            where, parametros = self._where()
+            sql = f'SELECT {sql_columnas} FROM {tabla}{where}'
+            if self._orden:
+                self._validar([c for c, _ in self._orden])
+                sql += ' ORDER BY ' + ', '.join(f'{_quote(c)} {"DESC" if d else "ASC"}' for c, d in self._orden)
+            if self._limite is not None or self._desde:
+                sql += ' LIMIT ? OFFSET ?'
+                parametros += [self._limite if self._limite is not None else -1, self._desde]
+            return self._resultado(self._cliente.ejecutar(sql, parametros))
+
+        if self._operacion in ('insert', 'upsert'):
+            if not self._filas:
+                return SQLiteResponse([])
+            columnas = list(dict.fromkeys(c for fila in self._filas for c in fila))
+            self._validar(columnas)
+            sql = (f'INSERT INTO {tabla} ({", ".join(_quote(c) for c in columnas)}) '
+                   f'VALUES ({", ".join("?" * len(columnas))})')
+            if self._operacion == 'upsert':
+                conflicto = [c.strip() for c in (self._on_conflict or 'id').split(',')]
+                self._validar(conflicto)
+                actualizables = [c for c in columnas if c not in conflicto]
+                sql += f' ON CONFLICT ({", ".join(_quote(c) for c in conflicto)}) DO '
+                sql += ('UPDATE SET ' + ', '.join(f'{_quote(c)} = excluded.{_quote(c)}' for c in actualizables)) if actualizables else 'NOTHING'
+            sql += ' RETURNING *'
+            parametros = [[_adaptar(fila.get(c)) for c in columnas] for fila in self._filas]
+            return self._resultado(self._cliente.ejecutar(sql, parametros, muchos=True))
+
+        where, parametros = self._where()
+        if self._operacion == 'update':
+            self._validar(list(self._valores))
+            asignaciones = ', '.join(f'{_quote(c)} = ?' for c in self._valores)
+            sql = f'UPDATE {tabla} SET {asignaciones}{where} RETURNING *'
+            parametros = [_adaptar(v) for v in self._valores.values()] + parametros
+        else:  # delete
+            sql = f'DELETE FROM {tabla}{where} RETURNING *'
+        return self._resultado(self._cliente.ejecutar(sql, parametros))
+
+    def _resultado(self, filas: List[Dict[str, Any]]) -> SQLiteResponse:
+        if self._unico is None:
+            return SQLiteResponse(filas, count=len(filas))
+        if len(filas) == 1:
+            return SQLiteResponse(filas[0], count=1)
+        if not filas and self._unico == 'maybe_single':
+            return SQLiteResponse(None, count=0)
+        # Mismo error que PostgREST cuando `.single()` no encuentra exactamente una fila
+        raise SQLiteAPIError(f'JSON object requested, multiple (or no) rows returned ({len(filas)} rows)', code='PGRST116')
+
+class _LlamadaRPC:
+    """`client.rpc(...)`: se ejecuta con `execute()`, como en supabase-py."""
+
+    def __init__(self, cliente: SQLiteClient, funcion: str, parametros: Dict[str, Any]):
+        self._cliente = cliente
+        self._funcion = funcion
+        self._parametros = parametros
+
+    def execute(self) -> SQLiteResponse:
+        if self._funcion not in FUNCIONES_RPC:
+            raise SQLiteAPIError(f'Could not find the function public.{self._funcion}', code='PGRST202')
+        tabla, columna_resumen = FUNCIONES_RPC[self._funcion]
+        evento = dict(self._parametros.get('p_evento') or {})
+        evento.pop('orden_evento', None)
+        if columna_resumen not in evento:
+            raise SQLiteAPIError(f'null value in column "{columna_resumen}" violates not-null constraint', code='23502')
+        columnas = list(evento)
+        existentes = self._cliente.columnas(tabla)
+        for columna in columnas:
+            if columna not in existentes:
+                raise SQLiteAPIError(f'column {tabla}.{columna} does not exist', code='42703')
+        # INSERT ... SELECT: el orden se calcula y se inserta en la misma sentencia
+        sql = (f'INSERT INTO {_quote(tabla)} ({", ".join(_quote(c) for c in columnas)}, "orden_evento") '
+               f'SELECT {", ".join("?" * len(columnas))}, COALESCE(MAX("orden_evento"), 0) + 1 '
+               f'FROM {_quote(tabla)} WHERE {_quote(columna_resumen)} = ? RETURNING *')
+        parametros = [_adaptar(evento[c]) for c in columnas] + [_adaptar(evento[columna_resumen])]
+        return SQLiteResponse(self._cliente.ejecutar(sql, parametros))
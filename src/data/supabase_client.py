@@ -4,6 +4,22 @@ import os
 from supabase import create_client, Client
 from typing import Optional
 
+# This module is imported as `src.data` (Streamlit) and as `data` (API).
+try:
+    from ..core.tracing import ClienteInstrumentado
+    from ..core.structured_logging import get_logger
+except ImportError:
+    from core.tracing import ClienteInstrumentado
+    from core.structured_logging import get_logger
+
+logger = get_logger('data.client')
+
+# --- Storage backend ---
+# STORAGE_BACKEND=supabase (default) uses the hosted Supabase project.
+# STORAGE_BACKEND=sqlite uses a local SQLite file (SQLITE_PATH, default ':memory:') with the
+# same query-builder interface, so the repository works offline (benchmarks, integration runs).
+STORAGE_BACKEND = os.environ.get("STORAGE_BACKEND", "supabase").lower()
+
 # --- Singleton instance ---
 _supabase_client_instance: Optional[Client] = None
 
@@ -12,8 +28,15 @@ def get_supabase_client() -> Client:
     Initializes and returns a singleton Supabase client instance.
     It attempts to load credentials from Streamlit's secrets (for frontend)
     or from environment variables (for backend/non-Streamlit environments).
+    With STORAGE_BACKEND=sqlite it returns a local SQLiteClient instead.
     """
     global _supabase_client_instance
+    if _supabase_client_instance is None and STORAGE_BACKEND == "sqlite":
+        from .sqlite_client import SQLiteClient
+        sqlite_path = os.environ.get("SQLITE_PATH", ":memory:")
+        logger.info("Initializing local SQLite storage backend (%s)...", sqlite_path)
+        _supabase_client_instance = ClienteInstrumentado(SQLiteClient(sqlite_path))
+
     if _supabase_client_instance is None:
         SUPABASE_URL = None
         SUPABASE_KEY = None
@@ -24,7 +47,7 @@ def get_supabase_client() -> Client:
             if "supabase" in st.secrets and "url" in st.secrets.supabase and "key" in st.secrets.supabase:
                 SUPABASE_URL = st.secrets.supabase.url
                 SUPABASE_KEY = st.secrets.supabase.key
-                print("Supabase credentials loaded from Streamlit secrets.")
+                logger.info("Supabase credentials loaded from Streamlit secrets.")
         except Exception:
             # Streamlit not available or secrets not configured, fall back to environment variables
             pass
@@ -33,7 +56,7 @@ def get_supabase_client() -> Client:
         if SUPABASE_URL is None or SUPABASE_KEY is None:
             SUPABASE_URL = os.environ.get("SUPABASE_URL")
             SUPABASE_KEY = os.environ.get("SUPABASE_KEY")
-            print("Supabase credentials loaded from environment variables.")
+            logger.info("Supabase credentials loaded from environment variables.")
 
         if not SUPABASE_URL or not SUPABASE_KEY:
             raise ValueError(
@@ -42,8 +65,9 @@ def get_supabase_client() -> Client:
                 "or as environment variables (for backend)."
             )
 
-        print("Initializing Supabase client...")
-        _supabase_client_instance = create_client(SUPABASE_URL, SUPABASE_KEY)
-        print("Supabase client initialized.")
+        logger.info("Initializing Supabase client...")
+        # Every .execute() is counted and timed as a DB round trip (see core/tracing.py)
+        _supabase_client_instance = ClienteInstrumentado(create_client(SUPABASE_URL, SUPABASE_KEY))
+        logger.info("Supabase client initialized.")
 
     return _supabase_client_instance
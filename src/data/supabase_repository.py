@@ -1,25 +1,54 @@
 # src/data/supabase_repository.py
 
 import os
-import json
+import random
+import time
 import datetime as dt
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 
 # Internal imports
 from .supabase_client import get_supabase_client
+from .cache import cached_read, invalidates, invalidate as invalidate_cache
+
+# Este módulo se importa como `src.data` (Streamlit) y como `data` (API).
+try:
+    from ..core.date_utils import fecha_a_iso
+    from ..core import json_codec
+    from ..core.tracing import medir
+    from ..core.structured_logging import get_logger, PayloadJson, MUESTREAR
+except ImportError:
+    from core.date_utils import fecha_a_iso
+    from core import json_codec
+    from core.tracing import medir
+    from core.structured_logging import get_logger, PayloadJson, MUESTREAR
+
+logger = get_logger('data.repository')
 
 # --- Type Aliases for Clarity ---
 Proposal = Dict[str, Any]
 
+# --- Exceptions ---
+
+class DuplicateEventError(Exception):
+    """An event with the same idempotency key was already recorded."""
+
+    def __init__(self, idempotency_key: Optional[str]):
+        super().__init__(f"Evento duplicado para la clave de idempotencia '{idempotency_key}'.")
+        self.idempotency_key = idempotency_key
+
 # --- Helper Functions ---
 
+def _is_unique_violation(error: Exception, column: str) -> bool:
+    """unique_violation (23505) on a constraint/index that mentions `column` (PostgREST and SQLite messages)."""
+    return getattr(error, 'code', None) == '23505' and column in str(getattr(error, 'message', error))
+
 def _format_date(date_str: Optional[str]) -> Optional[str]:
     """Converts a date from DD-MM-YYYY to YYYY-MM-DD for Supabase."""
     if not date_str or not isinstance(date_str, str):
         return None
     try:
-        return dt.datetime.strptime(date_str, '%d-%m-%Y').strftime('%Y-%m-%d')
-    except (ValueError, TypeError):
+        return fecha_a_iso(date_str)
+    except ValueError:
         return date_str # Return original if format is already correct or different
 
 def _convert_to_numeric(value: Any) -> Optional[float]:
@@ -35,6 +64,8 @@ def _convert_to_numeric(value: Any) -> Optional[float]:
 
 # --- Functions for Operations Module (Original `supabase_handler`) ---
 
+@cached_read(tables=['EMISORES.DEUDORES'])
+@medir('db')
 def get_razon_social_by_ruc(ruc: str) -> str:
     """Fetches a company's legal name by its RUC."""
     supabase = get_supabase_client()
@@ -44,48 +75,55 @@ def get_razon_social_by_ruc(ruc: str) -> str:
         response = supabase.table('EMISORES.DEUDORES').select('"Razon Social"').eq('RUC', ruc).single().execute()
         return response.data.get('Razon Social', '') if response.data else ''
     except Exception as e:
-        print(f"[ERROR in get_razon_social_by_ruc]: {e}")
+        logger.error("Error en get_razon_social_by_ruc: %s", e)
         return ""
 
+def _build_proposal_row(session_data: Proposal, identificador_lote: str, fecha_propuesta: str) -> Dict[str, Any]:
+    """Builds the 'propuestas' row for one invoice of the session (proposal_id included)."""
+    recalculate_result_full = session_data.get('recalculate_result')
+    data_to_insert = {
+        'recalculate_result_json': json_codec.dumps(recalculate_result_full) if recalculate_result_full else None,
+        'emisor_nombre': session_data.get('emisor_nombre'),
+        'emisor_ruc': session_data.get('emisor_ruc'),
+        'aceptante_nombre': session_data.get('aceptante_nombre'),
+        'aceptante_ruc': session_data.get('aceptante_ruc'),
+        'numero_factura': session_data.get('numero_factura'),
+        'monto_total_factura': _convert_to_numeric(session_data.get('monto_total_factura')),
+        'monto_neto_factura': _convert_to_numeric(session_data.get('monto_neto_factura')),
+        'moneda_factura': session_data.get('moneda_factura'),
+        'fecha_emision_factura': _format_date(session_data.get('fecha_emision_factura')),
+        'plazo_credito_dias': int(session_data['plazo_credito_dias']) if session_data.get('plazo_credito_dias') is not None else None,
+        'fecha_desembolso_factoring': _format_date(session_data.get('fecha_desembolso_factoring')),
+        'tasa_de_avance': _convert_to_numeric(session_data.get('tasa_de_avance')),
+        'interes_mensual': _convert_to_numeric(session_data.get('interes_mensual')),
+        'interes_moratorio': _convert_to_numeric(session_data.get('interes_moratorio')),
+        'fecha_pago_calculada': _format_date(session_data.get('fecha_pago_calculada')),
+        'plazo_operacion_calculado': int(session_data['plazo_operacion_calculado']) if session_data.get('plazo_operacion_calculado') is not None else None,
+        'anexo_number': session_data.get('anexo_number'),
+        'contract_number': session_data.get('contract_number'),
+        'identificador_lote': identificador_lote,
+        'estado': 'ACTIVO'
+    }
+
+    if recalculate_result_full:
+        capital = recalculate_result_full.get('calculo_con_tasa_encontrada', {}).get('capital')
+        data_to_insert['capital_calculado'] = _convert_to_numeric(capital)
+
+    emisor_nombre_id = str(data_to_insert.get('emisor_nombre', 'SIN_NOMBRE')).replace(' ', '_').replace('.', '')
+    numero_factura = str(data_to_insert.get('numero_factura', 'SIN_FACTURA'))
+    data_to_insert['proposal_id'] = f"{emisor_nombre_id}-{numero_factura}-{fecha_propuesta}"
+    return data_to_insert
+
+@invalidates('propuestas')
+@medir('db')
 def save_proposal(session_data: Proposal, identificador_lote: str) -> tuple[bool, str]:
     """Saves a complete proposal to the 'propuestas' table."""
     supabase = get_supabase_client()
     try:
-        recalculate_result_full = session_data.get('recalculate_result')
-        data_to_insert = {
-            'recalculate_result_json': json.dumps(recalculate_result_full) if recalculate_result_full else None,
-            'emisor_nombre': session_data.get('emisor_nombre'),
-            'emisor_ruc': session_data.get('emisor_ruc'),
-            'aceptante_nombre': session_data.get('aceptante_nombre'),
-            'aceptante_ruc': session_data.get('aceptante_ruc'),
-            'numero_factura': session_data.get('numero_factura'),
-            'monto_total_factura': _convert_to_numeric(session_data.get('monto_total_factura')),
-            'monto_neto_factura': _convert_to_numeric(session_data.get('monto_neto_factura')),
-            'moneda_factura': session_data.get('moneda_factura'),
-            'fecha_emision_factura': _format_date(session_data.get('fecha_emision_factura')),
-            'plazo_credito_dias': int(session_data['plazo_credito_dias']) if session_data.get('plazo_credito_dias') is not None else None,
-            'fecha_desembolso_factoring': _format_date(session_data.get('fecha_desembolso_factoring')),
-            'tasa_de_avance': _convert_to_numeric(session_data.get('tasa_de_avance')),
-            'interes_mensual': _convert_to_numeric(session_data.get('interes_mensual')),
-            'interes_moratorio': _convert_to_numeric(session_data.get('interes_moratorio')),
-            'fecha_pago_calculada': _format_date(session_data.get('fecha_pago_calculada')),
-            'plazo_operacion_calculado': int(session_data['plazo_operacion_calculado']) if session_data.get('plazo_operacion_calculado') is not None else None,
-            'anexo_number': session_data.get('anexo_number'),
-            'contract_number': session_data.get('contract_number'),
-            'identificador_lote': identificador_lote,
-            'estado': 'ACTIVO'
-        }
-
-        if recalculate_result_full:
-            capital = recalculate_result_full.get('calculo_con_tasa_encontrada', {}).get('capital')
-            data_to_insert['capital_calculado'] = _convert_to_numeric(capital)
-
-        emisor_nombre_id = str(data_to_insert.get('emisor_nombre', 'SIN_NOMBRE')).replace(' ', '_').replace('.', '')
-        numero_factura = str(data_to_insert.get('numero_factura', 'SIN_FACTURA'))
         fecha_propuesta = dt.datetime.now().strftime('%Y%m%d%H%M%S')
-        data_to_insert['proposal_id'] = f"{emisor_nombre_id}-{numero_factura}-{fecha_propuesta}"
+        data_to_insert = _build_proposal_row(session_data, identificador_lote, fecha_propuesta)
 
-        print(f"DEBUG: Data being sent to Supabase -> {json.dumps(data_to_insert, indent=4, default=str)}")
+        logger.debug("Propuesta enviada a Supabase: %s", PayloadJson(data_to_insert), extra=MUESTREAR)
         response = supabase.table('propuestas').insert(data_to_insert).execute()
         if hasattr(response, 'error') and response.error:
             raise Exception(response.error.message)
@@ -93,9 +131,59 @@ def save_proposal(session_data: Proposal, identificador_lote: str) -> tuple[bool
         return True, f"Propuesta con ID {data_to_insert['proposal_id']} guardada exitosamente."
 
     except Exception as e:
-        print(f"[ERROR en save_proposal]: {e}")
+        logger.error("Error en save_proposal: %s", e)
         return False, f"Error al guardar la propuesta: {e}"
 
+@invalidates('propuestas')
+@medir('db')
+def save_proposals_bulk(invoices: List[Proposal], identificador_lote: str) -> List[Dict[str, Any]]:
+    """
+    Saves the proposals of a whole lote, inserting INSERT_CHUNK_SIZE rows per request.
+    Returns one result per invoice, in the same order: {'proposal_id', 'status', 'message'}.
+    If a chunk is rejected, its rows are retried one by one so each error maps to its invoice.
+    """
+    supabase = get_supabase_client()
+    fecha_propuesta = dt.datetime.now().strftime('%Y%m%d%H%M%S')
+    results: List[Optional[Dict[str, Any]]] = [None] * len(invoices)
+    pending: List[Tuple[int, Dict[str, Any]]] = []  # (posición, fila) listas para insertar
+    seen_ids = set()
+
+    for position, invoice in enumerate(invoices):
+        try:
+            row = _build_proposal_row(invoice, identificador_lote, fecha_propuesta)
+        except Exception as e:
+            results[position] = {"proposal_id": None, "status": "ERROR", "message": f"Error al preparar la propuesta: {e}"}
+            continue
+        if row['proposal_id'] in seen_ids:
+            results[position] = {"proposal_id": row['proposal_id'], "status": "ERROR", "message": "Factura duplicada en el lote."}
+            continue
+        seen_ids.add(row['proposal_id'])
+        pending.append((position, row))
+
+    def _success(position: int, proposal_id: str) -> None:
+        results[position] = {"proposal_id": proposal_id, "status": "SUCCESS", "message": f"Propuesta con ID {proposal_id} guardada exitosamente."}
+
+    for chunk in _chunks(pending, INSERT_CHUNK_SIZE):
+        logger.debug("Lote de %s propuestas enviado a Supabase: %s", len(chunk), PayloadJson([row for _, row in chunk]), extra=MUESTREAR)
+        try:
+            supabase.table('propuestas').insert([row for _, row in chunk]).execute()
+            for position, row in chunk:
+                _success(position, row['proposal_id'])
+            continue
+        except Exception as e:
+            logger.error("Error en save_proposals_bulk (%s filas), se reintenta fila por fila: %s", len(chunk), e)
+
+        for position, row in chunk:
+            try:
+                supabase.table('propuestas').insert(row).execute()
+                _success(position, row['proposal_id'])
+            except Exception as e:
+                results[position] = {"proposal_id": row['proposal_id'], "status": "ERROR", "message": f"Error al guardar la propuesta: {e}"}
+
+    return results
+
+@cached_read(tables=['EMISORES.DEUDORES'])
+@medir('db')
 def get_signatory_data_by_ruc(ruc: str) -> Optional[Dict[str, Any]]:
     """
     Fetches signatory data (legal name, address, etc.) for a given RUC.
@@ -108,11 +196,13 @@ def get_signatory_data_by_ruc(ruc: str) -> Optional[Dict[str, Any]]:
         response = supabase.table('EMISORES.DEUDORES').select('*').eq('RUC', ruc).single().execute()
         return response.data if response.data else None
     except Exception as e:
-        print(f"[ERROR in get_signatory_data_by_ruc]: {e}")
+        logger.error("Error en get_signatory_data_by_ruc: %s", e)
         return None
 
 # --- Functions for Liquidation & Disbursement Modules ---
 
+@cached_read(tables=['propuestas'], search=True)
+@medir('db')
 def get_proposals_by_lote(lote_id: str) -> List[Proposal]:
     """Retrieves a list of active proposals for a specific batch ID."""
     supabase = get_supabase_client()
@@ -122,9 +212,11 @@ def get_proposals_by_lote(lote_id: str) -> List[Proposal]:
         ).eq('identificador_lote', lote_id).eq('estado', 'ACTIVO').execute()
         return response.data if response.data else []
     except Exception as e:
-        print(f"[ERROR en get_proposals_by_lote]: {e}")
+        logger.error("Error en get_proposals_by_lote: %s", e)
         return []
 
+@cached_read(tables=['propuestas'], search=True)
+@medir('db')
 def get_disbursed_proposals_by_lote(lote_id: str) -> List[Proposal]:
     """Retrieves a list of disbursed or in-liquidation proposals for a specific batch ID."""
     supabase = get_supabase_client()
@@ -134,9 +226,23 @@ def get_disbursed_proposals_by_lote(lote_id: str) -> List[Proposal]:
         ).eq('identificador_lote', lote_id).in_('estado', ['DESEMBOLSADA', 'EN PROCESO DE LIQUIDACION']).execute()
         return response.data if response.data else []
     except Exception as e:
-        print(f"[ERROR en get_disbursed_proposals_by_lote]: {e}")
+        logger.error("Error en get_disbursed_proposals_by_lote: %s", e)
         return []
 
+@cached_read(tables=['propuestas'], search=True)
+@medir('db')
+def get_disbursed_proposal_details_by_lote(lote_id: str) -> List[Proposal]:
+    """Retrieves all details for the disbursed or in-liquidation proposals of a batch, in batch order."""
+    proposal_ids = [p['proposal_id'] for p in get_disbursed_proposals_by_lote(lote_id) if p.get('proposal_id')]
+    try:
+        detalles = get_proposals_details_by_ids(proposal_ids)
+    except Exception as e:
+        logger.error("Error en get_disbursed_proposal_details_by_lote: %s", e)
+        return []
+    return [detalles[pid] for pid in proposal_ids if pid in detalles]
+
+@cached_read(tables=['propuestas'])
+@medir('db')
 def get_proposal_details_by_id(proposal_id: str) -> Optional[Proposal]:
     """Retrieves all details for a single proposal by its ID."""
     supabase = get_supabase_client()
@@ -144,20 +250,24 @@ def get_proposal_details_by_id(proposal_id: str) -> Optional[Proposal]:
         response = supabase.table('propuestas').select('*').eq('proposal_id', proposal_id).single().execute()
         return response.data if response.data else None
     except Exception as e:
-        print(f"[ERROR en get_proposal_details_by_id]: {e}")
+        logger.error("Error en get_proposal_details_by_id: %s", e)
         return None
 
+@invalidates('propuestas')
+@medir('db')
 def update_proposal_status(proposal_id: str, status: str) -> None:
     """Updates the status of a single proposal."""
     supabase = get_supabase_client()
     try:
         supabase.table('propuestas').update({'estado': status}).eq('proposal_id', proposal_id).execute()
     except Exception as e:
-        print(f"[ERROR en update_proposal_status]: {e}")
+        logger.error("Error en update_proposal_status: %s", e)
         raise
 
 # --- Liquidation Specific ---
 
+@cached_read(tables=['liquidaciones_resumen'])
+@medir('db')
 def get_liquidacion_resumen(proposal_id: str) -> Optional[Dict[str, Any]]:
     """Retrieves the liquidation summary for a given proposal_id."""
     supabase = get_supabase_client()
@@ -165,9 +275,11 @@ def get_liquidacion_resumen(proposal_id: str) -> Optional[Dict[str, Any]]:
         response = supabase.table('liquidaciones_resumen').select('*').eq('proposal_id', proposal_id).limit(1).execute()
         return response.data[0] if response.data else None
     except Exception as e:
-        print(f"[ERROR en get_liquidacion_resumen]: {e}")
+        logger.error("Error en get_liquidacion_resumen: %s", e)
         return None
 
+@cached_read(tables=['liquidaciones_resumen', 'liquidacion_eventos'])
+@medir('db')
 def get_liquidacion_eventos(proposal_id: str) -> List[Dict[str, Any]]:
     """Retrieves all liquidation events for a proposal, ordered by date."""
     supabase = get_supabase_client()
@@ -179,9 +291,11 @@ def get_liquidacion_eventos(proposal_id: str) -> List[Dict[str, Any]]:
         response = supabase.table('liquidacion_eventos').select('*').eq('liquidacion_resumen_id', resumen_id).order('orden_evento', desc=False).execute()
         return response.data if response.data else []
     except Exception as e:
-        print(f"[ERROR en get_liquidacion_eventos]: {e}")
+        logger.error("Error en get_liquidacion_eventos: %s", e)
         return []
 
+@invalidates('liquidaciones_resumen')
+@medir('db')
 def get_or_create_liquidacion_resumen(proposal_id: str, datos_operacion: Proposal) -> str:
     """Gets or creates a liquidation summary entry and returns its ID."""
     supabase = get_supabase_client()
@@ -190,7 +304,7 @@ def get_or_create_liquidacion_resumen(proposal_id: str, datos_operacion: Proposa
         return existing_resumen['id']
 
     try:
-        recalc_data = json.loads(datos_operacion.get('recalculate_result_json', '{}'))
+        recalc_data = json_codec.loads(datos_operacion.get('recalculate_result_json') or '{}')
         capital = recalc_data.get('calculo_con_tasa_encontrada', {}).get('capital', 0.0)
         new_entry = {
             "proposal_id": proposal_id,
@@ -203,41 +317,184 @@ def get_or_create_liquidacion_resumen(proposal_id: str, datos_operacion: Proposa
         else:
             raise Exception(f"Failed to create liquidacion_resumen: {getattr(response, 'error', 'Unknown error')}")
     except Exception as e:
-        print(f"[ERROR en get_or_create_liquidacion_resumen]: {e}")
+        logger.error("Error en get_or_create_liquidacion_resumen: %s", e)
         raise
 
-def add_liquidacion_evento(liquidacion_resumen_id: str, tipo_evento: str, fecha_evento: dt.date, monto_recibido: float, dias_diferencia: int, resultado_json: dict) -> None:
-    """Adds a new event to the liquidacion_eventos table."""
+# Los eventos se agregan con una RPC (documentation/migration/09_APPEND_EVENTOS.sql) que inserta
+# con orden_evento = MAX + 1 del resumen en una sola sentencia: un round trip en lugar de leer el
+# último orden y luego insertar. Si dos workers agregan a la vez al mismo resumen, el índice
+# único (resumen, orden_evento) rechaza a uno, que reintenta con el nuevo máximo.
+EVENT_APPEND_RETRIES = 5
+
+def _append_event(function_name: str, event: Dict[str, Any]) -> Dict[str, Any]:
+    """Calls an append RPC, retrying with jittered backoff on orden_evento conflicts. Returns the inserted row."""
     supabase = get_supabase_client()
+    for attempt in range(EVENT_APPEND_RETRIES):
+        try:
+            response = supabase.rpc(function_name, {'p_evento': event}).execute()
+            return response.data[0] if isinstance(response.data, list) else response.data
+        except Exception as e:
+            if not _is_unique_violation(e, 'orden') or attempt == EVENT_APPEND_RETRIES - 1:
+                raise
+            logger.warning("Conflicto de orden_evento en %s, reintento %d", function_name, attempt + 1)
+            time.sleep(random.uniform(0, 0.005 * 2 ** attempt))
+
+@invalidates('liquidacion_eventos')
+@medir('db')
+def add_liquidacion_evento(liquidacion_resumen_id: str, tipo_evento: str, fecha_evento: dt.date, monto_recibido: float, dias_diferencia: int, resultado_json: dict, idempotency_key: Optional[str] = None) -> None:
+    """
+    Adds a new event to the liquidacion_eventos table (orden_evento assigned atomically, see
+    _append_event). Raises DuplicateEventError if another event already holds idempotency_key
+    (unique index), so the caller writes nothing else.
+    """
     try:
-        last_event_response = supabase.table('liquidacion_eventos').select('orden_evento').eq('liquidacion_resumen_id', liquidacion_resumen_id).order('orden_evento', desc=True).limit(1).execute()
-        last_orden = last_event_response.data[0]['orden_evento'] if last_event_response.data else 0
-        
         new_event = {
             "liquidacion_resumen_id": liquidacion_resumen_id,
-            "orden_evento": last_orden + 1,
             "tipo_evento": tipo_evento,
             "fecha_evento": fecha_evento.isoformat(),
             "monto_recibido": monto_recibido,
             "dias_diferencia": dias_diferencia,
-            "resultado_json": json.dumps(resultado_json)
+            "resultado_json": json_codec.dumps(resultado_json),
+            "idempotency_key": idempotency_key
         }
-        supabase.table('liquidacion_eventos').insert(new_event).execute()
+        _append_event('append_liquidacion_evento', new_event)
+    except Exception as e:
+        if _is_unique_violation(e, 'idempotency_key'):
+            raise DuplicateEventError(idempotency_key) from e
+        logger.error("Error en add_liquidacion_evento: %s", e)
+        raise
+
+@medir('db')
+def get_liquidacion_eventos_by_idempotency_keys(idempotency_keys: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Existing liquidation events for the given idempotency keys, keyed by idempotency_key (one query per chunk)."""
+    supabase = get_supabase_client()
+    eventos: Dict[str, Dict[str, Any]] = {}
+    try:
+        for chunk in _chunks(list(dict.fromkeys(idempotency_keys)), IN_FILTER_CHUNK_SIZE):
+            response = supabase.table('liquidacion_eventos').select('idempotency_key,liquidacion_resumen_id,orden_evento,fecha_evento,monto_recibido,created_at').in_('idempotency_key', chunk).execute()
+            for row in response.data or []:
+                eventos[row['idempotency_key']] = row
+        return eventos
     except Exception as e:
-        print(f"[ERROR en add_liquidacion_evento]: {e}")
+        logger.error("Error en get_liquidacion_eventos_by_idempotency_keys: %s", e)
         raise
 
+@invalidates('liquidaciones_resumen')
+@medir('db')
 def update_liquidacion_resumen_saldo(liquidacion_resumen_id: str, saldo_actual: float) -> None:
     """Updates the saldo_actual in the liquidaciones_resumen table."""
     supabase = get_supabase_client()
     try:
         supabase.table('liquidaciones_resumen').update({'saldo_actual': saldo_actual}).eq('id', liquidacion_resumen_id).execute()
     except Exception as e:
-        print(f"[ERROR en update_liquidacion_resumen_saldo]: {e}")
+        logger.error("Error en update_liquidacion_resumen_saldo: %s", e)
+        raise
+
+# --- Batch Reads & Writes (Portfolio Jobs) ---
+# No pasan por la caché: recorren toda la cartera y siempre deben leer datos frescos.
+# Los errores se relanzan para que un job no termine "con éxito" sobre datos incompletos.
+
+IN_FILTER_CHUNK_SIZE = 200  # Evita URLs demasiado largas en los filtros `in_` de PostgREST
+INSERT_CHUNK_SIZE = 500     # Filas por petición en inserciones masivas
+READ_PAGE_SIZE = 1000       # Filas por página en lecturas paginadas (no más que el max-rows de PostgREST)
+
+def _chunks(values: List[Any], size: int) -> List[List[Any]]:
+    return [values[i:i + size] for i in range(0, len(values), size)]
+
+@medir('db')
+def get_open_proposals_page(after_proposal_id: Optional[str], limit: int) -> List[Proposal]:
+    """
+    Retrieves one page of proposals in 'DESEMBOLSADA' or 'EN PROCESO DE LIQUIDACION',
+    ordered by proposal_id. Uses keyset pagination (proposal_id > after_proposal_id).
+    """
+    supabase = get_supabase_client()
+    try:
+        query = supabase.table('propuestas').select(
+            'proposal_id, moneda_factura, interes_mensual, interes_moratorio, fecha_pago_calculada, recalculate_result_json, estado'
+        ).in_('estado', ['DESEMBOLSADA', 'EN PROCESO DE LIQUIDACION'])
+        if after_proposal_id is not None:
+            query = query.gt('proposal_id', after_proposal_id)
+        response = query.order('proposal_id', desc=False).limit(limit).execute()
+        return response.data if response.data else []
+    except Exception as e:
+        logger.error("Error en get_open_proposals_page: %s", e)
+        raise
+
+@medir('db')
+def get_proposals_details_by_ids(proposal_ids: List[str]) -> Dict[str, Proposal]:
+    """Retrieves all details for several proposals, keyed by proposal_id."""
+    supabase = get_supabase_client()
+    propuestas = {}
+    try:
+        for chunk in _chunks(proposal_ids, IN_FILTER_CHUNK_SIZE):
+            response = supabase.table('propuestas').select('*').in_('proposal_id', chunk).execute()
+            for row in response.data or []:
+                propuestas[row['proposal_id']] = row
+        return propuestas
+    except Exception as e:
+        logger.error("Error en get_proposals_details_by_ids: %s", e)
+        raise
+
+@medir('db')
+def get_liquidacion_resumenes_by_proposal_ids(proposal_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Retrieves the liquidation summaries for several proposals, keyed by proposal_id."""
+    supabase = get_supabase_client()
+    resumenes = {}
+    try:
+        for chunk in _chunks(proposal_ids, IN_FILTER_CHUNK_SIZE):
+            response = supabase.table('liquidaciones_resumen').select('id, proposal_id, saldo_actual').in_('proposal_id', chunk).execute()
+            for row in response.data or []:
+                resumenes[row['proposal_id']] = row
+        return resumenes
+    except Exception as e:
+        logger.error("Error en get_liquidacion_resumenes_by_proposal_ids: %s", e)
+        raise
+
+@medir('db')
+def get_last_liquidacion_evento_fechas(resumen_ids: List[str]) -> Dict[str, str]:
+    """Returns the fecha_evento of the latest event of each liquidation summary, keyed by resumen id."""
+    supabase = get_supabase_client()
+    ultimas_fechas = {}
+    try:
+        for chunk in _chunks(resumen_ids, IN_FILTER_CHUNK_SIZE):
+            # Orden único (resumen, orden_evento desc): el primer evento de cada resumen es el último
+            # registrado y la paginación por `range` no salta ni repite filas. Sin paginar, el tope
+            # de filas de PostgREST cortaría justo la cola con los eventos más recientes.
+            desde = 0
+            while True:
+                response = supabase.table('liquidacion_eventos').select(
+                    'liquidacion_resumen_id, fecha_evento'
+                ).in_('liquidacion_resumen_id', chunk).order('liquidacion_resumen_id').order(
+                    'orden_evento', desc=True
+                ).range(desde, desde + READ_PAGE_SIZE - 1).execute()
+                filas = response.data or []
+                for row in filas:
+                    ultimas_fechas.setdefault(row['liquidacion_resumen_id'], row['fecha_evento'])
+                if len(filas) < READ_PAGE_SIZE:
+                    break
+                desde += READ_PAGE_SIZE
+        return ultimas_fechas
+    except Exception as e:
+        logger.error("Error en get_last_liquidacion_evento_fechas: %s", e)
+        raise
+
+@medir('db')
+def save_devengos_snapshot(rows: List[Dict[str, Any]]) -> int:
+    """Upserts accrual snapshot rows into 'devengos_snapshot' (unique on fecha_corte + proposal_id)."""
+    if not rows:
+        return 0
+    supabase = get_supabase_client()
+    try:
+        supabase.table('devengos_snapshot').upsert(rows, on_conflict='fecha_corte,proposal_id').execute()
+        return len(rows)
+    except Exception as e:
+        logger.error("Error en save_devengos_snapshot: %s", e)
         raise
 
 # --- Disbursement Specific ---
 
+@cached_read(tables=['desembolsos_resumen'])
+@medir('db')
 def get_desembolso_resumen(proposal_id: str) -> Optional[Dict[str, Any]]:
     """Retrieves the disbursement summary for a given proposal_id."""
     supabase = get_supabase_client()
@@ -245,9 +502,11 @@ def get_desembolso_resumen(proposal_id: str) -> Optional[Dict[str, Any]]:
         response = supabase.table('desembolsos_resumen').select('*').eq('proposal_id', proposal_id).limit(1).execute()
         return response.data[0] if response.data else None
     except Exception as e:
-        print(f"[ERROR en get_desembolso_resumen]: {e}")
+        logger.error("Error en get_desembolso_resumen: %s", e)
         return None
 
+@invalidates('desembolsos_resumen')
+@medir('db')
 def get_or_create_desembolso_resumen(proposal_id: str, datos_operacion: Proposal) -> str:
     """Gets or creates a disbursement summary and returns its ID."""
     supabase = get_supabase_client()
@@ -256,7 +515,7 @@ def get_or_create_desembolso_resumen(proposal_id: str, datos_operacion: Proposal
         return existing_resumen['id']
     
     try:
-        recalc_data = json.loads(datos_operacion.get('recalculate_result_json', '{}'))
+        recalc_data = json_codec.loads(datos_operacion.get('recalculate_result_json') or '{}')
         abono = recalc_data.get('desglose_final_detallado', {}).get('abono', {}).get('monto', 0.0)
         new_entry = {
             "proposal_id": proposal_id,
@@ -268,30 +527,27 @@ def get_or_create_desembolso_resumen(proposal_id: str, datos_operacion: Proposal
         else:
             raise Exception(f"Failed to create desembolso_resumen: {getattr(response, 'error', 'Unknown error')}")
     except Exception as e:
-        print(f"[ERROR en get_or_create_desembolso_resumen]: {e}")
+        logger.error("Error en get_or_create_desembolso_resumen: %s", e)
         raise
 
+@medir('db')
 def add_desembolso_evento(desembolso_resumen_id: str, tipo_evento: str, fecha_evento: dt.date, monto_desembolsado: float) -> None:
-    """Adds a new event to the desembolso_eventos table."""
-    supabase = get_supabase_client()
+    """Adds a new event to the desembolso_eventos table (orden_evento assigned atomically, see _append_event)."""
     try:
-        last_event_response = supabase.table('desembolso_eventos').select('orden_evento').eq('desembolso_resumen_id', desembolso_resumen_id).order('orden_evento', desc=True).limit(1).execute()
-        last_orden = last_event_response.data[0]['orden_evento'] if last_event_response.data else 0
-        
         new_event = {
             "desembolso_resumen_id": desembolso_resumen_id,
-            "orden_evento": last_orden + 1,
             "tipo_evento": tipo_evento,
             "fecha_evento": fecha_evento.isoformat(),
             "monto_desembolsado": monto_desembolsado,
         }
-        supabase.table('desembolso_eventos').insert(new_event).execute()
+        _append_event('append_desembolso_evento', new_event)
     except Exception as e:
-        print(f"[ERROR en add_desembolso_evento]: {e}")
+        logger.error("Error en add_desembolso_evento: %s", e)
         raise
 
 # --- Auditing ---
 
+@medir('db')
 def add_audit_event(usuario_id: str, entidad_id: str, accion: str, estado_anterior: str, estado_nuevo: str, detalles_adicionales: dict) -> None:
     """Adds a new event to the auditoria_eventos table."""
     supabase = get_supabase_client()
@@ -302,17 +558,93 @@ def add_audit_event(usuario_id: str, entidad_id: str, accion: str, estado_anteri
             "accion": accion,
             "estado_anterior": estado_anterior,
             "estado_nuevo": estado_nuevo,
-            "detalles_adicionales": json.dumps(detalles_adicionales),
+            "detalles_adicionales": json_codec.dumps(detalles_adicionales),
             "timestamp": dt.datetime.now().isoformat()
         }
         supabase.table('auditoria_eventos').insert(new_event).execute()
     except Exception as e:
-        print(f"[ERROR en add_audit_event]: {e}")
+        logger.error("Error en add_audit_event: %s", e)
         # Not raising exception here to avoid rolling back the main operation if audit fails
         pass
 
+@medir('db')
+def add_audit_events_bulk(events: List[Dict[str, Any]]) -> int:
+    """Adds several events to the auditoria_eventos table in a single insert. Returns how many were inserted."""
+    if not events:
+        return 0
+    supabase = get_supabase_client()
+    ahora = dt.datetime.now().isoformat()
+    rows = [{
+        "usuario_id": event.get("usuario_id"),
+        "entidad_id": event.get("entidad_id"),
+        "accion": event.get("accion"),
+        "estado_anterior": event.get("estado_anterior"),
+        "estado_nuevo": event.get("estado_nuevo"),
+        "detalles_adicionales": json_codec.dumps(event.get("detalles_adicionales") or {}),
+        "timestamp": event.get("timestamp") or ahora
+    } for event in events]
+    try:
+        for chunk in _chunks(rows, INSERT_CHUNK_SIZE):
+            supabase.table('auditoria_eventos').insert(chunk).execute()
+        return len(rows)
+    except Exception as e:
+        logger.error("Error en add_audit_events_bulk: %s", e)
+        raise # El llamador (p. ej. RegistroAuditoria) decide si reintenta
+
+# --- Background Jobs (API /trabajos) ---
+
+# Columnas de estado: sondear un trabajo no debe leer el blob de resultados
+JOB_STATUS_COLUMNS = 'id,tipo,estado,usuario_id,idempotency_key,huella_payload,total,procesados,exitosas,errores,error,created_at,started_at,finished_at,updated_at'
+
+@medir('db')
+def create_job(job: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Inserts a row into 'trabajos_lote'. Returns None if another job already holds its idempotency_key."""
+    supabase = get_supabase_client()
+    try:
+        response = supabase.table('trabajos_lote').insert(job).execute()
+        return response.data[0] if response.data else None
+    except Exception as e:
+        if getattr(e, 'code', None) == '23505':  # unique_violation: ganó otra petición con la misma clave
+            return None
+        logger.error("Error en create_job: %s", e)
+        raise
+
+@medir('db')
+def get_job(job_id: str, include_results: bool = False) -> Optional[Dict[str, Any]]:
+    """Retrieves a job by id; 'resultado_json' is only read when include_results is True."""
+    supabase = get_supabase_client()
+    try:
+        columns = '*' if include_results else JOB_STATUS_COLUMNS
+        response = supabase.table('trabajos_lote').select(columns).eq('id', job_id).limit(1).execute()
+        return response.data[0] if response.data else None
+    except Exception as e:
+        logger.error("Error en get_job: %s", e)
+        raise
+
+@medir('db')
+def get_job_by_idempotency_key(idempotency_key: str) -> Optional[Dict[str, Any]]:
+    """Retrieves the job created with a given idempotency key, if any."""
+    supabase = get_supabase_client()
+    try:
+        response = supabase.table('trabajos_lote').select(JOB_STATUS_COLUMNS).eq('idempotency_key', idempotency_key).limit(1).execute()
+        return response.data[0] if response.data else None
+    except Exception as e:
+        logger.error("Error en get_job_by_idempotency_key: %s", e)
+        raise
+
+@medir('db')
+def update_job(job_id: str, changes: Dict[str, Any]) -> None:
+    """Updates state, progress or results of a job ('updated_at' is set here)."""
+    supabase = get_supabase_client()
+    try:
+        supabase.table('trabajos_lote').update({**changes, "updated_at": dt.datetime.now().isoformat()}).eq('id', job_id).execute()
+    except Exception as e:
+        logger.error("Error en update_job: %s", e)
+        raise
+
 # --- Functions for User Management & Access Control ---
 
+@medir('db')
 def get_user_by_email(email: str) -> Optional[Dict[str, Any]]:
     """Retrieves a user's record from 'authorized_users' by email."""
     supabase = get_supabase_client()
@@ -320,9 +652,10 @@ def get_user_by_email(email: str) -> Optional[Dict[str, Any]]:
         response = supabase.table('authorized_users').select('*').eq('email', email).single().execute()
         return response.data if response.data else None
     except Exception as e:
-        print(f"[ERROR in get_user_by_email]: {e}")
+        logger.error("Error en get_user_by_email: %s", e)
         return None
 
+@medir('db')
 def add_new_authorized_user(email: str) -> Optional[Dict[str, Any]]:
     """Adds a new user to 'authorized_users'."""
     supabase = get_supabase_client()
@@ -330,9 +663,10 @@ def add_new_authorized_user(email: str) -> Optional[Dict[str, Any]]:
         response = supabase.table('authorized_users').insert({'email': email}).execute()
         return response.data[0] if response.data else None
     except Exception as e:
-        print(f"[ERROR in add_new_authorized_user]: {e}")
+        logger.error("Error en add_new_authorized_user: %s", e)
         return None
 
+@medir('db')
 def get_module_by_name(module_name: str) -> Optional[Dict[str, Any]]:
     """Retrieves a module's record from 'modules' by name."""
     supabase = get_supabase_client()
@@ -340,9 +674,10 @@ def get_module_by_name(module_name: str) -> Optional[Dict[str, Any]]:
         response = supabase.table('modules').select('*').eq('name', module_name).single().execute()
         return response.data if response.data else None
     except Exception as e:
-        print(f"[ERROR in get_module_by_name]: {e}")
+        logger.error("Error en get_module_by_name: %s", e)
         return None
 
+@medir('db')
 def get_user_module_access(user_id: int, module_id: int) -> Optional[Dict[str, Any]]:
     """Retrieves a user's access record for a specific module from 'user_module_access'."""
     supabase = get_supabase_client()
@@ -350,9 +685,10 @@ def get_user_module_access(user_id: int, module_id: int) -> Optional[Dict[str, A
         response = supabase.table('user_module_access').select('*').eq('user_id', user_id).eq('module_id', module_id).single().execute()
         return response.data if response.data else None
     except Exception as e:
-        print(f"[ERROR in get_user_module_access]: {e}")
+        logger.error("Error en get_user_module_access: %s", e)
         return None
 
+@medir('db')
 def add_user_module_access(user_id: int, module_id: int, hierarchy_level: str = 'viewer') -> Optional[Dict[str, Any]]:
     """Grants a user access to a module with a specified hierarchy level."""
     supabase = get_supabase_client()
@@ -360,9 +696,10 @@ def add_user_module_access(user_id: int, module_id: int, hierarchy_level: str =
         response = supabase.table('user_module_access').insert({'user_id': user_id, 'module_id': module_id, 'hierarchy_level': hierarchy_level}).execute()
         return response.data[0] if response.data else None
     except Exception as e:
-        print(f"[ERROR in add_user_module_access]: {e}")
+        logger.error("Error en add_user_module_access: %s", e)
         return None
 
+@medir('db')
 def add_module(name: str, description: Optional[str] = None) -> Optional[Dict[str, Any]]:
     """Adds a new module to the 'modules' table."""
     supabase = get_supabase_client()
@@ -370,5 +707,5 @@ def add_module(name: str, description: Optional[str] = None) -> Optional[Dict[st
         response = supabase.table('modules').insert({'name': name, 'description': description}).execute()
         return response.data[0] if response.data else None
     except Exception as e:
-        print(f"[ERROR in add_module]: {e}")
+        logger.error("Error en add_module: %s", e)
         return None
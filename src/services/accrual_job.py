@@ -0,0 +1,179 @@
+# src/services/accrual_job.py
+"""
+Job de devengo de fin de día para toda la cartera abierta.
+
+Recorre en páginas todas las propuestas 'DESEMBOLSADA' y 'EN PROCESO DE LIQUIDACION',
+calcula el interés compensatorio, moratorio, su IGV y el saldo proyectado a la fecha
+de corte, y guarda una foto en la tabla `devengos_snapshot`.
+
+Uso (desde `src/`):
+    python -m services.accrual_job --fecha 31-10-2025
+    python -m services.accrual_job --sin-guardar
+"""
+
+import argparse
+import datetime
+import json
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
+# Este módulo se importa como `src.services` (Streamlit) y como `services` (API / CLI).
+try:
+    from ..core.accrual_calculator import calcular_devengos_lote
+    from ..core.date_utils import FechaLike, a_ordinal, formatear_fecha_iso, parse_fechas
+    from ..core import json_codec
+    from ..core.money import a_monto, sumar_centavos
+    from ..data import supabase_repository as db
+except ImportError:
+    from core.accrual_calculator import calcular_devengos_lote
+    from core.date_utils import FechaLike, a_ordinal, formatear_fecha_iso, parse_fechas
+    from core import json_codec
+    from core.money import a_monto, sumar_centavos
+    from data import supabase_repository as db
+
+TAMANO_PAGINA = 1000
+TAMANO_ESCRITURA = 500
+
+# Total -> columnas de la foto que suma. Los totales se acumulan en centavos enteros (exactos
+# sin importar cuántas páginas se sumen) y se pasan a montos solo al armar el resumen.
+COLUMNAS_TOTALES = {
+    "capital_base": ("capital_base",),
+    "interes_compensatorio": ("interes_compensatorio",),
+    "interes_moratorio": ("interes_moratorio",),
+    "igv_total": ("igv_interes_compensatorio", "igv_interes_moratorio"),
+    "saldo_proyectado": ("saldo_proyectado",),
+}
+
+# --- Lectura Paginada ---
+
+def iterar_operaciones_abiertas(tamano_pagina: int = TAMANO_PAGINA) -> Iterator[List[Dict[str, Any]]]:
+    """Genera páginas de propuestas abiertas, ordenadas por proposal_id."""
+    ultimo_id = None
+    while True:
+        pagina = db.get_open_proposals_page(ultimo_id, tamano_pagina)
+        if not pagina:
+            return
+        yield pagina
+        if len(pagina) < tamano_pagina:
+            return
+        ultimo_id = pagina[-1]['proposal_id']
+
+def _capital_desembolsado(recalculate_result_json: Optional[str]) -> float:
+    try:
+        recalc_data = json_codec.loads(recalculate_result_json or '{}')
+        return float(recalc_data.get('calculo_con_tasa_encontrada', {}).get('capital') or 0.0)
+    except (json.JSONDecodeError, TypeError, ValueError, AttributeError):
+        return 0.0
+
+def preparar_pagina(propuestas: List[Dict[str, Any]]) -> Dict[str, List[Any]]:
+    """
+    Arma las columnas de entrada del cálculo para una página de propuestas.
+    Igual que `liquidacion_service.preparar_datos_operacion`: si ya hubo pagos, la base es
+    el saldo actual y la fecha del último evento; si no, el capital y la fecha de pago.
+    """
+    proposal_ids = [p['proposal_id'] for p in propuestas]
+    resumenes = db.get_liquidacion_resumenes_by_proposal_ids(proposal_ids)
+    ultimas_fechas = db.get_last_liquidacion_evento_fechas([r['id'] for r in resumenes.values()])
+
+    capitales, fechas_base = [], []
+    for propuesta in propuestas:
+        capital = _capital_desembolsado(propuesta.get('recalculate_result_json'))
+        fecha_base = propuesta.get('fecha_pago_calculada')
+
+        resumen = resumenes.get(propuesta['proposal_id'])
+        if resumen and resumen.get('saldo_actual') is not None:
+            capital = float(resumen['saldo_actual'])
+            fecha_base = ultimas_fechas.get(resumen['id']) or fecha_base
+
+        capitales.append(capital)
+        fechas_base.append(fecha_base)
+
+    return {
+        "proposal_id": proposal_ids,
+        "estado": [p.get('estado') for p in propuestas],
+        "moneda_factura": [p.get('moneda_factura') for p in propuestas],
+        "capital_base": capitales,
+        "fecha_base": parse_fechas(fechas_base),
+        "interes_mensual": [float(p.get('interes_mensual') or 0) for p in propuestas],
+        "interes_moratorio": [float(p.get('interes_moratorio') or 0) for p in propuestas],
+    }
+
+# --- Cálculo y Escritura ---
+
+def _filas_snapshot(entrada: Dict[str, List[Any]], devengos: Dict[str, Any], fecha_corte_iso: str) -> List[Dict[str, Any]]:
+    columnas = {nombre: list(valores.tolist() if hasattr(valores, 'tolist') else valores) for nombre, valores in devengos.items()}
+    filas = []
+    for i, proposal_id in enumerate(entrada['proposal_id']):
+        fecha_base = entrada['fecha_base'][i]
+        filas.append({
+            "fecha_corte": fecha_corte_iso,
+            "proposal_id": proposal_id,
+            "estado": entrada['estado'][i],
+            "moneda_factura": entrada['moneda_factura'][i],
+            "capital_base": round(abs(entrada['capital_base'][i]), 2),
+            "fecha_base": formatear_fecha_iso(fecha_base) if fecha_base is not None else None,
+            **{nombre: valores[i] for nombre, valores in columnas.items()},
+        })
+    return filas
+
+def _acumular_totales(totales: Dict[str, Dict[str, int]], filas: List[Dict[str, Any]]) -> None:
+    por_moneda: Dict[str, List[Dict[str, Any]]] = {}
+    for fila in filas:
+        por_moneda.setdefault(fila['moneda_factura'] or 'N/A', []).append(fila)
+
+    for moneda, filas_moneda in por_moneda.items():
+        total = totales.setdefault(moneda, {"operaciones": 0, **{clave: 0 for clave in COLUMNAS_TOTALES}})
+        total["operaciones"] += len(filas_moneda)
+        for clave, columnas in COLUMNAS_TOTALES.items():
+            total[clave] += sum(sumar_centavos([fila[columna] for fila in filas_moneda]) for columna in columnas)
+
+def ejecutar_devengo(fecha_corte: Optional[FechaLike] = None, tamano_pagina: int = TAMANO_PAGINA, guardar: bool = True) -> Dict[str, Any]:
+    """Ejecuta el devengo de toda la cartera abierta a `fecha_corte` (hoy por defecto)."""
+    inicio = time.perf_counter()
+    corte = a_ordinal(fecha_corte if fecha_corte is not None else datetime.date.today())
+    fecha_corte_iso = formatear_fecha_iso(corte)
+
+    operaciones, paginas, guardadas = 0, 0, 0
+    totales: Dict[str, Dict[str, int]] = {}
+
+    for propuestas in iterar_operaciones_abiertas(tamano_pagina):
+        entrada = preparar_pagina(propuestas)
+        devengos = calcular_devengos_lote(
+            capitales=entrada['capital_base'],
+            fechas_base=entrada['fecha_base'],
+            tasas_compensatorias_pct=entrada['interes_mensual'],
+            tasas_moratorias_pct=entrada['interes_moratorio'],
+            fecha_corte=corte
+        )
+        filas = _filas_snapshot(entrada, devengos, fecha_corte_iso)
+        _acumular_totales(totales, filas)
+
+        if guardar:
+            for inicio_bloque in range(0, len(filas), TAMANO_ESCRITURA):
+                guardadas += db.save_devengos_snapshot(filas[inicio_bloque:inicio_bloque + TAMANO_ESCRITURA])
+
+        operaciones += len(filas)
+        paginas += 1
+
+    for total in totales.values():
+        for clave in COLUMNAS_TOTALES:
+            total[clave] = a_monto(total[clave])
+
+    return {
+        "fecha_corte": fecha_corte_iso,
+        "operaciones": operaciones,
+        "paginas": paginas,
+        "filas_guardadas": guardadas,
+        "totales_por_moneda": totales,
+        "segundos": round(time.perf_counter() - inicio, 3),
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Devengo de fin de día de la cartera abierta.")
+    parser.add_argument("--fecha", help="Fecha de corte DD-MM-YYYY (por defecto, hoy).")
+    parser.add_argument("--tamano-pagina", type=int, default=TAMANO_PAGINA)
+    parser.add_argument("--sin-guardar", action="store_true", help="Calcula sin escribir en devengos_snapshot.")
+    args = parser.parse_args()
+
+    resumen = ejecutar_devengo(fecha_corte=args.fecha, tamano_pagina=args.tamano_pagina, guardar=not args.sin_guardar)
+    print(json.dumps(resumen, indent=2, ensure_ascii=False))
@@ -0,0 +1,127 @@
+# src/services/calculator_client.py
+
+import os
+from typing import Any, Dict, List, Optional
+
+import requests
+
+# Este módulo se importa como `src.services` (Streamlit) y como `services` (API).
+try:
+    from ..core import factoring_calculator
+    from . import liquidacion_service
+except ImportError:
+    from core import factoring_calculator
+    from services import liquidacion_service
+
+# --- Configuración ---
+# CALCULATOR_MODE = "local"  -> los cálculos se ejecutan en este mismo proceso (import directo).
+# CALCULATOR_MODE = "remote" -> los cálculos se delegan a la API de FastAPI vía HTTP.
+# Si no se define, se usa "remote" cuando hay una URL de backend configurada y "local" en caso contrario.
+MODO_LOCAL = "local"
+MODO_REMOTO = "remote"
+
+class CalculatorError(Exception):
+    """Error al ejecutar un cálculo, sin importar el transporte usado."""
+    pass
+
+def _leer_secreto_streamlit(clave: str) -> Optional[str]:
+    try:
+        import streamlit as st
+        return st.secrets["backend_api"][clave]
+    except Exception:
+        # Streamlit no disponible o secreto no configurado
+        return None
+
+def get_backend_url() -> Optional[str]:
+    """URL del backend: variable de entorno primero, luego secretos de Streamlit."""
+    return os.getenv("BACKEND_API_URL") or _leer_secreto_streamlit("url")
+
+def get_calculator_mode() -> str:
+    modo = os.getenv("CALCULATOR_MODE") or _leer_secreto_streamlit("mode")
+    if modo:
+        return modo.strip().lower()
+    return MODO_REMOTO if get_backend_url() else MODO_LOCAL
+
+# --- Transportes ---
+
+class LocalCalculatorClient:
+    """Ejecuta los cálculos importando directamente los módulos de `core`."""
+
+    modo = MODO_LOCAL
+
+    def calcular_desembolso_lote(self, lote: List[Dict[str, Any]]) -> Dict[str, Any]:
+        try:
+            return factoring_calculator.procesar_lote_desembolso_inicial(lote)
+        except Exception as e:
+            raise CalculatorError(str(e)) from e
+
+    def encontrar_tasa_lote(self, lote: List[Dict[str, Any]]) -> Dict[str, Any]:
+        try:
+            return factoring_calculator.procesar_lote_encontrar_tasa(lote)
+        except Exception as e:
+            raise CalculatorError(str(e)) from e
+
+    def simular_liquidacion_lote(self, usuario_id: str, liquidaciones: List[Dict[str, Any]]) -> Dict[str, Any]:
+        try:
+            return liquidacion_service.simular_liquidacion_lote(liquidaciones)
+        except Exception as e:
+            raise CalculatorError(str(e)) from e
+
+    def simular_escenarios(self, usuario_id: str, escenarios: List[Dict[str, Any]]) -> Dict[str, Any]:
+        try:
+            return liquidacion_service.simular_escenarios(escenarios)
+        except Exception as e:
+            raise CalculatorError(str(e)) from e
+
+    def get_projected_balance(self, proposal_id: str, fecha_inicio_proyeccion: str, initial_capital: Optional[float]) -> Dict[str, Any]:
+        try:
+            return liquidacion_service.proyectar_saldo(proposal_id, fecha_inicio_proyeccion, initial_capital)
+        except Exception as e:
+            raise CalculatorError(str(e)) from e
+
+class RemoteCalculatorClient:
+    """Delega los cálculos a la API de FastAPI. Reutiliza la conexión entre llamadas."""
+
+    modo = MODO_REMOTO
+
+    def __init__(self, base_url: str):
+        self.base_url = base_url.rstrip('/')
+        self._session = requests.Session()
+
+    def _post(self, ruta: str, payload: Any) -> Dict[str, Any]:
+        try:
+            response = self._session.post(f"{self.base_url}{ruta}", json=payload)
+            response.raise_for_status()
+            return response.json()
+        except requests.exceptions.RequestException as e:
+            raise CalculatorError(f"Error de conexión con la API: {e}") from e
+
+    def calcular_desembolso_lote(self, lote: List[Dict[str, Any]]) -> Dict[str, Any]:
+        return self._post("/calcular_desembolso_lote", lote)
+
+    def encontrar_tasa_lote(self, lote: List[Dict[str, Any]]) -> Dict[str, Any]:
+        return self._post("/encontrar_tasa_lote", lote)
+
+    def simular_liquidacion_lote(self, usuario_id: str, liquidaciones: List[Dict[str, Any]]) -> Dict[str, Any]:
+        return self._post("/liquidaciones/simular_liquidacion_lote", {"usuario_id": usuario_id, "liquidaciones": liquidaciones})
+
+    def simular_escenarios(self, usuario_id: str, escenarios: List[Dict[str, Any]]) -> Dict[str, Any]:
+        return self._post("/liquidaciones/simular_escenarios", {"usuario_id": usuario_id, "escenarios": escenarios})
+
+    def get_projected_balance(self, proposal_id: str, fecha_inicio_proyeccion: str, initial_capital: Optional[float]) -> Dict[str, Any]:
+        payload = {"proposal_id": proposal_id, "fecha_inicio_proyeccion": fecha_inicio_proyeccion, "initial_capital": initial_capital}
+        return self._post("/liquidaciones/get_projected_balance", payload)
+
+# --- Fábrica ---
+
+def get_calculator_client(modo: Optional[str] = None):
+    """Devuelve el cliente de cálculo según la configuración (o el `modo` indicado)."""
+    modo = (modo or get_calculator_mode()).strip().lower()
+    if modo == MODO_LOCAL:
+        return LocalCalculatorClient()
+    if modo == MODO_REMOTO:
+        base_url = get_backend_url()
+        if not base_url:
+            raise CalculatorError("La URL del backend no está configurada. Define BACKEND_API_URL o configúrala en st.secrets.")
+        return RemoteCalculatorClient(base_url)
+    raise CalculatorError(f"Modo de cálculo desconocido: '{modo}'. Use '{MODO_LOCAL}' o '{MODO_REMOTO}'.")
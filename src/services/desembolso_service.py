@@ -0,0 +1,39 @@
+# src/services/desembolso_service.py
+
+from typing import Any, Dict, Iterator, List
+
+# Este módulo se importa como `src.services` (Streamlit) y como `services` (API).
+try:
+    from ..data import supabase_repository as db
+except ImportError:
+    from data import supabase_repository as db
+
+# --- Registro de Desembolsos ---
+
+def procesar_desembolso_item(desembolso: Dict[str, Any], usuario_id: str) -> Dict[str, Any]:
+    """
+    Marca la propuesta como DESEMBOLSADA y registra la auditoría. No lanza excepciones:
+    el error queda en el resultado de la factura.
+    """
+    proposal_id = desembolso.get('proposal_id')
+    try:
+        # Update status to DESEMBOLSADA
+        db.update_proposal_status(proposal_id, 'DESEMBOLSADA')
+
+        # Add audit event (assuming initial status was 'ACTIVO')
+        db.add_audit_event(
+            usuario_id=usuario_id,
+            entidad_id=proposal_id,
+            accion="DESEMBOLSO",
+            estado_anterior="ACTIVO",
+            estado_nuevo="DESEMBOLSADA",
+            detalles_adicionales={"monto_desembolsado": desembolso['monto_desembolsado'], "fecha_desembolso": desembolso['fecha_desembolso_real']}
+        )
+        return {"proposal_id": proposal_id, "status": "SUCCESS", "message": "Estado actualizado a DESEMBOLSADA."}
+    except Exception as e:
+        return {"proposal_id": proposal_id, "status": "ERROR", "message": f"Error al actualizar estado: {e}"}
+
+def procesar_desembolso_lote_iter(desembolsos: List[Dict[str, Any]], usuario_id: str) -> Iterator[Dict[str, Any]]:
+    """Procesa el lote factura por factura y entrega cada resultado apenas termina."""
+    for desembolso in desembolsos:
+        yield procesar_desembolso_item(desembolso, usuario_id)
@@ -0,0 +1,193 @@
+# src/services/job_service.py
+
+import datetime
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+# Este módulo se importa como `src.services` (Streamlit) y como `services` (API).
+try:
+    from ..core import json_codec
+    from ..core.structured_logging import get_logger
+    from ..data import supabase_repository as db
+    from .desembolso_service import procesar_desembolso_lote_iter
+    from .liquidacion_service import procesar_liquidacion_lote_iter
+except ImportError:
+    from core import json_codec
+    from core.structured_logging import get_logger
+    from data import supabase_repository as db
+    from services.desembolso_service import procesar_desembolso_lote_iter
+    from services.liquidacion_service import procesar_liquidacion_lote_iter
+
+logger = get_logger('services.jobs')
+
+# --- Trabajos de Lote en Segundo Plano ---
+# Un lote grande de liquidaciones o desembolsos puede tardar más que el timeout del cliente
+# (o del proxy). `enviar_trabajo` guarda el trabajo en la tabla `trabajos_lote`, lo encola
+# en un pool de hilos del proceso y devuelve enseguida su id; el cliente sondea el estado y
+# el progreso con `obtener_trabajo` y, al terminar, lee los resultados con `obtener_resultados`.
+#
+# Con `idempotency_key`, reenviar el mismo lote (p. ej. tras un timeout) devuelve el trabajo
+# ya creado en lugar de aplicar las liquidaciones otra vez; la restricción UNIQUE de la tabla
+# resuelve el caso de dos envíos simultáneos. Reusar la clave con otro lote es un error.
+#
+# El trabajo corre en el proceso que lo recibió: si ese proceso se reinicia, el trabajo queda
+# EN_PROCESO con `updated_at` detenido y hay que reenviar las facturas que falten.
+#
+# Configuración por variables de entorno:
+#   JOBS_WORKERS              hilos del pool (2 por defecto)
+#   JOBS_PROGRESO_SEGUNDOS    cada cuánto se guarda el progreso como máximo (1.0)
+
+MAX_WORKERS = int(os.environ.get("JOBS_WORKERS", "2"))
+PROGRESO_CADA_SEGUNDOS = float(os.environ.get("JOBS_PROGRESO_SEGUNDOS", "1.0"))
+
+PENDIENTE = 'PENDIENTE'
+EN_PROCESO = 'EN_PROCESO'
+COMPLETADO = 'COMPLETADO'
+FALLIDO = 'FALLIDO'
+ESTADOS_FINALES = (COMPLETADO, FALLIDO)
+
+# Tipo de trabajo -> procesador del lote (items, usuario_id, request_id), un resultado por
+# factura. El request_id es la clave de idempotencia del trabajo o, sin ella, la huella del
+# lote: reenviar el mismo lote sin clave crea otro trabajo, pero sus facturas salen DUPLICADO.
+TIPOS: Dict[str, Callable[[List[Dict[str, Any]], str, str], Iterator[Dict[str, Any]]]] = {
+    'procesar_liquidacion_lote': procesar_liquidacion_lote_iter,
+    'desembolsar_lote': lambda items, usuario_id, request_id: procesar_desembolso_lote_iter(items, usuario_id),
+}
+
+class ConflictoIdempotencia(ValueError):
+    """La clave de idempotencia ya se usó con otro lote."""
+
+_pool: Optional[ThreadPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+def _get_pool() -> ThreadPoolExecutor:
+    """Pool perezoso y compartido: los hilos se crean una vez y se reutilizan entre trabajos."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="trabajo-lote")
+        return _pool
+
+def shutdown() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+def _ahora() -> str:
+    return datetime.datetime.now().isoformat()
+
+def huella_payload(tipo: str, items: List[Dict[str, Any]], usuario_id: str) -> str:
+    """SHA-256 del lote, independiente del orden de las claves, para detectar claves reusadas."""
+    canonico = json.dumps({'tipo': tipo, 'usuario_id': usuario_id, 'items': items}, sort_keys=True, default=str, separators=(',', ':'))
+    return hashlib.sha256(canonico.encode('utf-8')).hexdigest()
+
+def _vista(trabajo: Dict[str, Any]) -> Dict[str, Any]:
+    """Lo que ve el cliente: sin la huella ni el blob de resultados."""
+    return {clave: valor for clave, valor in trabajo.items() if clave not in ('huella_payload', 'resultado_json')}
+
+def _existente(idempotency_key: str, huella: str) -> Dict[str, Any]:
+    trabajo = db.get_job_by_idempotency_key(idempotency_key)
+    if trabajo is None:
+        raise RuntimeError(f"No se encontró el trabajo de la clave de idempotencia '{idempotency_key}'.")
+    if trabajo.get('huella_payload') != huella:
+        raise ConflictoIdempotencia(f"La clave de idempotencia '{idempotency_key}' ya se usó con otro lote.")
+    return _vista(trabajo)
+
+def enviar_trabajo(tipo: str, items: List[Dict[str, Any]], usuario_id: str,
+                   idempotency_key: Optional[str] = None) -> Tuple[Dict[str, Any], bool]:
+    """
+    Registra el trabajo y lo encola. Devuelve el trabajo y si se creó ahora (False cuando
+    la clave de idempotencia ya tenía un trabajo con el mismo lote).
+    """
+    if tipo not in TIPOS:
+        raise ValueError(f"Tipo de trabajo desconocido: '{tipo}'.")
+    huella = huella_payload(tipo, items, usuario_id)
+    if idempotency_key:
+        if db.get_job_by_idempotency_key(idempotency_key) is not None:
+            return _existente(idempotency_key, huella), False
+
+    ahora = _ahora()
+    creado = db.create_job({
+        "id": uuid.uuid4().hex,
+        "tipo": tipo,
+        "estado": PENDIENTE,
+        "usuario_id": usuario_id,
+        "idempotency_key": idempotency_key or None,
+        "huella_payload": huella,
+        "total": len(items),
+        "procesados": 0,
+        "exitosas": 0,
+        "errores": 0,
+        "created_at": ahora,
+        "updated_at": ahora,
+    })
+    if creado is None:  # Otra petición con la misma clave insertó primero
+        return _existente(idempotency_key, huella), False
+
+    _get_pool().submit(_ejecutar, creado['id'], tipo, items, usuario_id, idempotency_key or huella)
+    logger.info("Trabajo %s encolado (%s, %d facturas)", creado['id'], tipo, len(items))
+    return _vista(creado), True
+
+def _ejecutar(job_id: str, tipo: str, items: List[Dict[str, Any]], usuario_id: str, request_id: str) -> None:
+    resultados: List[Dict[str, Any]] = []
+    exitosas = errores = 0
+    try:
+        db.update_job(job_id, {"estado": EN_PROCESO, "started_at": _ahora()})
+        ultimo_guardado = time.monotonic()
+        for resultado in TIPOS[tipo](items, usuario_id, request_id):
+            resultados.append(resultado)
+            if resultado.get("status") == "SUCCESS":
+                exitosas += 1
+            elif resultado.get("status") == "ERROR":
+                errores += 1  # Los DUPLICADO cuentan como procesados, no como errores
+            if time.monotonic() - ultimo_guardado >= PROGRESO_CADA_SEGUNDOS:
+                _guardar_progreso(job_id, len(resultados), exitosas, errores)
+                ultimo_guardado = time.monotonic()
+        db.update_job(job_id, {
+            "estado": COMPLETADO, "procesados": len(resultados), "exitosas": exitosas, "errores": errores,
+            "resultado_json": json_codec.dumps(resultados), "finished_at": _ahora(),
+        })
+        logger.info("Trabajo %s completado (%d exitosas, %d errores)", job_id, exitosas, errores)
+    except Exception as e:
+        logger.exception("Trabajo %s falló tras %d facturas", job_id, len(resultados))
+        try:
+            # Se guardan los resultados parciales: esas facturas ya quedaron registradas
+            db.update_job(job_id, {
+                "estado": FALLIDO, "procesados": len(resultados), "exitosas": exitosas, "errores": errores,
+                "resultado_json": json_codec.dumps(resultados), "error": str(e), "finished_at": _ahora(),
+            })
+        except Exception:
+            logger.exception("No se pudo marcar el trabajo %s como fallido", job_id)
+
+def _guardar_progreso(job_id: str, procesados: int, exitosas: int, errores: int) -> None:
+    # El progreso es informativo: si la escritura falla, el trabajo sigue
+    try:
+        db.update_job(job_id, {"procesados": procesados, "exitosas": exitosas, "errores": errores})
+    except Exception as e:
+        logger.warning("No se pudo guardar el progreso del trabajo %s: %s", job_id, e)
+
+def obtener_trabajo(job_id: str) -> Optional[Dict[str, Any]]:
+    """Estado y progreso del trabajo, o None si no existe."""
+    trabajo = db.get_job(job_id)
+    return _vista(trabajo) if trabajo else None
+
+def obtener_resultados(job_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Trabajo con sus resultados por factura en `resultados_del_lote` (el mismo formato que
+    los endpoints síncronos). Mientras no termina, `resultados_del_lote` es None.
+    """
+    trabajo = db.get_job(job_id, include_results=True)
+    if trabajo is None:
+        return None
+    resultados = trabajo.get('resultado_json')
+    if isinstance(resultados, str):
+        resultados = json_codec.loads(resultados)
+    return {**_vista(trabajo), "resultados_del_lote": resultados if trabajo['estado'] in ESTADOS_FINALES else None}
@@ -0,0 +1,351 @@
+# src/services/liquidacion_service.py
+
+import datetime
+import hashlib
+import json
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# Este módulo se importa como `src.services` (Streamlit) y como `services` (API).
+try:
+    from ..core.liquidation_calculator import calcular_liquidacion, proyectar_saldo_diario
+    from ..core.date_utils import a_date, formatear_fecha, iso_a_fecha, parse_fecha
+    from ..core.scenario_calculator import calcular_grilla_liquidacion
+    from ..core import json_codec
+    from ..core.structured_logging import get_logger
+    from ..data import supabase_repository as db
+    from . import simulation_executor
+except ImportError:
+    from core.liquidation_calculator import calcular_liquidacion, proyectar_saldo_diario
+    from core.date_utils import a_date, formatear_fecha, iso_a_fecha, parse_fecha
+    from core.scenario_calculator import calcular_grilla_liquidacion
+    from core import json_codec
+    from core.structured_logging import get_logger
+    from data import supabase_repository as db
+    from services import simulation_executor
+
+logger = get_logger('services.liquidaciones')
+
+ESTADOS_LIQUIDABLES = ['DESEMBOLSADA', 'EN PROCESO DE LIQUIDACION']
+MAX_CELDAS_ESCENARIO = 200_000  # Tope de tasas × fechas × montos por factura
+
+# --- Preparación de Datos ---
+
+def _validar_estado(datos_operacion: Dict[str, Any], proposal_id: str) -> str:
+    estado_anterior = datos_operacion.get('estado', 'DESCONOCIDO')
+    if estado_anterior not in ESTADOS_LIQUIDABLES:
+        raise ValueError(f"Factura {proposal_id} no está en un estado válido para liquidar.")
+    return estado_anterior
+
+def _normalizar_datos_operacion(
+    datos_operacion: Dict[str, Any],
+    is_first_payment: bool,
+    liquidacion_previa: Optional[Dict[str, Any]],
+    fecha_ultimo_evento_str: Optional[str]
+) -> Dict[str, Any]:
+    """Deja la propuesta (ya leída) en el formato que espera `calcular_liquidacion`. No accede a la base de datos."""
+    fecha_str_original = datos_operacion.get('fecha_pago_calculada')
+    if fecha_str_original:
+        try:
+            datos_operacion['fecha_pago_calculada'] = iso_a_fecha(fecha_str_original)
+        except ValueError: pass
+
+    recalc_json_str = datos_operacion.get('recalculate_result_json')
+    if recalc_json_str:
+        try:
+            recalc_data = json_codec.loads(recalc_json_str)
+            calculos = recalc_data.get('calculo_con_tasa_encontrada', {})
+            desglose = recalc_data.get('desglose_final_detallado', {})
+            datos_operacion['capital_calculado'] = calculos.get('capital')
+            datos_operacion['interes_calculado'] = desglose.get('interes', {}).get('monto')
+        except (json.JSONDecodeError, AttributeError): pass
+
+    if not is_first_payment and liquidacion_previa and liquidacion_previa.get('saldo_actual') is not None:
+        datos_operacion['capital_calculado'] = liquidacion_previa['saldo_actual']
+        if fecha_ultimo_evento_str:
+            datos_operacion['fecha_pago_calculada'] = iso_a_fecha(fecha_ultimo_evento_str)
+
+    return datos_operacion
+
+def preparar_datos_operacion(proposal_id: str, is_first_payment: bool) -> Tuple[Dict[str, Any], str]:
+    """
+    Obtiene la propuesta y la deja en el formato que espera `calcular_liquidacion`.
+    Devuelve los datos de la operación y el estado anterior de la propuesta.
+    """
+    datos_operacion = db.get_proposal_details_by_id(proposal_id)
+    if not datos_operacion:
+        raise LookupError(f"Propuesta {proposal_id} no encontrada.")
+
+    estado_anterior = _validar_estado(datos_operacion, proposal_id)
+
+    liquidacion_previa = db.get_liquidacion_resumen(proposal_id)
+    eventos_liquidacion = db.get_liquidacion_eventos(proposal_id)
+    fecha_ultimo_evento_str = eventos_liquidacion[-1]['fecha_evento'] if eventos_liquidacion else None
+
+    datos_operacion = _normalizar_datos_operacion(datos_operacion, is_first_payment, liquidacion_previa, fecha_ultimo_evento_str)
+    return datos_operacion, estado_anterior
+
+def preparar_lote(liquidaciones: List[Dict[str, Any]]) -> List[Tuple[Optional[Dict[str, Any]], Optional[str]]]:
+    """
+    Versión en lote de `preparar_datos_operacion`: tres lecturas masivas en lugar de tres
+    por factura. Devuelve, en el mismo orden, (datos_operacion, None) o (None, mensaje_de_error).
+    """
+    proposal_ids = list(dict.fromkeys(l['proposal_id'] for l in liquidaciones))
+    propuestas = db.get_proposals_details_by_ids(proposal_ids)
+    resumenes = db.get_liquidacion_resumenes_by_proposal_ids(proposal_ids)
+    ultimas_fechas = db.get_last_liquidacion_evento_fechas([r['id'] for r in resumenes.values()])
+
+    preparados = []
+    for liquidacion in liquidaciones:
+        proposal_id = liquidacion['proposal_id']
+        try:
+            propuesta = propuestas.get(proposal_id)
+            if not propuesta:
+                raise LookupError(f"Propuesta {proposal_id} no encontrada.")
+            _validar_estado(propuesta, proposal_id)
+            resumen = resumenes.get(proposal_id)
+            datos_operacion = _normalizar_datos_operacion(
+                dict(propuesta),  # copia: la misma propuesta puede aparecer varias veces en el lote
+                liquidacion['is_first_payment'],
+                resumen,
+                ultimas_fechas.get(resumen['id']) if resumen else None
+            )
+            preparados.append((datos_operacion, None))
+        except Exception as e:
+            preparados.append((None, str(e)))
+    return preparados
+
+def calcular_liquidacion_item(liquidacion: Dict[str, Any]) -> Tuple[Dict[str, Any], str, Dict[str, Any]]:
+    """
+    Prepara y calcula la liquidación de una factura sin escribir en la base de datos.
+    `liquidacion` tiene la forma de `LiquidacionInfo` del router de liquidaciones.
+    """
+    datos_operacion, estado_anterior = preparar_datos_operacion(
+        liquidacion['proposal_id'], liquidacion['is_first_payment']
+    )
+    resultado_calculo = calcular_liquidacion(
+        datos_operacion=datos_operacion,
+        monto_recibido=liquidacion['monto_recibido'],
+        fecha_pago_real_str=liquidacion['fecha_pago_real'],
+        tasa_interes_compensatoria_pct=liquidacion['tasa_interes_compensatoria_pct'],
+        tasa_interes_moratoria_pct=liquidacion['tasa_interes_moratoria_pct']
+    )
+    return datos_operacion, estado_anterior, resultado_calculo
+
+# --- Idempotencia ---
+# Cada liquidación registrada lleva una clave derivada de (proposal_id, fecha_pago_real,
+# monto_recibido, request_id), con índice único en `liquidacion_eventos`. `request_id` es la
+# cabecera Idempotency-Key del cliente: un doble clic o un reintento tras un timeout reenvía
+# el mismo lote con el mismo request_id y esas facturas se rechazan como DUPLICADO antes de
+# calcular o escribir nada. Un pago nuevo (aunque repita fecha y monto) usa otro request_id.
+# Sin cabecera, el request_id es la huella del lote: reenviar el mismo lote sin clave también
+# sale como DUPLICADO, así que un pago nuevo idéntico a uno ya registrado necesita su clave.
+
+def clave_idempotencia_liquidacion(liquidacion: Dict[str, Any], request_id: str) -> str:
+    """SHA-256 de (proposal_id, fecha de pago, monto al céntimo, request_id)."""
+    fecha = liquidacion.get('fecha_pago_real')
+    try:
+        fecha = formatear_fecha(parse_fecha(fecha))  # '1-2-2025' y '01-02-2025' son la misma fecha
+    except ValueError:
+        pass  # El cálculo rechazará la fecha; la clave solo necesita ser estable
+    try:
+        monto = f"{float(liquidacion.get('monto_recibido')):.2f}"
+    except (TypeError, ValueError):
+        monto = str(liquidacion.get('monto_recibido'))
+    partes = (str(liquidacion.get('proposal_id')), str(fecha), monto, request_id)
+    return hashlib.sha256('|'.join(partes).encode('utf-8')).hexdigest()
+
+def request_id_por_defecto(liquidaciones: List[Dict[str, Any]], usuario_id: str) -> str:
+    """SHA-256 del lote y el usuario, independiente del orden de las claves de cada factura."""
+    canonico = json.dumps({'usuario_id': usuario_id, 'liquidaciones': liquidaciones}, sort_keys=True, default=str, separators=(',', ':'))
+    return hashlib.sha256(canonico.encode('utf-8')).hexdigest()
+
+def _resultado_duplicado(liquidacion: Dict[str, Any], evento: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    origen = f"evento {evento['orden_evento']} registrado el {evento.get('created_at')}" if evento else "repetida en este lote"
+    return {"proposal_id": liquidacion.get('proposal_id'), "status": "DUPLICADO",
+            "message": f"Liquidación ya registrada ({origen}); no se volvió a aplicar."}
+
+def procesar_liquidacion_item(liquidacion: Dict[str, Any], usuario_id: str, idempotency_key: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Calcula y registra la liquidación de una factura: evento, saldo, nuevo estado de la
+    propuesta y auditoría. No lanza excepciones: el error queda en el resultado de la factura.
+    Si otro proceso ya registró `idempotency_key`, el evento no se inserta y no se escribe nada más.
+    """
+    proposal_id = liquidacion.get('proposal_id')
+    try:
+        # 1 y 2. Obtener datos, validar estado y ejecutar el cálculo de liquidación
+        datos_operacion, estado_anterior, resultado_calculo = calcular_liquidacion_item(liquidacion)
+        if 'error' in resultado_calculo:
+            # Entrada rechazada por el motor: no se escribe nada ni se consume la clave
+            return {"proposal_id": proposal_id, "status": "ERROR", "message": resultado_calculo['error']}
+
+        # 3. Determinar nuevo estado y guardar todo
+        saldo_final = resultado_calculo.get('liquidacion_final', {}).get('saldo_final_a_liquidar', 0)
+        nuevo_estado = 'LIQUIDADA' if saldo_final <= 0 else 'EN PROCESO DE LIQUIDACION'
+
+        liquidacion_resumen_id = db.get_or_create_liquidacion_resumen(proposal_id, datos_operacion)
+        db.add_liquidacion_evento(
+            liquidacion_resumen_id=liquidacion_resumen_id,
+            tipo_evento=resultado_calculo.get('tipo_pago', 'Desconocido'),
+            fecha_evento=datetime.datetime.fromordinal(parse_fecha(liquidacion['fecha_pago_real'])),
+            monto_recibido=liquidacion['monto_recibido'],
+            dias_diferencia=resultado_calculo.get('dias_diferencia', 0),
+            resultado_json=resultado_calculo,
+            idempotency_key=idempotency_key
+        )
+        db.update_liquidacion_resumen_saldo(liquidacion_resumen_id, saldo_final)
+        db.update_proposal_status(proposal_id, nuevo_estado)
+
+        # 4. Registrar evento de auditoría
+        db.add_audit_event(
+            usuario_id=usuario_id,
+            entidad_id=proposal_id,
+            accion="LIQUIDACION",
+            estado_anterior=estado_anterior,
+            estado_nuevo=nuevo_estado,
+            detalles_adicionales=liquidacion
+        )
+        return {"proposal_id": proposal_id, "status": "SUCCESS", "message": f"Liquidación registrada. Nuevo estado: {nuevo_estado}", "resultado_calculo": resultado_calculo}
+    except db.DuplicateEventError:
+        return _resultado_duplicado(liquidacion, None)
+    except Exception as e:
+        return {"proposal_id": proposal_id, "status": "ERROR", "message": str(e)}
+
+# --- Operaciones de Lote ---
+
+def procesar_liquidacion_lote_iter(liquidaciones: List[Dict[str, Any]], usuario_id: str,
+                                   request_id: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Procesa el lote factura por factura y entrega cada resultado apenas termina (ver el modo
+    NDJSON del router). Las claves de idempotencia del lote se consultan con una sola lectura:
+    las ya registradas y las repetidas dentro del lote salen como DUPLICADO sin calcularse.
+    Sin `request_id` se usa la huella del lote (ver `request_id_por_defecto`).
+    """
+    request_id = request_id or request_id_por_defecto(liquidaciones, usuario_id)
+    claves = [clave_idempotencia_liquidacion(liquidacion, request_id) for liquidacion in liquidaciones]
+    try:
+        registradas = db.get_liquidacion_eventos_by_idempotency_keys(claves)
+    except Exception:
+        # El índice único sigue impidiendo el doble registro, pero los reenvíos ya no salen DUPLICADO de antemano
+        logger.warning("No se pudieron consultar las claves de idempotencia del lote; solo queda el índice único",
+                       exc_info=True)
+        registradas = {}
+    vistas = set()
+    for liquidacion, clave in zip(liquidaciones, claves):
+        if clave in registradas or clave in vistas:
+            yield _resultado_duplicado(liquidacion, registradas.get(clave))
+            continue
+        vistas.add(clave)
+        yield procesar_liquidacion_item(liquidacion, usuario_id, clave)
+
+
+def simular_liquidacion_lote(liquidaciones: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Simula la liquidación de un lote. No modifica el estado de ninguna propuesta.
+    Los datos se leen en bloque y el cálculo se reparte entre procesos (ver `simulation_executor`).
+    """
+    inicio = time.perf_counter()
+    preparados = preparar_lote(liquidaciones)
+    segundos_preparacion = time.perf_counter() - inicio
+
+    tareas, posiciones = [], []
+    for posicion, (liquidacion, (datos_operacion, _)) in enumerate(zip(liquidaciones, preparados)):
+        if datos_operacion is None:
+            continue
+        tareas.append({
+            "datos_operacion": datos_operacion,
+            "monto_recibido": liquidacion['monto_recibido'],
+            "fecha_pago_real_str": liquidacion['fecha_pago_real'],
+            "tasa_interes_compensatoria_pct": liquidacion['tasa_interes_compensatoria_pct'],
+            "tasa_interes_moratoria_pct": liquidacion['tasa_interes_moratoria_pct'],
+        })
+        posiciones.append(posicion)
+
+    calculos, metadata = simulation_executor.calcular_liquidaciones(tareas)
+    calculo_por_posicion = dict(zip(posiciones, calculos))
+
+    resultados = []
+    for posicion, (liquidacion, (_, error)) in enumerate(zip(liquidaciones, preparados)):
+        proposal_id = liquidacion.get('proposal_id')
+        if error is not None:
+            resultados.append({"proposal_id": proposal_id, "status": "ERROR", "message": error})
+        else:
+            resultados.append({"proposal_id": proposal_id, "status": "SUCCESS", "message": "Simulación de liquidación exitosa.", "resultado_calculo": calculo_por_posicion[posicion]})
+
+    metadata["segundos_preparacion"] = round(segundos_preparacion, 4)
+    metadata["segundos_total"] = round(time.perf_counter() - inicio, 4)
+    return {"resultados_del_lote": resultados, "metadata": metadata}
+
+def _fechas_del_escenario(escenario: Dict[str, Any]) -> List[str]:
+    """Fechas explícitas (`fechas_pago`) o el rango diario `fecha_pago_desde`..`fecha_pago_hasta`."""
+    if escenario.get('fechas_pago'):
+        return list(escenario['fechas_pago'])
+    if escenario.get('fecha_pago_desde') and escenario.get('fecha_pago_hasta'):
+        desde, hasta = parse_fecha(escenario['fecha_pago_desde']), parse_fecha(escenario['fecha_pago_hasta'])
+        if hasta < desde:
+            raise ValueError("'fecha_pago_hasta' no puede ser anterior a 'fecha_pago_desde'.")
+        return [formatear_fecha(dia) for dia in range(desde, hasta + 1)]
+    raise ValueError("Indique 'fechas_pago' o el rango 'fecha_pago_desde' / 'fecha_pago_hasta'.")
+
+def simular_escenarios(escenarios: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Barre una grilla tasas × fechas de pago × montos por factura en una sola pasada vectorizada.
+    Devuelve matrices compactas (ver `scenario_calculator`) en lugar de un resultado por combinación.
+    """
+    preparados = preparar_lote(escenarios)
+
+    resultados = []
+    for escenario, (datos_operacion, error) in zip(escenarios, preparados):
+        proposal_id = escenario.get('proposal_id')
+        if error is not None:
+            resultados.append({"proposal_id": proposal_id, "status": "ERROR", "message": error})
+            continue
+        try:
+            fechas = _fechas_del_escenario(escenario)
+            montos = list(escenario.get('montos_recibidos') or [])
+            tasas = [(t['tasa_interes_compensatoria_pct'], t['tasa_interes_moratoria_pct']) for t in escenario.get('tasas') or []]
+            if not montos or not tasas:
+                raise ValueError("Indique al menos un monto recibido y un par de tasas.")
+            celdas = len(tasas) * len(fechas) * len(montos)
+            if celdas > MAX_CELDAS_ESCENARIO:
+                raise ValueError(f"La grilla tiene {celdas} combinaciones; el máximo es {MAX_CELDAS_ESCENARIO}.")
+
+            grilla = calcular_grilla_liquidacion(datos_operacion, fechas, montos, tasas)
+            resultados.append({
+                "proposal_id": proposal_id,
+                "status": "SUCCESS",
+                "ejes": ["tasas", "fechas_pago", "montos_recibidos"],
+                "tasas": [list(t) for t in tasas],
+                "fechas_pago": fechas,
+                "montos_recibidos": montos,
+                **grilla
+            })
+        except Exception as e:
+            resultados.append({"proposal_id": proposal_id, "status": "ERROR", "message": str(e)})
+
+    return {"resultados_del_lote": resultados}
+
+def proyectar_saldo(proposal_id: str, fecha_inicio_proyeccion: str, initial_capital: Optional[float]) -> Dict[str, Any]:
+    """Proyecta 30 días de saldo usando las tasas guardadas en la propuesta."""
+    proposal_details = db.get_proposal_details_by_id(proposal_id)
+    if not proposal_details:
+        raise LookupError("Proposal not found")
+
+    interes_compensatorio = proposal_details.get('interes_mensual')
+    interes_moratorio = proposal_details.get('interes_moratorio')
+    if interes_compensatorio is None or interes_moratorio is None:
+        raise ValueError("Tasas de interés no encontradas en la propuesta.")
+
+    try:
+        fecha_inicio = a_date(fecha_inicio_proyeccion)
+    except (ValueError, TypeError):
+        raise ValueError("Formato de fecha inválido. Use ISO format.")
+
+    proyeccion = proyectar_saldo_diario(
+        capital_inicial=initial_capital,
+        fecha_inicio=fecha_inicio,
+        tasa_compensatoria_mensual=interes_compensatorio,
+        tasa_moratoria_mensual=interes_moratorio,
+        dias_proyeccion=30  # Proyectar por 30 días por defecto
+    )
+    return {"proyeccion_futura": proyeccion}
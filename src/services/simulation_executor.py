@@ -0,0 +1,78 @@
+# src/services/simulation_executor.py
+
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+# Este módulo se importa como `src.services` (Streamlit) y como `services` (API).
+try:
+    from ..core.liquidation_calculator import procesar_lote_liquidacion
+    from ..core.tracing import medir
+except ImportError:
+    from core.liquidation_calculator import procesar_lote_liquidacion
+    from core.tracing import medir
+
+# --- Configuración ---
+# SIMULACION_WORKERS: procesos del pool (por defecto, uno por núcleo). 1 desactiva el pool.
+# Por debajo de UMBRAL_PARALELO facturas el costo de enviar los datos a otro proceso
+# supera al del cálculo, así que se calcula en el proceso actual.
+MAX_WORKERS = int(os.environ.get("SIMULACION_WORKERS", "0")) or (os.cpu_count() or 1)
+UMBRAL_PARALELO = int(os.environ.get("SIMULACION_UMBRAL_PARALELO", "200"))
+CHUNKS_POR_WORKER = 4  # Varios chunks por proceso para equilibrar la carga
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+def _get_pool() -> ProcessPoolExecutor:
+    """Pool perezoso y compartido: los procesos se crean una vez y se reutilizan entre peticiones."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # 'spawn' evita heredar hilos y conexiones abiertas del proceso padre (uvicorn, Supabase)
+            _pool = ProcessPoolExecutor(max_workers=MAX_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+def shutdown() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+def _calcular_chunk(tareas: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return procesar_lote_liquidacion(tareas)["resultados_por_factura"]
+
+@medir('calc')
+def calcular_liquidaciones(tareas: List[Dict[str, Any]], tamano_chunk: Optional[int] = None) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Ejecuta `calcular_liquidacion` sobre cada tarea (ver `procesar_lote_liquidacion`) y
+    devuelve los resultados en el mismo orden que `tareas`, junto con métricas de ejecución.
+    """
+    inicio = time.perf_counter()
+    paralelo = MAX_WORKERS > 1 and len(tareas) >= UMBRAL_PARALELO
+
+    if not paralelo:
+        resultados = _calcular_chunk(tareas) if tareas else []
+        workers, num_chunks = 1, 1 if tareas else 0
+    else:
+        tamano_chunk = tamano_chunk or max(1, -(-len(tareas) // (MAX_WORKERS * CHUNKS_POR_WORKER)))
+        chunks = [tareas[i:i + tamano_chunk] for i in range(0, len(tareas), tamano_chunk)]
+        resultados = []
+        # `map` conserva el orden de los chunks, así que basta con concatenar
+        for resultados_chunk in _get_pool().map(_calcular_chunk, chunks):
+            resultados.extend(resultados_chunk)
+        workers, num_chunks = MAX_WORKERS, len(chunks)
+
+    segundos = time.perf_counter() - inicio
+    metadata = {
+        "modo": "paralelo" if paralelo else "secuencial",
+        "workers": workers,
+        "chunks": num_chunks,
+        "facturas": len(tareas),
+        "segundos_calculo": round(segundos, 4),
+        "facturas_por_segundo": round(len(tareas) / segundos, 1) if segundos > 0 else None,
+    }
+    return resultados, metadata
@@ -0,0 +1,139 @@
+# src/utils/invoice_model.py
+
+import hashlib
+import json
+from typing import Any, Dict, List, Optional
+
+# Este módulo se importa como `src.utils` (Streamlit) y como `utils` (API).
+try:
+    from ..core.date_utils import dias_entre_lote, formatear_fecha, parse_fecha, parse_fechas
+except ImportError:
+    from core.date_utils import dias_entre_lote, formatear_fecha, parse_fecha, parse_fechas
+
+Invoice = Dict[str, Any]
+
+# --- Grafo de Dependencias ---
+# Campo de entrada -> campos derivados que hay que recalcular cuando cambia.
+DEPENDENCIAS = {
+    'fecha_emision_factura': ('fecha_pago_calculada', 'plazo_credito_dias', 'plazo_operacion_calculado'),
+    'plazo_credito_dias': ('fecha_pago_calculada', 'plazo_operacion_calculado'),
+    'fecha_pago_calculada': ('plazo_credito_dias', 'plazo_operacion_calculado'),
+    'fecha_desembolso_factoring': ('plazo_operacion_calculado',),
+}
+
+# Qué rama de `update_date_calculations` corresponde a cada campo de fecha.
+_CHANGED_FIELD_POR_CAMPO = {
+    'plazo_credito_dias': 'plazo',
+    'fecha_pago_calculada': 'fecha',
+}
+
+# Campos que alimentan el cálculo de desembolso / tasa. Si alguno cambia, el
+# resultado guardado en la factura queda obsoleto.
+CAMPOS_DE_CALCULO = frozenset({
+    'monto_neto_factura', 'moneda_factura', 'tasa_de_avance', 'interes_mensual',
+    'interes_moratorio', 'plazo_operacion_calculado', 'dias_minimos_interes_individual',
+})
+
+# --- Cálculo de Fechas ---
+
+def update_date_calculations(invoice: Invoice, changed_field: Optional[str] = None) -> None:
+    """Recalcula fecha de pago, plazo de crédito y plazo de operación de una factura."""
+    try:
+        fecha_emision_str = invoice.get('fecha_emision_factura')
+        if not fecha_emision_str:
+            invoice['fecha_pago_calculada'] = ""
+            invoice['plazo_credito_dias'] = 0
+            invoice['plazo_operacion_calculado'] = 0
+            return
+
+        emision = parse_fecha(fecha_emision_str)
+
+        if changed_field == 'plazo' and (invoice.get('plazo_credito_dias') or 0) > 0:
+            invoice['fecha_pago_calculada'] = formatear_fecha(emision + int(invoice['plazo_credito_dias']))
+        elif changed_field == 'fecha' and invoice.get('fecha_pago_calculada'):
+            invoice['plazo_credito_dias'] = max(parse_fecha(invoice['fecha_pago_calculada']) - emision, 0)
+        elif (invoice.get('plazo_credito_dias') or 0) > 0:
+            invoice['fecha_pago_calculada'] = formatear_fecha(emision + int(invoice['plazo_credito_dias']))
+        else:
+            invoice['fecha_pago_calculada'] = ""
+
+        if invoice.get('fecha_pago_calculada') and invoice.get('fecha_desembolso_factoring'):
+            plazo = parse_fecha(invoice['fecha_pago_calculada']) - parse_fecha(invoice['fecha_desembolso_factoring'])
+            invoice['plazo_operacion_calculado'] = max(plazo, 0)
+        else:
+            invoice['plazo_operacion_calculado'] = 0
+
+    except (ValueError, TypeError, AttributeError):
+        invoice['fecha_pago_calculada'] = ""
+        invoice['plazo_operacion_calculado'] = 0
+
+def recalcular_plazos_operacion(invoices: List[Invoice]) -> None:
+    """Recalcula en bloque `plazo_operacion_calculado` (fecha de pago - fecha de desembolso)."""
+    if not invoices:
+        return
+    pagos = parse_fechas(invoice.get('fecha_pago_calculada') for invoice in invoices)
+    desembolsos = parse_fechas(invoice.get('fecha_desembolso_factoring') for invoice in invoices)
+    plazos = dias_entre_lote(desembolsos, pagos, minimo=0)
+    for invoice, plazo in zip(invoices, plazos):
+        invoice['plazo_operacion_calculado'] = int(plazo)
+
+# --- Modificación con Seguimiento de Cambios ---
+
+def set_invoice_field(invoice: Invoice, field: str, value: Any, changed_field: Optional[str] = None) -> bool:
+    """
+    Asigna `value` a `field` y recalcula solo los campos que dependen de él.
+    Devuelve False (sin tocar nada) si el valor no cambió. Si cambia alguna entrada
+    del cálculo financiero, marca la factura con `calculo_obsoleto`.
+    """
+    if invoice.get(field) == value:
+        return False
+
+    invoice[field] = value
+    modificados = {field}
+
+    derivados = DEPENDENCIAS.get(field, ())
+    if derivados:
+        anteriores = {campo: invoice.get(campo) for campo in derivados}
+        update_date_calculations(invoice, changed_field=changed_field or _CHANGED_FIELD_POR_CAMPO.get(field))
+        modificados.update(campo for campo in derivados if invoice.get(campo) != anteriores[campo])
+
+    if modificados & CAMPOS_DE_CALCULO:
+        invoice['calculo_obsoleto'] = True
+    return True
+
+def apply_global_field(invoices: List[Invoice], field: str, value: Any, changed_field: Optional[str] = None) -> List[int]:
+    """Aplica un valor global. Solo las facturas cuyo valor difiere se modifican y recalculan."""
+    if field != 'fecha_desembolso_factoring':
+        return [idx for idx, invoice in enumerate(invoices) if set_invoice_field(invoice, field, value, changed_field)]
+
+    # La fecha de desembolso solo afecta al plazo de operación: se recalcula en bloque.
+    cambiadas = [idx for idx, invoice in enumerate(invoices) if invoice.get(field) != value]
+    afectadas = [invoices[idx] for idx in cambiadas]
+    plazos_anteriores = [invoice.get('plazo_operacion_calculado') for invoice in afectadas]
+    for invoice in afectadas:
+        invoice[field] = value
+    recalcular_plazos_operacion(afectadas)
+    for invoice, plazo_anterior in zip(afectadas, plazos_anteriores):
+        if invoice['plazo_operacion_calculado'] != plazo_anterior:
+            invoice['calculo_obsoleto'] = True
+    return cambiadas
+
+# --- Estado del Cálculo del Lote ---
+
+def lote_fingerprint(payload: List[Dict[str, Any]]) -> str:
+    """Huella del payload completo enviado al calculador."""
+    return hashlib.sha1(json.dumps(payload, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+def lote_requiere_calculo(invoices: List[Invoice], payload: List[Dict[str, Any]], ultimo_fingerprint: Optional[str]) -> bool:
+    """
+    Indica si hay que volver a calcular el lote. La decisión de comisión es agregada
+    (se toma sobre la suma del lote), así que basta con que cambie una factura para
+    recalcular todas; si nada cambió, se reutilizan los resultados guardados.
+    """
+    if any(invoice.get('calculo_obsoleto') or not invoice.get('recalculate_result') for invoice in invoices):
+        return True
+    return lote_fingerprint(payload) != ultimo_fingerprint
+
+def marcar_lote_calculado(invoices: List[Invoice]) -> None:
+    for invoice in invoices:
+        invoice['calculo_obsoleto'] = False
@@ -0,0 +1,32 @@
+# tests/conftest.py
+import os
+import sys
+
+import pytest
+
+# Las pruebas importan los módulos como la API (`core`, `data`, `services`, `api`) y nunca
+# tocan Supabase: el repositorio usa una base SQLite en memoria nueva en cada prueba.
+os.environ["STORAGE_BACKEND"] = "sqlite"
+os.environ.pop("SQLITE_PATH", None)
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from data import cache, supabase_client  # noqa: E402
+
+@pytest.fixture
+def base_local():
+    """Cliente SQLite nuevo (esquema vacío) y caché desactivada durante la prueba."""
+    supabase_client._supabase_client_instance = None
+    cache.configure(ttl_seconds=0)
+    cliente = supabase_client.get_supabase_client()
+    yield cliente
+    supabase_client._supabase_client_instance = None
+    cache.configure(ttl_seconds=cache.DEFAULT_TTL_SECONDS, state_ttl_seconds=cache.DEFAULT_STATE_TTL_SECONDS,
+                    search_ttl_seconds=cache.DEFAULT_SEARCH_TTL_SECONDS)
+
+@pytest.fixture
+def propuestas(base_local):
+    """Cinco propuestas sintéticas DESEMBOLSADAS cargadas en la base local."""
+    from benchmarks import synthetic_data
+    filas = synthetic_data.propuestas_desembolsadas(synthetic_data.generar_facturas(5, semilla=7))
+    base_local.table('propuestas').insert(filas).execute()
+    return filas
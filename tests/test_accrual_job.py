@@ -0,0 +1,110 @@
+# tests/test_accrual_job.py
+import datetime
+
+import pytest
+
+from core.accrual_calculator import calcular_devengos_lote
+from core.date_utils import a_ordinal
+from data import sqlite_client, supabase_repository as db
+from services import accrual_job
+
+FECHA_CORTE = datetime.date(2026, 3, 31)
+
+TOPE_FILAS = 3
+
+@pytest.fixture
+def paginas_chicas(monkeypatch):
+    """
+    Imita el max-rows de PostgREST con un tope de 3 filas por lectura (y páginas del mismo
+    tamaño): con unos pocos eventos ya hay que paginar para no perder los últimos.
+    """
+    monkeypatch.setattr(db, 'READ_PAGE_SIZE', TOPE_FILAS)
+    execute_original = sqlite_client._Consulta.execute
+
+    def execute(consulta):
+        if consulta._operacion == 'select' and (consulta._limite is None or consulta._limite > TOPE_FILAS):
+            consulta._limite = TOPE_FILAS
+        return execute_original(consulta)
+
+    monkeypatch.setattr(sqlite_client._Consulta, 'execute', execute)
+
+def _resumen_con_eventos(base_local, proposal_id, saldo_actual, fechas):
+    resumen_id = base_local.table('liquidaciones_resumen').insert(
+        {'proposal_id': proposal_id, 'saldo_actual': saldo_actual}
+    ).execute().data[0]['id']
+    if not fechas:
+        return resumen_id
+    base_local.table('liquidacion_eventos').insert([
+        {'liquidacion_resumen_id': resumen_id, 'orden_evento': orden, 'tipo_evento': 'Pago',
+         'fecha_evento': fecha.isoformat(), 'monto_recibido': 10.0}
+        for orden, fecha in enumerate(fechas, start=1)
+    ]).execute()
+    return resumen_id
+
+def _fechas(desde, cantidad):
+    return [desde + datetime.timedelta(days=7 * i) for i in range(cantidad)]
+
+def test_ultima_fecha_de_cada_resumen_aunque_haya_que_paginar(base_local, paginas_chicas):
+    largo = _resumen_con_eventos(base_local, 'P-1', 500.0, _fechas(datetime.date(2025, 1, 6), 8))
+    corto = _resumen_con_eventos(base_local, 'P-2', 300.0, _fechas(datetime.date(2025, 2, 3), 2))
+    sin_eventos = base_local.table('liquidaciones_resumen').insert({'proposal_id': 'P-3', 'saldo_actual': 1.0}).execute().data[0]['id']
+
+    fechas = db.get_last_liquidacion_evento_fechas([largo, corto, sin_eventos])
+
+    assert fechas == {largo: '2025-02-24', corto: '2025-02-10'}
+
+def test_ultima_fecha_no_depende_del_orden_de_insercion(base_local, paginas_chicas):
+    resumen_id = _resumen_con_eventos(base_local, 'P-1', 500.0, [])
+    for orden in (4, 1, 3, 5, 2):
+        base_local.table('liquidacion_eventos').insert({
+            'liquidacion_resumen_id': resumen_id, 'orden_evento': orden,
+            'fecha_evento': datetime.date(2025, 1, orden).isoformat(),
+        }).execute()
+
+    assert db.get_last_liquidacion_evento_fechas([resumen_id]) == {resumen_id: '2025-01-05'}
+
+def test_devengo_parte_del_saldo_y_la_fecha_del_ultimo_pago(base_local, propuestas, paginas_chicas):
+    pagada = propuestas[0]
+    eventos = _fechas(datetime.date.fromisoformat(pagada['fecha_pago_calculada']), 6)
+    _resumen_con_eventos(base_local, pagada['proposal_id'], 1000.0, eventos)
+
+    resumen = accrual_job.ejecutar_devengo(fecha_corte=FECHA_CORTE, tamano_pagina=2)
+
+    assert resumen['operaciones'] == len(propuestas)
+    assert resumen['paginas'] == 3
+    assert resumen['filas_guardadas'] == len(propuestas)
+
+    fila = base_local.table('devengos_snapshot').select('*').eq('proposal_id', pagada['proposal_id']).single().execute().data
+    assert fila['capital_base'] == 1000.0
+    assert fila['fecha_base'] == eventos[-1].isoformat()
+
+    esperado = calcular_devengos_lote(
+        capitales=[1000.0],
+        fechas_base=[a_ordinal(eventos[-1])],
+        tasas_compensatorias_pct=[float(pagada['interes_mensual'])],
+        tasas_moratorias_pct=[float(pagada['interes_moratorio'])],
+        fecha_corte=FECHA_CORTE
+    )
+    for columna in ('interes_compensatorio', 'interes_moratorio', 'saldo_proyectado'):
+        assert fila[columna] == pytest.approx(float(esperado[columna][0]), abs=0.005)
+
+def test_totales_por_moneda_y_reproceso_idempotente(base_local, propuestas):
+    primero = accrual_job.ejecutar_devengo(fecha_corte=FECHA_CORTE, tamano_pagina=2)
+    segundo = accrual_job.ejecutar_devengo(fecha_corte=FECHA_CORTE, tamano_pagina=2)
+
+    filas = base_local.table('devengos_snapshot').select('*').execute().data
+    assert len(filas) == len(propuestas)
+    assert segundo['totales_por_moneda'] == primero['totales_por_moneda']
+
+    for moneda, total in primero['totales_por_moneda'].items():
+        de_la_moneda = [f for f in filas if f['moneda_factura'] == moneda]
+        assert total['operaciones'] == len(de_la_moneda)
+        assert total['saldo_proyectado'] == pytest.approx(sum(f['saldo_proyectado'] for f in de_la_moneda), abs=0.001)
+        assert total['igv_total'] == pytest.approx(
+            sum(f['igv_interes_compensatorio'] + f['igv_interes_moratorio'] for f in de_la_moneda), abs=0.001)
+
+def test_sin_guardar_no_escribe(base_local, propuestas):
+    resumen = accrual_job.ejecutar_devengo(fecha_corte=FECHA_CORTE, guardar=False)
+    assert resumen['operaciones'] == len(propuestas)
+    assert resumen['filas_guardadas'] == 0
+    assert base_local.table('devengos_snapshot').select('id').execute().data == []
@@ -0,0 +1,65 @@
+# tests/test_append_eventos.py
+import datetime
+
+import pytest
+
+from data import supabase_repository as db
+from data.sqlite_client import SQLiteAPIError
+
+CONFLICTO_ORDEN = 'UNIQUE constraint failed: liquidacion_eventos.liquidacion_resumen_id, liquidacion_eventos.orden_evento'
+
+@pytest.fixture
+def rpc_con_fallos(base_local, monkeypatch):
+    """Hace fallar las primeras llamadas a la RPC con los errores de `fallos` y cuenta los intentos."""
+    monkeypatch.setattr(db.time, 'sleep', lambda segundos: None)
+    rpc_original = base_local.rpc
+    estado = {'fallos': [], 'llamadas': 0}
+
+    def rpc(nombre, parametros):
+        estado['llamadas'] += 1
+        if estado['fallos']:
+            raise estado['fallos'].pop(0)
+        return rpc_original(nombre, parametros)
+
+    monkeypatch.setattr(base_local, 'rpc', rpc)
+    return estado
+
+def _resumen(base_local):
+    return base_local.table('liquidaciones_resumen').insert({'proposal_id': 'P-1', 'saldo_actual': 100.0}).execute().data[0]['id']
+
+def _agregar(resumen_id, idempotency_key=None):
+    db.add_liquidacion_evento(resumen_id, 'Pago', datetime.date(2025, 1, 31), 50.0, 0, {'saldo': 50.0}, idempotency_key)
+
+def _ordenes(base_local):
+    return [e['orden_evento'] for e in base_local.table('liquidacion_eventos').select('orden_evento').order('orden_evento').execute().data]
+
+def test_reintenta_conflictos_de_orden(base_local, rpc_con_fallos):
+    resumen_id = _resumen(base_local)
+    rpc_con_fallos['fallos'] = [SQLiteAPIError(CONFLICTO_ORDEN, code='23505')] * 2
+    _agregar(resumen_id)
+    _agregar(resumen_id)
+    assert rpc_con_fallos['llamadas'] == 4
+    assert _ordenes(base_local) == [1, 2]
+
+def test_se_rinde_tras_agotar_los_reintentos(base_local, rpc_con_fallos):
+    resumen_id = _resumen(base_local)
+    rpc_con_fallos['fallos'] = [SQLiteAPIError(CONFLICTO_ORDEN, code='23505')] * db.EVENT_APPEND_RETRIES
+    with pytest.raises(SQLiteAPIError):
+        _agregar(resumen_id)
+    assert rpc_con_fallos['llamadas'] == db.EVENT_APPEND_RETRIES
+    assert _ordenes(base_local) == []
+
+def test_clave_duplicada_no_se_reintenta(base_local, rpc_con_fallos):
+    resumen_id = _resumen(base_local)
+    _agregar(resumen_id, 'clave-1')
+    with pytest.raises(db.DuplicateEventError):
+        _agregar(resumen_id, 'clave-1')
+    assert rpc_con_fallos['llamadas'] == 2
+    assert _ordenes(base_local) == [1]
+
+def test_otros_errores_no_se_reintentan(base_local, rpc_con_fallos):
+    # Un NOT NULL (23502) no es un conflicto de orden ni un duplicado
+    with pytest.raises(SQLiteAPIError) as error:
+        db.add_liquidacion_evento(None, 'Pago', datetime.date(2025, 1, 31), 50.0, 0, {}, 'clave-1')
+    assert error.value.code == '23502'
+    assert rpc_con_fallos['llamadas'] == 1
@@ -0,0 +1,75 @@
+# tests/test_audit_log.py
+import pytest
+
+from core.audit_log import RegistroAuditoria, registro_a_evento_auditoria
+
+def _registro(i, saldo, decision='BACK_DOOR_APLICADO'):
+    return {'operacion_id': f'OP-{i}', 'saldo_original': saldo, 'decision': decision, 'usuario': 'pytest'}
+
+def test_buffer_circular_descarta_los_mas_antiguos():
+    registro = RegistroAuditoria(capacidad=3)
+    for i in range(5):
+        registro.registrar(_registro(i, 1.0))
+    assert len(registro) == 3
+    assert [r['operacion_id'] for r in registro] == ['OP-2', 'OP-3', 'OP-4']
+    assert [r['operacion_id'] for r in registro.consultar(limite=2)] == ['OP-4', 'OP-3']
+    assert registro.consultar(operacion_id='OP-0') == []
+
+def test_metricas_acumuladas_incluyen_registros_descartados():
+    registro = RegistroAuditoria(capacidad=2)
+    for i, saldo in enumerate([10.0, 2.5, 40.0, 7.5]):
+        registro.registrar(_registro(i, saldo))
+    registro.registrar(_registro(9, 99.0, decision='OTRA'))
+    metricas = registro.metricas('BACK_DOOR_APLICADO')
+    assert metricas == {'cantidad': 4, 'suma': 60.0, 'promedio': 15.0, 'minimo': 2.5, 'maximo': 40.0}
+    assert registro.metricas('OTRA')['cantidad'] == 1
+    assert registro.metricas('NINGUNA') == {'cantidad': 0, 'suma': 0.0, 'promedio': 0.0, 'minimo': None, 'maximo': None}
+    assert [r['decision'] for r in registro.consultar(decision='OTRA')] == ['OTRA']
+
+def test_volcado_por_lotes_al_sink():
+    lotes = []
+    registro = RegistroAuditoria(sink=lotes.append, tamano_flush=3)
+    for i in range(7):
+        registro.registrar(_registro(i, 1.0))
+    assert [len(lote) for lote in lotes] == [3, 3]
+    assert registro.pendientes == 1
+    assert registro.flush() == 1
+    assert registro.flush() == 0
+    assert [r['operacion_id'] for lote in lotes for r in lote] == [f'OP-{i}' for i in range(7)]
+
+def test_fallo_del_sink_reencola_acotado_y_queda_en_el_log(caplog):
+    enviados, caido = [], {'valor': True}
+
+    def sink(lote):
+        if caido['valor']:
+            raise ConnectionError('sin red')
+        enviados.extend(lote)
+
+    registro = RegistroAuditoria(capacidad=4, sink=sink, tamano_flush=3)
+    with caplog.at_level('ERROR', logger='inandes.core.auditoria'):
+        for i in range(9):
+            registro.registrar(_registro(i, 1.0))
+    # Desde el tercer registro cada inserción reintenta el volcado; la cola se recorta a la
+    # capacidad, conservando los más recientes
+    assert registro.pendientes == 4
+    fallos = [r for r in caplog.records if 'auditoría' in r.getMessage()]
+    assert len(fallos) == 7
+    assert isinstance(fallos[0].exc_info[1], ConnectionError)
+
+    caido['valor'] = False
+    assert registro.flush() == 4
+    assert [r['operacion_id'] for r in enviados] == ['OP-5', 'OP-6', 'OP-7', 'OP-8']
+    assert registro.pendientes == 0
+
+def test_sin_sink_no_acumula_pendientes():
+    registro = RegistroAuditoria()
+    registro.append(_registro(1, 1.0))
+    assert registro.pendientes == 0
+    assert registro.flush() == 0
+
+def test_registro_a_evento_auditoria():
+    evento = registro_a_evento_auditoria({**_registro(1, 5.0), 'timestamp': '2025-01-01T00:00:00'})
+    assert evento['entidad_id'] == 'OP-1'
+    assert evento['accion'] == 'BACK_DOOR_APLICADO'
+    assert evento['usuario_id'] == 'pytest'
+    assert evento['timestamp'] == '2025-01-01T00:00:00'
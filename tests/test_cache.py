@@ -0,0 +1,132 @@
+# tests/test_cache.py
+import pytest
+
+from data import cache
+
+@pytest.fixture(autouse=True)
+def cache_limpia():
+    cache.configure(ttl_seconds=60, state_ttl_seconds=0, search_ttl_seconds=60)
+    yield
+    cache.configure(ttl_seconds=cache.DEFAULT_TTL_SECONDS, state_ttl_seconds=cache.DEFAULT_STATE_TTL_SECONDS,
+                    search_ttl_seconds=cache.DEFAULT_SEARCH_TTL_SECONDS)
+
+def _lector(tabla, search=False):
+    llamadas = []
+
+    def leer(clave):
+        llamadas.append(clave)
+        return {"clave": clave, "valores": [1, 2]}
+
+    leer.__name__ = f"leer_{tabla}"  # La clave de la caché incluye el nombre de la función
+    return cache.cached_read(tables=[tabla], search=search)(leer), llamadas
+
+def test_lectura_se_reutiliza_y_devuelve_copias():
+    leer, llamadas = _lector('EMISORES.DEUDORES')
+    primero = leer('a')
+    primero["valores"].append(3)
+    assert leer('a') == {"clave": 'a', "valores": [1, 2]}
+    assert llamadas == ['a']
+
+def test_escritura_invalida_las_lecturas_de_su_tabla():
+    leer, llamadas = _lector('EMISORES.DEUDORES')
+    otra, llamadas_otra = _lector('otra_tabla')
+    escribir = cache.invalidates('EMISORES.DEUDORES')(lambda: None)
+
+    leer('a'), otra('a')
+    escribir()
+    leer('a'), otra('a')
+    assert llamadas == ['a', 'a']
+    assert llamadas_otra == ['a']
+
+def test_la_escritura_invalida_aunque_falle():
+    leer, llamadas = _lector('EMISORES.DEUDORES')
+
+    @cache.invalidates('EMISORES.DEUDORES')
+    def escribir():
+        raise RuntimeError("fallo")
+
+    leer('a')
+    with pytest.raises(RuntimeError):
+        escribir()
+    leer('a')
+    assert llamadas == ['a', 'a']
+
+def test_resultados_vacios_no_se_guardan():
+    llamadas = []
+
+    @cache.cached_read(tables=['EMISORES.DEUDORES'])
+    def leer():
+        llamadas.append(1)
+        return []
+
+    leer(), leer()
+    assert len(llamadas) == 2
+
+@pytest.mark.parametrize("tabla", cache.TABLAS_CON_ESTADO)
+def test_tablas_con_estado_no_se_cachean_por_defecto(tabla):
+    # Otro proceso (API, trabajos, réplicas) puede cambiar el estado sin invalidar esta caché
+    leer, llamadas = _lector(tabla)
+    leer('a'), leer('a')
+    assert llamadas == ['a', 'a']
+
+def test_lectura_de_varias_tablas_usa_el_menor_ttl():
+    llamadas = []
+
+    @cache.cached_read(tables=['EMISORES.DEUDORES', 'propuestas'])
+    def leer():
+        llamadas.append(1)
+        return [1]
+
+    leer(), leer()
+    assert len(llamadas) == 2
+
+def test_ttl_de_tablas_con_estado_configurable():
+    cache.configure(ttl_seconds=60, state_ttl_seconds=5)
+    leer, llamadas = _lector('propuestas')
+    leer('a'), leer('a')
+    assert llamadas == ['a']
+
+def test_ttl_cero_desactiva_y_vacia():
+    leer, llamadas = _lector('EMISORES.DEUDORES')
+    leer('a')
+    cache.configure(ttl_seconds=0)
+    leer('a'), leer('a')
+    assert llamadas == ['a', 'a', 'a']
+
+def test_busqueda_de_pagina_se_cachea_aunque_lea_tablas_con_estado():
+    leer, llamadas = _lector('propuestas', search=True)
+    leer('LOTE-1'), leer('LOTE-1'), leer('LOTE-2')
+    assert llamadas == ['LOTE-1', 'LOTE-2']
+
+def test_busqueda_de_pagina_se_invalida_explicitamente():
+    leer, llamadas = _lector('propuestas', search=True)
+    leer('LOTE-1')
+    cache.invalidate('propuestas')
+    leer('LOTE-1')
+    assert llamadas == ['LOTE-1', 'LOTE-1']
+
+def test_busqueda_de_pagina_respeta_la_cache_desactivada():
+    # La API desactiva la caché con `configure(ttl_seconds=0)`: tampoco guarda búsquedas
+    cache.configure(ttl_seconds=0)
+    leer, llamadas = _lector('propuestas', search=True)
+    leer('LOTE-1'), leer('LOTE-1')
+    assert llamadas == ['LOTE-1', 'LOTE-1']
+
+def test_busqueda_del_lote_se_descarta_al_cambiar_un_estado(base_local, propuestas):
+    from data import supabase_repository as db
+
+    cache.configure(ttl_seconds=60, state_ttl_seconds=0, search_ttl_seconds=60)
+    lote = propuestas[0]['identificador_lote']
+    detalles = db.get_disbursed_proposal_details_by_lote(lote)
+    assert [d['proposal_id'] for d in detalles] == [p['proposal_id'] for p in propuestas]
+    assert detalles[0]['recalculate_result_json'] == propuestas[0]['recalculate_result_json']
+
+    # Un cambio hecho por otro proceso no se ve hasta invalidar...
+    base_local.table('propuestas').update({'estado': 'LIQUIDADA'}).eq('proposal_id', propuestas[1]['proposal_id']).execute()
+    assert len(db.get_disbursed_proposal_details_by_lote(lote)) == len(propuestas)
+    cache.invalidate('propuestas')
+    assert len(db.get_disbursed_proposal_details_by_lote(lote)) == len(propuestas) - 1
+
+    # ...y una escritura del repositorio invalida sola.
+    db.update_proposal_status(propuestas[2]['proposal_id'], 'LIQUIDADA')
+    assert len(db.get_disbursed_proposal_details_by_lote(lote)) == len(propuestas) - 2
@@ -0,0 +1,50 @@
+# tests/test_columnar.py
+import io
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from benchmarks import synthetic_data
+from core import columnar
+from core.factoring_calculator import procesar_lote_encontrar_tasa
+
+@pytest.fixture
+def filas():
+    """Resultados anidados de un lote real, con una factura que falla (solo tiene 'error')."""
+    payload = synthetic_data.payload_encontrar_tasa(synthetic_data.generar_facturas(6, semilla=44))
+    payload[2]['mfn'] = 0
+    return procesar_lote_encontrar_tasa(payload)['resultados_por_factura']
+
+def test_columnas_por_ruta(filas):
+    columnas = columnar.a_columnas(filas)
+    assert 'desglose_final_detallado.abono.monto' in columnas
+    assert all(len(valores) == len(filas) for valores in columnas.values())
+    assert columnas['error'] == [None, None, 'MFN no puede ser cero.', None, None, None]
+    assert columnas['desglose_final_detallado.abono.monto'][2] is None
+
+def test_a_filas_invierte_a_columnas(filas):
+    assert columnar.a_filas(columnar.a_columnas(filas)) == filas
+    assert columnar.a_filas({}) == []
+
+def test_arrow_ipc_ida_y_vuelta(filas):
+    tabla = columnar.a_tabla_arrow(columnar.a_columnas(filas), {'inandes.lote': '{"x": 1}'})
+    leida = pa.ipc.open_stream(columnar.a_arrow_ipc(tabla)).read_all()
+    assert leida.schema.metadata[b'inandes.lote'] == b'{"x": 1}'
+    assert columnar.a_filas(leida.to_pydict()) == filas
+
+def test_parquet_ida_y_vuelta(filas):
+    tabla = columnar.a_tabla_arrow(columnar.a_columnas(filas), {'inandes.lote': '{}'})
+    leida = pq.read_table(io.BytesIO(columnar.a_parquet(tabla)))
+    assert leida.schema.metadata[b'inandes.lote'] == b'{}'
+    assert columnar.a_filas(leida.to_pydict()) == filas
+
+def test_columna_con_tipos_mezclados_da_value_error():
+    with pytest.raises(ValueError, match="'a'"):
+        columnar.a_tabla_arrow(columnar.a_columnas([{'a': 1}, {'a': 'err'}]))
+
+def test_tipo_que_parquet_no_admite_da_value_error():
+    tabla = columnar.a_tabla_arrow({'a': [{}, {}]})
+    assert columnar.a_arrow_ipc(tabla)  # Arrow IPC sí lo admite
+    with pytest.raises(ValueError, match='Parquet'):
+        columnar.a_parquet(tabla)
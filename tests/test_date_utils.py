@@ -0,0 +1,54 @@
+# tests/test_date_utils.py
+import datetime
+
+import numpy as np
+import pytest
+
+from core import date_utils
+from core.date_utils import (a_date, a_ordinal, dias_entre, dias_entre_lote, fecha_a_iso, formatear_fecha,
+                             iso_a_fecha, parse_fecha, parse_fecha_iso, parse_fechas, sumar_dias)
+
+ORDINAL = datetime.date(2025, 1, 31).toordinal()
+
+@pytest.mark.parametrize("valor", [
+    '31-01-2025', '31-1-2025', '2025-01-31', '2025-01-31T10:20:30+00:00', '2025-01-31 10:20:30',
+    '2025-01-31T10:20:30.123456', datetime.date(2025, 1, 31), datetime.datetime(2025, 1, 31, 23, 59), ORDINAL,
+])
+def test_a_ordinal(valor):
+    assert a_ordinal(valor) == ORDINAL
+
+@pytest.mark.parametrize("valor", ['31/01/2025', '31-13-2025', '29-02-2025', '', 'hoy'])
+def test_parse_fecha_invalida(valor):
+    with pytest.raises(ValueError):
+        parse_fecha(valor)
+
+def test_parse_fecha_iso_invalida():
+    with pytest.raises(ValueError):
+        parse_fecha_iso('2025-02-30')
+    with pytest.raises(ValueError):
+        parse_fecha_iso(None)
+
+def test_conversiones_de_texto():
+    assert formatear_fecha(ORDINAL) == '31-01-2025'
+    assert fecha_a_iso('1-2-2025') == '2025-02-01'
+    assert iso_a_fecha('2025-02-01T00:00:00+00:00') == '01-02-2025'
+    assert a_date('2024-02-29') == datetime.date(2024, 2, 29)
+
+def test_aritmetica_de_dias():
+    assert sumar_dias('31-01-2025', 29) == '01-03-2025'
+    assert sumar_dias('01-03-2024', -1) == '29-02-2024'
+    assert dias_entre('31-12-2024', '2025-01-31') == 31
+    assert dias_entre(datetime.date(2025, 1, 31), '01-01-2025') == -30
+
+def test_parse_fechas_en_lote():
+    assert parse_fechas(['31-01-2025', None, '', 'mal', '2025-01-31', '31-01-2025']) == [ORDINAL, None, None, None, ORDINAL, ORDINAL]
+
+@pytest.mark.parametrize("minimo, esperado", [(None, [10, -5, 0, 0]), (0, [10, 0, 0, 0]), (-1, [10, -1, -1, -1])])
+def test_dias_entre_lote(minimo, esperado, monkeypatch):
+    inicios = [ORDINAL, ORDINAL, None, ORDINAL]
+    fines = [ORDINAL + 10, ORDINAL - 5, ORDINAL, None]
+    con_numpy = dias_entre_lote(inicios, fines, minimo)
+    assert isinstance(con_numpy, np.ndarray)
+    assert con_numpy.tolist() == esperado
+    monkeypatch.setattr(date_utils, 'np', None)
+    assert dias_entre_lote(inicios, fines, minimo) == esperado
@@ -0,0 +1,42 @@
+# tests/test_factoring_calculator.py
+import random
+
+from core.factoring_calculator import procesar_lote_desembolso_inicial
+from core.money import a_centavos
+
+def _factura(rng):
+    return {
+        'mfn': round(rng.uniform(1000, 300_000), 2), 'tasa_avance': rng.choice([0.8, 0.9, 0.95, 0.98]),
+        'interes_mensual': rng.uniform(0.01, 0.035), 'plazo_operacion': rng.randint(15, 120), 'igv_pct': 0.18,
+        'comision_estructuracion_pct': 0.005, 'comision_minima_aplicable': rng.choice([100, 150.5, 300]),
+        'aplicar_comision_afiliacion': rng.random() < 0.5, 'comision_afiliacion_aplicable': 200.0,
+    }
+
+def test_abono_y_totales_son_restas_y_sumas_exactas_en_centavos():
+    rng = random.Random(50)
+    for _ in range(500):
+        lote = [_factura(rng) for _ in range(rng.randint(1, 4))]
+        resultado = procesar_lote_desembolso_inicial(lote)
+        for datos, factura in zip(lote, resultado['resultados_por_factura']):
+            c = {k: a_centavos(v) for k, v in factura.items() if k != 'plazo_operacion'}
+            assert c['abono_real_teorico'] == c['capital'] - c['interes'] - c['igv_interes'] - c['comision_estructuracion'] \
+                - c['igv_comision'] - c['comision_afiliacion'] - c['igv_afiliacion']
+            assert factura['monto_desembolsado'] == c['abono_real_teorico'] // 100
+            assert c['margen_seguridad'] == a_centavos(datos['mfn']) - c['capital']
+        assert a_centavos(resultado['comision_estructuracion_total_corregida']) == \
+            sum(a_centavos(f['comision_estructuracion']) for f in resultado['resultados_por_factura'])
+
+def test_desglose_de_una_factura():
+    resultado = procesar_lote_desembolso_inicial([{
+        'mfn': 10000.0, 'tasa_avance': 0.9, 'interes_mensual': 0.02, 'plazo_operacion': 30, 'igv_pct': 0.18,
+        'comision_estructuracion_pct': 0.005, 'comision_minima_aplicable': 100.0,
+        'aplicar_comision_afiliacion': False, 'comision_afiliacion_aplicable': 200.0,
+    }])
+    factura = resultado['resultados_por_factura'][0]
+    assert resultado['metodo_comision_elegido'] == 'FIJO_PRORRATEADO'
+    # 9000 * ((1 + 0.02/30) ** 30 - 1) = 181.7508..., IGV 32.7151...
+    assert (factura['capital'], factura['interes'], factura['igv_interes']) == (9000.0, 181.75, 32.72)
+    assert (factura['comision_estructuracion'], factura['igv_comision']) == (100.0, 18.0)
+    assert factura['abono_real_teorico'] == 8667.53
+    assert factura['monto_desembolsado'] == 8667
+    assert factura['margen_seguridad'] == 1000.0
@@ -0,0 +1,101 @@
+# tests/test_factoring_system.py
+# Compara la versión vectorizada `liquidar_lote_con_back_door` con la individual
+# `liquidar_operacion_con_back_door`, fila por fila, con entradas aleatorias (semilla fija).
+import datetime
+import math
+import random
+
+import pandas as pd
+import pytest
+
+from core.factoring_system import SistemaFactoringCompleto
+from core.financial_kernel import factor_interes, tasa_diaria
+
+N = 1500
+CAMPOS_EXACTOS = ['dias_transcurridos', 'dias_mora', 'interes_devengado', 'igv_interes_devengado', 'interes_moratorio',
+                  'igv_moratorio', 'delta_intereses', 'delta_igv_intereses', 'delta_capital', 'saldo_global',
+                  'estado_operacion', 'accion_recomendada', 'back_door_aplicado', 'monto_minimo_configurado',
+                  'reducciones_aplicadas', 'saldo_original']
+
+def _caso(rng, i):
+    capital = round(rng.uniform(500, 200_000), 2)
+    if rng.random() < 0.1:
+        capital += rng.choice([4e-7, -4e-7, 1e-9])  # Deltas cercanos a cero: la clasificación depende del signo exacto
+    tasa = rng.choice([0.01, 0.015, 0.02, 0.03, 0.045])
+    plazo = rng.randint(15, 120)
+    desembolso = datetime.date(2025, 1, 1) + datetime.timedelta(days=rng.randint(0, 200))
+    interes = capital * factor_interes(tasa_diaria(tasa), plazo)
+    operacion = {
+        'id_operacion': f'OP-{i}', 'capital_operacion': capital, 'monto_desembolsado': capital * 0.9,
+        'interes_compensatorio': interes, 'igv_interes': interes * 0.18, 'tasa_interes_mensual': tasa,
+        'fecha_desembolso': desembolso, 'fecha_vencimiento': desembolso + datetime.timedelta(days=plazo),
+    }
+    pago = desembolso + datetime.timedelta(days=plazo + rng.choice([0, 0, rng.randint(-plazo - 3, 60)]))
+    tipo = rng.random()
+    if tipo < 0.3:
+        monto = round(capital)  # Saldo pequeño: candidato a back door
+    elif tipo < 0.5:
+        monto = capital - rng.uniform(0, 150)
+    elif tipo < 0.6:
+        monto = 1000.0 if capital == 1000.0000004 else capital
+    else:
+        monto = round(capital * rng.uniform(0.3, 1.2), 2)
+    return operacion, pago, monto
+
+def _iguales(a, b):
+    if isinstance(a, float) and isinstance(b, float) and math.isnan(a) and math.isnan(b):
+        return True
+    return a == b
+
+@pytest.fixture
+def sistemas(capsys):
+    individual, lote = SistemaFactoringCompleto(), SistemaFactoringCompleto()
+    yield individual, lote
+    capsys.readouterr()  # Los registros de back door se imprimen
+
+@pytest.mark.parametrize("monto_minimo", [None, 150.0])
+def test_lote_igual_a_individual(sistemas, monto_minimo):
+    individual, lote = sistemas
+    rng = random.Random(34)
+    casos = [_caso(rng, i) for i in range(N)]
+    casos.append(({**casos[0][0], 'capital_operacion': 1000.0000004, 'fecha_vencimiento': casos[0][0]['fecha_desembolso']},
+                  casos[0][0]['fecha_desembolso'] + datetime.timedelta(days=30), 1000.0))
+
+    df = lote.liquidar_lote_con_back_door([c[0] for c in casos], [c[1] for c in casos], [c[2] for c in casos], monto_minimo)
+    filas = df.to_dict('records')
+    aplicados = 0
+    for (operacion, pago, monto), fila in zip(casos, filas):
+        esperado = individual.liquidar_operacion_con_back_door(operacion, pago, monto, monto_minimo)
+        if 'error' in esperado:
+            assert fila['error'] == esperado['error']
+            continue
+        assert pd.isna(fila['error'])
+        diferentes = {c: (esperado[c], fila[c]) for c in CAMPOS_EXACTOS if not _iguales(esperado[c], fila[c])}
+        assert not diferentes, (operacion['id_operacion'], diferentes)
+        aplicados += esperado['back_door_aplicado']
+    assert aplicados > 20  # El caso de back door está cubierto
+    assert {f['estado_operacion'] for f in filas} >= {'LIQUIDADO - BACK DOOR', 'EN PROCESO - Caso 3', 'LIQUIDADO - Caso 1'}
+    assert individual.obtener_metricas_back_door()['total_back_door_aplicados'] == lote.obtener_metricas_back_door()['total_back_door_aplicados']
+
+def test_clasificacion_cerca_de_cero(sistemas):
+    individual, lote = sistemas
+    desembolso = datetime.date(2025, 1, 1)
+    operacion = {'id_operacion': 'OP', 'capital_operacion': 1000.0000004, 'monto_desembolsado': 900.0,
+                 'interes_compensatorio': 0.0, 'igv_interes': 0.0, 'tasa_interes_mensual': 0.02,
+                 'fecha_desembolso': desembolso, 'fecha_vencimiento': desembolso + datetime.timedelta(days=30)}
+    pago = desembolso + datetime.timedelta(days=30)
+    esperado = individual.liquidar_operacion(operacion, pago, 1000.0)
+    lote.configurar_back_door(aplicar=False)
+    fila = lote.liquidar_lote_con_back_door([operacion], [pago], [1000.0]).iloc[0]
+    assert esperado['estado_operacion'] == 'EN PROCESO - Caso 3'
+    assert fila['estado_operacion'] == esperado['estado_operacion']
+
+def test_filas_con_error(sistemas):
+    _, lote = sistemas
+    desembolso = datetime.date(2025, 1, 1)
+    operacion = {'capital_operacion': 1000.0, 'monto_desembolsado': 900.0, 'interes_compensatorio': 10.0,
+                 'igv_interes': 1.8, 'tasa_interes_mensual': 0.02, 'fecha_desembolso': desembolso,
+                 'fecha_vencimiento': desembolso + datetime.timedelta(days=30)}
+    df = lote.liquidar_lote_con_back_door([operacion, operacion], [desembolso - datetime.timedelta(days=1), None], [1000.0, 1000.0])
+    assert df['error'].tolist() == ['Fecha de pago anterior al desembolso', 'Datos de liquidación incompletos']
+    assert df['saldo_global'].isna().all()
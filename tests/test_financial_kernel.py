@@ -0,0 +1,168 @@
+# tests/test_financial_kernel.py
+# Cada prueba compara una primitiva del núcleo con la fórmula que el motor indicado escribía
+# en línea antes de usarlo, con entradas aleatorias (semilla fija) y comparación exacta.
+import math
+import random
+from decimal import Decimal
+
+import numpy as np
+import pytest
+
+from core import financial_kernel as fk
+
+N = 2000
+
+@pytest.fixture
+def rng():
+    return random.Random(49)
+
+def _operacion(rng):
+    capital = round(rng.uniform(100, 2_000_000), 2)
+    tasa_pct = round(rng.uniform(0.5, 5), 4)
+    dias = rng.randint(-30, 400)
+    return capital, tasa_pct, dias
+
+def test_float_factoring_calculator(rng):
+    for _ in range(N):
+        capital, tasa_pct, dias = _operacion(rng)
+        interes_mensual = tasa_pct / 100
+        antes = capital * (((1 + interes_mensual / 30) ** dias) - 1)
+        assert fk.interes_compuesto(capital, fk.tasa_diaria(interes_mensual), dias) == antes
+        assert capital * fk.factor_interes(fk.tasa_diaria(interes_mensual), dias) == antes
+        assert fk.igv(antes, 0.18) == antes * 0.18
+
+def test_float_factoring_system(rng):
+    for _ in range(N):
+        capital, tasa_pct, dias = _operacion(rng)
+        tasa_mensual = tasa_pct / 100
+        antes = capital * (math.pow(1 + tasa_mensual / 30, dias) - 1)
+        assert fk.interes_compuesto(capital, fk.tasa_diaria(tasa_mensual), dias) == antes
+        assert fk.factor_interes(fk.tasa_diaria(tasa_mensual), dias) * capital == (math.pow(1 + tasa_mensual / 30, dias) - 1) * capital
+
+def test_decimal_liquidation_calculator(rng):
+    for _ in range(N // 4):
+        capital, tasa_pct, dias = _operacion(rng)
+        capital_dec = Decimal(str(capital))
+        tasa_antes = (Decimal(str(tasa_pct)) / Decimal('100')) / Decimal('30')
+        tasa = fk.tasa_diaria(Decimal(str(tasa_pct)) / Decimal('100'))
+        assert tasa == tasa_antes
+        interes_antes = capital_dec * ((Decimal('1') + tasa_antes) ** dias - Decimal('1'))
+        interes = fk.interes_compuesto(capital_dec, tasa, dias)
+        assert interes == interes_antes
+        assert fk.igv(interes) == interes_antes * Decimal('0.18')
+
+def test_decimal_reconciliacion(rng):
+    # RECONCILIACION divide por 30 la tasa tal como la recibe (sin /100)
+    for _ in range(N // 4):
+        capital, tasa_pct, dias = _operacion(rng)
+        base, tasa_pct_dec = Decimal(str(capital)), Decimal(str(tasa_pct))
+        antes = base * ((1 + tasa_pct_dec / 30) ** abs(dias) - 1)
+        assert fk.interes_compuesto(base, fk.tasa_diaria(tasa_pct_dec), abs(dias)) == antes
+        assert fk.igv(antes, fk.IGV_PCT_DECIMAL) == antes * Decimal('0.18')
+
+def _lote(rng, n=N):
+    capital = np.array([round(rng.uniform(100, 2_000_000), 2) for _ in range(n)])
+    tasas_pct = np.array([round(rng.uniform(0.5, 5), 4) for _ in range(n)])
+    dias = np.array([rng.randint(-30, 400) for _ in range(n)])
+    return capital, tasas_pct, dias
+
+def test_numpy_factoring_system_lote(rng):
+    capital, tasas_pct, dias = _lote(rng)
+    tasa_mensual = tasas_pct / 100
+    antes = np.where(dias > 0, (np.power(1 + tasa_mensual / 30, np.maximum(dias, 0)) - 1) * capital, 0.0)
+    despues = np.where(dias > 0, fk.interes_compuesto(capital, fk.tasa_diaria(tasa_mensual), np.maximum(dias, 0)), 0.0)
+    np.testing.assert_array_equal(despues, antes)
+    mora_antes = np.where(dias > 0, (np.power(1 + 0.03 / 30, dias) - 1) * capital, 0.0)
+    mora = np.where(dias > 0, fk.interes_compuesto(capital, fk.tasa_diaria(0.03), dias), 0.0)
+    np.testing.assert_array_equal(mora, mora_antes)
+
+def test_numpy_accrual_y_escenarios(rng):
+    capital, tasas_pct, dias = _lote(rng)
+    dias = np.abs(dias)
+    tasa_antes = tasas_pct / 100 / 30
+    tasa = fk.tasa_diaria(tasas_pct / 100)
+    np.testing.assert_array_equal(tasa, tasa_antes)
+    # accrual_calculator (vectorizado)
+    antes = capital * np.expm1(dias * np.log1p(tasa_antes))
+    np.testing.assert_array_equal(capital * fk.factor_interes_expm1(tasa, dias), antes)
+    np.testing.assert_array_equal(fk.igv(antes, 0.18), antes * 0.18)
+    # scenario_calculator (escalar, float)
+    for c, t, n in zip(capital[:200].tolist(), tasas_pct[:200].tolist(), dias[:200].tolist()):
+        assert fk.interes_compuesto(c, fk.tasa_diaria(t / 100), n) == c * ((1 + t / 100 / 30) ** n - 1)
+
+def test_comision_estructuracion(rng):
+    for _ in range(N // 4):
+        capitales = [round(rng.uniform(100, 500_000), 2) for _ in range(rng.randint(1, 8))]
+        minimas = [rng.choice([0, 50, 150, 300, 1000]) for _ in capitales]
+        pct = rng.choice([0.0, 0.001, 0.003, 0.005, 0.01])
+        capital_total, fija_total = sum(capitales), sum(minimas)
+        porcentual_antes = capital_total * pct > fija_total
+        porcentual = fk.usa_comision_porcentual(capital_total, pct, fija_total)
+        assert porcentual == porcentual_antes
+        for capital, minima in zip(capitales, minimas):
+            antes = capital * pct if porcentual_antes else minima
+            assert fk.comision_estructuracion(capital, pct, minima, porcentual) == antes
+        arrays = fk.comision_estructuracion(np.array(capitales), pct, np.array(minimas), np.full(len(capitales), porcentual))
+        np.testing.assert_array_equal(arrays, [capital * pct if porcentual else minima for capital, minima in zip(capitales, minimas)])
+
+def _back_door_antes(liquidacion, saldo_global, monto_minimo, costo_transaccional):
+    """Reducción secuencial de `SistemaFactoringCompleto` antes del núcleo."""
+    if saldo_global <= 0 or saldo_global > monto_minimo or saldo_global > costo_transaccional:
+        return None
+    saldo_restante, reducciones = saldo_global, []
+    if liquidacion['interes_moratorio'] > 0:
+        reduccion = min(saldo_restante, liquidacion['interes_moratorio'])
+        if reduccion > 0:
+            saldo_restante -= reduccion
+            reducciones.append(reduccion)
+    for campo in ('delta_intereses', 'delta_capital'):
+        if saldo_restante > 0 and liquidacion[campo] > 0:
+            reduccion = min(saldo_restante, liquidacion[campo])
+            if reduccion > 0:
+                saldo_restante -= reduccion
+                reducciones.append(reduccion)
+    return reducciones
+
+def _back_door_nucleo(liquidacion, saldo_global, monto_minimo, costo_transaccional):
+    if not fk.aplica_back_door(saldo_global, monto_minimo, costo_transaccional):
+        return None
+    saldo_restante, reducciones = saldo_global, []
+    for campo in ('interes_moratorio', 'delta_intereses', 'delta_capital'):
+        reduccion = fk.reduccion_back_door(saldo_restante, liquidacion[campo])
+        if reduccion > 0:
+            saldo_restante -= reduccion
+            reducciones.append(reduccion)
+    return reducciones
+
+def _componente(rng):
+    return rng.choice([0.0, -round(rng.uniform(0, 50), 2), round(rng.uniform(0, 80), 2)])
+
+def test_back_door(rng):
+    saldos, minimos, costos, filas = [], [], [], []
+    for _ in range(N):
+        liquidacion = {campo: _componente(rng) for campo in ('interes_moratorio', 'delta_intereses', 'delta_capital')}
+        saldo = rng.choice([0.0, -5.0, round(rng.uniform(0, 150), 2)])
+        monto_minimo, costo = rng.choice([50.0, 100.0]), rng.choice([25.0, 80.0, 120.0])
+        assert _back_door_nucleo(liquidacion, saldo, monto_minimo, costo) == _back_door_antes(liquidacion, saldo, monto_minimo, costo)
+        saldos.append(saldo), minimos.append(monto_minimo), costos.append(costo), filas.append(liquidacion)
+
+    # Lote (factoring_system.liquidar_lote_con_back_door)
+    saldo, minimo, costo = np.array(saldos), np.array(minimos), np.array(costos)
+    aplica_antes = (saldo > 0) & (saldo <= minimo) & (saldo <= costo)
+    aplica = fk.aplica_back_door(saldo, minimo, costo)
+    np.testing.assert_array_equal(aplica, aplica_antes)
+    saldo_restante = np.where(aplica, saldo, 0.0)
+    for campo in ('interes_moratorio', 'delta_intereses', 'delta_capital'):
+        valor = np.array([fila[campo] for fila in filas])
+        antes = np.where(aplica_antes & (saldo_restante > 0) & (valor > 0), np.minimum(saldo_restante, valor), 0.0)
+        np.testing.assert_array_equal(fk.reduccion_back_door(saldo_restante, valor), antes)
+        saldo_restante = saldo_restante - antes
+
+def test_factor_interes_lote_igual_al_escalar(rng):
+    # `np.power` puede diferir del `pow` escalar en el último bit; `factor_interes_lote` no
+    _, tasas_pct, dias = _lote(rng)
+    dias = np.abs(dias)
+    tasa = fk.tasa_diaria(tasas_pct / 100)
+    esperado = [fk.factor_interes(t, d) for t, d in zip(tasa.tolist(), dias.tolist())]
+    np.testing.assert_array_equal(fk.factor_interes_lote(tasa, dias), esperado)
+    np.testing.assert_array_equal(fk.factor_interes_lote(fk.tasa_diaria(0.03), dias[:5]), [fk.factor_interes(fk.tasa_diaria(0.03), d) for d in dias[:5].tolist()])
@@ -0,0 +1,38 @@
+# tests/test_golden_cases.py
+import copy
+import json
+
+import pytest
+
+from benchmarks import golden_cases
+
+@pytest.fixture(scope='module')
+def resultados():
+    return golden_cases.ejecutar(repeticiones=1)[0]
+
+@pytest.fixture(scope='module')
+def baseline():
+    with open(golden_cases.RUTA_BASELINE, encoding='utf-8') as f:
+        return json.load(f)
+
+def test_todos_los_motores_coinciden_con_la_linea_base(resultados, baseline):
+    assert set(resultados) == set(baseline)
+    assert golden_cases.comparar_con_baseline(resultados, baseline) == []
+
+def test_motores_con_el_mismo_modelo_coinciden(resultados):
+    assert golden_cases.comparar_motores(resultados) == []
+
+def test_motor_faltante_es_un_error(resultados, baseline):
+    sin_motor = {motor: casos for motor, casos in resultados.items() if motor != 'calcular_liquidacion_RECONCILIACION'}
+    assert golden_cases.comparar_con_baseline(sin_motor, baseline) == [
+        'calcular_liquidacion_RECONCILIACION: está en la línea base pero no se ejecutó']
+    base_incompleta = {motor: casos for motor, casos in baseline.items() if motor != 'calcular_liquidacion_RECONCILIACION'}
+    assert len(golden_cases.comparar_con_baseline(resultados, base_incompleta)) == 1
+
+def test_un_centavo_de_diferencia_entre_motores_se_detecta(resultados):
+    alterados = copy.deepcopy(resultados)
+    caso_id = next(iter(alterados['SistemaFactoringCompleto (lote)']))
+    alterados['SistemaFactoringCompleto (lote)'][caso_id]['moratorios'] += 1
+    diferencias = golden_cases.comparar_motores(alterados)
+    assert len(diferencias) == 2  # Contra calcular_liquidacion y contra SistemaFactoringCompleto
+    assert all(caso_id in d and 'moratorios' in d for d in diferencias)
@@ -0,0 +1,99 @@
+# tests/test_job_service.py
+import pytest
+from fastapi.testclient import TestClient
+
+from api.main import app
+from benchmarks import synthetic_data
+from services import job_service
+
+RUTA = '/trabajos/procesar_liquidacion_lote'
+
+class PoolManual:
+    """Reemplaza el pool de hilos: los trabajos corren cuando la prueba llama a `ejecutar`."""
+
+    def __init__(self):
+        self.pendientes = []
+
+    def submit(self, funcion, *args):
+        self.pendientes.append((funcion, args))
+
+    def ejecutar(self):
+        while self.pendientes:
+            funcion, args = self.pendientes.pop(0)
+            funcion(*args)
+
+@pytest.fixture
+def pool(monkeypatch):
+    pool = PoolManual()
+    monkeypatch.setattr(job_service, '_get_pool', lambda: pool)
+    return pool
+
+@pytest.fixture
+def cliente_api():
+    with TestClient(app) as cliente:
+        yield cliente
+
+def _payload(propuestas):
+    return {'usuario_id': 'pytest', 'liquidaciones': synthetic_data.liquidaciones(propuestas, semilla=7)}
+
+def test_ciclo_de_vida(cliente_api, pool, propuestas):
+    respuesta = cliente_api.post(RUTA, json=_payload(propuestas), headers={'Idempotency-Key': 'trabajo-1'})
+    assert respuesta.status_code == 202
+    trabajo = respuesta.json()
+    assert respuesta.headers['location'] == f"/trabajos/{trabajo['id']}"
+    assert trabajo['estado'] == job_service.PENDIENTE
+    assert 'huella_payload' not in trabajo
+
+    assert cliente_api.get(f"/trabajos/{trabajo['id']}/resultados").status_code == 409
+
+    pool.ejecutar()
+    estado = cliente_api.get(f"/trabajos/{trabajo['id']}").json()
+    assert (estado['estado'], estado['procesados'], estado['exitosas'], estado['errores']) == (job_service.COMPLETADO, 5, 5, 0)
+    resultados = cliente_api.get(f"/trabajos/{trabajo['id']}/resultados").json()['resultados_del_lote']
+    assert [r['status'] for r in resultados] == ['SUCCESS'] * 5
+
+def test_reenvio_con_la_misma_clave(cliente_api, pool, propuestas):
+    primero = cliente_api.post(RUTA, json=_payload(propuestas), headers={'Idempotency-Key': 'trabajo-1'})
+    segundo = cliente_api.post(RUTA, json=_payload(propuestas), headers={'Idempotency-Key': 'trabajo-1'})
+    assert (primero.status_code, segundo.status_code) == (202, 200)
+    assert segundo.json()['id'] == primero.json()['id']
+    assert len(pool.pendientes) == 1
+
+def test_clave_reusada_con_otro_lote(cliente_api, pool, propuestas):
+    cliente_api.post(RUTA, json=_payload(propuestas), headers={'Idempotency-Key': 'trabajo-1'})
+    otro = _payload(propuestas[:2])
+    assert cliente_api.post(RUTA, json=otro, headers={'Idempotency-Key': 'trabajo-1'}).status_code == 422
+
+def test_trabajo_inexistente(cliente_api, base_local):
+    assert cliente_api.get('/trabajos/no-existe').status_code == 404
+    assert cliente_api.get('/trabajos/no-existe/resultados').status_code == 404
+
+def test_fallo_guarda_resultados_parciales(pool, base_local, monkeypatch):
+    def procesador(items, usuario_id, request_id):
+        yield {'proposal_id': items[0]['proposal_id'], 'status': 'SUCCESS', 'message': 'ok'}
+        raise RuntimeError('base de datos caída')
+    monkeypatch.setitem(job_service.TIPOS, 'procesar_liquidacion_lote', procesador)
+
+    trabajo, creado = job_service.enviar_trabajo('procesar_liquidacion_lote', [{'proposal_id': 'A'}, {'proposal_id': 'B'}], 'pytest')
+    assert creado
+    pool.ejecutar()
+    final = job_service.obtener_resultados(trabajo['id'])
+    assert (final['estado'], final['procesados'], final['exitosas']) == (job_service.FALLIDO, 1, 1)
+    assert final['error'] == 'base de datos caída'
+    assert [r['proposal_id'] for r in final['resultados_del_lote']] == ['A']
+
+def test_tipo_desconocido(base_local):
+    with pytest.raises(ValueError):
+        job_service.enviar_trabajo('otro', [], 'pytest')
+
+def test_sin_clave_usa_la_huella_como_request_id(pool, base_local, monkeypatch):
+    recibidos = []
+    def procesador(items, usuario_id, request_id):
+        recibidos.append(request_id)
+        return iter(())
+    monkeypatch.setitem(job_service.TIPOS, 'procesar_liquidacion_lote', procesador)
+    job_service.enviar_trabajo('procesar_liquidacion_lote', [], 'pytest')
+    pool.ejecutar()
+    job_service.enviar_trabajo('procesar_liquidacion_lote', [], 'pytest')
+    pool.ejecutar()
+    assert recibidos == [job_service.huella_payload('procesar_liquidacion_lote', [], 'pytest')] * 2
@@ -0,0 +1,66 @@
+# tests/test_liquidacion_idempotencia.py
+from benchmarks import synthetic_data
+from data import supabase_repository as db
+from services import liquidacion_service
+
+def _pagos(propuestas):
+    return synthetic_data.liquidaciones(propuestas, semilla=7)
+
+def _eventos(base_local):
+    return base_local.table('liquidacion_eventos').select('*').execute().data
+
+def _estados(propuestas):
+    return [db.get_proposal_details_by_id(p['proposal_id'])['estado'] for p in propuestas]
+
+def test_reenvio_con_la_misma_clave_es_duplicado(base_local, propuestas):
+    pagos = _pagos(propuestas)
+    primero = list(liquidacion_service.procesar_liquidacion_lote_iter(pagos, 'pytest', 'clave-1'))
+    segundo = list(liquidacion_service.procesar_liquidacion_lote_iter(pagos, 'pytest', 'clave-1'))
+    assert {r['status'] for r in primero} == {'SUCCESS'}
+    assert {r['status'] for r in segundo} == {'DUPLICADO'}
+    assert len(_eventos(base_local)) == len(pagos)
+
+def test_reenvio_sin_clave_es_duplicado(base_local, propuestas):
+    pagos = _pagos(propuestas)
+    list(liquidacion_service.procesar_liquidacion_lote_iter(pagos, 'pytest'))
+    # El mismo lote con las claves de cada factura en otro orden tiene la misma huella
+    reordenado = [dict(reversed(list(pago.items()))) for pago in pagos]
+    segundo = list(liquidacion_service.procesar_liquidacion_lote_iter(reordenado, 'pytest'))
+    assert {r['status'] for r in segundo} == {'DUPLICADO'}
+    assert len(_eventos(base_local)) == len(pagos)
+
+def test_otra_clave_registra_un_pago_nuevo(base_local, propuestas):
+    pagos = _pagos(propuestas)[:1]
+    list(liquidacion_service.procesar_liquidacion_lote_iter(pagos, 'pytest', 'clave-1'))
+    segundo = list(liquidacion_service.procesar_liquidacion_lote_iter(pagos, 'pytest', 'clave-2'))
+    assert segundo[0]['status'] != 'DUPLICADO'
+
+def test_repetida_dentro_del_lote(base_local, propuestas):
+    pago = _pagos(propuestas)[0]
+    resultados = list(liquidacion_service.procesar_liquidacion_lote_iter([pago, dict(pago)], 'pytest', 'clave-1'))
+    assert [r['status'] for r in resultados] == ['SUCCESS', 'DUPLICADO']
+
+def test_entrada_rechazada_no_escribe_ni_consume_la_clave(base_local, propuestas):
+    pago = dict(_pagos(propuestas)[0], fecha_pago_real='01-01-2060')  # Excede el límite de días
+    for _ in range(2):
+        resultado = list(liquidacion_service.procesar_liquidacion_lote_iter([pago], 'pytest', 'clave-1'))[0]
+        assert resultado['status'] == 'ERROR'
+        assert 'excede el límite' in resultado['message']
+    assert _eventos(base_local) == []
+    assert base_local.table('liquidaciones_resumen').select('*').execute().data == []
+    assert base_local.table('auditoria_eventos').select('*').execute().data == []
+    assert _estados(propuestas[:1]) == ['DESEMBOLSADA']
+
+def test_consulta_de_claves_fallida_queda_en_el_log(base_local, propuestas, monkeypatch, caplog):
+    def falla(claves):
+        raise RuntimeError('timeout')
+    monkeypatch.setattr(db, 'get_liquidacion_eventos_by_idempotency_keys', falla)
+    pagos = _pagos(propuestas)[:1]
+    with caplog.at_level('WARNING', logger='inandes.services.liquidaciones'):
+        resultados = list(liquidacion_service.procesar_liquidacion_lote_iter(pagos, 'pytest', 'clave-1'))
+    assert resultados[0]['status'] == 'SUCCESS'
+    registro = next(r for r in caplog.records if 'claves de idempotencia' in r.getMessage())
+    assert registro.exc_info[1].args == ('timeout',)
+    # Sin la consulta previa el reenvío no sale DUPLICADO, pero tampoco se registra dos veces
+    assert list(liquidacion_service.procesar_liquidacion_lote_iter(pagos, 'pytest', 'clave-1'))[0]['status'] != 'SUCCESS'
+    assert len(_eventos(base_local)) == 1
@@ -0,0 +1,40 @@
+# tests/test_liquidaciones_api.py
+import asyncio
+
+import orjson
+import pytest
+from fastapi.testclient import TestClient
+
+from api.main import app
+from api.routers import liquidaciones as router_liquidaciones
+from benchmarks import synthetic_data
+
+RUTA = '/liquidaciones/procesar_liquidacion_lote'
+
+@pytest.fixture
+def cliente_api():
+    with TestClient(app) as cliente:
+        yield cliente
+
+def _payload(propuestas):
+    return {'usuario_id': 'pytest', 'liquidaciones': synthetic_data.liquidaciones(propuestas, semilla=7)}
+
+def test_endpoint_de_lote_no_bloquea_el_event_loop():
+    # Un `async def` con trabajo síncrono dentro bloquearía el loop; `def` va al threadpool
+    assert not asyncio.iscoroutinefunction(router_liquidaciones.procesar_liquidacion_lote_endpoint)
+
+def test_procesar_lote(cliente_api, propuestas):
+    respuesta = cliente_api.post(RUTA, json=_payload(propuestas), headers={'Idempotency-Key': 'lote-1'})
+    assert respuesta.status_code == 200
+    resultados = respuesta.json()['resultados_del_lote']
+    assert [r['proposal_id'] for r in resultados] == [p['proposal_id'] for p in propuestas]
+    assert {r['status'] for r in resultados} == {'SUCCESS'}
+
+def test_procesar_lote_en_streaming(cliente_api, propuestas):
+    respuesta = cliente_api.post(RUTA, params={'stream': 'true'}, json=_payload(propuestas),
+                                 headers={'Idempotency-Key': 'lote-1'})
+    assert respuesta.status_code == 200
+    assert respuesta.headers['content-type'].startswith('application/x-ndjson')
+    lineas = [orjson.loads(linea) for linea in respuesta.content.splitlines()]
+    assert [l['status'] for l in lineas[:-1]] == ['SUCCESS'] * len(propuestas)
+    assert lineas[-1] == {'status': 'FIN', 'total': 5, 'exitosas': 5, 'errores': 0, 'duplicadas': 0}
@@ -0,0 +1,65 @@
+# tests/test_liquidation_calculator.py
+import datetime
+import random
+
+import pytest
+
+from core.liquidation_calculator import calcular_liquidacion, proyectar_saldo_diario
+from core.money import a_centavos
+
+N = 2000
+
+def _caso(rng):
+    capital = round(rng.uniform(100, 500_000), 2)
+    datos_operacion = {
+        'fecha_pago_calculada': '15-06-2025',
+        'capital_calculado': capital,
+        'interes_calculado': round(capital * rng.uniform(0.005, 0.05), 2),
+        'plazo_operacion_calculado': rng.randint(15, 120),
+        'interes_mensual': round(rng.uniform(0.8, 3.5), 2),
+    }
+    fecha_pago = datetime.date(2025, 6, 15) + datetime.timedelta(days=rng.randint(-60, 200))
+    return (datos_operacion, round(rng.uniform(0, capital * 1.1), 2), fecha_pago.strftime('%d-%m-%Y'),
+            datos_operacion['interes_mensual'], round(rng.uniform(0.5, 4), 2))
+
+def test_totales_y_saldo_son_la_suma_exacta_de_los_cargos():
+    rng = random.Random(50)
+    for _ in range(N):
+        datos_operacion, monto, fecha, tasa, tasa_mora = _caso(rng)
+        resultado = calcular_liquidacion(datos_operacion, monto, fecha, tasa, tasa_mora)
+        cargos = {k: a_centavos(v) for k, v in resultado['desglose_cargos'].items()}
+        creditos = {k: a_centavos(v) for k, v in resultado['desglose_creditos'].items()}
+        intereses = cargos['interes_compensatorio'] + cargos['igv_interes_compensatorio'] + \
+                    cargos['interes_moratorio'] + cargos['igv_interes_moratorio']
+
+        assert cargos['total_cargos'] == intereses + a_centavos(resultado['cargo_por_diferencia'])
+        assert creditos['total_creditos'] == creditos['interes_a_devolver'] + creditos['igv_interes_a_devolver'] + \
+                                             a_centavos(resultado['credito_por_diferencia'])
+        assert a_centavos(resultado['liquidacion_final']['saldo_final_a_liquidar']) == \
+               a_centavos(datos_operacion['capital_calculado']) + intereses - a_centavos(monto)
+
+def test_pago_tardio():
+    resultado = calcular_liquidacion(
+        {'fecha_pago_calculada': '01-01-2025', 'capital_calculado': 10000.0, 'interes_calculado': 200.0,
+         'plazo_operacion_calculado': 30, 'interes_mensual': 2.0},
+        9000.0, '31-01-2025', 2.0, 3.0)
+    # 10000 * ((1 + 0.02/30) ** 30 - 1) = 201.9454..., IGV 36.3501...
+    assert resultado['desglose_cargos']['interes_compensatorio'] == 201.95
+    assert resultado['desglose_cargos']['igv_interes_compensatorio'] == 36.35
+    assert resultado['cargo_por_diferencia'] == 1000.0
+    assert resultado['liquidacion_final']['saldo_final_a_liquidar'] == pytest.approx(
+        1000 + 201.95 + 36.35 + resultado['desglose_cargos']['interes_moratorio']
+        + resultado['desglose_cargos']['igv_interes_moratorio'], abs=1e-9)
+
+def test_entrada_invalida_devuelve_error():
+    resultado = calcular_liquidacion({'fecha_pago_calculada': '01-01-2025'}, 'no es un monto', '31-01-2025', 2.0, 3.0)
+    assert 'error' in resultado
+
+def test_proyeccion_acumula_los_cargos_del_dia():
+    proyeccion = proyectar_saldo_diario(15000.0, datetime.date(2025, 1, 1), 2.0, 3.0, 45)
+    saldo = a_centavos(15000.0)
+    for dia in proyeccion:
+        assert a_centavos(dia['capital_anterior']) == saldo
+        saldo += sum(a_centavos(dia[k]) for k in ('interes_compensatorio', 'igv_compensatorio', 'interes_moratorio', 'igv_moratorio'))
+        assert a_centavos(dia['capital_proyectado']) == saldo
+    assert proyeccion[0]['fecha'] == '01-01-2025'
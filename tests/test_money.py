@@ -0,0 +1,74 @@
+# tests/test_money.py
+import math
+import random
+from decimal import ROUND_CEILING, ROUND_DOWN, ROUND_FLOOR, ROUND_HALF_EVEN, ROUND_HALF_UP, Decimal
+
+import numpy as np
+import pytest
+
+from core import money
+
+@pytest.fixture
+def montos():
+    rng = random.Random(50)
+    valores = [round(rng.uniform(-1e6, 1e6), rng.randint(0, 6)) for _ in range(3000)]
+    # Empates exactos en binario (x.xx5 con denominador potencia de 2) y casos límite
+    valores += [0.125, -0.125, 0.375, 2.5 / 100, -2.5 / 100, 0.0, -0.0, 1e-9, -1e-9, 1234.57, 0.1 + 0.2]
+    return valores
+
+@pytest.mark.parametrize("modo", money.MODOS_REDONDEO)
+def test_a_centavos_es_exacto_sobre_el_float(montos, modo):
+    for valor in montos:
+        esperado = int(Decimal(valor).scaleb(2).to_integral_value(rounding=modo))
+        assert money.a_centavos(valor, modo) == esperado, valor
+
+def test_a_centavos_half_even_coincide_con_round(montos):
+    for valor in montos:
+        assert money.a_centavos(valor) == round(Decimal(round(valor, 2)).scaleb(2))
+
+def test_a_centavos_de_otros_tipos():
+    assert money.a_centavos(12) == 1200
+    assert money.a_centavos(np.int64(3)) == 300
+    assert money.a_centavos('10.005') == 1000
+    assert money.a_centavos('10.005', ROUND_HALF_UP) == 1001
+    assert money.a_centavos(Decimal('-10.005'), ROUND_HALF_UP) == -1001
+    assert money.a_centavos(Decimal('-10.001'), ROUND_DOWN) == -1000
+    assert money.a_centavos(Decimal('-10.001'), ROUND_FLOOR) == -1001
+    assert money.a_centavos(Decimal('10.001'), ROUND_CEILING) == 1001
+
+def test_modo_invalido():
+    with pytest.raises(ValueError):
+        money.a_centavos(1.0, 'ROUND_05UP')
+    with pytest.raises(ValueError):
+        money.redondear_montos_lote([1.0], 'otro')
+
+def test_a_monto():
+    assert money.a_monto(123457) == 1234.57
+    assert money.a_monto(-5) == -0.05
+
+def test_redondear_montos_lote_coincide_con_np_round(montos):
+    valores = np.array(montos + [math.nan, math.inf])
+    np.testing.assert_array_equal(money.redondear_montos_lote(valores), np.round(valores, 2))
+    assert math.isnan(money.redondear_montos_lote([math.nan])[0])
+
+@pytest.mark.parametrize("modo", money.MODOS_REDONDEO)
+def test_lote_con_y_sin_numpy(montos, modo, monkeypatch):
+    con_numpy = money.redondear_montos_lote(montos, modo).tolist()
+    centavos = money.a_centavos_lote(montos, modo).tolist()
+    monkeypatch.setattr(money, 'np', None)
+    assert money.redondear_montos_lote(montos, modo) == con_numpy
+    assert money.a_centavos_lote(montos, modo) == centavos
+
+def test_redondear_lote_half_up_en_empates():
+    # 0.125 y 0.375 son exactos en binario: el empate va hacia afuera del cero
+    assert money.redondear_montos_lote([0.125, -0.125, 0.375], ROUND_HALF_UP).tolist() == [0.13, -0.13, 0.38]
+    assert money.redondear_montos_lote([0.125, -0.125, 0.375], ROUND_HALF_EVEN).tolist() == [0.12, -0.12, 0.38]
+
+def test_sumar_centavos_es_exacto_y_no_depende_del_orden():
+    rng = random.Random(50)
+    valores = [round(rng.uniform(0, 1e7), 2) for _ in range(10000)]
+    esperado = sum(int(Decimal(str(v)) * 100) for v in valores)
+    assert money.sumar_centavos(valores) == esperado
+    assert money.sumar_centavos(list(reversed(valores))) == esperado
+    assert isinstance(money.sumar_centavos(valores), int)
+    assert money.sumar_centavos([]) == 0
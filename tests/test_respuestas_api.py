@@ -0,0 +1,70 @@
+# tests/test_respuestas_api.py
+import io
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+from api.main import app
+from api.responses import METADATOS_LOTE, respuesta_lote
+from benchmarks import synthetic_data
+from core import columnar, json_codec
+
+RUTA = '/encontrar_tasa_lote'
+
+@pytest.fixture
+def cliente_api():
+    with TestClient(app) as cliente:
+        yield cliente
+
+@pytest.fixture
+def payload():
+    return synthetic_data.payload_encontrar_tasa(synthetic_data.generar_facturas(4, semilla=44))
+
+def _json(cliente_api, payload):
+    respuesta = cliente_api.post(RUTA, json=payload)
+    assert respuesta.status_code == 200
+    return respuesta.json()
+
+def test_columnar_es_el_mismo_resultado(cliente_api, payload):
+    esperado = _json(cliente_api, payload)
+    respuesta = cliente_api.post(RUTA, params={'formato': 'columnar'}, json=payload)
+    assert respuesta.headers['content-type'].startswith('application/vnd.inandes.columnar+json')
+    cuerpo = respuesta.json()
+    assert cuerpo['cantidad'] == len(payload)
+    assert cuerpo['metodo_comision_elegido'] == esperado['metodo_comision_elegido']
+    assert columnar.a_filas(cuerpo['columnas']) == esperado['resultados_por_factura']
+
+@pytest.mark.parametrize('formato, leer', [
+    ('arrow', lambda cuerpo: pa.ipc.open_stream(cuerpo).read_all()),
+    ('parquet', lambda cuerpo: pq.read_table(io.BytesIO(cuerpo))),
+])
+def test_arrow_y_parquet_son_el_mismo_resultado(cliente_api, payload, formato, leer):
+    esperado = _json(cliente_api, payload)
+    respuesta = cliente_api.post(RUTA, params={'formato': formato}, json=payload)
+    assert respuesta.status_code == 200
+    tabla = leer(respuesta.content)
+    assert columnar.a_filas(tabla.to_pydict()) == esperado['resultados_por_factura']
+    assert json_codec.loads(tabla.schema.metadata[METADATOS_LOTE.encode()]) == \
+        {k: v for k, v in esperado.items() if k != 'resultados_por_factura'}
+
+def test_formato_por_cabecera_accept(cliente_api, payload):
+    respuesta = cliente_api.post(RUTA, json=payload, headers={'Accept': 'application/vnd.apache.arrow.stream'})
+    assert respuesta.headers['content-type'] == 'application/vnd.apache.arrow.stream'
+    assert 'Accept' in respuesta.headers['vary']
+
+def test_formato_desconocido(cliente_api, payload):
+    assert cliente_api.post(RUTA, params={'formato': 'xml'}, json=payload).status_code == 400
+
+@pytest.mark.parametrize('formato', ['arrow', 'parquet'])
+def test_tipos_mezclados_dan_406(formato):
+    resultado = {'metodo': 'x', 'resultados_por_factura': [{'a': 1}, {'a': 'err'}]}
+    with pytest.raises(HTTPException) as error:
+        respuesta_lote(resultado, formato)
+    assert error.value.status_code == 406
+    assert "'a'" in error.value.detail
+    # El mismo resultado sí sale en json y columnar
+    assert respuesta_lote(resultado, 'json').status_code == 200
+    assert respuesta_lote(resultado, 'columnar').status_code == 200
@@ -0,0 +1,77 @@
+# tests/test_scenario_calculator.py
+import datetime
+import random
+
+import pytest
+
+from core import scenario_calculator
+from core.liquidation_calculator import calcular_liquidacion
+from services import liquidacion_service
+
+CARGOS = ('interes_compensatorio', 'igv_interes_compensatorio', 'interes_moratorio', 'igv_interes_moratorio')
+
+@pytest.fixture(params=['numpy', 'sin_numpy'])
+def motor(request, monkeypatch):
+    """Ejecuta cada prueba con la grilla vectorizada y con el recorrido en bucles (sin numpy)."""
+    if request.param == 'sin_numpy':
+        monkeypatch.setattr(scenario_calculator, 'np', None)
+    return request.param
+
+def _operacion(rng):
+    capital = round(rng.uniform(100, 500_000), 2)
+    return {
+        'fecha_pago_calculada': '15-06-2025', 'capital_calculado': capital,
+        'interes_calculado': round(capital * 0.03, 2), 'plazo_operacion_calculado': 60, 'interes_mensual': 2.0,
+    }
+
+def _grilla_aleatoria(rng):
+    fechas = sorted({(datetime.date(2025, 6, 15) + datetime.timedelta(days=rng.randint(-40, 400))).strftime('%d-%m-%Y')
+                     for _ in range(10)})
+    tasas = [(round(rng.uniform(0.5, 4), 2), round(rng.uniform(0.5, 6), 2)) for _ in range(3)]
+    return fechas, tasas
+
+def test_cada_celda_es_igual_a_calcular_liquidacion(motor):
+    rng = random.Random(33)
+    for _ in range(15):
+        datos_operacion = _operacion(rng)
+        fechas, tasas = _grilla_aleatoria(rng)
+        capital = datos_operacion['capital_calculado']
+        montos = [0.0, round(capital / 3, 2), capital, round(capital * 1.2, 2)]
+
+        grilla = scenario_calculator.calcular_grilla_liquidacion(datos_operacion, fechas, montos, tasas)
+
+        for r, (tasa_c, tasa_m) in enumerate(tasas):
+            for d, fecha in enumerate(fechas):
+                for m, monto in enumerate(montos):
+                    resultado = calcular_liquidacion(datos_operacion, monto, fecha, tasa_c, tasa_m)
+                    assert grilla['dias_diferencia'][d] == resultado['dias_diferencia']
+                    assert grilla['saldos'][r][d][m] == resultado['liquidacion_final']['saldo_final_a_liquidar'], (motor, r, d, m)
+                    assert grilla['cargos'][r][d] == pytest.approx(sum(resultado['desglose_cargos'][k] for k in CARGOS), abs=1e-9)
+
+def test_forma_de_las_matrices(motor):
+    grilla = scenario_calculator.calcular_grilla_liquidacion(
+        _operacion(random.Random(1)), ['10-06-2025', '15-06-2025', '20-07-2025'], [10.0, 20.0], [(2.0, 3.0), (1.5, 2.5)])
+    assert grilla['dias_diferencia'] == [-5, 0, 35]
+    assert [len(fila) for fila in grilla['cargos']] == [3, 3]
+    assert [[len(celda) for celda in fila] for fila in grilla['saldos']] == [[2, 2, 2], [2, 2, 2]]
+    assert grilla['cargos'][0][:2] == [0.0, 0.0]  # Sin días vencidos no hay cargos
+
+def test_fechas_fuera_de_rango(motor):
+    with pytest.raises(ValueError, match='excede el límite'):
+        scenario_calculator.calcular_grilla_liquidacion(_operacion(random.Random(1)), ['15-06-2031'], [1.0], [(2.0, 3.0)])
+    with pytest.raises(ValueError, match='fecha_pago_calculada'):
+        scenario_calculator.calcular_grilla_liquidacion({}, ['15-06-2025'], [1.0], [(2.0, 3.0)])
+
+def test_tope_de_celdas_por_factura(propuestas, monkeypatch):
+    monkeypatch.setattr(liquidacion_service, 'MAX_CELDAS_ESCENARIO', 12)
+    tasas = [{'tasa_interes_compensatoria_pct': 2.0, 'tasa_interes_moratoria_pct': 3.0}] * 2
+    escenario = {'proposal_id': propuestas[0]['proposal_id'], 'is_first_payment': True, 'tasas': tasas,
+                 'fecha_pago_desde': '01-01-2026', 'fecha_pago_hasta': '03-01-2026', 'montos_recibidos': [100.0, 200.0]}
+    grande = dict(escenario, fecha_pago_hasta='04-01-2026')
+
+    resultados = liquidacion_service.simular_escenarios([escenario, grande])['resultados_del_lote']
+
+    assert resultados[0]['status'] == 'SUCCESS'
+    assert resultados[0]['fechas_pago'] == ['01-01-2026', '02-01-2026', '03-01-2026']
+    assert resultados[1] == {'proposal_id': propuestas[0]['proposal_id'], 'status': 'ERROR',
+                             'message': 'La grilla tiene 16 combinaciones; el máximo es 12.'}
@@ -0,0 +1,84 @@
+# tests/test_simulation_executor.py
+import datetime
+import random
+
+import pytest
+
+from core.liquidation_calculator import procesar_lote_liquidacion
+from services import simulation_executor
+
+def _tareas(n, semilla=32):
+    rng = random.Random(semilla)
+    tareas = []
+    for _ in range(n):
+        capital = round(rng.uniform(100, 500_000), 2)
+        fecha_pago = datetime.date(2025, 6, 15) + datetime.timedelta(days=rng.randint(-60, 200))
+        tareas.append({
+            'datos_operacion': {
+                'fecha_pago_calculada': '15-06-2025', 'capital_calculado': capital,
+                'interes_calculado': round(capital * 0.03, 2), 'plazo_operacion_calculado': 60, 'interes_mensual': 2.0,
+            },
+            'monto_recibido': round(rng.uniform(0, capital), 2),
+            'fecha_pago_real_str': fecha_pago.strftime('%d-%m-%Y'),
+            'tasa_interes_compensatoria_pct': 2.0,
+            'tasa_interes_moratoria_pct': 3.0,
+        })
+    return tareas
+
+def _secuencial(tareas):
+    return procesar_lote_liquidacion(tareas)["resultados_por_factura"]
+
+@pytest.fixture(scope='module')
+def pool():
+    """Pool 'spawn' real de 2 procesos, compartido por las pruebas del módulo."""
+    yield
+    simulation_executor.shutdown()
+
+@pytest.fixture
+def dos_workers(monkeypatch, pool):
+    monkeypatch.setattr(simulation_executor, 'MAX_WORKERS', 2)
+
+@pytest.fixture
+def sin_pool(monkeypatch):
+    def _get_pool():
+        raise AssertionError("no debería usar el pool")
+    monkeypatch.setattr(simulation_executor, '_get_pool', _get_pool)
+
+def test_pool_da_los_mismos_resultados_en_el_mismo_orden(dos_workers):
+    tareas = _tareas(simulation_executor.UMBRAL_PARALELO + 50)
+    tareas[17]['fecha_pago_real_str'] = 'no es una fecha'  # El error queda en su posición
+
+    resultados, metadata = simulation_executor.calcular_liquidaciones(tareas)
+
+    assert resultados == _secuencial(tareas)
+    assert 'error' in resultados[17]
+    assert metadata['modo'] == 'paralelo'
+    assert metadata['workers'] == 2
+    assert metadata['facturas'] == len(tareas)
+    # 250 tareas / (2 workers * 4 chunks por worker) -> chunks de 32
+    assert metadata['chunks'] == 8
+
+def test_tamano_de_chunk_explicito(dos_workers):
+    tareas = _tareas(simulation_executor.UMBRAL_PARALELO, semilla=7)
+    resultados, metadata = simulation_executor.calcular_liquidaciones(tareas, tamano_chunk=7)
+    assert resultados == _secuencial(tareas)
+    assert metadata['chunks'] == -(-len(tareas) // 7)
+
+def test_debajo_del_umbral_calcula_en_el_proceso(monkeypatch, sin_pool):
+    monkeypatch.setattr(simulation_executor, 'MAX_WORKERS', 2)
+    tareas = _tareas(simulation_executor.UMBRAL_PARALELO - 1)
+    resultados, metadata = simulation_executor.calcular_liquidaciones(tareas)
+    assert resultados == _secuencial(tareas)
+    assert (metadata['modo'], metadata['workers'], metadata['chunks']) == ('secuencial', 1, 1)
+
+def test_un_solo_worker_desactiva_el_pool(monkeypatch, sin_pool):
+    monkeypatch.setattr(simulation_executor, 'MAX_WORKERS', 1)
+    tareas = _tareas(simulation_executor.UMBRAL_PARALELO + 10)
+    resultados, metadata = simulation_executor.calcular_liquidaciones(tareas)
+    assert resultados == _secuencial(tareas)
+    assert metadata['modo'] == 'secuencial'
+
+def test_sin_tareas(sin_pool):
+    resultados, metadata = simulation_executor.calcular_liquidaciones([])
+    assert resultados == []
+    assert (metadata['modo'], metadata['facturas'], metadata['chunks']) == ('secuencial', 0, 0)
@@ -0,0 +1,83 @@
+# tests/test_sqlite_client.py
+import pytest
+
+from data.sqlite_client import SQLiteAPIError, SQLiteClient
+
+@pytest.fixture
+def cliente():
+    cliente = SQLiteClient(':memory:')
+    yield cliente
+    cliente.close()
+
+def _resumen(cliente, proposal_id='P-1'):
+    return cliente.table('liquidaciones_resumen').insert({'proposal_id': proposal_id, 'saldo_actual': 100.0}).execute().data[0]['id']
+
+def test_consultas_con_filtros_orden_y_rango(cliente):
+    cliente.table('propuestas').insert([
+        {'proposal_id': f'P-{i}', 'estado': 'DESEMBOLSADA' if i % 2 else 'ACTIVO', 'capital_calculado': float(i)}
+        for i in range(6)
+    ]).execute()
+
+    filas = (cliente.table('propuestas').select('proposal_id, capital_calculado')
+             .eq('estado', 'DESEMBOLSADA').order('capital_calculado', desc=True).execute().data)
+    assert [f['proposal_id'] for f in filas] == ['P-5', 'P-3', 'P-1']
+    assert set(filas[0]) == {'proposal_id', 'capital_calculado'}
+
+    pagina = cliente.table('propuestas').select('proposal_id').order('proposal_id').range(2, 3).execute().data
+    assert [f['proposal_id'] for f in pagina] == ['P-2', 'P-3']
+    assert cliente.table('propuestas').select('*').in_('proposal_id', []).execute().data == []
+
+def test_single_y_maybe_single(cliente):
+    cliente.table('propuestas').insert({'proposal_id': 'P-1'}).execute()
+    assert cliente.table('propuestas').select('*').eq('proposal_id', 'P-1').single().execute().data['proposal_id'] == 'P-1'
+    assert cliente.table('propuestas').select('*').eq('proposal_id', 'X').maybe_single().execute().data is None
+    with pytest.raises(SQLiteAPIError) as error:
+        cliente.table('propuestas').select('*').eq('proposal_id', 'X').single().execute()
+    assert error.value.code == 'PGRST116'
+
+def test_columna_inexistente(cliente):
+    with pytest.raises(SQLiteAPIError) as error:
+        cliente.table('propuestas').select('*').eq('no_existe', 1).execute()
+    assert error.value.code == '42703'
+
+def test_clave_primaria_duplicada(cliente):
+    cliente.table('propuestas').insert({'proposal_id': 'P-1'}).execute()
+    with pytest.raises(SQLiteAPIError) as error:
+        cliente.table('propuestas').insert({'proposal_id': 'P-1'}).execute()
+    assert error.value.code == '23505'
+
+def test_not_null_no_se_reporta_como_duplicado(cliente):
+    with pytest.raises(SQLiteAPIError) as error:
+        cliente.table('liquidacion_eventos').insert({'liquidacion_resumen_id': 1, 'tipo_evento': 'X'}).execute()
+    assert error.value.code == '23502'
+
+def test_check_no_se_reporta_como_duplicado(cliente):
+    cliente.ejecutar('CREATE TABLE prueba_check (valor INTEGER CHECK (valor > 0))')
+    with pytest.raises(SQLiteAPIError) as error:
+        cliente.ejecutar('INSERT INTO prueba_check VALUES (0)')
+    assert error.value.code == '23514'
+
+def test_rpc_append_numera_eventos_por_resumen(cliente):
+    resumen_a, resumen_b = _resumen(cliente, 'A'), _resumen(cliente, 'B')
+    ordenes = []
+    for resumen_id in (resumen_a, resumen_a, resumen_b, resumen_a):
+        fila = cliente.rpc('append_liquidacion_evento', {'p_evento': {
+            'liquidacion_resumen_id': resumen_id, 'tipo_evento': 'Pago', 'monto_recibido': 10.0,
+            'orden_evento': 99,  # Se ignora: el orden lo asigna la función
+        }}).execute().data[0]
+        ordenes.append((fila['liquidacion_resumen_id'], fila['orden_evento']))
+    assert ordenes == [(resumen_a, 1), (resumen_a, 2), (resumen_b, 1), (resumen_a, 3)]
+
+def test_rpc_desconocida(cliente):
+    with pytest.raises(SQLiteAPIError) as error:
+        cliente.rpc('no_existe', {}).execute()
+    assert error.value.code == 'PGRST202'
+
+def test_clave_de_idempotencia_duplicada(cliente):
+    resumen_id = _resumen(cliente)
+    evento = {'liquidacion_resumen_id': resumen_id, 'tipo_evento': 'Pago', 'idempotency_key': 'k-1'}
+    cliente.rpc('append_liquidacion_evento', {'p_evento': evento}).execute()
+    with pytest.raises(SQLiteAPIError) as error:
+        cliente.rpc('append_liquidacion_evento', {'p_evento': evento}).execute()
+    assert error.value.code == '23505'
+    assert 'idempotency_key' in error.value.message